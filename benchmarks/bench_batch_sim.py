@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_batch_sim.py [options]
+#=========================================================================
+# Compare the throughput in instance-cycles per second of simulating
+# independent copies of an RTL design one after another with
+# DefaultPassGroup and FlatSim against simulating them in lockstep with
+# BatchSim, which keeps every signal of all copies in a NumPy row. The
+# design is a chain of stdlib stream queues whose input and output
+# streams are driven with random valid, ready and message bits. Requires
+# numpy.
+#
+#  -h --help           Display this message
+#
+#  --nqueues           Number of queues in the chain, default=8
+#  --ncycles           Number of simulated cycles per run, default=500
+#  --ninstances        Comma-separated copy counts of BatchSim, default=1,16,256,4096
+#  --repeat            Number of runs per configuration, default=3
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.passes.mamba import BatchSim, FlatSim
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+from pymtl3.stdlib.stream.queues import StreamBypassQueue, StreamNormalQueue, StreamPipeQueue
+
+class QueueChain( Component ):
+
+  def construct( s, nqueues ):
+    queue_types = [ StreamNormalQueue, StreamPipeQueue, StreamBypassQueue ]
+
+    s.istream = IStreamIfc( Bits32 )
+    s.ostream = OStreamIfc( Bits32 )
+    s.queues  = [ queue_types[ i % 3 ]( Bits32, 2 ) for i in range(nqueues) ]
+
+    s.istream //= s.queues[0].istream
+    for i in range(1, nqueues):
+      s.queues[i-1].ostream //= s.queues[i].istream
+    s.queues[-1].ostream //= s.ostream
+
+def mk_stimulus( opts, n ):
+  rng = np.random.default_rng( 0xba7c )
+  return [ ( rng.integers( 0, 2, n ), rng.integers( 0, 2**32, n ), rng.integers( 0, 2, n ) )
+           for _ in range(opts.ncycles) ]
+
+# Simulate one copy at a time
+def run_single( opts, pass_group ):
+  model = QueueChain( opts.nqueues )
+  model.apply( pass_group )
+  model.sim_reset()
+
+  stimulus = [ tuple( int(x[0]) for x in cycle ) for cycle in mk_stimulus( opts, 1 ) ]
+  start = time.perf_counter()
+  for val, msg, rdy in stimulus:
+    model.istream.val @= val
+    model.istream.msg @= msg
+    model.ostream.rdy @= rdy
+    model.sim_tick()
+  return time.perf_counter() - start
+
+def run_batch( opts, n ):
+  model = QueueChain( opts.nqueues )
+  model.apply( BatchSim( n ) )
+  model.sim_reset()
+
+  stimulus = mk_stimulus( opts, n )
+  start = time.perf_counter()
+  for val, msg, rdy in stimulus:
+    model.sim_poke( model.istream.val, val )
+    model.sim_poke( model.istream.msg, msg )
+    model.sim_poke( model.ostream.rdy, rdy )
+    model.sim_tick()
+  return time.perf_counter() - start
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark the NumPy batch RTL simulation" )
+  p.add_argument( "--nqueues",    default=8,   type=int )
+  p.add_argument( "--ncycles",    default=500, type=int )
+  p.add_argument( "--ninstances", default="1,16,256,4096" )
+  p.add_argument( "--repeat",     default=3,   type=int )
+  opts = p.parse_args()
+
+  print()
+  print( f"  {'passes':<17} {'instances':>9} {'time(s)':>9} {'inst-cycles/s':>14} {'speedup':>8}" )
+
+  base = None
+  configs = [ ( "DefaultPassGroup", 1, lambda: run_single( opts, DefaultPassGroup() ) ),
+              ( "FlatSim",          1, lambda: run_single( opts, FlatSim() ) ) ]
+  configs += [ ( "BatchSim", n, lambda n=n: run_batch( opts, n ) )
+               for n in map( int, opts.ninstances.split(",") ) ]
+
+  for name, n, run in configs:
+    elapsed = min( run() for _ in range(opts.repeat) )
+    rate = n * opts.ncycles / elapsed
+    base = base or rate
+    print( f"  {name:<17} {n:>9} {elapsed:>9.3f} {rate:>14.0f} {rate / base:>7.1f}x" )
+
+if __name__ == "__main__":
+  main()
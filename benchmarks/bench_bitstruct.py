@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_bitstruct.py [options]
+#=========================================================================
+# Compare the default field-by-field bitstruct against the packed
+# integer representation (@bitstruct(packed=True)) on the operations
+# that dominate message-passing simulations.
+#
+#  -h --help           Display this message
+#
+#  --nfields           Number of fields in the struct, default=4
+#  --field-nbits       Bitwidth of each field, default=16
+#  --number            Number of operations per measurement, default=100000
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import sys
+import timeit
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import mk_bits, mk_bitstruct
+
+def bench_ops( Struct, number ):
+  nfields = len( Struct.__bitstruct_fields__ )
+  a = Struct( *range(1, nfields+1) )
+  b = Struct( *range(1, nfields+1) )
+  bits = a.to_bits()
+  env = { 'Struct': Struct, 'a': a, 'b': b, 'bits': bits,
+          'args': tuple(range(nfields)) }
+
+  ops = {
+    "construct" : "Struct( *args )",
+    "clone"     : "a.clone()",
+    "to_bits"   : "a.to_bits()",
+    "from_bits" : "Struct.from_bits( bits )",
+    "eq"        : "a == b",
+    "get field" : "a.f0",
+    "set field" : "a.f0 @= 1",
+    "imatmul"   : "c = a; c @= b",
+  }
+  return { name: min( timeit.repeat( stmt, globals=env, number=number, repeat=3 ) )
+           for name, stmt in ops.items() }
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark regular vs. packed bitstructs" )
+  p.add_argument( "--nfields",     default=4,      type=int )
+  p.add_argument( "--field-nbits", default=16,     type=int )
+  p.add_argument( "--number",      default=100000, type=int )
+  opts = p.parse_args()
+
+  fields = { f"f{i}": mk_bits(opts.field_nbits) for i in range(opts.nfields) }
+  regular = bench_ops( mk_bitstruct( "BenchMsg", fields ), opts.number )
+  packed  = bench_ops( mk_bitstruct( "BenchMsg", fields, packed=True ), opts.number )
+
+  print()
+  print( f"  {opts.nfields} fields x {opts.field_nbits} bits, {opts.number} ops" )
+  print( f"  {'op':<10} {'regular(us)':>12} {'packed(us)':>11} {'speedup':>8}" )
+  for name in regular:
+    r = regular[name] / opts.number * 1e6
+    k = packed[name]  / opts.number * 1e6
+    print( f"  {name:<10} {r:>12.3f} {k:>11.3f} {r/k:>7.2f}x" )
+  print()
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_elaboration.py [options]
+#=========================================================================
+# Measure cold vs. warm elaboration of the TinyRV0 processor test
+# harness with the persistent update block AST cache (pymtl3.dsl.AstCache).
+# Each elaboration runs in a fresh process because the parsed update
+# blocks are also cached on the component classes.
+#
+#  -h --help           Display this message
+#
+#  --repeat            Number of processes per configuration, default=5
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+def elaborate_once():
+  from examples.ex03_proc.NullXcel import NullXcelRTL
+  from examples.ex03_proc.ProcRTL import ProcRTL
+  from examples.ex03_proc.test.harness import TestHarness
+
+  model = TestHarness( ProcRTL, NullXcelRTL, 0, 0, 0, 1 )
+  start = time.perf_counter()
+  model.elaborate()
+  print( time.perf_counter() - start )
+
+def spawn( cache_dir ):
+  env = dict( os.environ, PYMTL_AST_CACHE_DIR=cache_dir )
+  out = subprocess.check_output( [ sys.executable, os.path.abspath(__file__), "--child" ],
+                                 env=env, cwd=sim_dir )
+  return float( out.decode().split()[-1] )
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark cold vs. warm elaboration" )
+  p.add_argument( "--repeat", default=5, type=int )
+  p.add_argument( "--child", action="store_true", help=argparse.SUPPRESS )
+  opts = p.parse_args()
+
+  if opts.child:
+    elaborate_once()
+    return
+
+  with tempfile.TemporaryDirectory() as tmp:
+    results = {}
+    results["disabled"] = [ spawn( "" ) for _ in range(opts.repeat) ]
+
+    cold = []
+    for i in range(opts.repeat):
+      cold.append( spawn( os.path.join( tmp, f"cold{i}" ) ) )
+    results["cold"] = cold
+
+    warm_dir = os.path.join( tmp, "warm" )
+    spawn( warm_dir )
+    results["warm"] = [ spawn( warm_dir ) for _ in range(opts.repeat) ]
+
+  base = min( results["disabled"] )
+  print()
+  print( f"  {'config':<10} {'best(ms)':>9} {'mean(ms)':>9} {'speedup':>8}" )
+  for name, times in results.items():
+    best = min(times)
+    print( f"  {name:<10} {best*1000:>9.1f} {sum(times)/len(times)*1000:>9.1f} {base/best:>7.2f}x" )
+  print()
+
+if __name__ == "__main__":
+  main()
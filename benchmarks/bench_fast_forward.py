@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_fast_forward.py [options]
+#=========================================================================
+# Measure the simulation time of a TinyRV0 processor running a
+# microbenchmark against a slow memory, with and without skipping the
+# idle cycles in which the processor waits for the memory.
+#
+#  -h --help           Display this message
+#
+#  --mem-latency       Extra memory latency, default=50
+#  --src-delay         Delay of the test source and sink, default=0
+#  --min-skip          min_skip of the FastForwardPass, default=8
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.passes.sim.FastForwardPass import FastForwardPass
+
+from examples.ex03_proc.NullXcel import NullXcelRTL
+from examples.ex03_proc.ProcRTL import ProcRTL
+from examples.ex03_proc.test.harness import TestHarness
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+
+def run( opts, fast_forward ):
+  model = TestHarness( ProcRTL, NullXcelRTL, opts.src_delay, opts.src_delay,
+                       0, opts.mem_latency )
+  model.apply( DefaultPassGroup( fast_forward=fast_forward and opts.min_skip ) )
+  model.load( ubmark_vvadd_unopt.gen_mem_image() )
+  model.sim_reset()
+
+  start = time.perf_counter()
+  if fast_forward:
+    while not model.done():
+      model.sim_fast_forward( 10**9 )
+  else:
+    while not model.done():
+      model.sim_tick()
+  elapsed = time.perf_counter() - start
+
+  with contextlib.redirect_stdout( io.StringIO() ):
+    assert ubmark_vvadd_unopt.verify( model.mem.mem.mem )
+  stats = model.get_metadata( FastForwardPass.stats ) if fast_forward else None
+  return elapsed, model.sim_cycle_count(), stats
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark fast-forwarding idle cycles" )
+  p.add_argument( "--mem-latency", default=50, type=int )
+  p.add_argument( "--src-delay",   default=0,  type=int )
+  p.add_argument( "--min-skip",    default=8,  type=int )
+  opts = p.parse_args()
+
+  ref_time, ref_cycles, _ = run( opts, False )
+  ff_time,  ff_cycles, stats = run( opts, True )
+  assert ff_cycles == ref_cycles
+
+  print()
+  print( f"  {'mode':>14} {'cycles':>9} {'time(s)':>9} {'cycles/s':>9}" )
+  print( f"  {'tick':>14} {ref_cycles:>9} {ref_time:>9.2f} {ref_cycles / ref_time:>9.0f}" )
+  print( f"  {'fast-forward':>14} {ff_cycles:>9} {ff_time:>9.2f} {ff_cycles / ff_time:>9.0f}" )
+  print()
+  print( f"  {stats}, speedup {ref_time / ff_time:.2f}x" )
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_inline_sim.py [options]
+#=========================================================================
+# Compare the simulation speed in cycles per second of DefaultPassGroup
+# and InlineSim, which splices the update blocks into a few generated
+# functions, on the TinyRV0 processor running a microbenchmark and on a
+# chain of stdlib stream queues.
+#
+#  -h --help           Display this message
+#
+#  --bmark <dataset>   {vvadd-unopt,vvadd-opt,cksum}
+#  --nqueues           Number of queues in the chain, default=12
+#  --nmsgs             Number of messages sent through the queues, default=2000
+#  --repeat            Number of runs per configuration, default=3
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.passes.mamba import InlineSim
+from pymtl3.stdlib.stream import StreamSinkFL, StreamSourceFL
+from pymtl3.stdlib.stream.queues import StreamBypassQueue, StreamNormalQueue, StreamPipeQueue
+
+from examples.ex03_proc.NullXcel import NullXcelRTL
+from examples.ex03_proc.ProcRTL import ProcRTL
+from examples.ex03_proc.test.harness import TestHarness
+from examples.ex03_proc.ubmark.proc_ubmark_cksum_roll import ubmark_cksum_roll
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_opt import ubmark_vvadd_opt
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+
+bmark_dict = {
+  "vvadd-unopt": ubmark_vvadd_unopt,
+  "vvadd-opt"  : ubmark_vvadd_opt,
+  "cksum"      : ubmark_cksum_roll
+}
+
+class QueueChain( Component ):
+
+  def construct( s, nqueues, msgs ):
+    queue_types = [ StreamNormalQueue, StreamPipeQueue, StreamBypassQueue ]
+
+    s.src    = StreamSourceFL( Bits32, msgs )
+    s.queues = [ queue_types[ i % 3 ]( Bits32, 2 ) for i in range(nqueues) ]
+    s.sink   = StreamSinkFL( Bits32, msgs )
+
+    s.src.ostream //= s.queues[0].istream
+    for i in range(1, nqueues):
+      s.queues[i-1].ostream //= s.queues[i].istream
+    s.queues[-1].ostream //= s.sink.istream
+
+  def done( s ):
+    return s.src.done() and s.sink.done()
+
+def mk_proc( opts ):
+  bmark = bmark_dict[ opts.bmark ]
+  model = TestHarness( ProcRTL, NullXcelRTL, 0, 0, 0, 1 )
+  def load():
+    model.load( bmark.gen_mem_image() )
+  def verify():
+    with contextlib.redirect_stdout( io.StringIO() ):
+      assert bmark.verify( model.mem.mem.mem )
+  return model, load, verify
+
+def mk_queues( opts ):
+  msgs  = [ Bits32(i * 7) for i in range(opts.nmsgs) ]
+  model = QueueChain( opts.nqueues, msgs )
+  return model, lambda: None, lambda: None
+
+def run( mk_model, opts, pass_group ):
+  model, load, verify = mk_model( opts )
+  start = time.perf_counter()
+  model.apply( pass_group )
+  setup = time.perf_counter() - start
+  load()
+  model.sim_reset()
+
+  start = time.perf_counter()
+  while not model.done():
+    model.sim_tick()
+  elapsed = time.perf_counter() - start
+
+  verify()
+  return model.sim_cycle_count(), setup, elapsed
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark update block inlining" )
+  p.add_argument( "--bmark",   default="vvadd-unopt", choices=sorted(bmark_dict) )
+  p.add_argument( "--nqueues", default=12,   type=int )
+  p.add_argument( "--nmsgs",   default=2000, type=int )
+  p.add_argument( "--repeat",  default=3,    type=int )
+  opts = p.parse_args()
+
+  print()
+  print( f"  {'design':<10} {'passes':<17} {'cycles':>8} {'setup(s)':>9} {'time(s)':>9} {'cycles/s':>9} {'speedup':>8}" )
+
+  for design, mk_model in [ ( "proc", mk_proc ), ( "queues", mk_queues ) ]:
+    base = None
+    for name, mk_pass_group in [ ( "DefaultPassGroup", DefaultPassGroup ), ( "InlineSim", InlineSim ) ]:
+      ncycles, setup, elapsed = min( ( run( mk_model, opts, mk_pass_group() ) for _ in range(opts.repeat) ),
+                                     key=lambda x: x[2] )
+      rate = ncycles / elapsed
+      base = base or rate
+      print( f"  {design:<10} {name:<17} {ncycles:>8} {setup:>9.2f} {elapsed:>9.2f} {rate:>9.0f} {rate / base:>7.2f}x" )
+
+if __name__ == "__main__":
+  main()
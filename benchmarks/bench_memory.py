@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_memory.py [options]
+#=========================================================================
+# Compare the dense BehavioralMemory against SparseBehavioralMemory with
+# random and streaming word accesses, and report how many bytes each of
+# them allocates.
+#
+#  -h --help           Display this message
+#
+#  --naccesses         Number of accesses per pattern, default=200000
+#  --footprint         Size of the accessed region in bytes, default=1MB
+#  --mem-nbytes        Size of the modeled memory, default=1MB
+#  --no-dense          Only run the sparse memory
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import b32
+from pymtl3.stdlib.mem.BehavioralMemory import BehavioralMemory, SparseBehavioralMemory
+
+def gen_addrs( pattern, naccesses, footprint ):
+  if pattern == "stream":
+    return [ (4*i) % footprint for i in range(naccesses) ]
+  rgen = random.Random( 0xdeadbeef )
+  return [ rgen.randrange( 0, footprint >> 2 ) << 2 for _ in range(naccesses) ]
+
+def run( mem, addrs ):
+  data = b32(0x1234)
+  start = time.perf_counter()
+  for addr in addrs:
+    mem.write( addr, 4, data )
+  for addr in addrs:
+    mem.read( addr, 4 )
+  return time.perf_counter() - start
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark dense vs. sparse behavioral memory" )
+  p.add_argument( "--naccesses",  default=200000, type=int )
+  p.add_argument( "--footprint",  default=1<<20,  type=int )
+  p.add_argument( "--mem-nbytes", default=1<<20,  type=int )
+  p.add_argument( "--no-dense",   action="store_true" )
+  opts = p.parse_args()
+
+  assert opts.footprint <= opts.mem_nbytes
+
+  print()
+  print( f"  {'memory':<8} {'pattern':<8} {'time(s)':>8} {'Macc/s':>8} {'allocated(KB)':>14}" )
+  for pattern in [ "random", "stream" ]:
+    addrs = gen_addrs( pattern, opts.naccesses, opts.footprint )
+    for name in ( [ "sparse" ] if opts.no_dense else [ "dense", "sparse" ] ):
+      # Free the previous memory before allocating the next one
+      mem = None
+      gc.collect()
+      if name == "dense":
+        start = time.perf_counter()
+        mem = BehavioralMemory( opts.mem_nbytes + 1 )
+        mem.elaborate()
+        t_alloc = time.perf_counter() - start
+        allocated = len( mem.mem )
+      else:
+        start = time.perf_counter()
+        mem = SparseBehavioralMemory( opts.mem_nbytes )
+        mem.elaborate()
+        t_alloc = time.perf_counter() - start
+      t = run( mem, addrs ) + t_alloc
+      if name == "sparse":
+        allocated = mem.resident_nbytes()
+      print( f"  {name:<8} {pattern:<8} {t:>8.3f} {2*len(addrs)/t/1e6:>8.2f} {allocated/1024:>14.0f}" )
+  print()
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_parallel_translation.py [options]
+#=========================================================================
+# Measure the Verilog translation time of a synthetic design made of many
+# unique modules with different numbers of translation processes, and
+# check that the results are identical to the serial translation. The
+# translation cache is disabled.
+#
+#  -h --help           Display this message
+#
+#  --nmodules          Number of unique modules, default=64
+#  --jobs              Numbers of processes to measure, default=1,4,16
+#  --repeat            Number of runs per configuration, default=3
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.passes.backends.generic import TranslationCache
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+
+class Stage( Component ):
+  # Every value of seed gives a different module
+
+  def construct( s, nbits, seed ):
+    s.in_ = InPort( nbits )
+    s.sel = InPort( 2 )
+    s.out = OutPort( nbits )
+
+    s.acc = Wire( nbits )
+    s.tmp = [ Wire( nbits ) for _ in range(4) ]
+
+    @update
+    def up_tmp():
+      for i in range(4):
+        if s.sel == i:
+          s.tmp[i] @= s.in_ + seed + i
+        elif s.in_[0]:
+          s.tmp[i] @= s.in_ ^ ( seed * i )
+        else:
+          s.tmp[i] @= s.in_ - i
+
+    @update_ff
+    def up_acc():
+      if s.reset:
+        s.acc <<= 0
+      else:
+        s.acc <<= s.acc + s.tmp[0] + s.tmp[1] + s.tmp[2] + s.tmp[3]
+
+    @update
+    def up_out():
+      s.out @= s.acc if s.sel[1] else s.tmp[ s.sel ]
+
+class Top( Component ):
+
+  def construct( s, nmodules ):
+    s.in_ = InPort( 32 )
+    s.sel = InPort( 2 )
+    s.out = OutPort( 32 )
+
+    s.stages = [ Stage( 32, i ) for i in range( nmodules ) ]
+    for i, stage in enumerate( s.stages ):
+      stage.in_ //= s.in_ if i == 0 else s.stages[i-1].out
+      stage.sel //= s.sel
+    s.out //= s.stages[-1].out
+
+def translate( nmodules, jobs ):
+  m = Top( nmodules )
+  m.elaborate()
+  m.set_metadata( VerilogTranslationPass.enable, True )
+  m.set_metadata( VerilogTranslationPass.explicit_file_name, "bench_parallel_translation.v" )
+  m.set_metadata( VerilogTranslationPass.translation_jobs, jobs )
+
+  start = time.perf_counter()
+  m.apply( VerilogTranslationPass() )
+  elapsed = time.perf_counter() - start
+
+  return elapsed, m.get_metadata( VerilogTranslationPass.translator ).hierarchy.src
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark parallel translation" )
+  p.add_argument( "--nmodules", default=64, type=int )
+  p.add_argument( "--jobs",     default="1,4,16" )
+  p.add_argument( "--repeat",   default=3, type=int )
+  opts = p.parse_args()
+
+  TranslationCache.set_cache_dir( None )
+
+  print()
+  print( f"  {'jobs':>4} {'time(s)':>9} {'speedup':>8}   ({os.cpu_count()} CPUs)" )
+  base_time = base_src = None
+  for jobs in [ int(x) for x in opts.jobs.split(",") ]:
+    elapsed, src = min( ( translate( opts.nmodules, jobs ) for _ in range(opts.repeat) ),
+                        key=lambda x: x[0] )
+    if base_time is None:
+      base_time, base_src = elapsed, src
+    assert src == base_src, f"the translation with {jobs} jobs differs from the first one!"
+    print( f"  {jobs:>4} {elapsed:>9.3f} {base_time / elapsed:>7.2f}x" )
+
+  os.remove( "bench_parallel_translation.v" )
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_partition_sim.py [options]
+#=========================================================================
+# Measure how PartitionSim scales with the number of partitions on a
+# design of several TinyRV0 processor tiles with RTL memories that all run
+# a microbenchmark, and whose only outputs are registered done and error
+# bits. The tiles are split into the given numbers of partitions of
+# neighbouring tiles, each simulated in its own process, and compared with
+# FlatSim in one process. The speedup is bounded by the number of cores,
+# and every cycle costs two barriers across all processes.
+#
+#  -h --help           Display this message
+#
+#  --ntiles            Number of processor tiles, default=4
+#  --ncycles           Number of simulated cycles per run, default=2000
+#  --partitions        Comma-separated partition counts, default=1,2,4
+#  --repeat            Number of runs per configuration, default=3
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.passes.mamba import FlatSim, PartitionSim
+from pymtl3.passes.mamba.PartitionSimPass import PartitionSimPass
+from pymtl3.passes.mamba.test.PartitionSim_test import ProcTile
+
+class TileGroup( Component ):
+
+  def construct( s, ntiles ):
+    s.done  = OutPort()
+    s.tiles = [ ProcTile() for _ in range(ntiles) ]
+
+    # Registered, so that a group can be a partition
+    @update_ff
+    def up_done():
+      done = b1(1)
+      for i in range(ntiles):
+        done = done & s.tiles[i].done
+      s.done <<= done
+
+class Tiles( Component ):
+
+  def construct( s, ntiles, ngroups ):
+    s.done   = OutPort()
+    sizes    = [ ntiles // ngroups + ( i < ntiles % ngroups ) for i in range(ngroups) ]
+    s.groups = [ TileGroup( n ) for n in sizes ]
+
+    @update
+    def up_done():
+      s.done @= 1
+      for i in range(ngroups):
+        s.done @= s.done & s.groups[i].done
+
+def run( opts, ngroups ):
+  model = Tiles( opts.ntiles, max( ngroups, 1 ) )
+  model.elaborate()
+  if ngroups:
+    for g in model.groups[1:]:
+      g.set_metadata( PartitionSimPass.partition, True )
+    model.apply( PartitionSim() )
+  else:
+    model.apply( FlatSim() )
+
+  try:
+    model.sim_reset()
+    start = time.perf_counter()
+    for _ in range(opts.ncycles):
+      model.sim_tick()
+    return time.perf_counter() - start
+  finally:
+    if ngroups:
+      model.sim_finalize()
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark the partitioned RTL simulation" )
+  p.add_argument( "--ntiles",     default=4,    type=int )
+  p.add_argument( "--ncycles",    default=2000, type=int )
+  p.add_argument( "--partitions", default="1,2,4" )
+  p.add_argument( "--repeat",     default=3,    type=int )
+  opts = p.parse_args()
+
+  print()
+  print( f"  cores: {os.cpu_count()}" )
+  print( f"  {'passes':<13} {'partitions':>10} {'time(s)':>9} {'cycles/s':>9} {'speedup':>8}" )
+
+  base = None
+  configs = [ ( "FlatSim", 0 ) ]
+  configs += [ ( "PartitionSim", n ) for n in map( int, opts.partitions.split(",") ) ]
+
+  for name, n in configs:
+    elapsed = min( run( opts, n ) for _ in range(opts.repeat) )
+    rate = opts.ncycles / elapsed
+    base = base or rate
+    print( f"  {name:<13} {max( n, 1 ):>10} {elapsed:>9.3f} {rate:>9.0f} {rate / base:>7.1f}x" )
+
+if __name__ == "__main__":
+  main()
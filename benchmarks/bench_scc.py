@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_scc.py [options]
+#=========================================================================
+# Measure the convergence of a large combinational SCC with
+# DefaultPassGroup. The design is a ring of stages connected through
+# interfaces, each of which either passes the message of the previous
+# stage on or starts a new one from its own register. Stage 0 always
+# starts a new one, so the ring never loops at runtime, but the
+# scheduler sees it as one SCC. Prints the simulation speed and the
+# iteration histogram of the SCC.
+#
+#  -h --help           Display this message
+#
+#  --nstages           Number of stages in the ring, default=64
+#  --ncycles           Number of simulated cycles, default=2000
+#  --period            Every stage updates its register once every period
+#                      cycles, default=16
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.passes.sim.DynamicSchedulePass import DynamicSchedulePass
+
+class LinkIfc( Interface ):
+  def construct( s, Type ):
+    s.msg  = OutPort( Type )
+    s.hops = OutPort( Bits8 )
+
+class LinkInIfc( Interface ):
+  def construct( s, Type ):
+    s.msg  = InPort( Type )
+    s.hops = InPort( Bits8 )
+
+class Stage( Component ):
+
+  def construct( s, k, period ):
+    s.in_   = LinkInIfc( Bits32 )
+    s.out   = LinkIfc( Bits32 )
+    s.count = Wire( Bits16 )
+    s.local = Wire( Bits32 )
+
+    @update_ff
+    def up_local():
+      if s.reset:
+        s.count <<= k
+        s.local <<= 0
+      else:
+        s.count <<= s.count + 1
+        if s.count % period == 0:
+          s.local <<= s.local + k + 1
+
+    # Stage 0 and some others start a new message, which cuts the loop
+    # at runtime
+    @update
+    def up_out():
+      if ( k == 0 ) | ( s.local[0:3] == 7 ):
+        s.out.msg  @= s.local
+        s.out.hops @= 0
+      else:
+        s.out.msg  @= s.in_.msg ^ s.local
+        s.out.hops @= s.in_.hops + 1
+
+class Ring( Component ):
+
+  def construct( s, nstages, period ):
+    s.out    = OutPort( Bits32 )
+    s.stages = [ Stage( i, period ) for i in range(nstages) ]
+    for i in range(nstages):
+      s.stages[i].out //= s.stages[ (i+1) % nstages ].in_
+    s.out //= s.stages[-1].out.msg
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark the convergence of combinational SCCs" )
+  p.add_argument( "--nstages", default=64,   type=int )
+  p.add_argument( "--ncycles", default=2000, type=int )
+  p.add_argument( "--period",  default=16,   type=int )
+  opts = p.parse_args()
+
+  model = Ring( opts.nstages, opts.period )
+  model.apply( DefaultPassGroup() )
+  model.sim_reset()
+
+  stats, = model.get_metadata( DynamicSchedulePass.scc_stats )
+  stats.histogram.clear()
+  stats.evaluations = 0
+
+  start = time.perf_counter()
+  for _ in range(opts.ncycles):
+    model.sim_tick()
+  elapsed = time.perf_counter() - start
+
+  calls = stats.calls()
+  print()
+  print( f"  blocks in the SCC  : {len(stats.blocks)}" )
+  print( f"  cycles/s           : {opts.ncycles / elapsed:.0f}" )
+  print( f"  rounds per call    : mean {stats.mean_rounds():.2f}, max {stats.max_rounds()}" )
+  print( f"  blocks per call    : {stats.evaluations / calls:.1f}" )
+  print( f"  whole-SCC reruns   : {stats.mean_rounds() * len(stats.blocks):.1f} blocks per call" )
+  print()
+  print( "  rounds      calls" )
+  for rounds, n in sorted( stats.histogram.items() ):
+    print( f"  {rounds:>6} {n:>10}" )
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_sweep.py [options]
+#=========================================================================
+# Measure the throughput in simulations per minute of a sweep of TinyRV0
+# processor simulations that only differ in the program loaded into the
+# test memory. We compare elaborating and scheduling a new test harness
+# for every simulation against run_sweep, which does it once and forks a
+# child per simulation.
+#
+#  -h --help           Display this message
+#
+#  --nsims             Number of simulations, default=24
+#  --jobs              Numbers of processes to measure, default=1,4
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import run_sweep
+
+from examples.ex03_proc.NullXcel import NullXcelRTL
+from examples.ex03_proc.ProcRTL import ProcRTL
+from examples.ex03_proc.test.harness import TestHarness
+from examples.ex03_proc.ubmark.proc_ubmark_cksum_roll import ubmark_cksum_roll
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_opt import ubmark_vvadd_opt
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+
+ubmarks = [ ubmark_vvadd_unopt, ubmark_vvadd_opt, ubmark_cksum_roll ]
+
+def mk_harness():
+  return TestHarness( ProcRTL, NullXcelRTL, 0, 0, 0, 1 )
+
+def load( model, point ):
+  model.load( point[1] )
+
+def verify( model, point ):
+  with contextlib.redirect_stdout( io.StringIO() ):
+    return bool( ubmarks[ point[0] ].verify( model.mem.mem.mem ) )
+
+def run_elaborate_each( points ):
+  ncycles = []
+  start = time.perf_counter()
+  for point in points:
+    model = mk_harness()
+    model.apply( DefaultPassGroup() )
+    load( model, point )
+    model.sim_reset()
+    while not model.done():
+      model.sim_tick()
+    assert verify( model, point )
+    ncycles.append( model.sim_cycle_count() )
+  return time.perf_counter() - start, ncycles
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark parallel simulation sweeps" )
+  p.add_argument( "--nsims", default=24, type=int )
+  p.add_argument( "--jobs",  default="1,4" )
+  opts = p.parse_args()
+
+  points = [ ( i % len(ubmarks), ubmarks[ i % len(ubmarks) ].gen_mem_image() )
+             for i in range( opts.nsims ) ]
+
+  print()
+  print( f"  {'mode':>16} {'time(s)':>9} {'sims/min':>9}   ({os.cpu_count()} CPUs)" )
+
+  elapsed, ref_ncycles = run_elaborate_each( points )
+  print( f"  {'elaborate each':>16} {elapsed:>9.2f} {60 * len(points) / elapsed:>9.1f}" )
+
+  for jobs in [ int(x) for x in opts.jobs.split(",") ]:
+    start = time.perf_counter()
+    report = run_sweep( mk_harness(), points, load, result_func=verify, njobs=jobs )
+    elapsed = time.perf_counter() - start
+    assert all( r.passed and r.value for r in report )
+    assert [ r.ncycles for r in report ] == ref_ncycles
+    print( f"  {f'sweep {jobs} jobs':>16} {elapsed:>9.2f} {60 * len(points) / elapsed:>9.1f}" )
+
+if __name__ == "__main__":
+  main()
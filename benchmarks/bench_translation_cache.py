@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_translation_cache.py [options]
+#=========================================================================
+# Measure the Verilog translation time of the TinyRV0 processor in
+# examples/ex03_proc with the persistent translation cache disabled,
+# with an empty cache, with a warm cache, and with a warm cache after
+# editing one update block of the ALU. Every translation runs in a fresh
+# process on a copy of the example so that the edit does not touch the
+# tree.
+#
+#  -h --help           Display this message
+#
+#  --repeat            Number of runs per configuration, default=3
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+child_src = """\
+import sys, time
+sys.path[:0] = [ {copy_dir!r}, {root_dir!r} ]
+
+from examples.ex03_proc.ProcRTL import ProcRTL
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+
+m = ProcRTL()
+m.elaborate()
+m.set_metadata( VerilogTranslationPass.enable, True )
+m.set_metadata( VerilogTranslationPass.explicit_file_name, {out_file!r} )
+
+start = time.perf_counter()
+m.apply( VerilogTranslationPass() )
+elapsed = time.perf_counter() - start
+print( elapsed, len( m.get_metadata( VerilogTranslationPass.cache_hits ) ) )
+"""
+
+def translate( copy_dir, cache_dir, out_file ):
+  env = dict( os.environ, PYMTL_TRANSLATION_CACHE_DIR=cache_dir )
+  src = child_src.format( copy_dir=copy_dir, root_dir=sim_dir, out_file=out_file )
+  out = subprocess.check_output( [ sys.executable, "-c", src ], env=env, cwd=copy_dir )
+  elapsed, nhits = out.split()[-2:]
+  with open( out_file ) as f:
+    return float(elapsed), int(nhits), f.read()
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark the translation cache" )
+  p.add_argument( "--repeat", default=3, type=int )
+  opts = p.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmp:
+    copy_dir  = os.path.join( tmp, "src" )
+    cache_dir = os.path.join( tmp, "cache" )
+    shutil.copytree( os.path.join( sim_dir, "examples" ), os.path.join( copy_dir, "examples" ),
+                     ignore=shutil.ignore_patterns( "__pycache__", "*.v", "*.vcd" ) )
+
+    misc = os.path.join( copy_dir, "examples", "ex03_proc", "MiscRTL.py" )
+    with open( misc ) as f:
+      misc_src = f.read()
+
+    def edit_alu( i ):
+      # Change a comment in the update block of AluRTL
+      with open( misc, "w" ) as f:
+        f.write( misc_src.replace( "# ADD", f"# ADD (edit {i})" ) )
+
+    rows = []
+
+    def run( name, cache, before=None ):
+      results = []
+      for i in range( opts.repeat ):
+        if before is not None:
+          before( i )
+        out_file = os.path.join( tmp, f"proc_{len(rows)}_{i}.v" )
+        results.append( translate( copy_dir, cache, out_file ) )
+      elapsed, nhits, src = min( results, key=lambda x: x[0] )
+      rows.append( ( name, elapsed, nhits, src ) )
+
+    def clear_cache( i ):
+      shutil.rmtree( cache_dir, ignore_errors=True )
+
+    run( "no cache", "" )
+    run( "cold",     cache_dir, clear_cache )
+    run( "warm",     cache_dir )
+    # Only AluRTL misses, its parents instantiate it by name
+    run( "one edit", cache_dir, edit_alu )
+
+    base = rows[0][1]
+    print()
+    print( f"  {'config':<10} {'time(s)':>9} {'speedup':>8} {'cached':>7}" )
+    for name, elapsed, nhits, _ in rows:
+      print( f"  {name:<10} {elapsed:>9.3f} {base / elapsed:>7.1f}x {nhits:>7}" )
+
+    assert rows[1][3] == rows[0][3] and rows[2][3] == rows[0][3], \
+           "the cached translation differs from the uncached one!"
+
+if __name__ == "__main__":
+  main()
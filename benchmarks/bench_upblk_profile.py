@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_upblk_profile.py [options]
+#=========================================================================
+# Measure the simulation overhead of UpblkProfilePass on the TinyRV0
+# processor running a microbenchmark, with every call timed and with
+# sampling, and print the profile of the last run.
+#
+#  -h --help           Display this message
+#
+#  --bmark <dataset>   {vvadd-unopt,vvadd-opt,cksum}
+#  --periods           Sample periods to measure, default=1,16,128
+#  --repeat            Number of runs per configuration, default=3
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import sys
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from examples.ex03_proc.NullXcel import NullXcelRTL
+from examples.ex03_proc.ProcRTL import ProcRTL
+from examples.ex03_proc.test.harness import TestHarness
+from examples.ex03_proc.ubmark.proc_ubmark_cksum_roll import ubmark_cksum_roll
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_opt import ubmark_vvadd_opt
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+from pymtl3 import *
+
+bmark_dict = {
+  "vvadd-unopt": ubmark_vvadd_unopt,
+  "vvadd-opt"  : ubmark_vvadd_opt,
+  "cksum"      : ubmark_cksum_roll
+}
+
+def run( bmark, period ):
+  model = TestHarness( ProcRTL, NullXcelRTL, 0, 0, 0, 1 )
+  model.elaborate()
+  model.apply( DefaultPassGroup( profile_upblks=period or False ) )
+  model.load( bmark.gen_mem_image() )
+  model.sim_reset()
+
+  start = time.perf_counter()
+  while not model.done() and model.sim_cycle_count() < 100000:
+    model.sim_tick()
+  elapsed = time.perf_counter() - start
+
+  assert bmark.verify( model.mem.mem.mem )
+  return model, model.sim_cycle_count(), elapsed
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark update block profiling" )
+  p.add_argument( "--bmark",   default="vvadd-unopt", choices=sorted(bmark_dict) )
+  p.add_argument( "--periods", default="1,16,128" )
+  p.add_argument( "--repeat",  default=3, type=int )
+  opts = p.parse_args()
+
+  bmark = bmark_dict[ opts.bmark ]
+
+  print()
+  print( f"  {'config':<12} {'cycles':>8} {'time(s)':>9} {'overhead':>9}" )
+  base_time = None
+  model = None
+  for period in [ 0 ] + [ int(x) for x in opts.periods.split(",") ]:
+    model, ncycles, elapsed = min( ( run( bmark, period ) for _ in range(opts.repeat) ),
+                                   key=lambda x: x[2] )
+    if period == 0:
+      name, base_time = "no profile", elapsed
+      overhead = f"{'-':>8}"
+    else:
+      name = "every call" if period == 1 else f"1/{period}"
+      overhead = f"{elapsed / base_time - 1:>8.1%}"
+    print( f"  {name:<12} {ncycles:>8} {elapsed:>9.3f} {overhead:>9}" )
+
+  model.print_upblk_profile( top_n=10 )
+
+if __name__ == "__main__":
+  main()
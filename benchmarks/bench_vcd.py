@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_vcd.py [options]
+#=========================================================================
+# Compare the simulation overhead and the file size of the text VCD
+# path and the binary (block-compressed) waveform path of
+# VcdGenerationPass on the TinyRV0 processor running a microbenchmark.
+#
+#  -h --help           Display this message
+#
+#  --bmark <dataset>   {vvadd-unopt,vvadd-opt,cksum}
+#  --repeat            Number of runs per configuration, default=3
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from examples.ex03_proc.NullXcel import NullXcelRTL
+from examples.ex03_proc.ProcRTL import ProcRTL
+from examples.ex03_proc.test.harness import TestHarness
+from examples.ex03_proc.ubmark.proc_ubmark_cksum_roll import ubmark_cksum_roll
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_opt import ubmark_vvadd_opt
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+from pymtl3 import *
+from pymtl3.passes.tracing import VcdGenerationPass
+from pymtl3.passes.tracing.binary_wave import convert_to_vcd
+
+bmark_dict = {
+  "vvadd-unopt": ubmark_vvadd_unopt,
+  "vvadd-opt"  : ubmark_vvadd_opt,
+  "cksum"      : ubmark_cksum_roll
+}
+
+# name, vcd_format, vcd_compression
+configs = [
+  ( "no dump",     None,     None   ),
+  ( "text",        "text",   None   ),
+  ( "binary-zlib", "binary", "zlib" ),
+  ( "binary-lzma", "binary", "lzma" ),
+]
+
+def run( bmark, vcd_format, compression, file_name ):
+  model = TestHarness( ProcRTL, NullXcelRTL, 0, 0, 0, 1 )
+  model.elaborate()
+  if vcd_format is not None:
+    model.set_metadata( VcdGenerationPass.vcd_file_name, file_name )
+    model.set_metadata( VcdGenerationPass.vcd_format, vcd_format )
+    if compression is not None:
+      model.set_metadata( VcdGenerationPass.vcd_compression, compression )
+  model.apply( DefaultPassGroup() )
+  model.load( bmark.gen_mem_image() )
+  model.sim_reset()
+
+  start = time.perf_counter()
+  while not model.done() and model.sim_cycle_count() < 100000:
+    model.sim_tick()
+  if vcd_format is not None:
+    model.get_metadata( VcdGenerationPass.vcd_writer ).close()
+  elapsed = time.perf_counter() - start
+
+  assert bmark.verify( model.mem.mem.mem )
+  return model.sim_cycle_count(), elapsed
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark VCD dumping" )
+  p.add_argument( "--bmark", default="vvadd-unopt", choices=sorted(bmark_dict) )
+  p.add_argument( "--repeat", default=3, type=int )
+  opts = p.parse_args()
+
+  bmark = bmark_dict[ opts.bmark ]
+
+  with tempfile.TemporaryDirectory() as tmp:
+    print()
+    print( f"  {'config':<12} {'cycles':>8} {'time(s)':>9} {'overhead':>9} {'size(KB)':>10} {'ratio':>7}" )
+    base_time = text_size = None
+
+    for name, vcd_format, compression in configs:
+      file_name = os.path.join( tmp, name )
+      ncycles, elapsed = min( ( run( bmark, vcd_format, compression, file_name )
+                                for _ in range(opts.repeat) ), key=lambda x: x[1] )
+      if vcd_format is None:
+        base_time = elapsed
+        size = 0
+      else:
+        size = os.path.getsize( file_name + (".vcd" if vcd_format == "text" else ".vcdb") )
+        if vcd_format == "text":
+          text_size = size
+
+      overhead = f"{elapsed / base_time - 1:>8.1%}" if vcd_format else f"{'-':>8}"
+      ratio    = f"{text_size / size:>6.1f}x" if size else f"{'-':>7}"
+      print( f"  {name:<12} {ncycles:>8} {elapsed:>9.3f} {overhead:>9} {size/1024:>10.1f} {ratio}" )
+
+      if vcd_format == "binary":
+        start = time.perf_counter()
+        convert_to_vcd( file_name + ".vcdb", file_name + ".vcd" )
+        print( f"  {'':<12} offline conversion to vcd: {time.perf_counter() - start:.3f}s" )
+    print()
+
+if __name__ == "__main__":
+  main()
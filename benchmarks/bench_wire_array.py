@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+#=========================================================================
+# bench_wire_array.py [options]
+#=========================================================================
+# Compare a ROM and a register file built from a list of Wires against
+# the ones built on WireArray. For each size we report the time to
+# elaborate and apply DefaultPassGroup, the peak memory of doing so, and
+# the time per simulated cycle.
+#
+#  -h --help           Display this message
+#
+#  --sizes             Number of entries, default=1024,16384,65536
+#  --ncycles           Number of simulated cycles, default=10000
+#  --no-list           Only run the WireArray versions
+#
+# Date   : Oct 17, 2026
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Hack to add project root to python path
+sim_dir = os.path.dirname( os.path.abspath( __file__ ) )
+while sim_dir:
+  if os.path.exists( sim_dir + os.path.sep + "pytest.ini" ):
+    sys.path.insert(0,sim_dir)
+    break
+  sim_dir = os.path.dirname(sim_dir)
+
+from pymtl3 import *
+from pymtl3.stdlib.mem import CombinationalROM
+from pymtl3.stdlib.primitive import RegisterFile
+
+# The implementations before WireArray
+
+class ListROM( Component ):
+
+  def construct( s, Type, num_entries, data, num_ports=1 ):
+    s.raddr = [ InPort( clog2(num_entries) ) for _ in range(num_ports) ]
+    s.rdata = [ OutPort( Type )              for _ in range(num_ports) ]
+
+    s.mem = [ Wire(Type) for _ in range(num_entries) ]
+    for i in range(num_entries):
+      s.mem[i] //= data[i]
+
+    @update
+    def up_read_rom():
+      for i in range(num_ports):
+        s.rdata[i] @= s.mem[ s.raddr[i] ]
+
+class ListRegisterFile( Component ):
+
+  def construct( s, Type, nregs=32, rd_ports=1, wr_ports=1 ):
+    addr_type = mk_bits( max( 1, clog2( nregs ) ) )
+
+    s.raddr = [ InPort( addr_type ) for i in range( rd_ports ) ]
+    s.rdata = [ OutPort( Type ) for i in range( rd_ports ) ]
+
+    s.waddr = [ InPort( addr_type ) for i in range( wr_ports ) ]
+    s.wdata = [ InPort( Type ) for i in range( wr_ports ) ]
+    s.wen   = [ InPort( Bits1 ) for i in range( wr_ports ) ]
+
+    s.regs = [ Wire( Type ) for i in range(nregs) ]
+
+    @update
+    def up_rf_read():
+      for i in range( rd_ports ):
+        s.rdata[i] @= s.regs[ s.raddr[i] ]
+
+    @update_ff
+    def up_rf_write():
+      for i in range( wr_ports ):
+        if s.wen[i]:
+          s.regs[ s.waddr[i] ] <<= s.wdata[i]
+
+def elaborate( mk_model ):
+  gc.collect()
+  tracemalloc.start()
+  start = time.perf_counter()
+  m = mk_model()
+  m.elaborate()
+  m.apply( DefaultPassGroup() )
+  m.sim_reset()
+  t = time.perf_counter() - start
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return m, t, peak
+
+def simulate( m, nentries, ncycles, is_rf ):
+  rgen  = random.Random( 0xdeadbeef )
+  addrs = [ rgen.randrange( nentries ) for _ in range(ncycles) ]
+  start = time.perf_counter()
+  if is_rf:
+    m.wen[0] @= 1
+    for addr in addrs:
+      m.raddr[0] @= addr
+      m.waddr[0] @= addr
+      m.wdata[0] @= addr
+      m.sim_tick()
+  else:
+    for addr in addrs:
+      m.raddr[0] @= addr
+      m.sim_tick()
+  return time.perf_counter() - start
+
+def main():
+  p = argparse.ArgumentParser( description="Benchmark list-of-Wire vs. WireArray storage" )
+  p.add_argument( "--sizes",   default="1024,16384,65536" )
+  p.add_argument( "--ncycles", default=10000, type=int )
+  p.add_argument( "--no-list", action="store_true" )
+  opts = p.parse_args()
+
+  print()
+  print( f"  {'model':<18} {'entries':>8} {'elab(s)':>8} {'peak(MB)':>9} {'us/cycle':>9}" )
+  for n in [ int(x) for x in opts.sizes.split(",") ]:
+    data = [ i & 0xffffffff for i in range(n) ]
+    configs = [
+      ( "ROM (WireArray)", lambda: CombinationalROM( Bits32, n, data ), False ),
+      ( "RF (WireArray)",  lambda: RegisterFile( Bits32, n ), True ),
+    ]
+    if not opts.no_list:
+      configs = [
+        ( "ROM (list)", lambda: ListROM( Bits32, n, data ), False ),
+        configs[0],
+        ( "RF (list)",  lambda: ListRegisterFile( Bits32, n ), True ),
+        configs[1],
+      ]
+    for name, mk_model, is_rf in configs:
+      m, t_elab, peak = elaborate( mk_model )
+      t_sim = simulate( m, n, opts.ncycles, is_rf )
+      print( f"  {name:<18} {n:>8} {t_elab:>8.2f} {peak/2**20:>9.1f} "
+             f"{t_sim/opts.ncycles*1e6:>9.2f}" )
+      m = None
+  print()
+
+if __name__ == "__main__":
+  main()
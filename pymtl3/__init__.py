@@ -21,6 +21,7 @@ from .dsl.Connectable import (
     Interface,
     OutPort,
     Wire,
+    WireArray,
 )
 from .dsl.ConstraintTypes import RD, WR, M, U
 from .dsl.MetadataKey import MetadataKey
@@ -29,7 +30,7 @@ from .passes.PassGroups import DefaultPassGroup
 
 __all__ = [
   'U','M','RD','WR',
-  'Wire', 'InPort', 'OutPort', 'Interface', 'CallerPort', 'CalleePort',
+  'Wire', 'WireArray', 'InPort', 'OutPort', 'Interface', 'CallerPort', 'CalleePort',
   'update', 'update_ff', 'update_once', 'connect', 'method_port',
   'CalleeIfcRTL', 'CallerIfcRTL',
   'non_blocking', 'CalleeIfcCL', 'CallerIfcCL',
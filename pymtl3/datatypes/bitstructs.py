@@ -45,6 +45,17 @@ class Pixel:
   def __str__( self ):
     return f'({self.r},{self.g},{self.b})'
 
+A bit struct whose fields are all BitsN can be declared with
+@bitstruct(packed=True) (or mk_bitstruct(..., packed=True)). Such an
+instance stores the whole struct as one integer in __slots__ and every
+field is a property that returns a new BitsN object, which makes clone,
+to_bits, from_bits, and __eq__ single integer operations. The catch is
+that a field can only be updated as a whole, e.g., `msg.addr = x` or
+`msg.addr @= x`. Slice assignment to a field (`msg.addr[0:4] @= x`) and
+non-blocking assignment to a field (`msg.addr <<= x`) could only modify
+the temporary BitsN object, so they raise TypeError; assign the whole
+field or the whole struct instead.
+
 Author : Yanghui Ou, Shunning Jiang
   Date : Oct 19, 2019
 """
@@ -519,6 +530,170 @@ def _mk_from_bits_fns( fields, total_nbits ):
                        "other = other.to_bits()",
                        f"return cls({','.join(from_bits_strs)})" ], _globals )
 #-------------------------------------------------------------------------
+# Packed bitstruct
+#-------------------------------------------------------------------------
+# For a packed bitstruct, the whole struct is stored in self._uint with
+# the first field in the most significant bits, i.e., the same layout as
+# to_bits(). self._next holds the value assigned by <<=. We generate the
+# following methods (for fields x (Bits4) and y (Bits8)):
+#
+# def __init__( s, x=0, y=0 ):
+#   s._uint = ((x if x.__class__ is int and 0 <= x <= 15 else
+#               int(x) if x.__class__ is _type_x or ... else int(_type_x(x))) << 8) | \
+#             (y if y.__class__ is int and 0 <= y <= 255 else
+#               int(y) if y.__class__ is _type_y or ... else int(_type_y(y)))
+#
+# def _get_x( self ):
+#   return _field_x( (self._uint >> 8), trunc_int=True )
+#
+# def _set_x( self, v ):
+#   self._uint = (self._uint & -3841) | ((v if v.__class__ is int ...) << 8)
+
+_PACKED_SLOTS = ( '_uint', '_next' )
+
+# A field is read as a temporary BitsN that cannot write back into the
+# struct, so it is an instance of a read-only subclass of the field type.
+# x.f @= v still works because __imatmul__ returns a new value that the
+# property setter then writes into the struct.
+
+_packed_field_types = {}
+
+def _mk_packed_field_type( Type ):
+  if Type in _packed_field_types:
+    return _packed_field_types[ Type ]
+
+  def __imatmul__( self, v ):
+    ret = Type()
+    ret @= v
+    return ret
+
+  def __ilshift__( self, v ):
+    raise TypeError( "A field of a packed BitStruct cannot be assigned with <<=.\n"
+                     "- Suggestion: assign the whole struct with <<=" )
+
+  def __setitem__( self, idx, v ):
+    raise TypeError( "A slice of a field of a packed BitStruct cannot be assigned.\n"
+                     "- Suggestion: assign the whole field, e.g., x.f @= concat( ... )" )
+
+  ret = _packed_field_types[ Type ] = type( Type.__name__, ( Type, ), {
+    '__slots__'  : (),
+    '__imatmul__': __imatmul__,
+    '__ilshift__': __ilshift__,
+    '__setitem__': __setitem__,
+  })
+  return ret
+
+def _mk_packed_slots_class( cls ):
+  # __slots__ only takes effect when a class is created, so we recreate
+  # the class like dataclass(slots=True) does.
+  namespace = dict( cls.__dict__ )
+  namespace.pop( '__dict__', None )
+  namespace.pop( '__weakref__', None )
+  namespace['__slots__'] = _PACKED_SLOTS
+  return type( cls )( cls.__name__, cls.__bases__, namespace )
+
+def _get_packed_layout( fields ):
+  # Return { name: (offset, mask) }
+  layout = {}
+  offset = sum( type_.nbits for type_ in fields.values() )
+  for name, type_ in fields.items():
+    offset -= type_.nbits
+    layout[ name ] = ( offset, (1 << type_.nbits) - 1 )
+  return layout
+
+def _gen_packed_to_int_str( name, var, mask ):
+  # Skip constructing a BitsN for in-range ints and BitsN of the field type
+  return ( f"({var} if {var}.__class__ is int and 0 <= {var} <= {mask} else "
+           f"int({var}) if {var}.__class__ is _type_{name} or {var}.__class__ is _field_{name} "
+           f"else int(_type_{name}({var})))" )
+
+def _get_packed_globals( fields ):
+  _globals = {}
+  for name, type_ in fields.items():
+    _globals[ f"_type_{name}" ]  = type_
+    _globals[ f"_field_{name}" ] = _mk_packed_field_type( type_ )
+  return _globals
+
+def _mk_packed_init_fn( self_name, fields ):
+  _globals = _get_packed_globals( fields )
+  terms = []
+  for name, (offset, mask) in _get_packed_layout( fields ).items():
+    term = _gen_packed_to_int_str( name, name, mask )
+    terms.append( f"({term} << {offset})" if offset else term )
+
+  return _create_fn(
+    '__init__',
+    [ self_name ] + [ f'{name} = 0' for name in fields ],
+    [ f"{self_name}._uint = {' | '.join( terms )}" ],
+    _globals = _globals,
+  )
+
+def _mk_packed_properties( fields ):
+  properties = {}
+  _globals = _get_packed_globals( fields )
+  for name, (offset, mask) in _get_packed_layout( fields ).items():
+    value = f"(self._uint >> {offset})" if offset else "self._uint"
+    getter = _create_fn( f'_get_{name}', [ 'self' ],
+                         [ f"return _field_{name}( {value}, trunc_int=True )" ], _globals )
+    setter = _create_fn( f'_set_{name}', [ 'self', 'v' ],
+                         [ f"self._uint = (self._uint & {~(mask << offset)}) | "
+                           f"({_gen_packed_to_int_str( name, 'v', mask )} << {offset})" ], _globals )
+    properties[ name ] = property( getter, setter )
+  return properties
+
+def _mk_packed_fns( cls, total_nbits ):
+  BitsN = mk_bits( total_nbits )
+  object_new = object.__new__
+
+  def __eq__( self, other ):
+    return other.__class__ is self.__class__ and self._uint == other._uint
+
+  def __hash__( self ):
+    return hash( (self.__class__, self._uint) )
+
+  def clone( self ):
+    ret = object_new( self.__class__ )
+    ret._uint = self._uint
+    return ret
+
+  def __deepcopy__( self, memo ):
+    ret = object_new( self.__class__ )
+    ret._uint = self._uint
+    return ret
+
+  def _to_uint( self, other ):
+    if other.__class__ is self.__class__:
+      return other._uint
+    assert self.nbits == other.nbits, f'LHS bitstruct {self.nbits}-bit <> RHS other {other.nbits}-bit'
+    return int( other.to_bits() )
+
+  def __imatmul__( self, other ):
+    self._uint = _to_uint( self, other )
+    return self
+
+  def __ilshift__( self, other ):
+    self._next = _to_uint( self, other )
+    return self
+
+  def _flip( self ):
+    self._uint = self._next
+
+  def to_bits( self ):
+    return BitsN( self._uint )
+
+  def from_bits( cls, other ):
+    assert cls.nbits == other.nbits, f'LHS bitstruct {cls.nbits}-bit <> RHS other {other.nbits}-bit'
+    ret = object_new( cls )
+    ret._uint = int( other.to_bits() )
+    return ret
+
+  return {
+    '__eq__': __eq__, '__hash__': __hash__, 'clone': clone, '__deepcopy__': __deepcopy__,
+    '__imatmul__': __imatmul__, '__ilshift__': __ilshift__, '_flip': _flip,
+    'to_bits': to_bits, 'from_bits': classmethod(from_bits),
+  }
+
+#-------------------------------------------------------------------------
 # _check_valid_array
 #-------------------------------------------------------------------------
 
@@ -590,7 +765,7 @@ def _get_self_name( fields ):
 _bitstruct_hash_cache = {}
 
 def _process_class( cls, add_init=True, add_str=True, add_repr=True,
-                    add_hash=True ):
+                    add_hash=True, packed=False ):
 
   # Get annotations of the class
   cls_annotations = cls.__dict__.get('__annotations__', {})
@@ -621,17 +796,29 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
     fields[ a_name ] = a_type
     hashable_fields[ a_name ] = _convert_list_to_tuple( a_type )
 
+  if packed:
+    for a_name, a_type in fields.items():
+      if isinstance( a_type, list ) or not issubclass( a_type, Bits ):
+        raise TypeError( "A packed BitStruct can only have BitsN fields:\n"
+                        f"- Field '{a_name}' of BitStruct {cls.__name__} is annotated as {a_type}." )
+      if a_name in _PACKED_SLOTS:
+        raise TypeError( f"A packed BitStruct cannot have field {a_name}." )
+
   cls._hash = _hash = hash( (cls.__name__, *tuple(hashable_fields.items()),
-                             add_init, add_str, add_repr, add_hash) )
+                             add_init, add_str, add_repr, add_hash, packed) )
 
   if _hash in _bitstruct_hash_cache:
     return _bitstruct_hash_cache[ _hash ]
 
+  if packed:
+    cls = _mk_packed_slots_class( cls )
+
   _bitstruct_hash_cache[ _hash ] = cls
 
   # Stamp the special attribute so that translation pass can identify it
   # as bit struct.
   setattr( cls, _FIELDS, fields )
+  user_defined = set( cls.__dict__ )
 
   # Add methods to the class
 
@@ -640,7 +827,14 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
   # did not define their own init.
   if add_init:
     if not '__init__' in cls.__dict__:
-      cls.__init__ = _mk_init_fn( _get_self_name(fields), fields )
+      if packed:
+        cls.__init__ = _mk_packed_init_fn( _get_self_name(fields), fields )
+      else:
+        cls.__init__ = _mk_init_fn( _get_self_name(fields), fields )
+
+  if packed:
+    for name, prop in _mk_packed_properties( fields ).items():
+      setattr( cls, name, prop )
 
   # Create __str__
   if add_str:
@@ -702,6 +896,16 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
 
   cls.get_field_type = classmethod(get_field_type)
 
+  # Replace the field-by-field methods with integer operations. __eq__
+  # and __hash__ are only replaced if they are the generated ones.
+  if packed:
+    for name, fn in _mk_packed_fns( cls, cls.nbits ).items():
+      if name in ( '__eq__', '__hash__' ) and name in user_defined:
+        continue
+      if name == '__hash__' and not add_hash:
+        continue
+      setattr( cls, name, fn )
+
   # TODO: maybe add a to_bits and from bits function.
 
   return cls
@@ -712,10 +916,11 @@ def _process_class( cls, add_init=True, add_str=True, add_repr=True,
 # The actual class decorator. We add a * in the argument list so that the
 # following argument can only be used as keyword arguments.
 
-def bitstruct( _cls=None, *, add_init=True, add_str=True, add_repr=True, add_hash=True ):
+def bitstruct( _cls=None, *, add_init=True, add_str=True, add_repr=True, add_hash=True,
+               packed=False ):
 
   def wrap( cls ):
-    return _process_class( cls, add_init, add_str, add_repr )
+    return _process_class( cls, add_init, add_str, add_repr, packed=packed )
 
   # Called as @bitstruct(...)
   if _cls is None:
@@ -731,7 +936,7 @@ def bitstruct( _cls=None, *, add_init=True, add_str=True, add_repr=True, add_has
 # TODO: should we add base parameters to support inheritence?
 
 def mk_bitstruct( cls_name, fields, *, namespace=None, add_init=True,
-                   add_str=True, add_repr=True, add_hash=True ):
+                   add_str=True, add_repr=True, add_hash=True, packed=False ):
 
   # copy namespace since  will mutate it
   namespace = {} if namespace is None else namespace.copy()
@@ -750,4 +955,4 @@ def mk_bitstruct( cls_name, fields, *, namespace=None, add_init=True,
   namespace['__annotations__'] = annos
   cls = types.new_class( cls_name, (), {}, lambda ns: ns.update( namespace ) )
   return bitstruct( cls, add_init=add_init, add_str=add_str,
-                    add_repr=add_repr, add_hash=add_hash )
+                    add_repr=add_repr, add_hash=add_hash, packed=packed )
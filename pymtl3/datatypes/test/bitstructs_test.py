@@ -10,7 +10,7 @@ Author : Yanghui Ou
 
 import pytest
 
-from pymtl3.dsl import Component, InPort, OutPort, update
+from pymtl3.dsl import Component, InPort, OutPort, update, update_ff
 from pymtl3.dsl.test.sim_utils import simple_sim_pass
 
 from ..bits_import import *
@@ -21,6 +21,7 @@ from ..bitstructs import (
     is_bitstruct_inst,
     mk_bitstruct,
 )
+from ..helpers import zext
 
 #-------------------------------------------------------------------------
 # Basic test to test error messages and exceptions
@@ -604,3 +605,128 @@ def test_imatmul_ilshift():
   assert c == B(0x1234567890abcd0f,[A(2),A(3),A(4)], A(5) )
   c._flip()
   assert c.to_bits() == Bits164(0xf0dcba09876543210005000400030002)
+
+#-------------------------------------------------------------------------
+# Packed bitstruct
+#-------------------------------------------------------------------------
+
+@bitstruct( packed=True )
+class PackedPoint:
+  x : Bits4
+  y : Bits8
+
+def test_packed_basic():
+  p = PackedPoint( 1, 2 )
+  assert not hasattr( p, '__dict__' )
+  assert p.x == 1 and p.x.nbits == 4
+  assert p.y == 2 and p.y.nbits == 8
+  assert p.to_bits() == Bits12(0x102)
+  assert PackedPoint.from_bits( Bits12(0x102) ) == p
+  assert str(p) == "1:02"
+  assert PackedPoint.get_field_type( 'y' ) is Bits8
+
+  p.y = 0xff
+  p.x @= Bits4(3)
+  assert p == PackedPoint( 3, 0xff )
+  assert p != PackedPoint( 3, 0xfe )
+  assert hash(p) == hash(PackedPoint( 3, 0xff ))
+
+  q = p.clone()
+  q.x = 0
+  assert p.x == 3
+
+  with pytest.raises( ValueError ):
+    PackedPoint( 16, 0 )
+  with pytest.raises( ValueError ):
+    p.y = Bits4(1)
+
+def test_packed_same_as_unpacked():
+  U = mk_bitstruct( "PackedPointU", { 'x': Bits4, 'y': Bits8 } )
+  P = mk_bitstruct( "PackedPointU", { 'x': Bits4, 'y': Bits8 }, packed=True )
+  assert U is not P
+  assert P is mk_bitstruct( "PackedPointU", { 'x': Bits4, 'y': Bits8 }, packed=True )
+  assert U.nbits == P.nbits
+  for x, y in [ (0, 0), (15, 255), (-1, -128), (5, 0xa5) ]:
+    assert U(x, y).to_bits() == P(x, y).to_bits()
+    assert U.from_bits( P(x, y).to_bits() ).y == P(x, y).y
+
+  p = P( 1, 2 )
+  p @= U( 3, 4 )
+  assert p == P( 3, 4 )
+  p <<= Bits12(0x567)
+  assert p == P( 3, 4 )
+  p._flip()
+  assert p == P( 5, 0x67 )
+
+def test_packed_non_bits_field():
+  with pytest.raises( TypeError ):
+    mk_bitstruct( "PackedNested", { 'x': Bits4, 'p': PackedPoint }, packed=True )
+  with pytest.raises( TypeError ):
+    mk_bitstruct( "PackedList", { 'x': [ Bits4, Bits4 ] }, packed=True )
+
+def test_packed_component():
+  class A( Component ):
+    def construct( s ):
+      s.in_ = InPort( PackedPoint )
+      s.out = OutPort( PackedPoint )
+      s.reg = OutPort( PackedPoint )
+
+      @update
+      def up_packed():
+        s.out @= s.in_
+        s.out.y @= zext( s.in_.x, 8 ) + 1
+
+      @update_ff
+      def up_packed_ff():
+        s.reg <<= s.in_
+
+  dut = A()
+  dut.elaborate()
+  dut.apply( simple_sim_pass )
+  dut.in_ = PackedPoint( 1, 7 )
+  dut.tick()
+  assert dut.out == PackedPoint( 1, 2 )
+  assert dut.reg == PackedPoint( 1, 7 )
+  dut.in_ = PackedPoint( 3, 9 )
+  dut.tick()
+  assert dut.out == PackedPoint( 3, 4 )
+  assert dut.reg == PackedPoint( 3, 9 )
+
+def test_packed_partial_field_write():
+  p = PackedPoint( 1, 2 )
+  p.y @= 0xab
+  assert p == PackedPoint( 1, 0xab )
+  assert p.y.__class__ is not Bits8 and isinstance( p.y, Bits8 )
+
+  # These would only modify the temporary field object
+  with pytest.raises( TypeError ):
+    p.y[0:4] @= 0xf
+  with pytest.raises( TypeError ):
+    p.y[0] @= 0
+  with pytest.raises( TypeError ):
+    p.y <<= 0
+  assert p == PackedPoint( 1, 0xab )
+
+  # A clone of the field is a normal Bits object
+  y = p.y.clone()
+  y[0:4] @= 0xf
+  assert y == 0xaf and p.y == 0xab
+
+  with pytest.raises( ValueError ):
+    p.y @= Bits4(1)
+
+def test_packed_component_partial_field_write():
+  class A( Component ):
+    def construct( s ):
+      s.out = OutPort( PackedPoint )
+
+      @update
+      def up_packed():
+        s.out @= PackedPoint( 0, 0 )
+        s.out.y[0:4] @= 0xf
+
+  dut = A()
+  dut.elaborate()
+  dut.apply( simple_sim_pass )
+  with pytest.raises( TypeError ):
+    dut.tick()
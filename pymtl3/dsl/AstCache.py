@@ -0,0 +1,240 @@
+"""
+========================================================================
+AstCache.py
+========================================================================
+A persistent on-disk cache of the source, AST, and read/write/call name
+tables that ComponentLevel2._cache_func_meta extracts from update blocks
+and functions. Every process otherwise re-parses the same update blocks
+at elaboration.
+
+We keep one pickle file per source file in the cache directory. It is
+validated against the mtime and size of the source file, and if those
+changed, against the hash of its content, so editing a file invalidates
+all of its entries. Each entry is keyed by the qualname and first line
+number of the function and the global names it can see, since the
+extracted tables depend on whether an index name is a global variable.
+
+The cache directory defaults to $XDG_CACHE_HOME/pymtl3/ast (or
+~/.cache/pymtl3/ast) and can be set with the PYMTL_AST_CACHE_DIR
+environment variable or set_cache_dir(). An empty PYMTL_AST_CACHE_DIR
+or set_cache_dir(None) disables the cache. The modification time of a
+file records its last use, and the least recently used files are
+evicted once the cache grows beyond PYMTL_AST_CACHE_SIZE MB (64 by
+default, see set_max_size()).
+
+Date   : Oct 17, 2026
+"""
+import atexit
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import types
+
+from . import AstHelper
+
+# Bump this when the layout of the cached tables changes
+_FORMAT = 1
+
+def _default_cache_dir():
+  path = os.environ.get( "PYMTL_AST_CACHE_DIR" )
+  if path is not None:
+    return path or None
+  base = os.environ.get( "XDG_CACHE_HOME" ) or os.path.join( os.path.expanduser("~"), ".cache" )
+  return os.path.join( base, "pymtl3", "ast" )
+
+def _analyzer_key():
+  # The tables are only valid for the same Python AST and extractor
+  try:
+    st = os.stat( AstHelper.__file__ )
+    helper = ( st.st_mtime_ns, st.st_size )
+  except OSError:
+    helper = None
+  return ( _FORMAT, sys.version_info[:2], helper )
+
+_cache_dir = _default_cache_dir()
+_key       = _analyzer_key()
+_max_size  = int( os.environ.get( "PYMTL_AST_CACHE_SIZE" ) or 64 ) * 1024 * 1024
+
+# Estimated total size of the cache files, None until we scan the directory
+_cache_size = None
+
+# source file path -> record dict, and the paths to write back
+_records = {}
+_dirty   = set()
+
+def get_cache_dir():
+  return _cache_dir
+
+def set_cache_dir( path ):
+  """ Set the cache directory. None disables the cache. """
+  global _cache_dir, _cache_size
+  flush()
+  _cache_dir  = None if path is None else str(path)
+  _cache_size = None
+  _records.clear()
+
+def get_max_size():
+  return _max_size
+
+def set_max_size( max_size ):
+  """ Set the size bound of the cache in MB. """
+  global _max_size
+  _max_size = int( max_size * 1024 * 1024 )
+
+#-------------------------------------------------------------------------
+# Internal helpers
+#-------------------------------------------------------------------------
+
+def _cache_file( path ):
+  digest = hashlib.blake2b( path.encode(), digest_size=16 ).hexdigest()
+  return os.path.join( _cache_dir, digest + ".pickle" )
+
+def _hash_file( path ):
+  with open( path, "rb" ) as f:
+    return hashlib.blake2b( f.read() ).hexdigest()
+
+def _global_names( func ):
+  names = set()
+  stack = [ func.__code__ ]
+  while stack:
+    code = stack.pop()
+    names.update( code.co_names )
+    names.update( code.co_varnames )
+    stack.extend( x for x in code.co_consts if isinstance( x, types.CodeType ) )
+  g = func.__globals__
+  return tuple( sorted( x for x in names if x in g ) )
+
+def _func_key( func ):
+  code = func.__code__
+  return ( func.__qualname__, code.co_firstlineno, _global_names( func ) )
+
+def _get_record( path ):
+  try:
+    st = os.stat( path )
+  except OSError: # e.g. <string>
+    return None
+  stat = ( st.st_mtime_ns, st.st_size )
+
+  record = _records.get( path )
+  if record is not None and record["stat"] == stat:
+    return record
+
+  try:
+    with open( _cache_file( path ), "rb" ) as f:
+      disk = pickle.load( f )
+    if disk["key"] != _key or disk["path"] != path:
+      disk = None
+    else:
+      os.utime( _cache_file( path ) )
+  except Exception:
+    disk = None
+
+  if disk is not None and disk["stat"] == stat:
+    record = disk
+  else:
+    try:
+      digest = _hash_file( path )
+    except OSError:
+      return None
+    if disk is not None and disk["digest"] == digest:
+      # Touched but not modified
+      record = disk
+    else:
+      record = { "key": _key, "path": path, "digest": digest, "funcs": {} }
+    record["stat"] = stat
+    _dirty.add( path )
+
+  _records[ path ] = record
+  return record
+
+#-------------------------------------------------------------------------
+# Public APIs
+#-------------------------------------------------------------------------
+
+def lookup( func ):
+  """ Return the cached (name_info, rd, wr, fc) of func or None. Each call
+  returns fresh objects. """
+  if _cache_dir is None:
+    return None
+  record = _get_record( func.__code__.co_filename )
+  if record is None:
+    return None
+  data = record["funcs"].get( _func_key( func ) )
+  if data is None:
+    return None
+  return pickle.loads( data )
+
+def store( func, meta ):
+  if _cache_dir is None:
+    return
+  path = func.__code__.co_filename
+  record = _get_record( path )
+  if record is None:
+    return
+  try:
+    data = pickle.dumps( meta, protocol=pickle.HIGHEST_PROTOCOL )
+  except Exception: # e.g. unpicklable constant in a slice
+    return
+  record["funcs"][ _func_key( func ) ] = data
+  _dirty.add( path )
+
+def flush():
+  """ Write back the records updated in this process. Writes are atomic
+  so concurrent processes at worst lose some entries. """
+  global _cache_size
+  if _cache_dir is None:
+    _dirty.clear()
+    return
+  while _dirty:
+    path = _dirty.pop()
+    try:
+      os.makedirs( _cache_dir, exist_ok=True )
+      if _cache_size is None:
+        _cache_size = sum( size for _, size, _ in _list_files() )
+      fd, tmp = tempfile.mkstemp( dir=_cache_dir, suffix=".tmp" )
+      try:
+        with os.fdopen( fd, "wb" ) as f:
+          pickle.dump( _records[ path ], f, protocol=pickle.HIGHEST_PROTOCOL )
+        _cache_size += os.path.getsize( tmp )
+        os.replace( tmp, _cache_file( path ) )
+      except BaseException:
+        os.unlink( tmp )
+        raise
+    except OSError:
+      pass
+
+  if _cache_size is not None and _cache_size > _max_size:
+    try:
+      _evict()
+    except OSError:
+      pass
+
+def _list_files():
+  ret = []
+  for name in os.listdir( _cache_dir ):
+    if name.endswith( ".pickle" ):
+      try:
+        st = os.stat( os.path.join( _cache_dir, name ) )
+      except OSError: # evicted by another process
+        continue
+      ret.append( ( st.st_mtime, st.st_size, name ) )
+  return ret
+
+def _evict():
+  # Remove the least recently used files first
+  global _cache_size
+  files = _list_files()
+  total = sum( size for _, size, _ in files )
+  for _, size, name in sorted( files ):
+    if total <= _max_size:
+      break
+    try:
+      os.unlink( os.path.join( _cache_dir, name ) )
+    except OSError:
+      pass
+    total -= size
+  _cache_size = total
+
+atexit.register( flush )
@@ -8,6 +8,7 @@ Author : Yanghui Ou
   Date : Apr 6, 2019
 """
 
+from . import Profiler
 from .ComponentLevel1 import ComponentLevel1
 from .ComponentLevel7 import ComponentLevel7
 from .Connectable import (
@@ -445,7 +446,11 @@ class Component( ComponentLevel7 ):
     except:
       pass
 
-    super().elaborate()
+    with Profiler.phase( "elaborate" ):
+      super().elaborate()
+      Profiler.annotate( components=len(s._dsl.all_components),
+                         signals=len(s._dsl.all_signals),
+                         update_blocks=len(s._dsl.all_upblks) )
 
     # try:
       # import pypyjit
@@ -527,7 +532,8 @@ class Component( ComponentLevel7 ):
     assert type(pass_instance) is not type, f"Should pass in a pass instance like " \
                                             f"'{pass_instance.__name__}()' instead of '{pass_instance.__name__}'"
     assert callable( pass_instance ), f"Should override __call__ of {pass_instance.__name__} for a valid pass"
-    pass_instance( s )
+    with Profiler.phase( type(pass_instance).__name__ ):
+      pass_instance( s )
 
   def check( s ):
     s._check_valid_dsl_code()
@@ -20,7 +20,7 @@ from collections import defaultdict
 
 from pymtl3.datatypes import Bits, is_bitstruct_class
 
-from . import AstHelper
+from . import AstCache, AstHelper, Profiler
 from .ComponentLevel1 import ComponentLevel1
 from .Connectable import Connectable, Const, InPort, Interface, OutPort, Signal, Wire
 from .ConstraintTypes import RD, WR, U, ValueConstraint
@@ -100,16 +100,24 @@ class ComponentLevel2( ComponentLevel1 ):
       AstHelper.extract_reads_writes_calls( s, func, _ast, _rd, _wr, _fc )
 
     elif name not in name_info:
+      # Other processes may have parsed the same function before
+      cached = AstCache.lookup( func )
+      if cached is not None:
+        name_info[ name ], name_rd[ name ], name_wr[ name ], name_fc[ name ] = cached
+        return
+
       _src, _line = inspect.getsourcelines( func )
       _src = "".join( _src )
       _ast = ast.parse( compiled_re.sub( r'\2', _src ) )
 
-      name_info[ name ] = (False, _src, _line, inspect.getsourcefile( func ), _ast )
+      name_info[ name ] = _info = (False, _src, _line, inspect.getsourcefile( func ), _ast )
       name_rd[ name ]   = _rd   = []
       name_wr[ name ]   = _wr   = []
       name_fc[ name ]   = _fc   = []
       AstHelper.extract_reads_writes_calls( s, func, _ast, _rd, _wr, _fc )
 
+      AstCache.store( func, ( _info, _rd, _wr, _fc ) )
+
   def _elaborate_read_write_func( s ):
 
     # We have parsed AST to extract every read/write variable name.
@@ -614,18 +622,27 @@ class ComponentLevel2( ComponentLevel1 ):
   # Override
   def elaborate( s ):
     # Don't directly use the base class elaborate anymore
-    s._elaborate_construct()
+    with Profiler.phase( "_elaborate_construct" ):
+      s._elaborate_construct()
 
     # First elaborate all functions to spawn more named objects
-    for c in s._collect_all_single( lambda s: isinstance( s, ComponentLevel2 ) ):
-      c._elaborate_read_write_func()
+    with Profiler.phase( "_elaborate_read_write_func" ):
+      for c in s._collect_all_single( lambda s: isinstance( s, ComponentLevel2 ) ):
+        c._elaborate_read_write_func()
+
+    # Persist newly parsed functions for the next process
+    AstCache.flush()
 
-    s._elaborate_collect_all_named_objects()
+    with Profiler.phase( "_elaborate_collect_all_named_objects" ):
+      s._elaborate_collect_all_named_objects()
 
-    s._elaborate_declare_vars()
-    s._elaborate_collect_all_vars()
+    with Profiler.phase( "_elaborate_declare_vars" ):
+      s._elaborate_declare_vars()
+    with Profiler.phase( "_elaborate_collect_all_vars" ):
+      s._elaborate_collect_all_vars()
 
-    s._check_valid_dsl_code()
+    with Profiler.phase( "_check_valid_dsl_code" ):
+      s._check_valid_dsl_code()
 
   #-----------------------------------------------------------------------
   # Post-elaborate public APIs (can only be called after elaboration)
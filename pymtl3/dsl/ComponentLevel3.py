@@ -20,6 +20,7 @@ from collections import defaultdict
 from pymtl3.datatypes import Bits, is_bitstruct_inst
 from pymtl3.extra.pypy import custom_exec
 
+from . import Profiler
 from .ComponentLevel1 import ComponentLevel1
 from .ComponentLevel2 import ComponentLevel2, compiled_re
 from .Connectable import (
@@ -779,7 +780,8 @@ class ComponentLevel3( ComponentLevel2 ):
   # Override
   def _elaborate_collect_all_vars( s ):
     super()._elaborate_collect_all_vars()
-    s._dsl.all_value_nets = s._resolve_value_connections()
+    with Profiler.phase( "_resolve_value_connections" ):
+      s._dsl.all_value_nets = s._resolve_value_connections()
     s._dsl._has_pending_value_connections = False
 
     s._check_valid_dsl_code()
@@ -7,6 +7,7 @@ We allow CallerPort to be connected to CalleePort
 Author : Shunning Jiang
 Date   : Dec 29, 2018
 """
+from . import Profiler
 from .ComponentLevel1 import ComponentLevel1
 from .ComponentLevel2 import ComponentLevel2
 from .ComponentLevel4 import ComponentLevel4
@@ -153,8 +154,10 @@ class ComponentLevel5( ComponentLevel4 ):
       elif isinstance( c, MethodPort ):
         s._dsl.all_method_ports.add( c )
 
-    s._dsl.all_value_nets  = s._resolve_value_connections()
+    with Profiler.phase( "_resolve_value_connections" ):
+      s._dsl.all_value_nets  = s._resolve_value_connections()
     # Added here
-    s._dsl.all_method_nets = s._resolve_method_connections()
+    with Profiler.phase( "_resolve_method_connections" ):
+      s._dsl.all_method_nets = s._resolve_method_connections()
     s._dsl._has_pending_value_connections = False
     s._dsl._has_pending_method_connections = False
@@ -77,6 +77,10 @@ def _connect_check( o1, o2, internal ):
     if o1_connectable: assert o2._dsl.elaborate_top is top
     else:              top = o2_top
 
+  if isinstance( o1, WireArray ) or isinstance( o2, WireArray ):
+    raise InvalidConnectionError(f"A WireArray cannot be connected. Please use the init argument\n"
+                                 f"or write it in an update block. (when connecting {o1!r} to {o2!r})")
+
   if not o1_connectable and not o2_connectable:
     if internal:  return None, False, False
 
@@ -375,6 +379,85 @@ class Wire( Signal ):
   def inverse( s ):
     return Wire( s._dsl.Type )
 
+# WireArray is a single signal that holds num_entries values of Type. It
+# replaces [ Wire( Type ) for _ in range(num_entries) ] for large storage
+# such as ROMs and register files. During simulation it is one list-like
+# object instead of num_entries signals, and it is still translated to an
+# unpacked array. Any access to s.x[i] is treated as an access to the
+# whole array by the scheduler.
+
+class WireArray( Wire ):
+
+  def __init__( s, Type, num_entries, init=None ):
+    super().__init__( Type )
+    assert num_entries > 0, "WireArray must have at least one entry"
+    if init is not None:
+      assert len(init) == num_entries, f"init has {len(init)} values instead of {num_entries}"
+      init = tuple( init )
+    s._dsl.num_entries = num_entries
+    s._dsl.init = init
+
+  def inverse( s ):
+    return WireArray( s._dsl.Type, s._dsl.num_entries, s._dsl.init )
+
+  def __len__( s ):
+    return s._dsl.num_entries
+
+  def __getitem__( s, idx ):
+    # Every entry is part of the same signal
+    if isinstance( idx, int ) and not ( 0 <= idx < s._dsl.num_entries ):
+      raise IndexError( f"{s} has {s._dsl.num_entries} entries" )
+    return s
+
+  def default_value( s ):
+    Type = s._dsl.Type
+    init = s._dsl.init
+    if init is None:
+      values = [ Type() for _ in range(s._dsl.num_entries) ]
+    else:
+      values = [ x.clone() if isinstance( x, Type ) else Type(x) for x in init ]
+
+    if s._dsl.needs_double_buffer:
+      return WireArrayFFValue( values )
+    return WireArrayValue( values )
+
+  def is_leaf_signal( s ):
+    return False
+
+class WireArrayValue( list ):
+  """ The simulation value of a WireArray. """
+
+  __slots__ = ()
+
+  def __ilshift__( s, other ):
+    for x, y in zip( s, other ):
+      x <<= y
+    return s
+
+  def _flip( s ):
+    for x in s:
+      x._flip()
+
+class WireArrayFFValue( WireArrayValue ):
+  """ The simulation value of a WireArray written in update_ff blocks.
+  s.x[i] <<= v calls __setitem__, which records the entry so that _flip
+  only touches the entries written in this cycle. """
+
+  __slots__ = ( '_written', )
+
+  def __init__( s, values ):
+    super().__init__( values )
+    s._written = []
+
+  def __setitem__( s, idx, v ):
+    list.__setitem__( s, idx, v )
+    s._written.append( v )
+
+  def _flip( s ):
+    for x in s._written:
+      x._flip()
+    s._written.clear()
+
 class InPort( Signal ):
   def inverse( s ):
     return OutPort( s._dsl.Type )
@@ -29,6 +29,7 @@ from .Connectable import (
     OutPort,
     Signal,
     Wire,
+    WireArray,
 )
 from .ConstraintTypes import RD, WR, M, U
 from .MetadataKey import MetadataKey
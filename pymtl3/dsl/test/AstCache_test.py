@@ -0,0 +1,118 @@
+"""
+========================================================================
+AstCache_test.py
+========================================================================
+
+Date   : Oct 17, 2026
+"""
+import importlib.util
+import inspect
+import os
+
+import pytest
+
+from pymtl3.dsl import AstCache
+
+src_template = """
+from pymtl3 import *
+
+class A( Component ):
+  def construct( s ):
+    s.in_ = InPort( 8 )
+    s.out = OutPort( 8 )
+    s.tmp = Wire( 8 )
+
+    @update
+    def up():
+      s.tmp @= s.in_
+      s.{0} @= s.tmp
+"""
+
+@pytest.fixture
+def cache_dir( tmp_path ):
+  saved = AstCache.get_cache_dir()
+  AstCache.set_cache_dir( tmp_path / "cache" )
+  yield tmp_path / "cache"
+  AstCache.set_cache_dir( saved )
+
+def _load_class( path, nth ):
+  spec = importlib.util.spec_from_file_location( f"astcache_mod{nth}", path )
+  mod  = importlib.util.module_from_spec( spec )
+  spec.loader.exec_module( mod )
+  return mod.A
+
+def _write_tables( cls ):
+  return [ [ x[0] for x in y ] for y in cls._name_wr.values() ]
+
+def test_cold_then_warm( tmp_path, cache_dir, monkeypatch ):
+  path = tmp_path / "mod_a.py"
+  path.write_text( src_template.format( "out" ) )
+
+  a = _load_class( path, 0 )()
+  a.elaborate()
+  assert len( os.listdir( cache_dir ) ) == 1
+
+  # Forget everything in memory, a fresh class must not parse at all
+  AstCache.set_cache_dir( cache_dir )
+  def fail( *args ):
+    raise AssertionError( "update block is parsed again" )
+  monkeypatch.setattr( inspect, "getsourcelines", fail )
+
+  b = _load_class( path, 1 )()
+  b.elaborate()
+  assert type(a)._name_info.keys() == type(b)._name_info.keys()
+  assert type(a)._name_info['up'][1] == type(b)._name_info['up'][1]
+  assert _write_tables( type(a) ) == _write_tables( type(b) )
+
+  reads, writes, _ = b.get_all_upblk_metadata()
+  assert { repr(x) for x in writes[ b.get_update_block( 'up' ) ] } == { "s.tmp", "s.out" }
+
+def test_invalidate_on_change( tmp_path, cache_dir ):
+  path = tmp_path / "mod_b.py"
+  path.write_text( src_template.format( "out" ) )
+  _load_class( path, 2 )().elaborate()
+
+  # Add a second output written by the same block
+  path.write_text( src_template.format( "out2" ).replace(
+    "s.out = OutPort( 8 )", "s.out = OutPort( 8 )\n    s.out2 = OutPort( 8 )" ) )
+  AstCache.set_cache_dir( cache_dir )
+
+  b = _load_class( path, 3 )()
+  b.elaborate()
+  _, writes, _ = b.get_all_upblk_metadata()
+  assert { repr(x) for x in writes[ b.get_update_block( 'up' ) ] } == { "s.tmp", "s.out2" }
+
+def test_disabled( tmp_path, cache_dir ):
+  AstCache.set_cache_dir( None )
+  path = tmp_path / "mod_c.py"
+  path.write_text( src_template.format( "out" ) )
+  _load_class( path, 4 )().elaborate()
+  assert not os.path.exists( cache_dir )
+
+def test_lru_eviction( tmp_path, cache_dir ):
+  paths = []
+  for i in range(3):
+    path = tmp_path / f"mod_lru{i}.py"
+    path.write_text( src_template.format( "out" ) )
+    _load_class( path, 10+i )().elaborate()
+    paths.append( str(path) )
+  AstCache.flush()
+
+  files = [ AstCache._cache_file( x ) for x in paths ]
+  for i, x in enumerate( files ):
+    os.utime( x, ( 100 * (i+1), 100 * (i+1) ) )
+  size = os.path.getsize( files[0] )
+
+  # Room for two files, so adding a fourth one evicts the two oldest
+  old = AstCache.get_max_size()
+  AstCache.set_max_size( 2.5 * size / 1024 / 1024 )
+  try:
+    path = tmp_path / "mod_lru3.py"
+    path.write_text( src_template.format( "out" ) )
+    _load_class( path, 13 )().elaborate()
+    AstCache.flush()
+  finally:
+    AstCache.set_max_size( old / 1024 / 1024 )
+
+  assert [ os.path.exists( x ) for x in files ] == [ False, False, True ]
+  assert os.path.exists( AstCache._cache_file( str(path) ) )
@@ -0,0 +1,89 @@
+"""
+========================================================================
+Profiler_test.py
+========================================================================
+
+Date   : Oct 17, 2026
+"""
+import json
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.dsl import Profiler
+
+
+class Inner( Component ):
+  def construct( s ):
+    s.in_ = InPort( 8 )
+    s.out = OutPort( 8 )
+
+    @update
+    def up():
+      s.out @= s.in_ + 1
+
+class Outer( Component ):
+  def construct( s ):
+    s.in_ = InPort( 8 )
+    s.out = OutPort( 8 )
+    s.inner = Inner()
+    s.inner.in_ //= s.in_
+    s.inner.out //= s.out
+
+@pytest.fixture
+def profiler():
+  was_enabled = Profiler.is_enabled()
+  Profiler.reset()
+  Profiler.enable()
+  yield Profiler
+  Profiler.reset()
+  if not was_enabled:
+    Profiler.disable()
+
+def _find( records, name ):
+  for record in records:
+    if record['name'] == name:
+      return record
+  raise AssertionError(f"no phase named {name}")
+
+def test_profile_elaborate_and_passes( profiler ):
+  m = Outer()
+  m.elaborate()
+  m.apply( DefaultPassGroup() )
+
+  report = profiler.get_report()
+  names  = [ r['name'] for r in report['phases'] ]
+  assert names == [ 'elaborate', 'DefaultPassGroup' ]
+
+  elab = _find( report['phases'], 'elaborate' )
+  assert elab['components'] == 2
+  assert elab['update_blocks'] == 1
+  children = [ r['name'] for r in elab['children'] ]
+  assert children[:2] == [ '_elaborate_construct', '_elaborate_read_write_func' ]
+  assert '_resolve_value_connections' in \
+         [ r['name'] for r in _find( elab['children'], '_elaborate_collect_all_vars' )['children'] ]
+
+  passes = _find( report['phases'], 'DefaultPassGroup' )['children']
+  assert [ r['name'] for r in passes ] == [
+    'LineTraceParamPass', 'GenDAGPass', 'WrapGreenletPass', 'CLLineTracePass',
+    'DynamicSchedulePass', 'VcdGenerationPass', 'PrintTextWavePass', 'UpblkProfilePass',
+    'PrepareSimPass', 'FastForwardPass',
+  ]
+  for record in passes:
+    assert record['wall_time'] >= 0.0
+
+  # The report is plain data
+  assert json.loads( json.dumps( report ) ) == report
+  assert 'GenDAGPass' in profiler.format_report( report )
+
+def test_profile_disabled():
+  was_enabled = Profiler.is_enabled()
+  Profiler.disable()
+  Profiler.reset()
+  try:
+    m = Outer()
+    m.apply( DefaultPassGroup() )
+    assert Profiler.get_report() == { 'phases': [] }
+  finally:
+    if was_enabled:
+      Profiler.enable()
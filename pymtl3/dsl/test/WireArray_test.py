@@ -0,0 +1,95 @@
+"""
+========================================================================
+WireArray_test.py
+========================================================================
+
+Date   : Oct 17, 2026
+"""
+from pymtl3.datatypes import Bits1, Bits2, Bits8
+from pymtl3.dsl.ComponentLevel1 import update
+from pymtl3.dsl.ComponentLevel2 import update_ff
+from pymtl3.dsl.ComponentLevel3 import ComponentLevel3
+from pymtl3.dsl.Connectable import InPort, OutPort, WireArray
+from pymtl3.dsl.errors import InvalidConnectionError
+
+from .sim_utils import simple_sim_pass
+
+
+class RF( ComponentLevel3 ):
+  def construct( s, nregs=4 ):
+    s.reset = InPort( Bits1 )
+    s.raddr = InPort( Bits2 )
+    s.rdata = OutPort( Bits8 )
+    s.waddr = InPort( Bits2 )
+    s.wdata = InPort( Bits8 )
+    s.wen   = InPort( Bits1 )
+
+    s.regs = WireArray( Bits8, nregs )
+
+    @update
+    def up_rf_read():
+      s.rdata @= s.regs[ s.raddr ]
+
+    @update_ff
+    def up_rf_write():
+      if s.reset:
+        for i in range( nregs ):
+          s.regs[i] <<= 0
+      elif s.wen:
+        s.regs[ s.waddr ] <<= s.wdata
+
+def test_wire_array_rf():
+  m = RF()
+  m.elaborate()
+  simple_sim_pass( m )
+
+  assert len(m.regs) == 4
+  m.sim_reset()
+
+  m.wen   = Bits1(1)
+  m.waddr = Bits2(2)
+  m.wdata = Bits8(0x42)
+  m.raddr = Bits2(2)
+  m.tick()
+  # Only the written entry is committed at the end of the tick
+  assert m.regs[2] == 0x42
+  assert m.regs[1] == 0
+
+  m.wen   = Bits1(0)
+  m.wdata = Bits8(0x13)
+  m.tick()
+  assert m.rdata == 0x42
+  assert m.regs[2] == 0x42
+
+def test_wire_array_init():
+  class ROM( ComponentLevel3 ):
+    def construct( s ):
+      s.raddr = InPort( Bits2 )
+      s.rdata = OutPort( Bits8 )
+      s.mem   = WireArray( Bits8, 4, [ 4, 3, 2, Bits8(1) ] )
+
+      @update
+      def up_rom():
+        s.rdata @= s.mem[ s.raddr ]
+
+  m = ROM()
+  m.elaborate()
+  simple_sim_pass( m )
+  for i in range(4):
+    m.raddr = Bits2(i)
+    m.tick()
+    assert m.rdata == 4-i
+
+def test_wire_array_no_connection():
+  class A( ComponentLevel3 ):
+    def construct( s ):
+      s.out = OutPort( Bits8 )
+      s.mem = WireArray( Bits8, 4 )
+      s.out //= s.mem
+
+  try:
+    A().elaborate()
+  except InvalidConnectionError as e:
+    print(e)
+    return
+  raise Exception("Should've thrown InvalidConnectionError")
@@ -1,6 +1,7 @@
 from .autotick.OpenLoopCLPass import OpenLoopCLPass
 from .BasePass import BasePass
 from .sim.DynamicSchedulePass import DynamicSchedulePass
+from .sim.FastForwardPass import FastForwardPass
 from .sim.GenDAGPass import GenDAGPass
 from .sim.PrepareSimPass import PrepareSimPass
 from .sim.SimpleSchedulePass import SimpleSchedulePass
@@ -9,30 +10,37 @@ from .sim.WrapGreenletPass import WrapGreenletPass
 from .tracing.CLLineTracePass import CLLineTracePass
 from .tracing.LineTraceParamPass import LineTraceParamPass
 from .tracing.PrintTextWavePass import PrintTextWavePass
+from .tracing.UpblkProfilePass import UpblkProfilePass
 from .tracing.VcdGenerationPass import VcdGenerationPass
 
 
 # SimpleSim can be used when the UDG is a DAG
 class SimpleSimPass( BasePass ):
   def __call__( s, top ):
-    LineTraceParamPass()( top )
-    GenDAGPass()( top )
-    WrapGreenletPass()( top )
-    SimpleSchedulePass()( top )
-    CLLineTracePass()( top )
-    VcdGenerationPass()( top )
-    PrintTextWavePass()( top )
+    top.apply( LineTraceParamPass() )
+    top.apply( GenDAGPass() )
+    top.apply( WrapGreenletPass() )
+    top.apply( SimpleSchedulePass() )
+    top.apply( CLLineTracePass() )
+    top.apply( VcdGenerationPass() )
+    top.apply( PrintTextWavePass() )
+    top.apply( UpblkProfilePass() )
 
-    PrepareSimPass(print_line_trace=False)( top )
+    top.apply( PrepareSimPass(print_line_trace=False) )
 
 class DefaultPassGroup( BasePass ):
   def __init__( s, *, vcdwave=None, textwave=False,
-                      linetrace=False, reset_active_high=True ):
+                      linetrace=False, reset_active_high=True,
+                      profile_upblks=False, fast_forward=False ):
 
     s.vcdwave = vcdwave
     s.textwave = textwave
     s.linetrace = linetrace
     s.reset_active_high = reset_active_high
+    # True times every call, N samples one out of N calls of each block
+    s.profile_upblks = profile_upblks
+    # True adds top.sim_fast_forward, N also sets its min_skip
+    s.fast_forward = fast_forward
 
   def __call__( s, top ):
 
@@ -42,16 +50,28 @@ class DefaultPassGroup( BasePass ):
     if s.textwave:
       top.set_metadata( PrintTextWavePass.enable, True )
 
-    LineTraceParamPass()( top )
-    GenDAGPass()( top )
-    WrapGreenletPass()( top )
-    CLLineTracePass()( top )
-    DynamicSchedulePass()( top )
-    VcdGenerationPass()( top )
-    PrintTextWavePass()( top )
+    if s.profile_upblks:
+      top.set_metadata( UpblkProfilePass.enable, True )
+      if s.profile_upblks is not True:
+        top.set_metadata( UpblkProfilePass.sample_period, s.profile_upblks )
 
-    PrepareSimPass(print_line_trace=s.linetrace,
-                   reset_active_high=s.reset_active_high)( top )
+    if s.fast_forward:
+      top.set_metadata( FastForwardPass.enable, True )
+      if s.fast_forward is not True:
+        top.set_metadata( FastForwardPass.min_skip, s.fast_forward )
+
+    top.apply( LineTraceParamPass() )
+    top.apply( GenDAGPass() )
+    top.apply( WrapGreenletPass() )
+    top.apply( CLLineTracePass() )
+    top.apply( DynamicSchedulePass() )
+    top.apply( VcdGenerationPass() )
+    top.apply( PrintTextWavePass() )
+    top.apply( UpblkProfilePass() )
+
+    top.apply( PrepareSimPass(print_line_trace=s.linetrace,
+                              reset_active_high=s.reset_active_high) )
+    top.apply( FastForwardPass() )
 
 class AutoTickSimPass( BasePass ):
   def __init__( s, print_line_trace=True ):
@@ -59,7 +79,7 @@ class AutoTickSimPass( BasePass ):
 
   def __call__( s, top ):
     top.elaborate()
-    GenDAGPass()( top )
-    WrapGreenletPass()( top )
-    OpenLoopCLPass( s.print_line_trace )( top )
+    top.apply( GenDAGPass() )
+    top.apply( WrapGreenletPass() )
+    top.apply( OpenLoopCLPass( s.print_line_trace ) )
     top.lock_in_simulation()
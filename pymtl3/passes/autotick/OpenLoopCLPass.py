@@ -12,14 +12,13 @@ import os
 import random
 from collections import deque
 
-import py
-
 from pymtl3.datatypes import Bits1
 from pymtl3.dsl import CalleeIfcCL, CalleePort
 from pymtl3.dsl.errors import UpblkCyclicError
 
 from ..BasePass import BasePass, PassMetadata
 from ..errors import PassOrderError
+from ..sim.DynamicSchedulePass import DynamicSchedulePass, gen_scc_block
 from ..sim.PrepareSimPass import PrepareSimPass
 from ..sim.SimpleSchedulePass import SimpleSchedulePass, dump_dag
 from ..sim.SimpleTickPass import SimpleTickPass
@@ -227,6 +226,8 @@ class OpenLoopCLPass( BasePass ):
     constraint_objs = top._dag.constraint_objs
 
     update_schedule = []
+    top._sched.scc_stats = scc_stats = []
+    top.set_metadata( DynamicSchedulePass.scc_stats, scc_stats )
 
     scc_id = 0
     for i in scc_schedule:
@@ -278,66 +279,9 @@ class OpenLoopCLPass( BasePass ):
               visited.add( v )
 
         scc_id += 1
-        variables = set()
-        for (u, v) in E:
-          # Collect all variables that triggers other blocks in the SCC
-          if u in scc and v in scc:
-            variables.update( constraint_objs[ (u, v) ] )
-
-        # generate a loop for scc
-        # Shunning: we just simply loop over the whole SCC block
-        # TODO performance optimizations using Mamba techniques within a SCC block
-
-        def gen_wrapped_SCCblk( s, scc, src ):
-          from pymtl3.dsl.errors import UpblkCyclicError
-
-          namespace = {}
-          namespace.update( locals() )
-          # print src
-          exec(py.code.Source( src ).compile(), namespace)
-
-          return namespace['generated_block']
-
-        # FIXME when there is nothing in {2} ..
-        template = """
-          from copy import deepcopy
-          def wrapped_SCC_{0}():
-            num_iters = 0
-            while True:
-              num_iters += 1
-              {1}
-              for blk in scc: # TODO Mamba
-                blk()
-              if {2}:
-                break
-              if num_iters > 100:
-                raise UpblkCyclicError("Combinational loop detected at runtime in {{{3}}}!")
-            # print "SCC block{0} is executed", num_iters, "times"
-          generated_block = wrapped_SCC_{0}
-        """
-
-        copy_srcs  = []
-        check_srcs = []
-        # print_srcs = []
-
-        for j, var in enumerate(variables):
-          if issubclass( var._dsl.Type, Bits ):
-            copy_srcs.append( f"t{j} = {var}.value" )
-          elif is_bitstruct_class( var._dsl.Type ):
-            copy_srcs.append( f"t{j} = {var}.clone()" )
-          else:
-            copy_srcs.append( f"t{j} = deepcopy({var})" )
-
-          check_srcs.append( f"{var} == t{j}" )
-          # print_srcs.append( f"print '{var}', {var}, _____tmp_{j}" )
-
-        scc_block_src = template.format( scc_id,
-                                         "; ".join( copy_srcs ),
-                                         " and ".join( check_srcs ),
-                                         ", ".join( [ x.__name__ for x in scc] ) )
-                                         # "; ".join( print_srcs ) )
-
-        update_schedule.append( gen_wrapped_SCCblk( top, tmp_schedule, scc_block_src ) )
+        blk = gen_scc_block( top, scc_id, tmp_schedule, E, constraint_objs )
+        scc_stats.append( blk._scc_stats )
+        update_schedule.append( blk )
 
     # Shunning: we call line trace related pass here.
     CLLineTracePass()( top )
@@ -9,6 +9,7 @@
 from pymtl3.datatypes import Bits32
 from pymtl3.dsl import *
 from pymtl3.dsl.errors import UpblkCyclicError
+from pymtl3.passes.sim.DynamicSchedulePass import DynamicSchedulePass
 from pymtl3.passes.sim.GenDAGPass import GenDAGPass
 from pymtl3.passes.tracing.PrintTextWavePass import PrintTextWavePass
 
@@ -312,3 +313,52 @@ def test_deep_pass_through_equal_m_constraint():
 
   num_cycles = _test_TestModuleNonBlockingIfc( Top )
   assert num_cycles == 3 + 10 # regression
+
+def test_scc_convergence():
+
+  class Top(Component):
+
+    def construct( s ):
+      s.count = Wire(Bits32)
+      s.x     = Wire(Bits32)
+      s.y     = Wire(Bits32)
+      s.z     = Wire(Bits32)
+
+      @update_ff
+      def up_count():
+        s.count <<= s.count + 1
+
+      @update
+      def up_xz():
+        s.x @= s.count
+        s.z @= s.y + 1
+
+      @update
+      def up_y():
+        s.y @= s.x + 1
+
+      s.add_constraints( U( up_xz ) < M( s.pull ) )
+
+    @method_port
+    def pull( s ):
+      return s.z
+
+    def line_trace( s ):
+      return f"{s.z}"
+
+  A = Top()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( OpenLoopCLPass( print_line_trace=False ) )
+
+  for i in range(5):
+    assert A.pull() == A.count + 2
+
+  # y changes in the first round of every call after the first, so the
+  # SCC runs a second round
+  stats, = A.get_metadata( DynamicSchedulePass.scc_stats )
+  assert sorted( stats.blocks ) == [ 'up_xz', 'up_y' ]
+  assert stats.calls() == 5
+  assert stats.histogram[2] >= 4
+  assert stats.max_rounds() == 2
+  assert stats.evaluations <= 2 * sum( k * v for k, v in stats.histogram.items() )
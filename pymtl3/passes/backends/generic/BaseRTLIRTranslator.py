@@ -23,6 +23,21 @@ class BaseRTLIRTranslator:
     for child in m.get_child_components(repr):
       s.gen_base_rtlir_trans_metadata( child )
 
+  #-----------------------------------------------------------------------
+  # Component skipping
+  #-----------------------------------------------------------------------
+  # The behavioral and structural translators ask these two methods
+  # whether the per-component work of m can be skipped, for example
+  # because an identical module has been translated before. The
+  # translator that skips m replays the side effects of its translation
+  # on the shared metadata (e.g. struct declarations) in the given phase.
+
+  def is_component_skipped( s, m ):
+    return False
+
+  def replay_skipped_component( s, m, phase ):
+    pass
+
 #-------------------------------------------------------------------------
 # TranslatorMetadata
 #-------------------------------------------------------------------------
@@ -4,12 +4,35 @@
 # Author : Peitian Pan
 # Date   : March 15, 2019
 """Provide translators that convert RTLIR to backend representation."""
+import multiprocessing
 
+from pymtl3 import Placeholder
+from pymtl3.passes.rtlir import RTLIRDataType as rdt
+from pymtl3.passes.rtlir.structural.StructuralRTLIRGenL1Pass import (
+    StructuralRTLIRGenL1Pass,
+)
+from pymtl3.passes.rtlir.util.utility import get_ordered_update_ff, get_ordered_upblks
+
+from . import TranslationCache
 from .BaseRTLIRTranslator import TranslatorMetadata
 from .behavioral import BehavioralTranslator
 from .errors import RTLIRTranslationError
 from .structural import StructuralTranslator
 
+# The translator inherited by the forked translation workers
+_forked_translator = None
+
+def _translate_in_forked_worker( names ):
+  return _forked_translator._translate_deferred_components( names )
+
+def _get_component_nspace( namespace, m ):
+  ns = TranslatorMetadata()
+  for name, metadata_d in vars(namespace).items():
+    # Hierarchical metadata will not be added
+    if m in metadata_d:
+      setattr( ns, name, metadata_d[m] )
+  return ns
+
 
 def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
   """Return an RTLIRTranslator from the two given translators."""
@@ -19,14 +42,209 @@ def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
     Components are assembled here because they have both behavioral
     and structural parts. This translator also generates the overall
     code layout of the backend representation.
+
+    Every module is translated only once: the other instances with the
+    same module name are skipped. If `use_translation_cache` is set,
+    modules that have been translated before (possibly by another
+    process) are also emitted from TranslationCache.
+
+    If `translation_jobs` is not 1, the modules other than the top module
+    and placeholders are translated by that many forked processes (0 for
+    one per CPU) and stitched together in hierarchy order.
     """
 
+    def __init__( s, top ):
+      super().__init__( top )
+      s.use_translation_cache = False
+      s.translation_jobs = 1
+
     # Override
     def clear( s, tr_top, tr_cfgs ):
       s.tr_cfgs = tr_cfgs
       s.hierarchy = TranslatorMetadata()
+      # Decided once the structural RTLIR of the hierarchy is available
+      s._tr_skipped = None
+      s._tr_structs = {}
+      s._tr_cache = {}
+      s._tr_deferred = {}
+      s._tr_phase = None
+      s.translation_cache_hits = []
       super().clear( tr_top )
 
+    #---------------------------------------------------------------------
+    # Component skipping
+    #---------------------------------------------------------------------
+
+    def _gen_component_skips( s ):
+      # m -> the component whose recorded side effects are replayed for m
+      s._tr_skipped = {}
+      # m -> { phase: [ struct dtypes ] } of translated or cached m
+      s._tr_structs = {}
+      # m -> ( cache key, cached src or None )
+      s._tr_cache = {}
+      # unique name -> m, modules left to the translation workers
+      s._tr_deferred = {}
+
+      use_cache = s.use_translation_cache and TranslationCache.is_enabled()
+      struct_dtypes = None
+      reps = {}
+
+      def visit( m ):
+        nonlocal struct_dtypes
+        if m is not s.tr_top and not isinstance( m, Placeholder ):
+          m_rtype = m.get_metadata( StructuralRTLIRGenL1Pass.rtlir_type )
+          name = s.rtlir_tr_component_unique_name( m_rtype )
+
+          if name in reps:
+            s._tr_skipped[m] = reps[name]
+          else:
+            reps[name] = m
+            s._tr_structs[m] = {}
+            if use_cache:
+              key = TranslationCache.component_key( s, m )
+              entry = TranslationCache.lookup( key )
+              if entry is not None:
+                if struct_dtypes is None:
+                  struct_dtypes = TranslationCache.struct_dtypes( s.tr_top )
+                try:
+                  s._tr_structs[m] = { phase: [ struct_dtypes[x] for x in names ]
+                                       for phase, names in entry['structs'].items() }
+                  s._tr_skipped[m] = m
+                  s.translation_cache_hits.append( name )
+                except KeyError:
+                  # e.g. a struct that only appears in a temporary variable
+                  entry = None
+              s._tr_cache[m] = ( key, None if entry is None else entry['src'] )
+
+            if s._get_translation_jobs() > 1 and m not in s._tr_skipped:
+              # Skipped until the workers are done, see translate()
+              s._tr_deferred[name] = m
+              s._tr_skipped[m] = m
+
+        for child in m.get_child_components(repr):
+          visit( child )
+
+      visit( s.tr_top )
+
+      if len( s._tr_deferred ) < 2:
+        for m in s._tr_deferred.values():
+          del s._tr_skipped[m]
+        s._tr_deferred = {}
+
+    #---------------------------------------------------------------------
+    # Parallel translation
+    #---------------------------------------------------------------------
+
+    def _get_translation_jobs( s ):
+      if "fork" not in multiprocessing.get_all_start_methods():
+        return 1
+      return s.translation_jobs or multiprocessing.cpu_count()
+
+    def _gen_deferred_behavioral_trans_metadata( s, ms ):
+      # Generate the behavioral RTLIR of the deferred modules ms, and of
+      # nothing else, by skipping the top module for the walk
+      for m in ms:
+        del s._tr_skipped[m]
+      is_top_skipped = s.tr_top in s._tr_skipped
+      s._tr_skipped[s.tr_top] = s.tr_top
+      s._gen_behavioral_trans_metadata( s.tr_top )
+      if not is_top_skipped:
+        del s._tr_skipped[s.tr_top]
+
+    def _translate_deferred_components( s, names ):
+      """Translate the deferred modules with the given unique names in a
+      forked worker. Return { name: ( src, { phase: [ full struct names
+      ] } ) } of the modules translated without errors."""
+      ms = [ s._tr_deferred[name] for name in names ]
+      try:
+        s._gen_deferred_behavioral_trans_metadata( ms )
+        # The top module is translated by the parent process
+        s._tr_skipped[s.tr_top] = s.tr_top
+        s._tr_structs[s.tr_top] = {}
+        s._translate_phases()
+      except Exception:
+        # The parent process translates them again and reports the error
+        return {}
+
+      ret = {}
+      for name, m in zip( names, ms ):
+        try:
+          src = s._translate_component_src( m )
+        except Exception:
+          continue
+        ret[name] = ( src, { phase: [ x.get_full_name() for x in dtypes ]
+                             for phase, dtypes in s._tr_structs[m].items() } )
+      return ret
+
+    def _get_deferred_buckets( s, njobs ):
+      # Longest-processing-time-first assignment of the modules to the
+      # workers. The cost of a module is estimated from the size of its
+      # update blocks and the number of its attributes.
+      def cost( m ):
+        m_rtype = m.get_metadata( StructuralRTLIRGenL1Pass.rtlir_type )
+        info = type(m).__dict__.get( '_name_info', {} )
+        return 64 * len( m_rtype.properties ) + \
+               sum( len( info[blk.__name__][1] ) for blk in
+                    get_ordered_upblks( m ) + get_ordered_update_ff( m )
+                    if blk.__name__ in info )
+
+      buckets = [ ( 0, i, [] ) for i in range( njobs ) ]
+      for name, m in sorted( s._tr_deferred.items(), key=lambda x: -cost(x[1]) ):
+        load, i, names = min( buckets )
+        names.append( name )
+        buckets[i] = ( load + cost(m), i, names )
+      return [ names for _, _, names in buckets if names ]
+
+    def _translate_deferred( s ):
+      global _forked_translator
+      buckets = s._get_deferred_buckets( min( s._get_translation_jobs(), len(s._tr_deferred) ) )
+
+      _forked_translator = s
+      try:
+        with multiprocessing.get_context( "fork" ).Pool( len(buckets) ) as pool:
+          results = pool.map( _translate_in_forked_worker, buckets, chunksize=1 )
+      finally:
+        _forked_translator = None
+
+      struct_dtypes = TranslationCache.struct_dtypes( s.tr_top )
+      failed = []
+      for name, m in s._tr_deferred.items():
+        result = next( ( x[name] for x in results if name in x ), None )
+        try:
+          src, structs = result
+          s._tr_structs[m] = { phase: [ struct_dtypes[x] for x in names ]
+                               for phase, names in structs.items() }
+        except ( TypeError, KeyError ):
+          failed.append( m )
+          continue
+        key = s._tr_cache.get( m, ( None, None ) )[0]
+        TranslationCache.store( key, src, structs )
+        s._tr_cache[m] = ( key, src )
+
+      # Modules that failed or whose structs we cannot find are translated
+      # here as if they had not been deferred
+      if failed:
+        s._gen_deferred_behavioral_trans_metadata( failed )
+      s._tr_deferred = {}
+
+    # Override
+    def is_component_skipped( s, m ):
+      if s._tr_skipped is None:
+        s._gen_component_skips()
+      return m in s._tr_skipped
+
+    # Override
+    def replay_skipped_component( s, m, phase ):
+      for dtype in s._tr_structs[ s._tr_skipped[m] ].get( phase, () ):
+        s.rtlir_data_type_translation( m, dtype )
+
+    # Override
+    def rtlir_data_type_translation( s, m, dtype ):
+      # Record the structs each module declares so that we can replay them
+      if isinstance( dtype, rdt.Struct ) and m in s._tr_structs and m not in s._tr_skipped:
+        s._tr_structs[m].setdefault( s._tr_phase, [] ).append( dtype )
+      return super().rtlir_data_type_translation( m, dtype )
+
     def _gen_hierarchy_metadata( s, structural_ns, hierarchy_ns ):
       metadata = getattr( s.structural, structural_ns, {} )
       result = getattr( s.hierarchy, hierarchy_ns )
@@ -35,16 +253,28 @@ def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
         if Type not in result:
           result[ Type ] = data
 
+    def _translate_phases( s ):
+      s.rtlir_tr_initialize()
+      s._tr_phase = 'behavioral'
+      s.translate_behavioral( s.tr_top )
+      s._tr_phase = 'structural'
+      s.translate_structural( s.tr_top )
+      s._tr_phase = 'component'
+
+    def _translate_component_src( s, m ):
+      return s.rtlir_tr_component(
+          _get_component_nspace( s.behavioral, m ),
+          _get_component_nspace( s.structural, m ),
+      )
+
     # Override
-    def translate( s, tr_top, tr_cfgs = None ):
+    def translate( s, tr_top, tr_cfgs = None, stream = None ):
+      """Translate the hierarchy under tr_top into hierarchy.src.
 
-      def get_component_nspace( namespace, m ):
-        ns = TranslatorMetadata()
-        for name, metadata_d in vars(namespace).items():
-          # Hierarchical metadata will not be added
-          if m in metadata_d:
-            setattr( ns, name, metadata_d[m] )
-        return ns
+      If a file-like stream is given, the source is written to it
+      instead and each module is written as soon as it is generated,
+      so the whole source never has to be held in memory.
+      """
 
       def translate_component( m, components ):
         for child in m.get_child_components(repr):
@@ -52,10 +282,21 @@ def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
 
         name = s.structural.component_unique_name[m]
         if name not in components:
-          components[name] = s.rtlir_tr_component(
-              get_component_nspace( s.behavioral, m ),
-              get_component_nspace( s.structural, m ),
-          )
+          key, src = s._tr_cache.get( m, ( None, None ) )
+          if src is not None:
+            s.replay_skipped_component( m, 'component' )
+          else:
+            src = s._translate_component_src( m )
+            if key is not None:
+              structs = { phase: [ x.get_full_name() for x in dtypes ]
+                          for phase, dtypes in s._tr_structs[m].items() }
+              TranslationCache.store( key, src, structs )
+          if stream is None:
+            components[name] = src
+          else:
+            # Only remember that the module has been emitted
+            s.rtlir_tr_src_layout_component( src, stream )
+            components[name] = None
         s._gen_hierarchy_metadata( 'decl_type_vector', 'decl_type_vector' )
         s._gen_hierarchy_metadata( 'decl_type_array', 'decl_type_array'   )
         s._gen_hierarchy_metadata( 'decl_type_struct', 'decl_type_struct' )
@@ -71,14 +312,26 @@ def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
       s.hierarchy.decl_type_struct = {}
 
       try:
-        s.rtlir_tr_initialize()
-        s.translate_behavioral( s.tr_top )
-        s.translate_structural( s.tr_top )
+        if s._tr_skipped is None:
+          s._gen_component_skips()
+        if s._tr_deferred:
+          s._translate_deferred()
+        s._translate_phases()
+        if stream is not None:
+          # All data types have been declared at this point
+          s._gen_hierarchy_metadata( 'decl_type_vector', 'decl_type_vector' )
+          s._gen_hierarchy_metadata( 'decl_type_array', 'decl_type_array'   )
+          s._gen_hierarchy_metadata( 'decl_type_struct', 'decl_type_struct' )
+          s.rtlir_tr_src_layout_begin( s.hierarchy, stream )
         translate_component( s.tr_top, s.hierarchy.components )
       except AssertionError as e:
         msg = '' if e.args[0] is None else e.args[0]
         raise RTLIRTranslationError( s.tr_top, msg )
 
+      if stream is not None:
+        s.hierarchy.component_src = s.hierarchy.src = None
+        return
+
       # Generate the representation for all components
       s.hierarchy.component_src = s.rtlir_tr_components(s.hierarchy.components)
 
@@ -95,6 +348,12 @@ def mk_RTLIRTranslator( _StructuralTranslator, _BehavioralTranslator ):
     def rtlir_tr_src_layout( s, hierarchy ):
       raise NotImplementedError()
 
+    def rtlir_tr_src_layout_begin( s, hierarchy, stream ):
+      raise NotImplementedError()
+
+    def rtlir_tr_src_layout_component( s, component_src, stream ):
+      raise NotImplementedError()
+
     def rtlir_tr_components( s, components ):
       raise NotImplementedError()
 
@@ -0,0 +1,404 @@
+"""
+========================================================================
+TranslationCache.py
+========================================================================
+A persistent on-disk cache of the translated source of each module. A
+design is usually built from many instances of a few parameterized
+classes, and most of them do not change between two translations, so
+RTLIRTranslator emits every module it finds here without generating
+and type checking its RTLIR.
+
+Each entry is stored in its own JSON file named after its key. The key
+of a component covers everything its module text is derived from:
+
+- the translator, i.e. the source of the translator classes and the
+  RTLIR passes
+- the module name, which encodes the class and its parameters
+- the translation configs of the component and its children
+- the RTLIR types of its ports, wires, constants, interfaces and
+  subcomponents, including the values of the constants
+- its connections and the initial values of its wire arrays
+- the source, location and free variables of its update blocks
+
+Besides the source we keep the names of the structs the module declared
+in each translation phase, so that the struct definitions of the
+hierarchy come out in the same order as without the cache.
+
+The cache directory defaults to $XDG_CACHE_HOME/pymtl3/translation (or
+~/.cache/pymtl3/translation) and can be set with the
+PYMTL_TRANSLATION_CACHE_DIR environment variable or set_cache_dir(). An
+empty PYMTL_TRANSLATION_CACHE_DIR or set_cache_dir(None) disables the
+cache. The modification time of an entry records its last use, and the
+least recently used entries are evicted once the cache grows beyond
+PYMTL_TRANSLATION_CACHE_SIZE MB (256 by default, see set_max_size()).
+
+Date   : Oct 17, 2026
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import types
+
+from pymtl3.datatypes import Bits
+from pymtl3.dsl import Placeholder, WireArray
+from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.passes import rtlir
+from pymtl3.passes.rtlir import RTLIRDataType as rdt
+from pymtl3.passes.rtlir import RTLIRType as rt
+from pymtl3.passes.rtlir.structural.StructuralRTLIRGenL1Pass import (
+    StructuralRTLIRGenL1Pass,
+)
+from pymtl3.passes.rtlir.util.utility import get_ordered_update_ff, get_ordered_upblks
+
+# Bump this when the layout of the entries or the key changes
+_FORMAT = 1
+
+def _default_cache_dir():
+  path = os.environ.get( "PYMTL_TRANSLATION_CACHE_DIR" )
+  if path is not None:
+    return path or None
+  base = os.environ.get( "XDG_CACHE_HOME" ) or os.path.join( os.path.expanduser("~"), ".cache" )
+  return os.path.join( base, "pymtl3", "translation" )
+
+_cache_dir = _default_cache_dir()
+_max_size  = int( os.environ.get( "PYMTL_TRANSLATION_CACHE_SIZE" ) or 256 ) * 1024 * 1024
+
+# Estimated total size of the entries, None until we scan the directory
+_cache_size = None
+
+def get_cache_dir():
+  return _cache_dir
+
+def set_cache_dir( path ):
+  """ Set the cache directory. None disables the cache. """
+  global _cache_dir, _cache_size
+  _cache_dir  = None if path is None else str(path)
+  _cache_size = None
+
+def get_max_size():
+  return _max_size
+
+def set_max_size( max_size ):
+  """ Set the size bound of the cache in MB. """
+  global _max_size
+  _max_size = int( max_size * 1024 * 1024 )
+
+def is_enabled():
+  return _cache_dir is not None
+
+#-------------------------------------------------------------------------
+# Translator fingerprint
+#-------------------------------------------------------------------------
+
+# path -> ( (mtime, size), digest )
+_file_digests = {}
+
+# translator class -> fingerprint
+_fingerprints = {}
+
+def _hash_file( path ):
+  try:
+    st = os.stat( path )
+  except OSError:
+    return ""
+  stat = ( st.st_mtime_ns, st.st_size )
+  cached = _file_digests.get( path )
+  if cached is not None and cached[0] == stat:
+    return cached[1]
+  with open( path, "rb" ) as f:
+    digest = hashlib.blake2b( f.read(), digest_size=16 ).hexdigest()
+  _file_digests[ path ] = ( stat, digest )
+  return digest
+
+def _py_files( path ):
+  if os.path.isfile( path ):
+    return [ path ]
+  ret = []
+  for root, dirs, files in os.walk( path ):
+    dirs[:] = sorted( x for x in dirs if x not in ( "test", "__pycache__" ) )
+    ret.extend( os.path.join( root, x ) for x in sorted( files ) if x.endswith( ".py" ) )
+  return ret
+
+def _translator_fingerprint( cls ):
+  # A translator is defined by the backend package of every class in its
+  # MRO and by the RTLIR passes. We hash the whole packages because the
+  # classes call helpers that live next to them.
+  try:
+    return _fingerprints[ cls ]
+  except KeyError:
+    pass
+
+  paths = { os.path.dirname( os.path.abspath( rtlir.__file__ ) ) }
+  for klass in cls.__mro__:
+    path = getattr( sys.modules.get( klass.__module__ ), "__file__", None )
+    if path is None:
+      continue
+    path  = os.path.abspath( path )
+    names = klass.__module__.split( "." )
+    if names[:3] == [ "pymtl3", "passes", "backends" ] and len(names) > 4:
+      # Go up to pymtl3/passes/backends/<backend>
+      for _ in range( len(names) - 4 ):
+        path = os.path.dirname( path )
+    paths.add( path )
+
+  h = hashlib.blake2b( digest_size=16 )
+  h.update( f"{cls.__module__}.{cls.__qualname__}".encode() )
+  for path in sorted( paths ):
+    for x in _py_files( path ):
+      h.update( x.encode() )
+      h.update( _hash_file( x ).encode() )
+
+  _fingerprints[ cls ] = ret = h.hexdigest()
+  return ret
+
+#-------------------------------------------------------------------------
+# Component key
+#-------------------------------------------------------------------------
+
+def _rel( obj, prefix ):
+  # The name of obj relative to the component whose repr is prefix, so
+  # that all instances of a module get the same key.
+  name = repr( obj )
+  if prefix != "s" and ( name == prefix or name.startswith( ( prefix + ".", prefix + "[" ) ) ):
+    return "s" + name[ len(prefix): ]
+  return name
+
+def _value_sig( v, prefix ):
+  if v is None or isinstance( v, ( bool, int, float, str, Bits ) ):
+    return repr( v )
+  if isinstance( v, ( list, tuple ) ):
+    return f"{type(v).__name__}({','.join( _value_sig( x, prefix ) for x in v )})"
+  if isinstance( v, dict ):
+    return "{" + ",".join( f"{_value_sig( k, prefix )}:{_value_sig( x, prefix )}"
+                           for k, x in sorted( v.items(), key=lambda kv: repr(kv[0]) ) ) + "}"
+  if isinstance( v, NamedObject ):
+    return _rel( v, prefix )
+  if isinstance( v, types.ModuleType ):
+    return f"module {v.__name__}"
+  if isinstance( v, type ):
+    ret = f"{v.__module__}.{v.__qualname__}"
+    fields = getattr( v, "__bitstruct_fields__", None )
+    if fields is not None:
+      ret += "{" + ",".join( f"{k}:{_value_sig( x, prefix )}" for k, x in fields.items() ) + "}"
+    return ret
+  if callable( v ) and hasattr( v, "__qualname__" ):
+    return f"{getattr( v, '__module__', '' )}.{v.__qualname__}"
+  ret = repr( v )
+  # Default reprs change from run to run
+  return type( v ).__qualname__ if " at 0x" in ret else ret
+
+def _dtype_sig( dtype ):
+  get_full_name = getattr( dtype, "get_full_name", None )
+  return get_full_name() if get_full_name is not None else str( dtype )
+
+def _type_sig( rtype, prefix ):
+  if isinstance( rtype, rt.Array ):
+    sub = rtype.get_sub_type()
+    ret = f"Array{rtype.get_dim_sizes()}({_type_sig( sub, prefix )})"
+    if isinstance( sub, rt.Const ):
+      ret += _value_sig( rtype.get_obj(), prefix )
+    return ret
+  if isinstance( rtype, rt.Const ):
+    return f"Const({_dtype_sig( rtype.get_dtype() )},{_value_sig( rtype.get_object(), prefix )})"
+  if isinstance( rtype, rt.Port ):
+    return f"Port({rtype.get_direction()},{_dtype_sig( rtype.get_dtype() )})"
+  if isinstance( rtype, rt.Signal ):
+    return f"{type(rtype).__name__}({_dtype_sig( rtype.get_dtype() )})"
+  if isinstance( rtype, rt.InterfaceView ):
+    props = sorted( rtype.properties.items() )
+    return f"{rtype.get_name()}(" + ",".join( f"{k}:{_type_sig( x, prefix )}" for k, x in props ) + ")"
+  if isinstance( rtype, rt.Component ):
+    ports = rtype.get_ports_packed() + rtype.get_ifc_views_packed()
+    return f"{rtype.get_name()}(" + ",".join( f"{k}:{_type_sig( x, prefix )}" for k, x in ports ) + ")"
+  return repr( rtype )
+
+def _cfg_sig( tr_cfgs, m ):
+  if not tr_cfgs:
+    return None
+  cfg = tr_cfgs[ m ]
+  options = getattr( cfg, "Options", None ) or vars( cfg )
+  return [ ( k, _value_sig( getattr( cfg, k, None ), "s" ) ) for k in sorted( options ) ]
+
+def _code_names( code ):
+  names = set()
+  stack = [ code ]
+  while stack:
+    code = stack.pop()
+    names.update( code.co_names )
+    stack.extend( x for x in code.co_consts if isinstance( x, types.CodeType ) )
+  return names
+
+def _upblk_sig( m, blk, prefix ):
+  info = type( m ).__dict__.get( "_name_info", {} ).get( blk.__name__ )
+  # ( is_lambda, src, line, file )
+  ret = [ blk.__name__, list( info[:4] ) if info else None ]
+
+  code = getattr( blk, "__code__", None )
+  if code is not None:
+    cells = blk.__closure__ or ()
+    for name, cell in zip( code.co_freevars, cells ):
+      try:
+        ret.append( ( name, _value_sig( cell.cell_contents, prefix ) ) )
+      except ValueError: # empty cell
+        ret.append( ( name, None ) )
+    g = blk.__globals__
+    for name in sorted( _code_names( code ) ):
+      if name in g:
+        ret.append( ( name, _value_sig( g[ name ], prefix ) ) )
+  return ret
+
+def component_key( translator, m ):
+  """ Return the cache key of the module translator generates for m, or
+  None if m should not be cached. """
+  if isinstance( m, Placeholder ):
+    return None
+
+  rtype  = m.get_metadata( StructuralRTLIRGenL1Pass.rtlir_type )
+  prefix = repr( m )
+
+  children = []
+  for child in m.get_child_components( repr ):
+    # The instantiation of a placeholder depends on its own pass configs
+    if isinstance( child, Placeholder ):
+      return None
+    c_rtype = child.get_metadata( StructuralRTLIRGenL1Pass.rtlir_type )
+    children.append( [ _rel( child, prefix ),
+                       translator.rtlir_tr_component_unique_name( c_rtype ),
+                       _cfg_sig( translator.tr_cfgs, child ) ] )
+
+  props = sorted( rtype.get_all_properties().items() )
+  conns = sorted( ( _rel( u, prefix ), _rel( v, prefix ) )
+                  for u, v in translator.inst_conns.get( m, () ) )
+  # Initial values of wire arrays become constant connections
+  conns += [ ( k, _value_sig( obj._dsl.init, prefix ) ) for k, obj in sorted( m.__dict__.items() )
+             if isinstance( obj, WireArray ) and obj._dsl.init is not None ]
+  upblks = [ _upblk_sig( m, blk, prefix )
+             for blk in get_ordered_upblks( m ) + get_ordered_update_ff( m ) ]
+
+  data = [
+    _FORMAT,
+    _translator_fingerprint( type(translator) ),
+    translator.rtlir_tr_component_unique_name( rtype ),
+    rtype.get_name(),
+    rtype.get_file_info(),
+    _cfg_sig( translator.tr_cfgs, m ),
+    [ ( k, _type_sig( x, prefix ) ) for k, x in props ],
+    children,
+    conns,
+    upblks,
+  ]
+  return hashlib.blake2b( json.dumps( data ).encode(), digest_size=20 ).hexdigest()
+
+#-------------------------------------------------------------------------
+# Struct lookup
+#-------------------------------------------------------------------------
+
+def struct_dtypes( top ):
+  """ Return a dict that maps the full names of all struct types that
+  appear in the interfaces, wires and constants of the hierarchy under
+  top to the RTLIR data types. """
+  ret = {}
+
+  def visit_dtype( dtype ):
+    if isinstance( dtype, rdt.PackedArray ):
+      dtype = dtype.get_sub_dtype()
+    if isinstance( dtype, rdt.Struct ) and dtype.get_full_name() not in ret:
+      ret[ dtype.get_full_name() ] = dtype
+      for field in dtype.get_all_properties().values():
+        visit_dtype( field )
+
+  def visit_type( rtype ):
+    if isinstance( rtype, rt.Array ):
+      visit_type( rtype.get_sub_type() )
+    elif isinstance( rtype, rt.Signal ):
+      visit_dtype( rtype.get_dtype() )
+    elif isinstance( rtype, ( rt.InterfaceView, rt.Component ) ):
+      for x in rtype.properties.values():
+        if not isinstance( x, rt.Component ):
+          visit_type( x )
+
+  def visit( m ):
+    visit_type( m.get_metadata( StructuralRTLIRGenL1Pass.rtlir_type ) )
+    for child in m.get_child_components( repr ):
+      visit( child )
+
+  visit( top )
+  return ret
+
+#-------------------------------------------------------------------------
+# Public APIs
+#-------------------------------------------------------------------------
+
+def _entry_file( key ):
+  return os.path.join( _cache_dir, key + ".json" )
+
+def lookup( key ):
+  """ Return the cached entry { 'src': ..., 'structs': { phase: [ full
+  struct names ] } } of key, or None. """
+  if _cache_dir is None or key is None:
+    return None
+  try:
+    with open( _entry_file( key ) ) as f:
+      entry = json.load( f )
+  except Exception:
+    return None
+  if not isinstance( entry, dict ) or entry.get( "key" ) != key:
+    return None
+  try:
+    os.utime( _entry_file( key ) )
+  except OSError:
+    pass
+  return entry
+
+def store( key, src, structs ):
+  """ Write an entry. Writes are atomic so concurrent processes at worst
+  translate a module twice. """
+  global _cache_size
+  if _cache_dir is None or key is None:
+    return
+  entry = { "key": key, "src": src, "structs": structs }
+  try:
+    os.makedirs( _cache_dir, exist_ok=True )
+    if _cache_size is None:
+      _cache_size = sum( size for _, size, _ in _list_entries() )
+    fd, tmp = tempfile.mkstemp( dir=_cache_dir, suffix=".tmp" )
+    try:
+      with os.fdopen( fd, "w" ) as f:
+        json.dump( entry, f )
+      _cache_size += os.path.getsize( tmp )
+      os.replace( tmp, _entry_file( key ) )
+    except BaseException:
+      os.unlink( tmp )
+      raise
+    if _cache_size > _max_size:
+      _evict()
+  except OSError:
+    pass
+
+def _list_entries():
+  ret = []
+  for name in os.listdir( _cache_dir ):
+    if name.endswith( ".json" ):
+      try:
+        st = os.stat( os.path.join( _cache_dir, name ) )
+      except OSError: # evicted by another process
+        continue
+      ret.append( ( st.st_mtime, st.st_size, name ) )
+  return ret
+
+def _evict():
+  # Remove the least recently used entries first
+  global _cache_size
+  entries = _list_entries()
+  total = sum( size for _, size, _ in entries )
+  for _, size, name in sorted( entries ):
+    if total <= _max_size:
+      break
+    try:
+      os.unlink( os.path.join( _cache_dir, name ) )
+    except OSError:
+      pass
+    total -= size
+  _cache_size = total
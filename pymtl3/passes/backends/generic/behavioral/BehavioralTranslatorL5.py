@@ -28,6 +28,11 @@ class BehavioralTranslatorL5( BehavioralTranslatorL4 ):
 
   # Override
   def _gen_behavioral_trans_metadata( s, m ):
+    if s.is_component_skipped( m ):
+      for child in m.get_child_components(repr):
+        s._gen_behavioral_trans_metadata( child )
+      return
+
     m.apply( BehavioralRTLIRGenL5Pass( s.tr_top ) )
     m.apply( BehavioralRTLIRTypeCheckL5Pass( s.tr_top ) )
     s.behavioral.rtlir[m] = \
@@ -47,6 +52,9 @@ class BehavioralTranslatorL5( BehavioralTranslatorL4 ):
 
   # Override
   def translate_behavioral( s, m ):
-    super().translate_behavioral( m )
+    if s.is_component_skipped( m ):
+      s.replay_skipped_component( m, 'behavioral' )
+    else:
+      super().translate_behavioral( m )
     for child in m.get_child_components(repr):
       s.translate_behavioral( child )
@@ -169,6 +169,10 @@ class StructuralTranslatorL1( BaseRTLIRTranslator ):
     else:
       s.structural.component_no_synthesis[m] = False
 
+    if s.is_component_skipped( m ):
+      s.replay_skipped_component( m, 'structural' )
+      return
+
     # Translate declarations of signals
     s.translate_decls( m )
 
@@ -0,0 +1,111 @@
+#=========================================================================
+# VerilatorBuildCache.py
+#=========================================================================
+# Date   : Oct 17, 2026
+"""Provide a content-addressed cache of verilated shared libraries.
+
+Every build is stored in ``<cache dir>/<key>/`` where the key is a hash of
+everything that goes into the shared library: the translated Verilog, the
+generated C wrapper, the serialized import configuration, extra C sources,
+and the Verilator/C compiler versions. A cached library is hard-linked (or
+copied across file systems) into the working directory. The modification
+time of an entry records its last use, and the least recently used
+entries are evicted once the cache grows beyond its size bound.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from fasteners import InterProcessLock
+
+_tool_versions = {}
+
+def get_tool_version( cmd ):
+  """Return the output of `cmd --version`, cached per process."""
+  if cmd not in _tool_versions:
+    try:
+      out = subprocess.check_output( [cmd, "--version"], stderr = subprocess.STDOUT )
+      _tool_versions[cmd] = out.decode( 'utf-8', 'replace' ).strip()
+    except (OSError, subprocess.CalledProcessError):
+      _tool_versions[cmd] = ""
+  return _tool_versions[cmd]
+
+class VerilatorBuildCache:
+
+  def __init__( s, path, max_size ):
+    s.path = os.path.abspath( os.path.expanduser( path ) )
+    # max_size is in MB
+    s.max_size = max_size * 1024 * 1024
+    os.makedirs( s.path, exist_ok = True )
+    s.lock = InterProcessLock( os.path.join( s.path, ".lock" ) )
+
+  @staticmethod
+  def compute_key( files, cfg, tools ):
+    """Hash the content of `files`, the json-serializable `cfg`, and the
+    versions of `tools`."""
+    h = hashlib.blake2b( digest_size = 20 )
+    for name in files:
+      with open( name, 'rb' ) as fd:
+        h.update( fd.read() )
+      h.update( b'\0' )
+    h.update( json.dumps( cfg, sort_keys = True, default = str ).encode() )
+    for tool in tools:
+      h.update( get_tool_version( tool ).encode() )
+    return h.hexdigest()
+
+  def _entry( s, key ):
+    return os.path.join( s.path, key )
+
+  def fetch( s, key, files ):
+    """Place the cached `files` of `key` in the working directory. Return
+    True on a hit."""
+    entry = s._entry( key )
+    with s.lock:
+      if not all( os.path.isfile( os.path.join( entry, f ) ) for f in files ):
+        return False
+      for f in files:
+        # Never write through an existing link into the cache
+        if os.path.lexists( f ):
+          os.remove( f )
+        src = os.path.join( entry, f )
+        try:
+          os.link( src, f )
+        except OSError:
+          shutil.copy2( src, f )
+      os.utime( entry )
+    return True
+
+  def store( s, key, files ):
+    """Copy the freshly built `files` into the cache under `key`."""
+    entry = s._entry( key )
+    tmp = f"{entry}.tmp{os.getpid()}"
+    with s.lock:
+      if os.path.isdir( entry ):
+        os.utime( entry )
+        return
+      shutil.rmtree( tmp, ignore_errors = True )
+      os.makedirs( tmp )
+      for f in files:
+        shutil.copy2( f, os.path.join( tmp, f ) )
+      os.replace( tmp, entry )
+      s._evict()
+
+  def _evict( s ):
+    entries = []
+    total = 0
+    for name in os.listdir( s.path ):
+      entry = os.path.join( s.path, name )
+      if name.startswith( '.' ) or not os.path.isdir( entry ):
+        continue
+      size = sum( os.path.getsize( os.path.join( entry, f ) ) for f in os.listdir( entry ) )
+      entries.append( (os.path.getmtime( entry ), size, entry) )
+      total += size
+
+    # Remove the least recently used entries first
+    for _, size, entry in sorted( entries ):
+      if total <= s.max_size:
+        break
+      shutil.rmtree( entry, ignore_errors = True )
+      total -= size
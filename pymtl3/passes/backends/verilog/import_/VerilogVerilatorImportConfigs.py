@@ -64,6 +64,11 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     # Expects a boolean value
     "vl_enable_assert" : True,
 
+    # --savable
+    # Expects a boolean value; True to allow saving and restoring the
+    # state of the verilated model (used by sim_checkpoint/sim_restore)
+    "vl_savable" : False,
+
     # Verilator warning-related options
 
     # False to disable the warnings, True to enable
@@ -81,6 +86,15 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     # Should be one of ['zeros', 'ones', 'rand']
     "vl_xinit" : "zeros",
 
+    # --threads
+    # Number of threads the verilated model uses at runtime
+    "vl_threads" : 1,
+
+    # --output-split
+    # Split the generated C++ into files of about this many statements so
+    # that they can be compiled in parallel; 0 to disable this option
+    "vl_output_split" : 0,
+
     # --trace
     # Expects a boolean value
     "vl_trace" : False,
@@ -138,18 +152,43 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     # include library linker flags/names such as `-lfoo`.
     "ld_libs" : "-lpthread",
 
+    # Number of concurrent C compiler processes. 1 compiles all sources in
+    # a single compiler call; otherwise each source is compiled into an
+    # object file and then linked. 0 to use one process per CPU.
+    "c_jobs" : 1,
+
     "c_flags" : "",
+
+    # Global build cache options
+
+    # Directory of the verilated shared libraries shared across working
+    # directories; "" to use $PYMTL_VERILATOR_BUILD_CACHE. The cache is
+    # disabled if neither is set.
+    "vl_build_cache_dir" : "",
+
+    # Size bound of the build cache in MB. The least recently used builds
+    # are evicted first.
+    "vl_build_cache_max_size" : 4096,
   }
 
   Checkers = {
     ("enable", "verbose", "vl_enable_assert", "vl_line_trace", "vl_W_lint", "vl_W_style",
      "vl_W_fatal", "vl_trace", "vl_coverage", "vl_line_coverage", "vl_toggle_coverage",
-     "vl_trace_on_demand"):
+     "vl_trace_on_demand", "vl_savable"):
       Checker( lambda v: isinstance(v, bool), "expects a boolean" ),
 
-    ("c_flags", "ld_flags", "ld_libs", "vl_trace_filename", "vl_trace_on_demand_portname"):
+    ("c_flags", "ld_flags", "ld_libs", "vl_trace_filename", "vl_trace_on_demand_portname",
+     "vl_build_cache_dir"):
       Checker( lambda v: isinstance(v, str),  "expects a string" ),
 
+    "vl_threads": Checker( lambda v: isinstance(v, int) and v > 0, "expects a positive integer" ),
+
+    ("vl_output_split", "c_jobs"): Checker( lambda v: isinstance(v, int) and v >= 0,
+                                            "expects a non-negative integer" ),
+
+    "vl_build_cache_max_size": Checker( lambda v: isinstance(v, int) and v > 0,
+                                        "expects a positive integer (MB)" ),
+
     "vl_Wno_list": Checker( lambda v: isinstance(v, list) and all(w in VerilogPlaceholderConfigs.Warnings for w in v),
                             "expects a list of warnings" ),
 
@@ -252,6 +291,10 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
   def get_shared_lib_path( s ):
     return f'lib{s.translated_top_module}_v.so'
 
+  def get_build_cache_dir( s ):
+    path = s.vl_build_cache_dir or os.environ.get("PYMTL_VERILATOR_BUILD_CACHE", "")
+    return expand(path) if path else None
+
   #---------------------
   # Command generation
   #---------------------
@@ -269,13 +312,15 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     include     = "" if not s.v_include else \
                   " ".join("-I" + path for path in s.v_include)
     en_assert   = "--assert" if s.vl_enable_assert else ""
+    savable     = "--savable" if s.vl_savable else ""
 
     # Always verilator -O3 and unroll because -O0 may lead to this error:
     # -Info: Command Line disabled gate optimization with -Og/-O0.  This may cause ordering problems
     opt_level   = "-O3"
     loop_unroll = "--unroll-count 1000000"
     stmt_unroll = "--unroll-stmts 1000000"
-    thread      = "--threads 1"
+    thread      = f"--threads {s.vl_threads}"
+    output_split = f"--output-split {s.vl_output_split}" if s.vl_output_split else ""
     trace       = "--trace" if s.vl_trace else ""
     trace_max_width = f"--trace-max-width {s.vl_trace_max_width}" if s.vl_trace_max_width else ""
     trace_max_array = f"--trace-max-array {s.vl_trace_max_array}" if s.vl_trace_max_array else ""
@@ -285,9 +330,9 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     warnings    = s._create_vl_warning_cmd()
 
     all_opts = [
-      top_module, mk_dir, include, en_assert, opt_level, loop_unroll,
+      top_module, mk_dir, include, en_assert, savable, opt_level, loop_unroll,
       # stmt_unroll, trace, warnings, flist, src, coverage,
-      stmt_unroll, thread, trace, trace_max_width, trace_max_array, warnings, src, vlibs, coverage,
+      stmt_unroll, thread, output_split, trace, trace_max_width, trace_max_array, warnings, src, vlibs, coverage,
       line_cov, toggle_cov,
     ]
 
@@ -326,10 +371,7 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     # of the second ...
     # (7/9/2020): Use -O0 by default so that normally the tests are super fast and don't corrupt cffi,
     # but when the user gives a "fast" flag, it uses -O1.
-    if s.fast:
-      c_flags = "-O1"
-    else:
-      c_flags = "-O0"
+    c_flags = s._get_c_opt_level()
 
     if not s.is_default("c_flags"):
       c_flags += f" {expand(s.c_flags)}"
@@ -341,13 +383,43 @@ class VerilogVerilatorImportConfigs( BasePassConfigs ):
     c_src_files = " ".join(s._get_c_src_files())
     ld_flags = expand(s.ld_flags)
     ld_libs = s.ld_libs
-    coverage = "-DVM_COVERAGE" if s.vl_coverage or \
-                                  s.vl_line_coverage or \
-                                  s.vl_toggle_coverage else ""
+    coverage = s._get_c_coverage_flag()
 
     return f"g++ {c_flags} {c_include_path} {ld_flags}"\
            f" -o {out_file} {c_src_files} {ld_libs} {coverage}"
 
+  def get_c_jobs( s ):
+    return s.c_jobs or os.cpu_count() or 1
+
+  def create_cc_obj_cmds( s ):
+    """Return a list of ( object file, command ) that compile each C++
+    source into an object file under the Verilator make directory."""
+    extra_flags = f" {expand(s.c_flags)}" if not s.is_default("c_flags") else ""
+    common = f"-fPIC -std=c++11 -pthread "\
+             f"{' '.join('-I'+p for p in s._get_all_includes() if p)} "\
+             f"{s._get_c_coverage_flag()}"
+    obj_dir = f"{s.vl_mk_dir}/pymtl_objs"
+    os.makedirs( obj_dir, exist_ok = True )
+
+    fast_srcs, slow_srcs, global_srcs = s._get_vl_srcs()
+    # SLOW files are only executed once, apply no optimization to them
+    slow_opt = "-O0" if s.fast else s._get_c_opt_level()
+    srcs = [ (src, s._get_c_opt_level()) for src in fast_srcs + global_srcs ] + \
+           [ (src, slow_opt) for src in slow_srcs ]
+
+    cmds = []
+    for i, (src, opt) in enumerate( srcs ):
+      base = os.path.splitext( os.path.basename( src ) )[0]
+      obj = f"{obj_dir}/{i}_{base}.o"
+      cmds.append( (obj, f"g++ {opt}{extra_flags} {common} -c {src} -o {obj}") )
+    return cmds
+
+  def create_ld_cmd( s, objs ):
+    """Return the command that links `objs` into the shared library."""
+    extra_flags = f" {expand(s.c_flags)}" if not s.is_default("c_flags") else ""
+    return f"g++ {s._get_c_opt_level()}{extra_flags} -fPIC -shared -pthread "\
+           f"{expand(s.ld_flags)} -o {s.get_shared_lib_path()} {' '.join(objs)} {s.ld_libs}"
+
   def vprint( s, msg, nspaces = 0, use_fill = False ):
     if s.verbose:
       if use_fill:
@@ -392,11 +464,20 @@ $PYMTL_VERILATOR_INCLUDE_DIR is set or `pkg-config` has been configured properly
 
     return includes
 
-  def _get_c_src_files( s ):
+  def _get_c_opt_level( s ):
+    return "-O1" if s.fast else "-O0"
+
+  def _get_c_coverage_flag( s ):
+    return "-DVM_COVERAGE" if s.vl_coverage or \
+                              s.vl_line_coverage or \
+                              s.vl_toggle_coverage else ""
+
+  def _get_vl_srcs( s ):
+    """Return the FAST sources (including the C wrapper), the SLOW
+    sources, and the Verilator runtime sources of the verilated model."""
     top_module = s.translated_top_module.replace('__', '___05F')
     vl_mk_dir = s.vl_mk_dir
     vl_class_mk = f"{vl_mk_dir}/V{top_module}_classes.mk"
-    cxx_inputs = []
 
     # Add C wrapper
     o0 = []
@@ -413,6 +494,13 @@ $PYMTL_VERILATOR_INCLUDE_DIR is set or `pkg-config` has been configured properly
       objs += s._compile_vl_srcs_from_vl_class_mk( all_lines, s.vl_include_dir, "VM_GLOBAL_FAST" )
       objs += s._compile_vl_srcs_from_vl_class_mk( all_lines, s.vl_include_dir, "VM_GLOBAL_SLOW" )
 
+    return o1, o0, objs
+
+  def _get_c_src_files( s ):
+    top_module = s.translated_top_module.replace('__', '___05F')
+    cxx_inputs = []
+    o1, o0, objs = s._get_vl_srcs()
+
     with open(f"{top_module}_v__ALL_pickled.cpp", 'w') as out:
 
       if not s.fast:
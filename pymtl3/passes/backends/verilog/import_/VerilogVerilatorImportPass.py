@@ -15,6 +15,7 @@ import shutil
 import subprocess
 import sys
 import timeit
+from concurrent.futures import ThreadPoolExecutor
 from fasteners import InterProcessLock
 from functools import reduce
 from importlib import reload
@@ -41,6 +42,7 @@ from ..util.utility import (
     wrap,
 )
 from ..VerilogPlaceholderPass import VerilogPlaceholderPass
+from .VerilatorBuildCache import VerilatorBuildCache
 from .verilator_wrapper_c_template import template as c_template
 from .verilator_wrapper_py_template import template as py_template
 
@@ -113,6 +115,15 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``False``
   vl_enable_assert    = MetadataKey(bool)
 
+  #: Allow saving and restoring the state of the verilated model
+  #: (``--savable``). Required to checkpoint a simulation that contains
+  #: this imported component.
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: ``False``
+  vl_savable          = MetadataKey(bool)
+
   #: Verilator optimization level.
   #:
   #: Type: ``int``; input
@@ -227,6 +238,21 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``""``
   vl_trace_on_demand_portname = MetadataKey(str)
 
+  #: Number of threads the verilated model uses at runtime (``--threads``).
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``1``
+  vl_threads          = MetadataKey(int)
+
+  #: Split the generated C++ into files of about this many statements
+  #: (``--output-split``); 0 to disable.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``0``
+  vl_output_split     = MetadataKey(int)
+
   #: Optional flags to be passed to the C compiler.
   #:
   #: Type: ``str``; input
@@ -262,6 +288,29 @@ class VerilogVerilatorImportPass( BasePass ):
   #: Default value: ``''``
   ld_libs             = MetadataKey(str)
 
+  #: Number of concurrent C compiler processes. 1 compiles all sources in
+  #: a single compiler call; 0 to use one process per CPU.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``1``
+  c_jobs              = MetadataKey(int)
+
+  #: Directory of the global build cache shared across working directories.
+  #: Falls back to ``$PYMTL_VERILATOR_BUILD_CACHE``; disabled if neither is set.
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: ``''``
+  vl_build_cache_dir  = MetadataKey(str)
+
+  #: Size bound of the global build cache in MB.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``4096``
+  vl_build_cache_max_size = MetadataKey(int)
+
   # Import pass output pass data
 
   #: An instnace of :class:`VerilatorImportConfigs` containing the parsed options.
@@ -398,10 +447,17 @@ class VerilogVerilatorImportPass( BasePass ):
         with open( config_file, 'w' ) as fd:
           json.dump( cfg_d, fd, indent = 4 )
 
-        # Build the Verilated model
-        s.create_verilator_model( m, ph_cfg, ip_cfg )
+        # The C wrapper does not depend on the verilated sources, generate
+        # it first so that it is part of the build cache key.
         port_cdefs = s.create_verilator_c_wrapper( m, ph_cfg, ip_cfg, ports )
-        s.create_shared_lib( m, ph_cfg, ip_cfg )
+
+        # Build the Verilated model unless another working directory has
+        # built the same one
+        if not s.fetch_from_build_cache( ip_cfg, cfg_d ):
+          s.create_verilator_model( m, ph_cfg, ip_cfg )
+          s.create_shared_lib( m, ph_cfg, ip_cfg )
+          s.store_to_build_cache( ip_cfg )
+
         symbols = s.create_py_wrapper( m, ph_cfg, ip_cfg, rtype, ports, port_cdefs )
 
       lock.release()
@@ -423,6 +479,49 @@ class VerilogVerilatorImportPass( BasePass ):
 
     return imp
 
+  #-----------------------------------------------------------------------
+  # Global build cache
+  #-----------------------------------------------------------------------
+  # The shared library is the only build product needed to import the
+  # model, so we cache it keyed by everything it is built from.
+
+  def get_build_cache_key( s, ip_cfg, cfg_d ):
+    files = [ ip_cfg.translated_source_file, ip_cfg.get_c_wrapper_path() ] + \
+            [ expand(p) for p in ip_cfg.c_srcs ]
+    cfg = dict( cfg_d,
+      top_module = ip_cfg.translated_top_module,
+      fast = ip_cfg.fast,
+      vl_trace_max_width = ip_cfg.vl_trace_max_width,
+      vl_trace_max_array = ip_cfg.vl_trace_max_array,
+      v_include = ip_cfg.v_include,
+      vl_include_dir = os.environ.get("PYMTL_VERILATOR_INCLUDE_DIR"),
+    )
+    return VerilatorBuildCache.compute_key( files, cfg, [ "verilator", "g++" ] )
+
+  def fetch_from_build_cache( s, ip_cfg, cfg_d ):
+    s._build_cache = s._build_cache_key = None
+    cache_dir = ip_cfg.get_build_cache_dir()
+    if cache_dir is None:
+      return False
+
+    cache = VerilatorBuildCache( cache_dir, ip_cfg.vl_build_cache_max_size )
+    key = s.get_build_cache_key( ip_cfg, cfg_d )
+    if cache.fetch( key, [ ip_cfg.get_shared_lib_path() ] ):
+      ip_cfg.vprint(f"{ip_cfg.translated_top_module} is found in build cache {cache_dir}!", 2)
+      return True
+
+    # Make sure the compiler does not write through a link into the cache
+    shared_lib = ip_cfg.get_shared_lib_path()
+    if os.path.lexists( shared_lib ):
+      os.remove( shared_lib )
+    s._build_cache, s._build_cache_key = cache, key
+    return False
+
+  def store_to_build_cache( s, ip_cfg ):
+    if s._build_cache is not None:
+      s._build_cache.store( s._build_cache_key, [ ip_cfg.get_shared_lib_path() ] )
+      s._build_cache = s._build_cache_key = None
+
   #-----------------------------------------------------------------------
   # create_verilator_model
   #-----------------------------------------------------------------------
@@ -484,6 +583,7 @@ class VerilogVerilatorImportPass( BasePass ):
     verilator_xinit_value = ip_cfg.get_vl_xinit_value()
     verilator_xinit_seed = ip_cfg.get_vl_xinit_seed()
     has_clk = int(ph_cfg.has_clk)
+    vl_savable = int(ip_cfg.vl_savable)
 
     # On-demand VCD dumping configs
     on_demand_dump_vcd = int(ip_cfg.vl_trace_on_demand)
@@ -512,6 +612,19 @@ class VerilogVerilatorImportPass( BasePass ):
     make_indent( port_inits, 1 )
     port_inits = '\n'.join( port_inits )
 
+    # Generate packed input/output copies of run_batch
+    batch_in, batch_out = s.gen_batch_layout( ports )
+    batch_in_nbytes  = sum( x[3] for x in batch_in )
+    batch_out_nbytes = sum( x[3] for x in batch_out )
+    batch_set_inputs = [ f'memcpy( m->{c_name}, _in + {off}, {nbytes} );'
+                         for _, c_name, off, nbytes, _ in batch_in ]
+    batch_get_outputs = [ f'memcpy( _out + {off}, m->{c_name}, {nbytes} );'
+                          for _, c_name, off, nbytes, _ in batch_out ]
+    make_indent( batch_set_inputs, 2 )
+    make_indent( batch_get_outputs, 2 )
+    batch_set_inputs  = '\n'.join( batch_set_inputs )
+    batch_get_outputs = '\n'.join( batch_get_outputs )
+
     # Fill in the C wrapper template
     if dump:
       with open( wrapper_name, 'w' ) as output:
@@ -531,6 +644,9 @@ class VerilogVerilatorImportPass( BasePass ):
     dump_vcd = ip_cfg.vl_trace
     ip_cfg.vprint("\n=====Compile shared library=====")
 
+    if ip_cfg.get_c_jobs() != 1:
+      return s.create_shared_lib_parallel( m, ph_cfg, ip_cfg )
+
     cmd = ip_cfg.create_cc_cmd()
 
     succeeds = True
@@ -562,6 +678,52 @@ class VerilogVerilatorImportPass( BasePass ):
     ip_cfg.vprint(f"Successfully compiled shared library "\
                   f"{ip_cfg.get_shared_lib_path()}!", 2)
 
+  #-----------------------------------------------------------------------
+  # create_shared_lib_parallel
+  #-----------------------------------------------------------------------
+  # Compile each C++ source into an object file with `c_jobs` concurrent
+  # compiler processes and then link them into the shared lib.
+
+  def create_shared_lib_parallel( s, m, ph_cfg, ip_cfg ):
+
+    def run( cmd ):
+      t0 = timeit.default_timer()
+      proc = subprocess.run( cmd, stdout = subprocess.PIPE, stderr = subprocess.STDOUT,
+                             shell = True, universal_newlines = True )
+      return proc.returncode, proc.stdout, timeit.default_timer()-t0
+
+    def fail( cmd, err_msg ):
+      raise VerilogImportError(m,
+          f"Failed to compile Verilated model into a shared library:\n"\
+          f"  C compiler command:\n{indent(cmd, '  ')}\n\n"\
+          f"  C compiler output:\n{indent(wrap(err_msg), '  ')}\n")
+
+    t_start = timeit.default_timer()
+    cmds = ip_cfg.create_cc_obj_cmds()
+    n_jobs = ip_cfg.get_c_jobs()
+
+    ip_cfg.vprint(f"Compiling {len(cmds)} sources with {n_jobs} jobs:", 2)
+    with ThreadPoolExecutor( max_workers = n_jobs ) as executor:
+      results = list( executor.map( run, [ cmd for _, cmd in cmds ] ) )
+
+    for (obj, cmd), (ret, out, t) in zip( cmds, results ):
+      ip_cfg.vprint(f"{t:.3f}s {obj}", 4)
+      if ret:
+        fail( cmd, out )
+    ip_cfg.vprint(f"object compilation time: {timeit.default_timer()-t_start}")
+
+    cmd = ip_cfg.create_ld_cmd( [ obj for obj, _ in cmds ] )
+    ip_cfg.vprint("Linking shared library with command:", 2)
+    ip_cfg.vprint(f"{cmd}", 4)
+    ret, out, t = run( cmd )
+    if ret:
+      fail( cmd, out )
+    ip_cfg.vprint(f"link time: {t}")
+    ip_cfg.vprint(f"shared library compilation time: {timeit.default_timer()-t_start}")
+
+    ip_cfg.vprint(f"Successfully compiled shared library "\
+                  f"{ip_cfg.get_shared_lib_path()}!", 2)
+
   #-----------------------------------------------------------------------
   # create_py_wrapper
   #-----------------------------------------------------------------------
@@ -593,6 +755,9 @@ class VerilogVerilatorImportPass( BasePass ):
     # Internal line trace
     in_line_trace = s.gen_internal_line_trace_py( ports )
 
+    # Packed layout of run_batch
+    batch_in, batch_out = s.gen_batch_layout( ports )
+
     # External trace function definition
     if ip_cfg.vl_line_trace:
       external_trace_c_def = f'void V{ip_cfg.translated_top_module}_line_trace( V{ip_cfg.translated_top_module}_t *, char * );'
@@ -621,6 +786,10 @@ class VerilogVerilatorImportPass( BasePass ):
           vl_trace_filename     = ip_cfg.vl_trace_filename,
           external_trace        = int(ip_cfg.vl_line_trace),
           trace_c_def           = external_trace_c_def,
+          batch_in_layout       = [ (py, off, n, nbits) for py, _, off, n, nbits in batch_in ],
+          batch_out_layout      = [ (py, off, n, nbits) for py, _, off, n, nbits in batch_out ],
+          batch_in_nbytes       = sum( x[3] for x in batch_in ),
+          batch_out_nbytes      = sum( x[3] for x in batch_out ),
         )
         output.write( py_wrapper )
 
@@ -683,9 +852,9 @@ class VerilogVerilatorImportPass( BasePass ):
     s._volatile_configs = [
       'verilog_hash',
       'vl_line_trace', 'vl_coverage', 'vl_line_coverage', 'vl_toggle_coverage',
-      'vl_mk_dir', 'vl_enable_assert',
+      'vl_mk_dir', 'vl_enable_assert', 'vl_savable',
       'vl_W_lint', 'vl_W_style', 'vl_W_fatal', 'vl_Wno_list',
-      'vl_xinit', 'vl_trace',
+      'vl_xinit', 'vl_trace', 'vl_threads', 'vl_output_split',
       'vl_trace_timescale', 'vl_trace_cycle_time',
       'vl_trace_on_demand', 'vl_trace_on_demand_portname',
       'c_flags', 'c_include_path', 'c_srcs',
@@ -1159,6 +1328,55 @@ m->{name}{sub} = {deference}model->{name}{sub};
         structs  += _structs
     return set_comb, structs
 
+  #-------------------------------------------------------------------------
+  # gen_batch_layout
+  #-------------------------------------------------------------------------
+  # Return the packed layout of the input and output ports used by the
+  # run_batch entry point. Each port element (except clk) is a tuple of
+  # ( PyMTL name, C name, byte offset, number of bytes, bitwidth ), where
+  # the number of bytes matches the C type of the verilated port. Names
+  # follow gen_comb_input/gen_comb_output.
+
+  def gen_batch_layout( s, packed_ports ):
+    layouts = { 'InPort': [], 'OutPort': [] }
+    offsets = { 'InPort': 0,  'OutPort': 0 }
+
+    def gen_elements( direction, py, c, pnames, nbits, index, n_dim ):
+      if not n_dim:
+        if   nbits <= 8:  nbytes = 1
+        elif nbits <= 16: nbytes = 2
+        elif nbits <= 32: nbytes = 4
+        elif nbits <= 64: nbytes = 8
+        else:             nbytes = 4*((nbits-1)//32+1)
+        layouts[direction].append( (py.format(next(pnames)), c, offsets[direction], nbytes, nbits) )
+        offsets[direction] += nbytes
+      else:
+        for idx in range( n_dim[0] ):
+          if index == 0:
+            _py, _index = f"{py}[{idx}]", index
+          else:
+            _py, _index = py, index-1
+          gen_elements( direction, _py, f"{c}[{idx}]", pnames, nbits, _index, n_dim[1:] )
+
+    for _pnames, vname, rtype, port_idx in packed_ports:
+      if not vname:
+        continue
+      if isinstance( rtype, rt.Array ):
+        n_dim = rtype.get_dim_sizes()
+      else:
+        n_dim = []
+      repeats = reduce(lambda a, b: a*b, n_dim[port_idx:], 1)
+      pnames = [name for name in _pnames for _ in range(repeats)]
+      p_n_dim, p_rtype = get_rtype( rtype )
+      direction = s._get_direction( p_rtype )
+      if direction == 'InPort' and pnames[0] == 'clk':
+        continue
+      nbits = p_rtype.get_dtype().get_length()
+      gen_elements( direction, "{}", s._verilator_name(vname), cycle(pnames),
+                    nbits, port_idx, p_n_dim )
+
+    return layouts['InPort'], layouts['OutPort']
+
   #-------------------------------------------------------------------------
   # gen_line_trace_py
   #-------------------------------------------------------------------------
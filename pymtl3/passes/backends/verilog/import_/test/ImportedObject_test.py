@@ -524,3 +524,56 @@ def test_incr_on_demand_vcd( do_test ):
     a.sim_tick()
 
   a.finalize()
+
+def test_reg_run_batch():
+  # Simulate packed test vectors through the C run_batch entry point
+  import numpy as np
+
+  class VReg( Component, VerilogPlaceholder ):
+    def construct( s ):
+      s.in_ = InPort( Bits32 )
+      s.out = OutPort( Bits32 )
+      s.set_metadata( VerilogPlaceholderPass.port_map, {
+          s.clk : "clk", s.reset : "reset",
+          s.in_ : "d",   s.out : "q",
+      } )
+      s.set_metadata( VerilogPlaceholderPass.src_file, dirname(__file__)+'/VReg.v' )
+  a = VReg()
+  a.elaborate()
+  a.apply( VerilogPlaceholderPass() )
+  a = VerilogTranslationImportPass()( a )
+  a.apply( DefaultPassGroup() )
+  a.sim_reset()
+
+  in_layout  = { x[0]: x[1:] for x in a.batch_in_layout }
+  out_layout = { x[0]: x[1:] for x in a.batch_out_layout }
+  values = [ 1, 2, 0xdeadbeef, 42, 7 ]
+  ncycles = len(values)
+
+  # One row of packed inputs per cycle
+  inputs = np.zeros( ( ncycles, a.batch_in_nbytes ), dtype=np.uint8 )
+  off, nbytes, _ = in_layout['in_']
+  for i, v in enumerate( values ):
+    inputs[i, off:off+nbytes] = list( v.to_bytes( nbytes, 'little' ) )
+
+  outputs, n = a.run_batch( inputs, ncycles )
+  assert n == ncycles
+  off, nbytes, _ = out_layout['out']
+  q = [ int.from_bytes( outputs[i*a.batch_out_nbytes+off:i*a.batch_out_nbytes+off+nbytes], 'little' )
+        for i in range(ncycles) ]
+  # q lags d by one cycle
+  assert q == [ 0 ] + values[:-1]
+
+  # Stop at the first mismatch against the expected outputs
+  a.sim_reset()
+  expected = bytearray( outputs )
+  expected[3*a.batch_out_nbytes+off] ^= 1
+  _, n = a.run_batch( inputs, ncycles, expected )
+  assert n == 3
+
+  # The whole array is checked, not just its number of rows
+  with pytest.raises( ValueError ):
+    a.run_batch( inputs[:, :-1], ncycles )
+  with pytest.raises( ValueError ):
+    a.run_batch( inputs, ncycles + 1 )
+  a.finalize()
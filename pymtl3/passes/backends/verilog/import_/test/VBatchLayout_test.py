@@ -0,0 +1,51 @@
+#=========================================================================
+# VBatchLayout_test.py
+#=========================================================================
+# Date   : Oct 17, 2026
+"""Test the packed port layout of the run_batch entry point."""
+
+from pymtl3.datatypes import Bits1, Bits12, Bits64, Bits100
+from pymtl3.dsl import Component, InPort, Interface, OutPort
+from pymtl3.passes.backends.verilog.util.utility import gen_mapped_ports
+
+from ..VerilogVerilatorImportPass import VerilogVerilatorImportPass
+
+
+def get_layout( m ):
+  m.elaborate()
+  return VerilogVerilatorImportPass().gen_batch_layout( gen_mapped_ports( m, {} ) )
+
+def test_scalar_and_wide_ports():
+  class A( Component ):
+    def construct( s ):
+      s.wide = InPort( Bits100 )
+      s.out  = OutPort( Bits12 )
+      s.out2 = OutPort( Bits64 )
+  batch_in, batch_out = get_layout( A() )
+  # clk is never packed
+  assert batch_in == [
+    ( 'reset', 'reset', 0, 1, 1 ),
+    ( 'wide', 'wide', 1, 16, 100 ),
+  ]
+  assert batch_out == [
+    ( 'out', 'out', 0, 2, 12 ),
+    ( 'out2', 'out2', 2, 8, 64 ),
+  ]
+
+def test_port_array_and_interface():
+  class Ifc( Interface ):
+    def construct( s ):
+      s.foo = InPort( Bits1 )
+  class A( Component ):
+    def construct( s ):
+      s.in_ = [ [ InPort( Bits12 ) for _ in range(2) ] for _ in range(2) ]
+      s.ifc = [ Ifc() for _ in range(2) ]
+  batch_in, _ = get_layout( A() )
+  names = { py: (c, nbytes) for py, c, _, nbytes, _ in batch_in }
+  assert names['in_[1][0]'] == ( 'in_[1][0]', 2 )
+  assert names['ifc[1].foo'] == ( 'ifc___05Ffoo[1]', 1 )
+  # Ports are packed back to back
+  offset = 0
+  for _, _, off, nbytes, _ in batch_in:
+    assert off == offset
+    offset += nbytes
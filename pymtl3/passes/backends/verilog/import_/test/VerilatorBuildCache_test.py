@@ -0,0 +1,56 @@
+#=========================================================================
+# VerilatorBuildCache_test.py
+#=========================================================================
+# Date   : Oct 17, 2026
+"""Test the global build cache of the Verilator import pass."""
+
+import os
+
+from ..VerilatorBuildCache import VerilatorBuildCache
+
+
+def _write( path, content ):
+  with open( path, 'w' ) as fd:
+    fd.write( content )
+
+def test_key_depends_on_content_and_config( tmpdir ):
+  tmpdir.chdir()
+  _write( "A.v", "module A; endmodule" )
+  k0 = VerilatorBuildCache.compute_key( [ "A.v" ], { "fast": False }, [] )
+  assert k0 == VerilatorBuildCache.compute_key( [ "A.v" ], { "fast": False }, [] )
+  assert k0 != VerilatorBuildCache.compute_key( [ "A.v" ], { "fast": True }, [] )
+  _write( "A.v", "module A; wire x; endmodule" )
+  assert k0 != VerilatorBuildCache.compute_key( [ "A.v" ], { "fast": False }, [] )
+
+def test_store_and_fetch_across_directories( tmpdir ):
+  cache = VerilatorBuildCache( str(tmpdir.join("cache")), 1 )
+
+  tmpdir.mkdir("a").chdir()
+  _write( "libA_v.so", "binary" )
+  assert not cache.fetch( "k", [ "libA_v.so" ] )
+  cache.store( "k", [ "libA_v.so" ] )
+
+  tmpdir.mkdir("b").chdir()
+  assert cache.fetch( "k", [ "libA_v.so" ] )
+  with open( "libA_v.so" ) as fd:
+    assert fd.read() == "binary"
+
+  # Refetching replaces the file instead of writing into the cache
+  assert cache.fetch( "k", [ "libA_v.so" ] )
+  assert os.path.isfile( "libA_v.so" )
+
+def test_lru_eviction( tmpdir ):
+  # 1MB bound, each build is 400KB
+  cache = VerilatorBuildCache( str(tmpdir.join("cache")), 1 )
+  tmpdir.chdir()
+  _write( "lib.so", "x" * 400 * 1024 )
+
+  cache.store( "k0", [ "lib.so" ] )
+  cache.store( "k1", [ "lib.so" ] )
+  os.utime( tmpdir.join("cache", "k0"), (0, 0) )
+  os.utime( tmpdir.join("cache", "k1"), (1, 1) )
+  # k0 is used more recently than k1
+  assert cache.fetch( "k0", [ "lib.so" ] )
+
+  cache.store( "k2", [ "lib.so" ] )
+  assert sorted( x for x in os.listdir( str(tmpdir.join("cache")) ) if x[0] != '.' ) == [ "k0", "k2" ]
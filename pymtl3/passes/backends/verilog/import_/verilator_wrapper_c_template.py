@@ -10,6 +10,7 @@ template = \
 #include "obj_dir_{component_name}/V{vl_component_name}.h"
 #include "stdio.h"
 #include "stdint.h"
+#include "string.h"
 #include "verilated.h"
 #include "verilated_vcd_c.h"
 
@@ -29,6 +30,17 @@ template = \
 // set to true when Verilog module has line tracing
 #define VLINETRACE {external_trace}
 
+// set to true when the model is verilated with --savable
+#define VL_SAVABLE {vl_savable}
+
+// size in bytes of one cycle of packed inputs/outputs for run_batch()
+#define BATCH_IN_NBYTES  {batch_in_nbytes}
+#define BATCH_OUT_NBYTES {batch_out_nbytes}
+
+#if VL_SAVABLE
+#include "verilated_save.h"
+#endif
+
 #if VLINETRACE
 #include "obj_dir_{component_name}/V{vl_component_name}__Syms.h"
 #include "svdpi.h"
@@ -74,6 +86,11 @@ extern "C" {{
   void V{component_name}_comb_eval( V{component_name}_t * );
   void V{component_name}_seq_eval( V{component_name}_t * );
   void V{component_name}_assert_en( V{component_name}_t *, bool );
+  int  V{component_name}_run_batch( V{component_name}_t *, const unsigned char *,
+                                   unsigned char *, const unsigned char *,
+                                   const unsigned char *, int );
+  int  V{component_name}_save_state( V{component_name}_t *, const char * );
+  int  V{component_name}_restore_state( V{component_name}_t *, const char * );
 
   #if VLINETRACE
   void V{component_name}_line_trace( V{component_name}_t *, char * );
@@ -259,6 +276,109 @@ void V{component_name}_seq_eval( V{component_name}_t * m ) {{
   #endif
 }}
 
+//------------------------------------------------------------------------
+// run_batch()
+//------------------------------------------------------------------------
+// Simulate ncycles cycles without going back to Python. In each cycle we
+// copy one packed input vector into the input ports, evaluate the model,
+// copy the output ports into one packed output vector, and tick the
+// clock. If expected is not NULL, the outputs are compared against it
+// under mask, and the simulation stops before ticking the first
+// mismatching cycle. Return the number of cycles that matched.
+
+int V{component_name}_run_batch( V{component_name}_t * m, const unsigned char * in,
+                                 unsigned char * out, const unsigned char * expected,
+                                 const unsigned char * mask, int ncycles ) {{
+
+  for ( int c = 0; c < ncycles; c++ ) {{
+
+    const unsigned char * _in  = in  + (long) c * BATCH_IN_NBYTES;
+    unsigned char       * _out = out + (long) c * BATCH_OUT_NBYTES;
+
+    // set inputs
+{batch_set_inputs}
+
+    V{component_name}_comb_eval( m );
+
+    // capture outputs
+{batch_get_outputs}
+
+    if ( expected ) {{
+      const unsigned char * _exp  = expected + (long) c * BATCH_OUT_NBYTES;
+      const unsigned char * _mask = mask     + (long) c * BATCH_OUT_NBYTES;
+      for ( int i = 0; i < BATCH_OUT_NBYTES; i++ )
+        if ( (_out[i] ^ _exp[i]) & _mask[i] )
+          return c;
+    }}
+
+    V{component_name}_seq_eval( m );
+  }}
+
+  return ncycles;
+
+}}
+
+//------------------------------------------------------------------------
+// save_state()
+//------------------------------------------------------------------------
+// Save the state of the verilated model and the simulation time into
+// filename. Return 0 on success, 1 if the file cannot be opened, and -1
+// if the model is not verilated with --savable.
+
+int V{component_name}_save_state( V{component_name}_t * m, const char * filename ) {{
+
+  #if VL_SAVABLE
+  V{vl_component_name} * model       = (V{vl_component_name} *) m->_cffi_model;
+  VerilatedContext     * context_ptr = (VerilatedContext *) m->_cffi_context_ptr;
+
+  VerilatedSave os;
+  os.open( filename );
+  if ( !os.isOpen() )
+    return 1;
+
+  uint64_t time       = context_ptr->time();
+  uint32_t trace_time = m->_cffi_trace_time;
+  os << time << trace_time;
+  os << *model;
+  os.close();
+  return 0;
+  #else
+  return -1;
+  #endif
+
+}}
+
+//------------------------------------------------------------------------
+// restore_state()
+//------------------------------------------------------------------------
+// Restore the state saved by save_state(). Same return values.
+
+int V{component_name}_restore_state( V{component_name}_t * m, const char * filename ) {{
+
+  #if VL_SAVABLE
+  V{vl_component_name} * model       = (V{vl_component_name} *) m->_cffi_model;
+  VerilatedContext     * context_ptr = (VerilatedContext *) m->_cffi_context_ptr;
+
+  VerilatedRestore os;
+  os.open( filename );
+  if ( !os.isOpen() )
+    return 1;
+
+  uint64_t time;
+  uint32_t trace_time;
+  os >> time >> trace_time;
+  os >> *model;
+  os.close();
+
+  context_ptr->time( time );
+  m->_cffi_trace_time = trace_time;
+  return 0;
+  #else
+  return -1;
+  #endif
+
+}}
+
 //------------------------------------------------------------------------
 // assert_en()
 //------------------------------------------------------------------------
@@ -26,6 +26,14 @@ from pymtl3.dsl import Component, connect, InPort, OutPort, Wire, update, update
 class {component_name}( Component ):
   id_ = 0
 
+  # Layout of one cycle of packed inputs/outputs used by run_batch():
+  # ( port name, byte offset, number of bytes, bitwidth ). Values are
+  # little-endian.
+  batch_in_layout  = {batch_in_layout}
+  batch_out_layout = {batch_out_layout}
+  batch_in_nbytes  = {batch_in_nbytes}
+  batch_out_nbytes = {batch_out_nbytes}
+
   def __init__( s, *args, **kwargs ):
     s._finalization_count = 0
 
@@ -60,6 +68,11 @@ class {component_name}( Component ):
       void V{component_name}_comb_eval( V{component_name}_t * );
       void V{component_name}_seq_eval( V{component_name}_t * );
       void V{component_name}_assert_en( bool en );
+      int V{component_name}_run_batch( V{component_name}_t *, const unsigned char *,
+                                       unsigned char *, const unsigned char *,
+                                       const unsigned char *, int );
+      int V{component_name}_save_state( V{component_name}_t *, const char * );
+      int V{component_name}_restore_state( V{component_name}_t *, const char * );
       {trace_c_def}
 
     """)
@@ -182,6 +195,62 @@ class {component_name}( Component ):
     assert isinstance( en, bool )
     s._ffi_inst.V{component_name}_assert_en( s._ffi_m, en )
 
+  def run_batch( s, inputs, ncycles, expected=None, mask=None ):
+    """Simulate ncycles cycles in C.
+
+    `inputs` is a bytes-like object (bytes, bytearray, NumPy array, ...)
+    holding ncycles packed input vectors laid out as batch_in_layout.
+    If `expected` is given, the outputs are compared against it under
+    `mask` (both laid out as batch_out_layout) and the simulation stops
+    before the clock edge of the first mismatching cycle.
+
+    Return the packed outputs and the number of cycles that matched.
+    Note that the PyMTL ports of this component are not updated.
+    """
+    # len() of a multi-dimensional array is only its number of rows;
+    # compare the total number of bytes of each buffer instead.
+    def check_nbytes( name, buf, nbytes ):
+      buf_nbytes = memoryview( buf ).nbytes
+      if buf_nbytes < ncycles * nbytes:
+        raise ValueError( f"run_batch: {{name}} holds {{buf_nbytes}} bytes but "
+                          f"{{ncycles}} cycles of {{nbytes}} bytes are required" )
+
+    check_nbytes( "inputs", inputs, s.batch_in_nbytes )
+    out = s.ffi.new( "unsigned char[]", max( 1, ncycles * s.batch_out_nbytes ) )
+    _in = s.ffi.from_buffer( "unsigned char[]", inputs ) if s.batch_in_nbytes else s.ffi.NULL
+    if expected is None:
+      _exp = _mask = s.ffi.NULL
+    else:
+      check_nbytes( "expected", expected, s.batch_out_nbytes )
+      if mask is None:
+        mask = b'\\xff' * ( ncycles * s.batch_out_nbytes )
+      check_nbytes( "mask", mask, s.batch_out_nbytes )
+      _exp  = s.ffi.from_buffer( "unsigned char[]", expected )
+      _mask = s.ffi.from_buffer( "unsigned char[]", mask )
+    n = s._ffi_inst.V{component_name}_run_batch( s._ffi_m, _in, out, _exp, _mask, ncycles )
+    return bytes( s.ffi.buffer( out, ncycles * s.batch_out_nbytes ) ), n
+
+  def save_verilated_state( s, filename ):
+    """Save the state of the verilated model into `filename`.
+
+    The model has to be verilated with the vl_savable option. Note that
+    the PyMTL ports of this component are not saved.
+    """
+    ret = s._ffi_inst.V{component_name}_save_state( s._ffi_m, filename.encode() )
+    s._check_state_ret( ret, filename )
+
+  def restore_verilated_state( s, filename ):
+    """Restore the state saved by save_verilated_state() from `filename`."""
+    ret = s._ffi_inst.V{component_name}_restore_state( s._ffi_m, filename.encode() )
+    s._check_state_ret( ret, filename )
+
+  def _check_state_ret( s, ret, filename ):
+    if ret < 0:
+      raise RuntimeError( "{component_name} is not savable: please set the "
+                          "vl_savable option of VerilogVerilatorImportPass" )
+    if ret > 0:
+      raise OSError( f"cannot open {{filename}}" )
+
   def line_trace( s ):
     if {external_trace}:
       s._ffi_inst.V{component_name}_line_trace( s._ffi_m, s._ffi_m._cffi_line_trace_str )
@@ -48,6 +48,34 @@ def mk_VTranslator( _RTLIRTranslator, _STranslator, _BTranslator ):
       s._included_pickled_files = set()
 
     def rtlir_tr_src_layout( s, hierarchy ):
+      s.set_header()
+      is_prev_result = s.header_keywords in hierarchy.component_src
+      return s.rtlir_tr_src_layout_prologue( hierarchy, is_prev_result ) + \
+             hierarchy.component_src
+
+    def rtlir_tr_src_layout_begin( s, hierarchy, stream ):
+      s.set_header()
+      # Only a placeholder can include a previous translation result
+      is_prev_result = any( s.header_keywords in x for x in s.structural.placeholder_src.values() )
+
+      # The top module has not been translated yet
+      top = s.tr_top
+      s._top_module_full_name = s.structural.component_explicit_module_name[top] or \
+                                s._mangled_placeholder_top_module_name or \
+                                s.structural.component_unique_name[top]
+
+      stream.write( s.rtlir_tr_src_layout_prologue( hierarchy, is_prev_result ) )
+      s._is_first_streamed_component = True
+
+    def rtlir_tr_src_layout_component( s, component_src, stream ):
+      # Same as the separator of rtlir_tr_components
+      if not s._is_first_streamed_component:
+        stream.write( "\n\n" )
+      s._is_first_streamed_component = False
+      stream.write( component_src )
+
+    def rtlir_tr_src_layout_prologue( s, hierarchy, is_prev_result ):
+      """Return the header and the struct definitions."""
       # Sanity check on BitStructs
       all_struct_names = { x.cls.__name__ for x in hierarchy.decl_type_struct }
 
@@ -60,7 +88,7 @@ def mk_VTranslator( _RTLIRTranslator, _STranslator, _BTranslator ):
       s.set_header()
       name = s._top_module_full_name
 
-      if s.header_keywords not in hierarchy.component_src:
+      if not is_prev_result:
         ret = s.header.format( **locals() )
       else:
         # This is a previous translation result
@@ -77,8 +105,6 @@ def mk_VTranslator( _RTLIRTranslator, _STranslator, _BTranslator ):
         struct_def = tplt['def'] + '\n'
         ret += template.format( **locals() )
 
-      # Add component sources
-      ret += hierarchy.component_src
       return ret
 
     def rtlir_tr_components( s, components ):
@@ -33,14 +33,26 @@ class VerilogTranslationConfigs( BasePassConfigs ):
     # Note that this could be applied to non-top modules
     # This option can only be enabled if no_synthesis is True
     "no_synthesis_no_reset" : False,
+
+    # Write the translation result to the output file module by module
+    # Only the value on the translated component matters
+    "stream_output" : False,
+
+    # Number of processes that translate the modules in parallel
+    # 0 to use one process per CPU
+    # Only the value on the translated component matters
+    "translation_jobs" : 1,
   }
 
   Checkers = {
-    ("enable", "no_synthesis", "no_synthesis_no_clk", "no_synthesis_no_reset") :
+    ("enable", "no_synthesis", "no_synthesis_no_clk", "no_synthesis_no_reset", "stream_output") :
     Checker( lambda v: isinstance( v, bool ), "expects a boolean" ),
 
     ("explicit_file_name", "explicit_module_name") :
-    Checker( lambda v: isinstance(v, str), "expects a string" )
+    Checker( lambda v: isinstance(v, str), "expects a string" ),
+
+    "translation_jobs":
+    Checker( lambda v: isinstance(v, int) and v >= 0, "expects a non-negative integer" ),
   }
 
   Pass = VerilogTranslationPass
@@ -9,7 +9,12 @@ import os, tempfile
 from pymtl3 import MetadataKey
 from pymtl3.passes.BasePass import BasePass
 
-from ..util.utility import verilog_cmp
+from ..util.utility import (
+    LeanVerilogHashWriter,
+    get_hash_of_lean_verilog,
+    verilog_cmp,
+    write_lean_hash_sidecar,
+)
 from .VTranslator import VTranslator
 
 
@@ -70,6 +75,25 @@ class VerilogTranslationPass( BasePass ):
   #: Default value: ``False``
   no_synthesis_no_reset = MetadataKey(bool)
 
+  #: Write each module to the output file as soon as it is translated
+  #: instead of building the whole source in memory. ``is_same`` is then
+  #: decided by the hash of the output recorded in a ``.lean_hash``
+  #: sidecar file, and ``translator.hierarchy.src`` is not available.
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: ``False``
+  stream_output         = MetadataKey(bool)
+
+  #: Number of forked processes that translate the modules of the
+  #: hierarchy in parallel. ``0`` to use one process per CPU. The result
+  #: is the same as the one of the serial translation.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: ``1``
+  translation_jobs      = MetadataKey(int)
+
   # Translation pass output pass data
 
   #: An instance of :class:`TranslationConfigs` that contains the parsed options.
@@ -102,10 +126,17 @@ class VerilogTranslationPass( BasePass ):
   #: Type: ``str``; output
   translated_top_module = MetadataKey(str)
 
+  #: Names of the modules that were emitted from the translation cache.
+  #: See ``pymtl3.passes.backends.generic.TranslationCache``.
+  #:
+  #: Type: ``list``; output
+  cache_hits            = MetadataKey(list)
+
   def __call__( s, top ):
     """Translate a PyMTL component hierarhcy rooted at ``top``."""
     s.top = top
     s.translator = VTranslator( s.top )
+    s.translator.use_translation_cache = True
     s.traverse_hierarchy( top )
 
   def get_translation_config( s ):
@@ -131,23 +162,16 @@ class VerilogTranslationPass( BasePass ):
 
     if m.has_metadata( c.enable ) and m.get_metadata( c.enable ):
       m.set_metadata( c.translate_config, s.gen_tr_cfgs(m) )
-      s.translator.translate( m, m.get_metadata( c.translate_config ) )
+      s.translator.translation_jobs = m.get_metadata( c.translate_config )[m].translation_jobs
 
-      module_name = s.translator._top_module_full_name
+      if m.get_metadata( c.translate_config )[m].stream_output:
+        s.translate_streaming( m )
+        return
 
-      if m.has_metadata( c.explicit_file_name ) and \
-         m.get_metadata( c.explicit_file_name ):
-        fname = m.get_metadata( c.explicit_file_name )
-        if '.v' in fname:
-          filename = fname.split('.v')[0]
-        elif '.sv' in fname:
-          filename = fname.split('.sv')[0]
-        else:
-          filename = fname
-      else:
-        filename = f"{module_name}__pickled"
+      s.translator.translate( m, m.get_metadata( c.translate_config ) )
 
-      output_file = filename + '.v'
+      module_name = s.translator._top_module_full_name
+      output_file = s.get_output_file( m, module_name )
 
       # Create a temporary file under the current directory.
       is_same = False
@@ -170,11 +194,7 @@ class VerilogTranslationPass( BasePass ):
           os.replace( tmp_path, output_file )
 
         # Expose some attributes about the translation process.
-        m.set_metadata( c.is_same,               is_same      )
-        m.set_metadata( c.translator,            s.translator )
-        m.set_metadata( c.translated,            True         )
-        m.set_metadata( c.translated_filename,   output_file  )
-        m.set_metadata( c.translated_top_module, module_name  )
+        s.set_translated_metadata( m, is_same, output_file, module_name )
 
       # Clean up the temporary file.
       os.close( tmp_fd )
@@ -184,3 +204,59 @@ class VerilogTranslationPass( BasePass ):
     else:
       for child in m.get_child_components(repr):
         s.traverse_hierarchy( child )
+
+  def get_output_file( s, m, module_name ):
+    c = s.__class__
+
+    if m.has_metadata( c.explicit_file_name ) and \
+       m.get_metadata( c.explicit_file_name ):
+      fname = m.get_metadata( c.explicit_file_name )
+      if '.v' in fname:
+        filename = fname.split('.v')[0]
+      elif '.sv' in fname:
+        filename = fname.split('.sv')[0]
+      else:
+        filename = fname
+    else:
+      filename = f"{module_name}__pickled"
+
+    return filename + '.v'
+
+  def set_translated_metadata( s, m, is_same, output_file, module_name ):
+    c = s.__class__
+    m.set_metadata( c.is_same,               is_same      )
+    m.set_metadata( c.translator,            s.translator )
+    m.set_metadata( c.translated,            True         )
+    m.set_metadata( c.translated_filename,   output_file  )
+    m.set_metadata( c.translated_top_module, module_name  )
+    m.set_metadata( c.cache_hits, s.translator.translation_cache_hits )
+
+  def translate_streaming( s, m ):
+    """Write the translation result to a temporary file as it is
+    generated, hashing its lean content on the fly, and only replace the
+    output file if the hash differs from the one of the existing file."""
+    tmp_fd, tmp_path = tempfile.mkstemp(dir=os.curdir, text=True)
+    try:
+      with os.fdopen( tmp_fd, "w" ) as tmp_file:
+        writer = LeanVerilogHashWriter( tmp_file )
+        s.translator.translate( m, m.get_metadata( s.__class__.translate_config ), writer )
+        tmp_file.flush()
+        os.fsync( tmp_file )
+      digest = writer.hexdigest()
+
+      module_name = s.translator._top_module_full_name
+      output_file = s.get_output_file( m, module_name )
+
+      # Reads the output file only if its sidecar is missing or stale
+      is_same = os.path.exists( output_file ) and \
+                get_hash_of_lean_verilog( output_file ) == digest
+
+      if not is_same:
+        os.replace( tmp_path, output_file )
+      write_lean_hash_sidecar( output_file, digest )
+
+      s.set_translated_metadata( m, is_same, output_file, module_name )
+
+    finally:
+      if os.path.exists( tmp_path ):
+        os.remove( tmp_path )
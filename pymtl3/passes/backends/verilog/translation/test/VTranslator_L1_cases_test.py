@@ -5,6 +5,7 @@
 
 import pytest
 
+from pymtl3 import Bits2, Bits8, Component, InPort, OutPort, WireArray, update
 from pymtl3.passes.backends.verilog.util.test_utility import check_eq
 from pymtl3.passes.rtlir.util.test_utility import get_parameter
 
@@ -25,3 +26,25 @@ def run_test( case, m ):
 )
 def test_verilog_L1( case ):
   run_test( case, case.DUT() )
+
+def test_wire_array():
+  class WireArrayROM( Component ):
+    def construct( s ):
+      s.raddr = InPort( Bits2 )
+      s.rdata = OutPort( Bits8 )
+      s.mem = WireArray( Bits8, 4, [ 4, 3, 2, 1 ] )
+
+      @update
+      def upblk():
+        s.rdata @= s.mem[ s.raddr ]
+
+  m = WireArrayROM()
+  m.elaborate()
+  tr = VTranslator( m )
+  tr.translate( m )
+  src = tr.hierarchy.src
+  # Translated in the same way as [ Wire( Bits8 ) for _ in range(4) ]
+  assert "logic [7:0] mem [0:3];" in src
+  assert "rdata = mem[raddr];" in src
+  for i in range(4):
+    assert f"assign mem[{i}] = 8'd{4-i};" in src
@@ -0,0 +1,157 @@
+#=========================================================================
+# VTranslator_cache_test.py
+#=========================================================================
+"""Test module deduplication and the persistent translation cache."""
+
+import os
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.passes.backends.generic import TranslationCache
+from pymtl3.passes.backends.verilog.util.test_utility import check_eq
+from pymtl3.passes.rtlir.util.test_utility import get_parameter
+
+from ..behavioral.test.VBehavioralTranslatorL5_test import test_verilog_behavioral_L5
+from ..structural.test.VStructuralTranslatorL4_test import test_verilog_structural_L4
+from ..VerilogTranslationPass import VerilogTranslationPass
+from ..VTranslator import VTranslator
+
+
+@pytest.fixture
+def cache_dir( tmp_path ):
+  old = TranslationCache.get_cache_dir()
+  TranslationCache.set_cache_dir( tmp_path )
+  yield tmp_path
+  TranslationCache.set_cache_dir( old )
+
+def translate( m ):
+  m.elaborate()
+  tr = VTranslator( m )
+  tr.use_translation_cache = True
+  tr.translate( m )
+  return tr
+
+@pytest.mark.parametrize(
+  'case', get_parameter('case', test_verilog_behavioral_L5) + \
+          get_parameter('case', test_verilog_structural_L4)
+)
+def test_cold_and_warm( case, cache_dir ):
+  cold = translate( case.DUT() )
+  check_eq( cold.hierarchy.src, case.REF_SRC )
+  assert cold.translation_cache_hits == []
+  warm = translate( case.DUT() )
+  check_eq( warm.hierarchy.src, case.REF_SRC )
+
+#-------------------------------------------------------------------------
+# Test components
+#-------------------------------------------------------------------------
+
+INCR = 1
+
+class Incr( Component ):
+  def construct( s, nbits ):
+    s.in_ = InPort( nbits )
+    s.out = OutPort( nbits )
+
+    @update
+    def up_incr():
+      s.out @= s.in_ + INCR
+
+@bitstruct
+class Pair:
+  a: Bits8
+  b: Bits8
+
+class PairSwap( Component ):
+  def construct( s ):
+    s.in_ = InPort( Pair )
+    s.out = OutPort( Pair )
+
+    @update
+    def up_swap():
+      s.out.a @= s.in_.b
+      s.out.b @= s.in_.a
+
+class Chain( Component ):
+  def construct( s, n ):
+    s.in_ = InPort( 8 )
+    s.out = OutPort( 8 )
+    s.pin = InPort( Pair )
+    s.pout = OutPort( Pair )
+
+    s.incrs = [ Incr( 8 ) for _ in range( n ) ]
+    s.wide  = Incr( 16 )
+    s.swap  = PairSwap()
+
+    s.incrs[0].in_ //= s.in_
+    for i in range( 1, n ):
+      s.incrs[i].in_ //= s.incrs[i-1].out
+    s.out //= s.incrs[-1].out
+
+    s.wide.in_ //= 0
+    s.swap.in_ //= s.pin
+    s.pout //= s.swap.out
+
+def translate_chain( n=4 ):
+  m = Chain( n )
+  m.elaborate()
+  m.set_metadata( VerilogTranslationPass.enable, True )
+  m.apply( VerilogTranslationPass() )
+  return m.get_metadata( VerilogTranslationPass.translator ).hierarchy.src, \
+         m.get_metadata( VerilogTranslationPass.cache_hits )
+
+def test_dedup_instances():
+  old = TranslationCache.get_cache_dir()
+  TranslationCache.set_cache_dir( None )
+  try:
+    src, hits = translate_chain( 8 )
+  finally:
+    TranslationCache.set_cache_dir( old )
+  assert hits == []
+  assert src.count( 'module Incr__nbits_8' ) == 1
+  assert src.count( 'Incr__nbits_8 incrs__' ) == 8
+  assert src.count( 'module Incr__nbits_16' ) == 1
+  assert src.count( 'typedef struct packed' ) == 1
+
+def test_translation_cache( cache_dir ):
+  global INCR
+
+  cold_src, cold_hits = translate_chain()
+  warm_src, warm_hits = translate_chain()
+  assert cold_hits == []
+  assert sorted( warm_hits ) == [ 'Incr__nbits_16', 'Incr__nbits_8', 'PairSwap_noparam' ]
+  assert warm_src == cold_src
+
+  # The value of a global variable in an update block is part of the key
+  INCR = 2
+  try:
+    src, hits = translate_chain()
+  finally:
+    INCR = 1
+  assert sorted( hits ) == [ 'PairSwap_noparam' ]
+  assert src != cold_src
+
+  # Disabling the cache does not change the result
+  TranslationCache.set_cache_dir( None )
+  src, hits = translate_chain()
+  assert hits == []
+  assert src == cold_src
+
+def test_lru_eviction( cache_dir ):
+  old = TranslationCache.get_max_size()
+  # Room for three entries of about 1KB
+  TranslationCache.set_max_size( 3500 / 1024 / 1024 )
+  try:
+    for i, key in enumerate( "abc" ):
+      TranslationCache.store( key, key * 1000, {} )
+      os.utime( cache_dir / f"{key}.json", ( 100 * (i+1), 100 * (i+1) ) )
+    # A hit makes a the most recently used entry
+    assert TranslationCache.lookup( "a" )["src"] == "a" * 1000
+    TranslationCache.store( "d", "d" * 1000, {} )
+  finally:
+    TranslationCache.set_max_size( old / 1024 / 1024 )
+
+  assert TranslationCache.lookup( "b" ) is None
+  for key in "acd":
+    assert TranslationCache.lookup( key )["src"] == key * 1000
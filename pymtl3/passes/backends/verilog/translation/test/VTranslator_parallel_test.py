@@ -0,0 +1,93 @@
+#=========================================================================
+# VTranslator_parallel_test.py
+#=========================================================================
+"""Test the translation of modules in forked worker processes."""
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.passes.backends.generic import TranslationCache
+from pymtl3.passes.backends.verilog.util.test_utility import check_eq
+from pymtl3.passes.rtlir.errors import PyMTLSyntaxError
+from pymtl3.passes.rtlir.util.test_utility import get_parameter
+
+from ..behavioral.test.VBehavioralTranslatorL5_test import test_verilog_behavioral_L5
+from ..structural.test.VStructuralTranslatorL4_test import test_verilog_structural_L4
+from ..VerilogTranslationPass import VerilogTranslationPass
+from ..VTranslator import VTranslator
+from .VTranslator_cache_test import Chain, Incr
+
+
+@pytest.fixture
+def cache_dir( tmp_path ):
+  old = TranslationCache.get_cache_dir()
+  TranslationCache.set_cache_dir( tmp_path )
+  yield tmp_path
+  TranslationCache.set_cache_dir( old )
+
+@pytest.fixture
+def no_cache():
+  old = TranslationCache.get_cache_dir()
+  TranslationCache.set_cache_dir( None )
+  yield
+  TranslationCache.set_cache_dir( old )
+
+@pytest.mark.parametrize(
+  'case', get_parameter('case', test_verilog_behavioral_L5) + \
+          get_parameter('case', test_verilog_structural_L4)
+)
+def test_parallel( case, no_cache ):
+  m = case.DUT()
+  m.elaborate()
+  tr = VTranslator( m )
+  tr.translation_jobs = 2
+  tr.translate( m )
+  check_eq( tr.hierarchy.src, case.REF_SRC )
+
+def translate_chain( jobs ):
+  m = Chain( 4 )
+  m.elaborate()
+  m.set_metadata( VerilogTranslationPass.enable, True )
+  m.set_metadata( VerilogTranslationPass.translation_jobs, jobs )
+  m.apply( VerilogTranslationPass() )
+  return m.get_metadata( VerilogTranslationPass.translator ).hierarchy.src, \
+         m.get_metadata( VerilogTranslationPass.cache_hits )
+
+def test_parallel_pass( no_cache ):
+  ref_src, _ = translate_chain( 1 )
+  for jobs in [ 2, 3, 8 ]:
+    src, _ = translate_chain( jobs )
+    assert src == ref_src
+
+def test_parallel_translation_cache( cache_dir ):
+  # The results of the workers are stored in the cache
+  cold_src, cold_hits = translate_chain( 3 )
+  warm_src, warm_hits = translate_chain( 1 )
+  assert cold_hits == []
+  assert sorted( warm_hits ) == [ 'Incr__nbits_16', 'Incr__nbits_8', 'PairSwap_noparam' ]
+  assert warm_src == cold_src
+
+class BadIncr( Incr ):
+  def construct( s, nbits ):
+    super().construct( nbits )
+
+    @update
+    def up_bad():
+      while s.in_:
+        pass
+
+class BadTop( Component ):
+  def construct( s ):
+    s.a = Incr( 8 )
+    s.b = BadIncr( 4 )
+    s.c = Incr( 16 )
+
+def test_parallel_error( no_cache ):
+  # A module that fails in a worker is translated again by the parent
+  # process, which raises the error
+  m = BadTop()
+  m.elaborate()
+  tr = VTranslator( m )
+  tr.translation_jobs = 3
+  with pytest.raises( PyMTLSyntaxError ):
+    tr.translate( m )
@@ -0,0 +1,67 @@
+#=========================================================================
+# VerilogTranslationPass_stream_test.py
+#=========================================================================
+"""Test streaming Verilog emission and the lean hash sidecar."""
+
+import io
+import os
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog.util.utility import (
+    LeanVerilogHashWriter,
+    get_hash_of_lean_verilog,
+    get_lean_hash_sidecar,
+    read_lean_hash_sidecar,
+)
+
+from ..VerilogTranslationPass import VerilogTranslationPass
+from .VTranslator_cache_test import Chain
+
+
+def translate( m, stream ):
+  m.elaborate()
+  m.set_metadata( VerilogTranslationPass.enable, True )
+  m.set_metadata( VerilogTranslationPass.stream_output, stream )
+  m.apply( VerilogTranslationPass() )
+  with open( m.get_metadata( VerilogTranslationPass.translated_filename ) ) as f:
+    return f.read(), m.get_metadata( VerilogTranslationPass.is_same )
+
+def test_lean_hash_writer():
+  src = "// comment\nmodule A;\n\n  wire x;\nendmodule\n// end"
+  for chunk in [ 1, 3, 7, len(src) ]:
+    out = io.StringIO()
+    writer = LeanVerilogHashWriter( out )
+    for i in range( 0, len(src), chunk ):
+      writer.write( src[i:i+chunk] )
+    assert out.getvalue() == src
+    assert writer.hexdigest() == get_hash_of_lean_verilog( io.StringIO( src ) )
+
+def test_stream_output( tmp_path, monkeypatch ):
+  monkeypatch.chdir( tmp_path )
+
+  ref_src, _ = translate( Chain( 4 ), False )
+  os.remove( 'Chain__n_4__pickled.v' )
+
+  src, is_same = translate( Chain( 4 ), True )
+  assert src == ref_src
+  assert not is_same
+  assert read_lean_hash_sidecar( 'Chain__n_4__pickled.v' ) == \
+         get_hash_of_lean_verilog( io.StringIO( src ) )
+
+  # The output file is left untouched if the translation is the same
+  mtime_ns = os.stat( 'Chain__n_4__pickled.v' ).st_mtime_ns
+  src, is_same = translate( Chain( 4 ), True )
+  assert is_same
+  assert os.stat( 'Chain__n_4__pickled.v' ).st_mtime_ns == mtime_ns
+
+  # A modified output file invalidates the sidecar
+  with open( 'Chain__n_4__pickled.v', 'a' ) as f:
+    f.write( 'module Extra; endmodule\n' )
+  assert read_lean_hash_sidecar( 'Chain__n_4__pickled.v' ) is None
+  src, is_same = translate( Chain( 4 ), True )
+  assert not is_same
+  assert src == ref_src
+
+  # No temporary files are left behind
+  assert sorted( os.listdir( tmp_path ) ) == \
+         [ 'Chain__n_4__pickled.v', get_lean_hash_sidecar( 'Chain__n_4__pickled.v' ) ]
@@ -61,8 +61,11 @@ def get_file_hash( file_path ):
     hash_inst.update(string)
     return hash_inst.hexdigest()
 
+def is_lean_verilog_line( line ):
+  return line != '\n' and not line.startswith('//')
+
 def get_lean_verilog( fd ):
-  return [x for x in fd.readlines() if x != '\n' and not x.startswith('//')]
+  return [x for x in fd.readlines() if is_lean_verilog_line( x )]
 
 def get_lean_verilog_file( file_path_or_fd ):
   if hasattr( file_path_or_fd, 'readlines' ):
@@ -72,12 +75,72 @@ def get_lean_verilog_file( file_path_or_fd ):
       return get_lean_verilog(fd)
 
 def get_hash_of_lean_verilog( file_path ):
+  if not hasattr( file_path, 'readlines' ):
+    # Use the hash recorded when the file was emitted if it is still valid
+    digest = read_lean_hash_sidecar( file_path )
+    if digest is not None:
+      return digest
+    with open(file_path) as fd:
+      return get_hash_of_lean_verilog( fd )
+
   hash_inst = blake2b()
-  v = get_lean_verilog_file( file_path )
-  string = ''.join(v).encode( 'ascii' )
-  hash_inst.update(string)
+  for x in file_path:
+    if is_lean_verilog_line( x ):
+      hash_inst.update( x.encode( 'ascii' ) )
   return hash_inst.hexdigest()
 
+#-------------------------------------------------------------------------
+# Streaming emission
+#-------------------------------------------------------------------------
+# The hash of the lean Verilog of a file can be stored next to it in a
+# sidecar file together with the size and mtime of the file, so that we
+# do not need to read the file again as long as it is not modified.
+
+def get_lean_hash_sidecar( file_path ):
+  return f'{file_path}.lean_hash'
+
+def read_lean_hash_sidecar( file_path ):
+  """Return the recorded lean hash of file_path, or None if there is no
+  sidecar or the file has changed since the hash was recorded."""
+  try:
+    st = os.stat( file_path )
+    with open( get_lean_hash_sidecar( file_path ) ) as fd:
+      digest, size, mtime_ns = fd.read().split()
+  except (OSError, ValueError):
+    return None
+  if int(size) != st.st_size or int(mtime_ns) != st.st_mtime_ns:
+    return None
+  return digest
+
+def write_lean_hash_sidecar( file_path, digest ):
+  st = os.stat( file_path )
+  with open( get_lean_hash_sidecar( file_path ), 'w' ) as fd:
+    fd.write( f'{digest} {st.st_size} {st.st_mtime_ns}\n' )
+
+class LeanVerilogHashWriter:
+  """Write text to fd and compute get_hash_of_lean_verilog of everything
+  written so far on the fly."""
+
+  def __init__( s, fd ):
+    s.fd = fd
+    s.hash_inst = blake2b()
+    s.partial = ''
+
+  def write( s, text ):
+    s.fd.write( text )
+    lines = ( s.partial + text ).split( '\n' )
+    s.partial = lines.pop()
+    for line in lines:
+      line += '\n'
+      if is_lean_verilog_line( line ):
+        s.hash_inst.update( line.encode( 'ascii' ) )
+
+  def hexdigest( s ):
+    if s.partial and is_lean_verilog_line( s.partial ):
+      s.hash_inst.update( s.partial.encode( 'ascii' ) )
+    s.partial = ''
+    return s.hash_inst.hexdigest()
+
 def verilog_cmp( tmp, out ):
   tmp_v, out_v = get_lean_verilog_file(tmp), get_lean_verilog_file(out)
   is_same_len = len(tmp_v) == len(out_v)
@@ -16,6 +16,7 @@ VTranslator = mk_VTranslator( RTLIRTranslator, Yosys_STranslator, Yosys_BTransla
 class YosysTranslator( VTranslator ):
 
   def set_header( s ):
+      s.header_keywords = 'generated by PyMTL yosys-SystemVerilog translation pass'
       s.header = \
 """\
 //-------------------------------------------------------------------------
@@ -29,13 +30,12 @@ class YosysTranslator( VTranslator ):
   #   pass
 
   def rtlir_tr_src_layout( s, hierarchy ):
+    return s.rtlir_tr_src_layout_prologue( hierarchy, False ) + hierarchy.component_src
+
+  def rtlir_tr_src_layout_prologue( s, hierarchy, is_prev_result ):
     s.set_header()
     name = s._top_module_full_name
-    ret = s.header.format( **locals() )
-
-    # Add component sources
-    ret += hierarchy.component_src
-    return ret
+    return s.header.format( **locals() )
 
   def rtlir_tr_component( s, behavioral, structural ):
 
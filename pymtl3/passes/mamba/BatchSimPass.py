@@ -0,0 +1,298 @@
+"""
+========================================================================
+BatchSimPass.py
+========================================================================
+Simulate N independent copies of an RTL design in lockstep with NumPy.
+
+BatchSimPass compiles the update blocks like FlatSimPass, but every slot
+of the state is a row of a NumPy array of shape (number of slots, N), so
+every statement of the generated code works on all N copies at once and
+one sim_tick advances all of them. Control flow that depends on the
+values of signals is predicated: both sides of an if statement run with
+masked writes, and a side is skipped only when no copy takes it. Designs
+whose slots are at most 64 bits wide use uint64 rows, wider designs fall
+back to rows of Python ints.
+
+The copies differ in the values of their top-level input ports, which
+are set and read as arrays of N values:
+
+  top.apply( BatchSim( ninstances=1000 ) )
+  top.sim_reset()
+  top.sim_poke( top.in_, np.arange( 1000 ) )
+  top.sim_tick()
+  out = top.sim_peek( top.out )
+
+sim_reset drives the reset port of all copies. The Bits objects of the
+signals show the copy trace_instance, which is what line traces,
+waveforms and generated test benches see.
+
+Date   : Oct 17, 2026
+"""
+from pymtl3.passes.errors import ModelTypeError
+from pymtl3.passes.rtlir import BehavioralRTLIR as bir
+
+from ..sim.SimCheckpoint import dump_checkpoint_state, load_checkpoint_state
+from .FlatSimPass import FlatSimPass, _is_const, _mask, _nbits, _UpblkCompiler
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+class BatchSimPass( FlatSimPass ):
+
+  def __init__( self, ninstances, trace_instance=0, print_line_trace=True,
+                reset_active_high=True ):
+    super().__init__( print_line_trace, reset_active_high )
+    assert 0 <= trace_instance < ninstances
+
+    self.ninstances     = ninstances
+    self.trace_instance = trace_instance
+
+  def __call__( self, top ):
+    if np is None:
+      raise ImportError( "BatchSimPass requires numpy" )
+    super().__call__( top )
+
+  def allocate_slots( self, top ):
+    super().allocate_slots( top )
+    self.dtype = np.uint64 if max( self.widths, default=0 ) <= 64 else object
+
+  #-----------------------------------------------------------------------
+  # Code generation
+  #-----------------------------------------------------------------------
+
+  def mk_compiler( self, prefix, is_seq ):
+    return _BatchUpblkCompiler( self, prefix, is_seq )
+
+  # Tables are arrays indexed by all indices at once
+  def mk_table( self, value, kind, indices ):
+    dtype = np.intp if kind == "slot" else self.dtype
+    name  = self.mk_const( ( kind, value ), np.array( value, dtype=dtype ) )
+    return f"{name}[{', '.join( self.index( i ) for i in indices )}]"
+
+  # Rows of Python ints cannot index arrays
+  def index( self, src ):
+    return src if self.dtype is not object else f"_ix( {src} )"
+
+  def snapshot( self, slots ):
+    return f"S[{sorted(slots)}]"
+
+  def unchanged( self, old, slots ):
+    return f"({old} == {self.snapshot( slots )}).all()"
+
+  def func_globals( self ):
+    T  = self.dtype
+    ar = np.arange( self.ninstances )
+
+    def _sel( p, a, b ):
+      r = np.where( p, a, b )
+      return r if r.dtype == T else r.astype( T )
+    def _put( dst, v, p ):
+      np.copyto( dst, v, casting="unsafe", where=p )
+    def _cond( v ):
+      return np.asarray( np.not_equal( v, 0 ), dtype=bool )
+    def _u( v ):
+      return np.asarray( v ).astype( T )
+    def _parity( v, nbits ):
+      n = 1
+      while n < nbits:
+        n <<= 1
+      while n > 1:
+        n >>= 1
+        v = v ^ (v >> n)
+      return v & 1
+    def _shl( v, n, nbits, mask ):
+      return _sel( n < nbits, (v << n) & mask, 0 )
+    def _ix( v ):
+      return v.astype( np.intp ) if isinstance( v, np.ndarray ) else v
+
+    return dict( super().func_globals(), _sel=_sel, _put=_put, _cond=_cond, _u=_u,
+                 _parity=_parity, _shl=_shl, _ix=_ix, _ar=ar )
+
+  # A dynamic slot picks one row per copy
+  def word( self, ref, A ):
+    if ref.name is None and ref.dynamic:
+      return f"{A}[{self.index( ref.index )}, _ar]"
+    return super().word( ref, A )
+
+  # Write the bits of the copies selected by the predicate pred
+  def write( self, ref, v, A, pred=None ):
+    if pred is None:
+      return super().write( ref, v, A )
+    word = self.word( ref, A )
+    new  = self.merge( ref, word, v )
+    if ref.name is None and not ref.dynamic:
+      return f"_put( {word}, {new}, {pred} )"
+    return f"{word} = _sel( {pred}, {new}, {word} )"
+
+  def merge( self, ref, word, v ):
+    if isinstance( ref.lo, int ) and ref.width is not None:
+      return super().merge( ref, word, v )
+    # ~mask is negative, clear the bits with xor instead
+    M, lo = _mask( ref.nbits ), ref.lo
+    return f"({word} ^ ((({word} >> {lo}) & {M}) << {lo})) | ({v} << {lo})"
+
+  #-----------------------------------------------------------------------
+  # Simulation functions
+  #-----------------------------------------------------------------------
+
+  def create_views( self, top ):
+    views, ports = self.collect_views( top )
+    store = self.compile_sync( "sync_views", views, True )
+    load  = self.compile_sync( "load_views", views, False )
+    k     = self.trace_instance
+
+    # The views show one copy, and loading them sets all copies
+    def sync_views( S ):
+      store( S[:, k].tolist() )
+    def load_views( S ):
+      values = [ 0 ] * len(self.widths)
+      load( values )
+      S[:] = np.array( values, dtype=self.dtype )[:, None]
+    self.sync_views = sync_views
+    self.load_views = load_views
+
+    # Only the reset port is read from its view, the other input ports
+    # are set with sim_poke and the output ports read with sim_peek
+    reset = [ (obj, i) for obj, i in ports[0] if obj is top.reset ]
+    self.sync_in  = self.compile_sync( "sync_in", reset, False )
+    self.sync_out = lambda S: None
+
+    S = np.empty( ( len(self.widths), self.ninstances ), dtype=self.dtype )
+    load_views( S )
+    self.arrays = top._sim.flat_arrays = [ S, S.copy() ]
+    self.wrap_line_trace( top )
+    self.create_sim_poke_peek( top, views, ports[0] )
+
+  def create_sim_poke_peek( self, top, views, inports ):
+    slots   = { id(obj): i for obj, i in views }
+    inputs  = { id(obj) for obj, _ in inports }
+    arrays  = self.arrays
+    widths  = self.widths
+
+    def sim_poke( port, values ):
+      if id(port) not in inputs:
+        raise ValueError( f"sim_poke sets top-level input ports, not {port!r}" )
+      i = slots[ id(port) ]
+      if hasattr( values, "to_bits" ):
+        values = int( values.to_bits() )
+      values = np.asarray( values, dtype=object )
+      if values.ndim > 1 or values.size not in ( 1, arrays[0].shape[1] ):
+        raise ValueError( f"sim_poke needs one value or {arrays[0].shape[1]} values, "
+                          f"not an array of shape {values.shape}" )
+      if ( values < 0 ).any() or ( values > _mask( widths[i] ) ).any():
+        raise ValueError( f"sim_poke values do not fit in {widths[i]} bits" )
+      arrays[0][i] = values
+
+    def sim_peek( port ):
+      return arrays[0][ slots[ id(port) ] ].copy()
+
+    top.sim_poke = sim_poke
+    top.sim_peek = sim_peek
+
+  def create_sim_checkpoint( self, top ):
+    arrays = self.arrays
+
+    def sim_checkpoint( path ):
+      dump_checkpoint_state( ( top._sim.simulated_cycles, arrays[0] ), path )
+    def sim_restore( path ):
+      top._sim.simulated_cycles, S = load_checkpoint_state( top, path )
+      arrays[0][:] = S
+      arrays[1][:] = S
+    top.sim_checkpoint = sim_checkpoint
+    top.sim_restore    = sim_restore
+
+#-------------------------------------------------------------------------
+# _BatchUpblkCompiler
+#-------------------------------------------------------------------------
+# Compile an update block into statements over rows. Conditions that are
+# not Python constants become boolean rows, and the statements under them
+# write through the current predicate.
+
+class _BatchUpblkCompiler( _UpblkCompiler ):
+
+  def __init__( s, sim_pass, prefix, is_seq ):
+    super().__init__( sim_pass, prefix, is_seq )
+    s.pred   = None  # name of the predicate of the current statements
+    s.npreds = 0
+    s.tmps   = set()
+
+  def visit_CombUpblk( s, node ):
+    super().visit_CombUpblk( node )
+    # Copies that skip a predicated assignment keep the old value
+    s.lines[:0] = [ f"{x} = 0" for x in sorted( s.tmps ) ]
+
+  visit_SeqUpblk = visit_CombUpblk
+
+  def visit_Assign( s, node ):
+    target = node.targets[0]
+    if not isinstance( target, bir.TmpVar ):
+      return super().visit_Assign( node )
+
+    name  = s.local( target )
+    value = s.value( node.value, _nbits( target ) )
+    # A row of S is a view that later writes would change
+    if value.startswith( "S[" ):
+      value += ".copy()"
+    s.tmps.add( name )
+    if s.pred is None:
+      s.emit( f"{name} = {value}" )
+    else:
+      s.emit( f"{name} = _sel( {s.pred}, {value}, {name} )" )
+
+  def write( s, ref, value, target ):
+    s.emit( s.sim.write( ref, value, target, s.pred ) )
+
+  def visit_If( s, node, elif_=False ):
+    if _is_const( node.cond ):
+      s.emit( f"if {s.expr( node.cond )}:" )
+      s.emit_body( node.body )
+      if node.orelse:
+        s.emit( "else:" )
+        s.emit_body( node.orelse )
+      return
+
+    s.npreds += 1
+    k = s.npreds
+    c = f"{s.prefix}c{k}"
+    s.emit( f"{c} = _cond( {s.expr( node.cond )} )" )
+
+    outer = s.pred
+    for p, cond, stmts in [ ( f"{s.prefix}p{k}", c,      node.body   ),
+                            ( f"{s.prefix}q{k}", f"~{c}", node.orelse ) ]:
+      if not stmts:
+        continue
+      s.emit( f"{p} = {cond}" if outer is None else f"{p} = {outer} & {cond}" )
+      s.emit( f"if {p}.any():" )
+      s.pred = p
+      s.emit_body( stmts )
+      s.pred = outer
+
+  def visit_For( s, node ):
+    for x in ( node.start, node.end, node.step ):
+      if not _is_const( x ):
+        raise ModelTypeError( "RTL designs whose loop bounds are constants" )
+    super().visit_For( node )
+
+  def visit_IfExp( s, node ):
+    if _is_const( node.cond ):
+      return super().visit_IfExp( node )
+    if _is_const( node ):
+      body, orelse = s.expr( node.body ), s.expr( node.orelse )
+    else:
+      nbits = _nbits( node )
+      body, orelse = s.value( node.body, nbits ), s.value( node.orelse, nbits )
+    return f"_sel( _cond( {s.expr( node.cond )} ), {body}, {orelse} )"
+
+  def visit_Reduce( s, node ):
+    if isinstance( node.op, bir.BitXor ):
+      n = _nbits( node.value )
+      return f"_parity( {s.value( node.value, n )}, {n} )"
+    return f"_u( {super().visit_Reduce( node )} )"
+
+  def visit_Compare( s, node ):
+    src = super().visit_Compare( node )
+    if _is_const( node.left ) and _is_const( node.right ):
+      return src
+    return f"_u( {src} )"
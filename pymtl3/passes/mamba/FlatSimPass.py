@@ -0,0 +1,1029 @@
+"""
+========================================================================
+FlatSimPass.py
+========================================================================
+Simulate an RTL design on a flat list of integers instead of on the Bits
+and bitstruct objects created by lock_in_simulation.
+
+Every net of top-level signals gets one slot of the state list, a Wire
+array gets a contiguous range of slots, and the value of a slot is the
+integer value of the signal, i.e. always in [0, 2**nbits). Fields and
+slices of signals are bit ranges of their slot. The update blocks are
+compiled from the behavioral RTLIR that the translation passes build
+into Python code that reads and writes these integers with explicit
+shifts and masks. Generated net blocks become plain copies.
+
+Combinational blocks write the current-cycle list S. Sequential blocks
+read S and write the next-cycle list N, which starts as a copy of S, so
+the clock edge is a list copy plus swapping S and N instead of calling
+_flip on every double-buffered signal.
+
+The Bits objects of the signals are kept as read-only views. The
+simulation reads the top-level input ports from their views every time
+it evaluates the design and writes the top-level output ports back, and
+it refreshes all views before line tracing, waveform dumping and
+checkpointing. Writing a signal other than a top-level input port from
+outside the simulation has no effect.
+
+Date   : Oct 17, 2026
+"""
+import linecache
+
+from pymtl3.datatypes import Bits, b1, is_bitstruct_class, mk_bits
+from pymtl3.dsl import MetadataKey
+from pymtl3.dsl.Connectable import Const, MethodPort, Signal
+from pymtl3.dsl.errors import UpblkCyclicError
+from pymtl3.extra.pypy import custom_exec
+from pymtl3.passes.backends.verilog import VerilogTBGenPass
+from pymtl3.passes.errors import ModelTypeError, PassOrderError
+from pymtl3.passes.rtlir import BehavioralRTLIR as bir
+from pymtl3.passes.rtlir import (
+    BehavioralRTLIRGenPass,
+    BehavioralRTLIRTypeCheckPass,
+)
+from pymtl3.passes.rtlir import RTLIRDataType as rdt
+from pymtl3.passes.rtlir import RTLIRType as rt
+from pymtl3.passes.tracing.PrintTextWavePass import PrintTextWavePass
+from pymtl3.passes.tracing.VcdGenerationPass import VcdGenerationPass
+
+from ..sim.PrepareSimPass import PrepareSimPass
+from ..sim.SimCheckpoint import load_checkpoint, save_checkpoint
+
+def _mask( nbits ):
+  return (1 << nbits) - 1
+
+def _lit( v ):
+  return hex(v) if v > 9 else str(v) if v >= 0 else f"({v})"
+
+def _dtype( node ):
+  try:
+    return node.Type.get_dtype()
+  except AttributeError:
+    return None
+
+def _nbits( node ):
+  return _dtype( node ).get_length()
+
+def _is_const( node ):
+  return isinstance( node.Type, rt.Const )
+
+def _type_nbits( t ):
+  if isinstance( t, list ):
+    return len(t) * _type_nbits( t[0] )
+  return t.nbits
+
+# Shift left by an amount that may be at least the width
+
+def _shl( v, n, nbits, mask ):
+  return (v << n) & mask if n < nbits else 0
+
+#-------------------------------------------------------------------------
+# Resolved references
+#-------------------------------------------------------------------------
+# A reference is resolved into a bit range [lo, lo+nbits) of a slot of
+# the state lists or of a local variable. lo is an int or the source of
+# an expression. A dynamic index into a list of components, interfaces
+# or signals applies the rest of the reference to every element, which
+# gives a _Dyn tree that collapse turns into lookup tables.
+
+class _Sig:
+  def __init__( s, base, lo, nbits, width, off=None ):
+    s.base  = base   # first slot
+    s.off   = off    # dynamic offset into a Wire array, source or None
+    s.lo    = lo
+    s.nbits = nbits
+    s.width = width  # nbits of the slot
+
+class _Local:
+  def __init__( s, name, lo, nbits, width ):
+    s.name  = name
+    s.lo    = lo
+    s.nbits = nbits
+    s.width = width
+
+class _Value:
+  def __init__( s, value ):
+    s.value = value
+
+class _Dyn:
+  def __init__( s, index, children ):
+    s.index    = index
+    s.children = children
+
+class _Ref:
+  def __init__( s, index, lo, nbits, width, slots=(), *, name=None, const=None,
+                dynamic=False ):
+    s.index   = index   # source of the slot index
+    s.name    = name    # name of a local variable instead of a slot
+    s.lo      = lo
+    s.nbits   = nbits
+    s.width   = width   # nbits of the word if known, otherwise None
+    s.slots   = slots   # all slots the reference may point to
+    s.const   = const   # source of a constant, the others are unused
+    s.dynamic = dynamic # whether the slot depends on the values of signals
+
+class FlatSimPass( PrepareSimPass ):
+
+  # FlatSimPass public pass data
+
+  #: Names of the signals that share each slot of the state lists
+  #:
+  #: Type: ``list``; output
+  slot_names = MetadataKey(list)
+
+  # At most this many blocks are compiled into one generated function
+  max_blocks_per_func = 128
+
+  def __call__( self, top ):
+    if not hasattr( top, "_dag" ) or not hasattr( top._dag, "genblk_nets" ):
+      raise PassOrderError( "genblk_nets" )
+    if not hasattr( top, "_sched" ):
+      raise PassOrderError( "_sched" )
+
+    self.top     = top
+    self.consts  = {} # key -> ( name of a default argument, its value )
+    self.nblocks = 0
+
+    # The update blocks have to be compiled before lock_in_simulation
+    # replaces the signals with their values.
+    self.check_rtl( top )
+    self.allocate_slots( top )
+    self.compile_rtlir( top )
+    self.compile_schedules( top )
+
+    super().__call__( top )
+
+    top.set_metadata( FlatSimPass.slot_names, self.names )
+
+  #-----------------------------------------------------------------------
+  # Design analysis
+  #-----------------------------------------------------------------------
+
+  def check_rtl( self, top ):
+    if top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ):
+      raise ModelTypeError( "RTL designs without method ports" )
+    if top.get_all_update_once():
+      raise ModelTypeError( "RTL designs without update_once blocks" )
+
+  def allocate_slots( self, top ):
+    self.slots   = {} # top-level signal -> first slot
+    self.widths  = [] # nbits of every slot
+    self.names   = [] # names of the signals in every slot
+    self.entries = {} # first slot of a Wire array -> number of entries
+
+    # Top-level signals in the same net share their slots
+    for writer, signals in top.get_all_value_nets():
+      tops = [ x for x in signals if isinstance( x, Signal ) and x.is_top_level_signal() ]
+      if tops:
+        self.add_slots( tops )
+
+    for x in sorted( top._dsl.all_signals, key=repr ):
+      if x.is_top_level_signal() and x not in self.slots:
+        self.add_slots( [ x ] )
+
+  def add_slots( self, signals ):
+    x     = signals[0]
+    Type  = x._dsl.Type
+    nbits = _type_nbits( Type ) if isinstance( Type, type ) and \
+            ( issubclass( Type, Bits ) or is_bitstruct_class( Type ) ) else None
+    if nbits is None:
+      raise ModelTypeError( f"RTL designs with Bits or bitstruct signals, not {x!r} of {Type}" )
+
+    num  = getattr( x._dsl, "num_entries", None )
+    base = len(self.widths)
+    name = "/".join( repr(y) for y in signals )
+    if num is None:
+      self.widths.append( nbits )
+      self.names.append( name )
+    else:
+      self.widths.extend( [ nbits ] * num )
+      self.entries[ base ] = num
+      self.names.extend( f"{name}[{i}]" for i in range(num) )
+    for y in signals:
+      self.slots[ y ] = base
+
+  # Return ( slot, lo, nbits ) of a signal that is not a Wire array
+  def locate( self, sig ):
+    if sig.is_top_level_signal():
+      return self.slots[ sig ], 0, self.widths[ self.slots[ sig ] ]
+
+    parent = sig.get_parent_object()
+    slot, lo, nbits = self.locate( parent )
+    if sig._dsl.slice is not None:
+      sl = sig._dsl.slice
+      return slot, lo + sl.start, sl.stop - sl.start
+
+    # A field of a bitstruct, the first field is at the MSB and element 0
+    # of a list field is at the LSB of the field
+    fields = parent._dsl.Type.__bitstruct_fields__
+    for name, t in reversed( list( fields.items() ) ):
+      if name == sig._dsl._my_name:
+        break
+      lo += _type_nbits( t )
+    for i in sig._dsl._my_indices or ():
+      t   = t[0]
+      lo += i * _type_nbits( t )
+    return slot, lo, _type_nbits( t )
+
+  def compile_rtlir( self, top ):
+    self.rtlir = {} # update block -> behavioral RTLIR
+
+    gen_pass = BehavioralRTLIRGenPass( top )
+    tc_pass  = BehavioralRTLIRTypeCheckPass( top )
+    for m in sorted( top.get_all_components(), key=repr ):
+      if not m.get_update_blocks():
+        continue
+      try:
+        gen_pass( m )
+        tc_pass( m )
+      except Exception as e:
+        raise ModelTypeError( f"RTL designs whose update blocks can be translated, "
+                              f"{m!r} failed with\n{e}" ) from e
+      self.rtlir.update( m.get_metadata( BehavioralRTLIRGenPass.rtlir_upblks ) )
+
+  #-----------------------------------------------------------------------
+  # Code generation
+  #-----------------------------------------------------------------------
+
+  def mk_const( self, key, value=None ):
+    if key not in self.consts:
+      self.consts[ key ] = f"_c{len(self.consts)}", key if value is None else value
+    return self.consts[ key ][0]
+
+  # The source of an element of a nested tuple of slots, bit offsets or
+  # constant values
+  def mk_table( self, value, kind, indices ):
+    return self.mk_const( value ) + "".join( f"[{i}]" for i in indices )
+
+  def mk_compiler( self, prefix, is_seq ):
+    return _UpblkCompiler( self, prefix, is_seq )
+
+  def compile_schedules( self, top ):
+    self.comb = self.compile_schedule( "comb", top._sched.update_schedule, False )
+    self.ff   = self.compile_schedule( "ff",   top._sched.schedule_ff,     True  )
+
+  def compile_schedule( self, name, schedule, is_seq ):
+    return self.compile_blocks( name, [ self.compile_func( func, is_seq ) for func in schedule ],
+                                is_seq )
+
+  # Compile the ( source lines, written slots ) of blocks into one function
+  def compile_blocks( self, name, blocks, is_seq ):
+    funcs = []
+    n = self.max_blocks_per_func
+    for i in range( 0, len(blocks), n ):
+      funcs.append( self.compile_function( f"{name}{len(funcs)}", is_seq,
+                                           sum( ( x[0] for x in blocks[i:i+n] ), [] ) ) )
+
+    if len(funcs) == 1:
+      return funcs[0]
+
+    def run( *lists ):
+      for f in funcs:
+        f( *lists )
+    return run
+
+  # Return ( source lines, slots that the lines may write )
+  def compile_func( self, func, is_seq ):
+    if func in self.rtlir:
+      self.nblocks += 1
+      comp = self.mk_compiler( f"_{self.nblocks}_", is_seq )
+      comp.visit( self.rtlir[ func ] )
+      return [ f"# {func.__name__}" ] + comp.lines, comp.written
+
+    if func in self.top._dag.genblk_nets:
+      return self.compile_net( *self.top._dag.genblk_nets[ func ] )
+
+    if hasattr( func, "_upblks" ):
+      return self.compile_scc( func._upblks )
+
+    raise ModelTypeError( f"RTL designs whose update blocks can be translated, "
+                          f"{func.__name__} is not one of them" )
+
+  def compile_net( self, writer, readers ):
+    if not readers:
+      return [], set()
+
+    if isinstance( writer, Const ):
+      c = writer._dsl.const
+      value = _lit( int(c.to_bits()) if hasattr( c, "to_bits" ) else int(c) )
+    else:
+      value = self.read( self.sig_ref( writer ) )
+
+    lines   = []
+    written = set()
+    if len(readers) > 1:
+      lines.append( f"_x = {value}" )
+      value = "_x"
+    for x in readers:
+      ref = self.sig_ref( x )
+      lines.append( self.write( ref, value, "S" ) )
+      written.update( ref.slots )
+    return lines, written
+
+  def sig_ref( self, sig ):
+    slot, lo, nbits = self.locate( sig )
+    return _Ref( str(slot), lo, nbits, self.widths[ slot ], (slot,) )
+
+  def compile_scc( self, upblks ):
+    self.nblocks += 1
+    k = self.nblocks
+
+    body    = []
+    written = set()
+    for blk in upblks:
+      lines, w = self.compile_func( blk, False )
+      body.extend( lines )
+      written.update( w )
+
+    names    = ", ".join( blk.__name__ for blk in upblks )
+    message  = f"Combinational loop detected at runtime in {{{names}}} after 100 iters!"
+    return ( [ f"for _i{k} in range(100):",
+               f"  _old{k} = {self.snapshot( written )}" ] +
+             [ f"  {x}" for x in body ] +
+             [ f"  if {self.unchanged( f'_old{k}', written )}:",
+                "    break",
+                "else:",
+               f"  raise UpblkCyclicError( {message!r} )" ] ), written
+
+  # The source of a copy of the values of slots and of a comparison of
+  # such a copy against the current values
+  def snapshot( self, slots ):
+    return "(" + "".join( f"S[{x}], " for x in sorted(slots) ) + ")"
+
+  def unchanged( self, old, slots ):
+    return f"{old} == {self.snapshot( slots )}"
+
+  # Names that the generated functions can use
+  def func_globals( self ):
+    return { "_shl": _shl, "UpblkCyclicError": UpblkCyclicError }
+
+  def compile_function( self, func_name, is_seq, lines ):
+    consts = { name: value for name, value in self.consts.values()
+               if any( name in x for x in lines ) }
+    args   = [ "S", "N" ] if is_seq else [ "S" ]
+    args  += [ f"{name}={name}" for name in consts ]
+
+    src = f"def {func_name}( {', '.join(args)} ):\n"
+    src += "".join( f"  {x}\n" for x in lines or [ "pass" ] )
+
+    fname = f"<{func_name} of {self.top.__class__.__name__}>"
+    linecache.cache[ fname ] = ( len(src), None, src.splitlines( True ), fname )
+
+    _globals = dict( consts, **self.func_globals() )
+    _locals  = {}
+    custom_exec( compile( src, filename=fname, mode="exec" ), _globals, _locals )
+    return _locals[ func_name ]
+
+  # The source of the word of a reference in list A
+  def word( self, ref, A ):
+    return ref.name if ref.name is not None else f"{A}[{ref.index}]"
+
+  # Read the bits of a reference from list S
+  def read( self, ref ):
+    if ref.const is not None:
+      return ref.const
+    word = self.word( ref, "S" )
+    lo, M = ref.lo, _lit( _mask( ref.nbits ) )
+    if lo == 0:
+      return word if ref.nbits == ref.width else f"({word} & {M})"
+    if isinstance( lo, int ) and lo + ref.nbits == ref.width:
+      return f"({word} >> {lo})"
+    return f"(({word} >> {lo}) & {M})"
+
+  # Write the in-range value v to the bits of a reference in list A
+  def write( self, ref, v, A ):
+    word = self.word( ref, A )
+    return f"{word} = {self.merge( ref, word, v )}"
+
+  # The source of word with the bits of a reference replaced by v
+  def merge( self, ref, word, v ):
+    lo = ref.lo
+    if lo == 0 and ref.nbits == ref.width:
+      return v
+    if isinstance( lo, int ) and ref.width is not None:
+      keep = _mask( ref.width ) ^ (_mask( ref.nbits ) << lo)
+      return f"({word} & {_lit(keep)}) | " + ( f"({v} << {lo})" if lo else v )
+    M = _lit( _mask( ref.nbits ) )
+    return f"({word} & ~({M} << {lo})) | ({v} << {lo})"
+
+  #-----------------------------------------------------------------------
+  # Simulation functions
+  #-----------------------------------------------------------------------
+
+  # Compile the functions that move values between the state lists and
+  # the Bits objects that lock_in_simulation created
+  def create_views( self, top ):
+    views, ports = self.collect_views( top )
+    self.sync_views = self.compile_sync( "sync_views", views, True )
+    self.load_views = self.compile_sync( "load_views", views, False )
+    self.sync_in    = self.compile_sync( "sync_in",  ports[0], False )
+    self.sync_out   = self.compile_sync( "sync_out", ports[1], True )
+
+    S = [ 0 ] * len(self.widths)
+    self.load_views( S )
+    self.arrays = top._sim.flat_arrays = [ S, S[:] ]
+    self.wrap_line_trace( top )
+
+  # Return the ( value object, slot ) pairs of all signals and of the
+  # top-level input and output ports
+  def collect_views( self, top ):
+    mapping = top._sim.signal_object_mapping
+
+    views = {} # id of a value object -> ( value object, slot )
+    ports = [], []
+    for x in sorted( self.slots, key=repr ):
+      slot  = self.slots[ x ]
+      value = mapping[ x ][-1]
+      objs  = [ (value, slot) ] if getattr( x._dsl, "num_entries", None ) is None else \
+              [ (v, slot + i) for i, v in enumerate( value ) ]
+      for obj, i in objs:
+        views[ id(obj) ] = obj, i
+      if x.get_host_component() is top:
+        if x.is_input_value_port():
+          ports[0].extend( objs )
+        elif x.is_output_value_port():
+          ports[1].extend( objs )
+
+    return list( views.values() ), ports
+
+  # Line tracing reads the views
+  def wrap_line_trace( self, top ):
+    if hasattr( top, "line_trace" ):
+      line_trace = top.line_trace
+      sync_views = self.sync_views
+      arrays     = self.arrays
+      def flat_line_trace():
+        sync_views( arrays[0] )
+        return line_trace()
+      top.line_trace = flat_line_trace
+
+  # Compile store( S ) that writes the value objects or load( S ) that
+  # reads them
+  def compile_sync( self, func_name, objs, store ):
+    lines    = []
+    _globals = {}
+    for k, (obj, i) in enumerate( objs ):
+      name = f"o{k}"
+      _globals[ name ] = obj
+      if isinstance( obj, Bits ):
+        lines.append( f"{name} @= S[{i}]" if store else f"S[{i}] = {name}.uint()" )
+      elif is_bitstruct_class( type(obj) ):
+        if store:
+          _globals[ f"f{k}" ] = self.mk_from_int( type(obj) )
+          lines.append( f"{name} @= f{k}( S[{i}] )" )
+        else:
+          lines.append( f"S[{i}] = int( {name}.to_bits() )" )
+      elif not store:
+        lines.append( f"S[{i}] = {int(obj)}" )
+
+    args = "".join( f", {x}={x}" for x in _globals )
+    src  = f"def {func_name}( S{args} ):\n" + "".join( f"  {x}\n" for x in lines or [ "pass" ] )
+    _locals = {}
+    custom_exec( compile( src, filename=f"<{func_name}>", mode="exec" ), _globals, _locals )
+    return _locals[ func_name ]
+
+  @staticmethod
+  def mk_from_int( cls ):
+    BitsN = mk_bits( cls.nbits )
+    from_bits = cls.from_bits
+    return lambda v: from_bits( BitsN( v ) )
+
+  # The first hook after lock_in_simulation
+  def create_sim_eval_comb( self, top ):
+    self.create_views( top )
+
+    arrays   = self.arrays
+    comb     = self.comb
+    sync_in  = self.sync_in
+    sync_out = self.sync_out
+    check    = top._sim.check_top_level_inports
+
+    def sim_eval_combinational():
+      check()
+      S = arrays[0]
+      sync_in( S )
+      comb( S )
+      sync_out( S )
+
+    top.sim_eval_combinational = sim_eval_combinational
+
+  def create_clock_edge( self, top ):
+    hooks = []
+    if top.has_metadata( VcdGenerationPass.vcd_func ):
+      hooks.append( top.get_metadata( VcdGenerationPass.vcd_func ) )
+    if top.has_metadata( PrintTextWavePass.textwave_func ):
+      hooks.append( top.get_metadata( PrintTextWavePass.textwave_func ) )
+    if top.has_metadata( VerilogTBGenPass.vtbgen_hooks ):
+      hooks.extend( top.get_metadata( VerilogTBGenPass.vtbgen_hooks ) )
+
+    arrays     = self.arrays
+    ff         = self.ff
+    sync_views = self.sync_views
+    advance    = self.create_advance_sim_cycle( top )
+
+    def clock_edge():
+      S, N = arrays
+      if hooks:
+        sync_views( S )
+        for f in hooks:
+          f()
+      N[:] = S
+      ff( S, N )
+      arrays[0] = N
+      arrays[1] = S
+      advance()
+
+    return clock_edge
+
+  def create_sim_tick( self, top ):
+    arrays     = self.arrays
+    comb       = self.comb
+    sync_in    = self.sync_in
+    sync_out   = self.sync_out
+    check      = top._sim.check_top_level_inports
+    clock_edge = self.create_clock_edge( top )
+
+    print_line_trace = None
+    if self.print_line_trace and hasattr( top, 'line_trace' ):
+      print_line_trace = top.print_line_trace
+
+    def sim_tick():
+      S = arrays[0]
+      sync_in( S )
+      comb( S )
+      if print_line_trace is not None:
+        print_line_trace()
+      clock_edge()
+      S = arrays[0]
+      comb( S )
+      sync_out( S )
+      check()
+
+    top.sim_tick = sim_tick
+
+  def create_sim_reset( self, top ):
+    arrays     = self.arrays
+    comb       = self.comb
+    sync_in    = self.sync_in
+    sync_out   = self.sync_out
+    clock_edge = self.create_clock_edge( top )
+
+    print_line_trace = self.print_line_trace and hasattr( top, 'line_trace' )
+    active_high      = self.reset_active_high
+
+    def up():
+      S = arrays[0]
+      sync_in( S )
+      comb( S )
+      sync_out( S )
+
+    def sim_reset():
+      if print_line_trace:
+        print()
+      # cycle 0
+      top.reset @= b1( active_high )
+      up()
+
+      clock_edge()
+      # cycle 1
+      up()
+      if print_line_trace:
+        print( f"{top._sim.simulated_cycles:3}r {top.line_trace()}" )
+
+      clock_edge()
+      # cycle 2
+      up()
+      if print_line_trace:
+        print( f"{top._sim.simulated_cycles:3}r {top.line_trace()}" )
+
+      clock_edge()
+      # cycle 3
+      top.reset @= b1( not active_high )
+      up()
+
+    top.sim_reset = sim_reset
+
+  def create_sim_checkpoint( self, top ):
+    arrays     = self.arrays
+    sync_views = self.sync_views
+    load_views = self.load_views
+
+    def sim_checkpoint( path ):
+      sync_views( arrays[0] )
+      save_checkpoint( top, path )
+    def sim_restore( path ):
+      load_checkpoint( top, path )
+      load_views( arrays[0] )
+      arrays[1][:] = arrays[0]
+    top.sim_checkpoint = sim_checkpoint
+    top.sim_restore    = sim_restore
+
+#-------------------------------------------------------------------------
+# _UpblkCompiler
+#-------------------------------------------------------------------------
+# Compile the behavioral RTLIR of one update block into source lines.
+# Every expression compiles to a parenthesized source string whose value
+# is in range for its width unless the expression is a Python constant,
+# e.g. a loop variable or a closure integer, which follow int semantics
+# like they do in the update block.
+
+class _UpblkCompiler( bir.BehavioralRTLIRNodeVisitor ):
+
+  def __init__( s, sim_pass, prefix, is_seq ):
+    s.sim     = sim_pass
+    s.prefix  = prefix
+    s.target  = "N" if is_seq else "S"
+    s.lines   = []
+    s.indent  = ""
+    s.written = set()
+    s.dynamic = False # whether the reference being resolved has a dynamic slot
+
+  def emit( s, line ):
+    s.lines.append( s.indent + line )
+
+  def emit_body( s, stmts ):
+    indent = s.indent
+    s.indent += "  "
+    n = len(s.lines)
+    for stmt in stmts:
+      s.visit( stmt )
+    if len(s.lines) == n:
+      s.emit( "pass" )
+    s.indent = indent
+
+  #-----------------------------------------------------------------------
+  # Statements
+  #-----------------------------------------------------------------------
+
+  def visit_CombUpblk( s, node ):
+    for stmt in node.body:
+      s.visit( stmt )
+
+  visit_SeqUpblk = visit_CombUpblk
+
+  def visit_Assign( s, node ):
+    targets = node.targets
+    if isinstance( targets[0], bir.TmpVar ):
+      s.emit( f"{s.local( targets[0] )} = {s.value( node.value, _nbits( targets[0] ) )}" )
+      return
+
+    refs  = [ s.resolve( x ) for x in targets ]
+    value = s.value( node.value, refs[0].nbits )
+    if len(refs) > 1:
+      s.emit( f"{s.prefix}v = {value}" )
+      value = f"{s.prefix}v"
+    for ref in refs:
+      if ref.slots:
+        target = s.target
+        s.written.update( ref.slots )
+      else:
+        target = None
+      s.write( ref, value, target )
+
+  def write( s, ref, value, target ):
+    s.emit( s.sim.write( ref, value, target ) )
+
+  def visit_If( s, node, elif_=False ):
+    s.emit( f"{'elif' if elif_ else 'if'} {s.expr( node.cond )}:" )
+    s.emit_body( node.body )
+    if len(node.orelse) == 1 and isinstance( node.orelse[0], bir.If ):
+      s.visit_If( node.orelse[0], True )
+    elif node.orelse:
+      s.emit( "else:" )
+      s.emit_body( node.orelse )
+
+  def visit_For( s, node ):
+    var = s.prefix + node.var.name
+    s.emit( f"for {var} in range( {s.expr( node.start )}, {s.expr( node.end )}, "
+            f"{s.expr( node.step )} ):" )
+    s.emit_body( node.body )
+
+  #-----------------------------------------------------------------------
+  # Expressions
+  #-----------------------------------------------------------------------
+
+  def local( s, node ):
+    return s.prefix + node.name
+
+  # Return the source of node as a value in [0, 2**nbits)
+  def value( s, node, nbits ):
+    v = s.const_value( node )
+    if v is not None:
+      return _lit( v & _mask( nbits ) )
+    if _is_const( node ):
+      return f"({s.expr( node )} & {_lit( _mask( nbits ) )})"
+    return s.expr( node )
+
+  def const_value( s, node ):
+    v = getattr( node, "_value", None )
+    if v is None:
+      return None
+    try:
+      return int(v)
+    except TypeError:
+      return int(v.to_bits())
+
+  def expr( s, node ):
+    v = s.const_value( node )
+    if v is not None:
+      if not _is_const( node ) or isinstance( node, bir.SizeCast ):
+        v &= _mask( _nbits( node ) )
+      return _lit( v )
+    return s.visit( node )
+
+  def visit_Number( s, node ):
+    return _lit( node.value )
+
+  def visit_LoopVar( s, node ):
+    return s.local( node )
+
+  def visit_TmpVar( s, node ):
+    return s.local( node )
+
+  def visit_Attribute( s, node ):
+    return s.sim.read( s.resolve( node ) )
+
+  visit_Index   = visit_Attribute
+  visit_Slice   = visit_Attribute
+  visit_FreeVar = visit_Attribute
+
+  def visit_Concat( s, node ):
+    return s.pack( [ ( x, _nbits( x ) ) for x in node.values ] )
+
+  def visit_StructInst( s, node ):
+    props = _dtype( node ).get_all_properties()
+    return s.pack( [ ( x, t.get_length() ) for x, t in zip( node.values, props.values() ) ] )
+
+  # Concatenate values with the first one at the MSB
+  def pack( s, values ):
+    terms = []
+    lo = sum( n for _, n in values )
+    for x, n in values:
+      lo -= n
+      v = s.value( x, n )
+      terms.append( f"({v} << {lo})" if lo else v )
+    return f"({' | '.join( terms )})" if len(terms) > 1 else terms[0]
+
+  def visit_ZeroExt( s, node ):
+    return s.value( node.value, _nbits( node.value ) )
+
+  def visit_Truncate( s, node ):
+    return f"({s.expr( node.value )} & {_lit( _mask( _nbits( node ) ) )})"
+
+  def visit_SizeCast( s, node ):
+    nbits = _nbits( node )
+    if _is_const( node.value ) or _nbits( node.value ) > nbits:
+      return f"({s.expr( node.value )} & {_lit( _mask( nbits ) )})"
+    return s.expr( node.value )
+
+  def visit_SignExt( s, node ):
+    n, nbits = _nbits( node.value ), _nbits( node )
+    v = s.value( node.value, n )
+    if n == nbits:
+      return v
+    H = _lit( 1 << (n-1) )
+    return f"((({v} ^ {H}) - {H}) & {_lit( _mask( nbits ) )})"
+
+  def visit_Reduce( s, node ):
+    n = _nbits( node.value )
+    v = s.value( node.value, n )
+    if isinstance( node.op, bir.BitAnd ):
+      return f"({v} == {_lit( _mask( n ) )})"
+    if isinstance( node.op, bir.BitOr ):
+      return f"({v} != 0)"
+    return f"(bin({v}).count('1') & 1)"
+
+  def visit_IfExp( s, node ):
+    if _is_const( node ):
+      return f"({s.expr( node.body )} if {s.expr( node.cond )} else {s.expr( node.orelse )})"
+    nbits = _nbits( node )
+    return ( f"({s.value( node.body, nbits )} if {s.expr( node.cond )} "
+             f"else {s.value( node.orelse, nbits )})" )
+
+  def visit_UnaryOp( s, node ):
+    v = s.expr( node.operand )
+    if isinstance( node.op, bir.UAdd ):
+      return v
+    if _is_const( node ):
+      return f"({'~' if isinstance( node.op, bir.Invert ) else '-'}{v})"
+    M = _lit( _mask( _nbits( node ) ) )
+    if isinstance( node.op, bir.Invert ):
+      return f"({s.value( node.operand, _nbits( node ) )} ^ {M})"
+    return f"(-{v} & {M})"
+
+  _binops = {
+    bir.Add: "+", bir.Sub: "-", bir.Mult: "*", bir.Div: "//", bir.Mod: "%",
+    bir.Pow: "**", bir.ShiftLeft: "<<", bir.ShiftRightLogic: ">>",
+    bir.BitAnd: "&", bir.BitOr: "|", bir.BitXor: "^",
+  }
+
+  def visit_BinOp( s, node ):
+    op = s._binops[ type(node.op) ]
+    if _is_const( node ):
+      return f"({s.expr( node.left )} {op} {s.expr( node.right )})"
+
+    nbits = _nbits( node )
+    M = _lit( _mask( nbits ) )
+
+    if op in ( "<<", ">>" ):
+      l = s.value( node.left, nbits )
+      r = s.expr( node.right )
+      if op == ">>":
+        return f"({l} >> {r})"
+      rv = s.const_value( node.right )
+      if ( rv is not None and rv < nbits ) or \
+         ( not _is_const( node.right ) and _mask( _nbits( node.right ) ) < nbits ):
+        return f"(({l} << {r}) & {M})"
+      return f"_shl( {l}, {r}, {nbits}, {M} )"
+
+    if op in ( "+", "-", "*", "**" ):
+      l = s.expr_in( node.left, nbits )
+      r = s.expr_in( node.right, nbits )
+      return f"(({l} {op} {r}) & {M})"
+
+    # Bitwise operators, division and modulo of in-range values stay in range
+    l = s.value( node.left, nbits )
+    r = s.value( node.right, nbits )
+    return f"({l} {op} {r})"
+
+  # Modular arithmetic only needs constants to be masked when known
+  def expr_in( s, node, nbits ):
+    v = s.const_value( node )
+    if v is not None:
+      return _lit( v & _mask( nbits ) )
+    return s.expr( node )
+
+  def visit_Compare( s, node ):
+    op = { bir.Eq: "==", bir.NotEq: "!=", bir.Lt: "<", bir.LtE: "<=",
+           bir.Gt: ">", bir.GtE: ">=" }[ type(node.op) ]
+    left, right = node.left, node.right
+    if _is_const( left ) and _is_const( right ):
+      return f"({s.expr( left )} {op} {s.expr( right )})"
+    nbits = max( _nbits( x ) for x in ( left, right ) if not _is_const( x ) )
+    return f"({s.value( left, nbits )} {op} {s.value( right, nbits )})"
+
+  #-----------------------------------------------------------------------
+  # References
+  #-----------------------------------------------------------------------
+
+  # Resolve an Attribute/Index/Slice chain into a _Ref
+  def resolve( s, node ):
+    steps = []
+    while isinstance( node, ( bir.Attribute, bir.Index, bir.Slice ) ):
+      steps.append( node )
+      node = node.value
+    steps.reverse()
+
+    if isinstance( node, bir.Base ):
+      root = node.base
+    elif isinstance( node, bir.FreeVar ):
+      root = node.obj
+    elif isinstance( node, bir.TmpVar ):
+      n = _nbits( node )
+      root = _Local( s.local( node ), 0, n, n )
+    else:
+      raise ModelTypeError( f"RTL designs whose update blocks can be translated, "
+                            f"{node} cannot be resolved" )
+    # Index expressions resolve their own references while we walk
+    outer, s.dynamic = s.dynamic, False
+    ref = s.collapse( s.walk( root, node, steps ) )
+    s.dynamic = outer
+    return ref
+
+  def walk( s, obj, prev, steps ):
+    if isinstance( obj, Signal ) and getattr( obj._dsl, "num_entries", None ) is None:
+      slot, lo, nbits = s.sim.locate( obj )
+      obj = _Sig( slot, lo, nbits, s.sim.widths[ slot ] )
+
+    if not steps:
+      if isinstance( obj, ( _Sig, _Local ) ):
+        return obj
+      if isinstance( obj, Signal ):
+        raise ModelTypeError( f"RTL designs that do not read whole Wire arrays like {obj!r}" )
+      try:
+        return _Value( int(obj) )
+      except TypeError:
+        return _Value( int(obj.to_bits()) )
+
+    node, rest = steps[0], steps[1:]
+
+    if isinstance( obj, ( _Sig, _Local ) ):
+      return s.walk( s.select( obj, prev, node ), node, rest )
+
+    if isinstance( node, bir.Attribute ):
+      return s.walk( getattr( obj, node.attr ), node, rest )
+
+    assert isinstance( node, bir.Index ), f"cannot slice {obj!r}"
+    idx = s.const_value( node.idx )
+    if isinstance( obj, Signal ): # Wire array
+      base = s.sim.slots[ obj ]
+      n    = s.sim.widths[ base ]
+      if idx is not None:
+        return s.walk( _Sig( base + idx, 0, n, n ), node, rest )
+      s.dynamic |= not _is_const( node.idx )
+      return s.walk( _Sig( base, 0, n, n, s.expr( node.idx ) ), node, rest )
+    if idx is not None:
+      return s.walk( obj[ idx ], node, rest )
+    s.dynamic |= not _is_const( node.idx )
+    return _Dyn( s.expr( node.idx ), [ s.walk( x, node, rest ) for x in obj ] )
+
+  # Narrow the bit range of a signal or local to a field, element or slice
+  def select( s, obj, prev, node ):
+    dtype = _dtype( prev )
+
+    if isinstance( node, bir.Attribute ):
+      props = dtype.get_all_properties()
+      lo = 0
+      for name, t in reversed( list( props.items() ) ):
+        if name == node.attr:
+          break
+        lo += t.get_length()
+      return s.narrow( obj, lo, t.get_length() )
+
+    if isinstance( node, bir.Index ):
+      if isinstance( dtype, rdt.PackedArray ):
+        n = dtype.get_next_dim_type().get_length()
+      else:
+        n = 1
+      idx = s.const_value( node.idx )
+      if idx is not None:
+        return s.narrow( obj, idx * n, n )
+      v = s.expr( node.idx )
+      return s.narrow( obj, v if n == 1 else f"{v} * {n}", n )
+
+    lower = s.const_value( node.lower )
+    upper = s.const_value( node.upper )
+    if lower is not None and upper is not None:
+      return s.narrow( obj, lower, upper - lower )
+    return s.narrow( obj, s.expr( node.base ), node.size )
+
+  def narrow( s, obj, lo, nbits ):
+    if isinstance( obj.lo, int ) and isinstance( lo, int ):
+      lo = obj.lo + lo
+    elif obj.lo == 0:
+      lo = lo if isinstance( lo, int ) else f"({lo})"
+    elif lo == 0:
+      lo = obj.lo
+    else:
+      lo = f"({obj.lo} + {lo})"
+    if isinstance( obj, _Local ):
+      return _Local( obj.name, lo, nbits, obj.width )
+    return _Sig( obj.base, lo, nbits, obj.width, obj.off )
+
+  # Turn a resolved tree into a _Ref with lookup tables for the dynamic
+  # indices into lists of objects
+  def collapse( s, tree ):
+    indices = []
+    node = tree
+    while isinstance( node, _Dyn ):
+      indices.append( node.index )
+      node = node.children[0]
+
+    def leaves( x ):
+      if isinstance( x, _Dyn ):
+        for y in x.children:
+          yield from leaves( y )
+      else:
+        yield x
+    def table( x, f ):
+      if isinstance( x, _Dyn ):
+        return tuple( table( y, f ) for y in x.children )
+      return f( x )
+    def lookup( f, kind ):
+      return s.sim.mk_table( table( tree, f ), kind, indices )
+
+    all_leaves = list( leaves( tree ) )
+
+    if isinstance( node, _Value ):
+      if not indices:
+        return _Ref( None, 0, 0, None, const=_lit( node.value ) )
+      return _Ref( None, 0, 0, None, const=lookup( lambda x: x.value, "value" ) )
+
+    if isinstance( node, _Local ):
+      return _Ref( None, node.lo, node.nbits, node.width, name=node.name )
+
+    if len({ ( x.off, x.nbits ) for x in all_leaves }) != 1 or \
+       len({ x.lo for x in all_leaves if not isinstance( x.lo, int ) }) > 1 or \
+       ( any( isinstance( x.lo, int ) for x in all_leaves ) and
+         any( not isinstance( x.lo, int ) for x in all_leaves ) ):
+      raise ModelTypeError( f"RTL designs whose update blocks can be translated, "
+                            f"the elements of a list indexed by {indices[0]} differ" )
+
+    bases = { x.base for x in all_leaves }
+    base  = str( node.base ) if len(bases) == 1 else lookup( lambda x: x.base, "slot" )
+    if node.off is not None:
+      base = f"{base} + {node.off}"
+
+    los = { x.lo for x in all_leaves }
+    lo  = node.lo if len(los) == 1 else lookup( lambda x: x.lo, "lo" )
+
+    widths = { x.width for x in all_leaves }
+    width  = node.width if len(widths) == 1 else None
+
+    slots = set()
+    for x in all_leaves:
+      if x.off is None:
+        slots.add( x.base )
+      else:
+        slots.update( range( x.base, x.base + s.sim.entries[ x.base ] ) )
+    return _Ref( base, lo, node.nbits, width, tuple(slots), dynamic=s.dynamic )
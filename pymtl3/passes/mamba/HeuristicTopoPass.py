@@ -13,6 +13,7 @@ from queue import PriorityQueue
 from ..BasePass import BasePass, PassMetadata
 from ..errors import PassOrderError
 from ..sim.SimpleSchedulePass import SimpleSchedulePass, check_schedule
+from ..tracing.UpblkProfilePass import UpblkProfilePass
 from .UnrollSimPass import UnrollSimPass
 
 # FIXME also apply branchiness to all update_ff blocks
@@ -110,6 +111,8 @@ class HeuristicTopoPass( UnrollSimPass ):
     simple.schedule_ff( top )
     simple.schedule_posedge_flip( top )
 
+    UpblkProfilePass()( top )
+
     top._sim = PassMetadata()
 
     self.create_print_line_trace( top )
@@ -120,6 +123,8 @@ class HeuristicTopoPass( UnrollSimPass ):
     self.create_sim_eval_comb( top )
     self.create_sim_tick( top )
     self.create_sim_reset( top )
+    self.create_sim_checkpoint( top )
+    self.create_sim_finalize( top )
 
   def schedule_intra_cycle( self, top ):
 
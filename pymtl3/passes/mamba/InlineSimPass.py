@@ -0,0 +1,428 @@
+"""
+========================================================================
+InlineSimPass.py
+========================================================================
+Generate the simulation functions by splicing the bodies of the update
+blocks into a few large functions instead of calling every block.
+
+UnrollSimPass and Mamba2020Pass only unroll the calls to update blocks,
+which helps the PyPy JIT. On CPython every block still costs a function
+call, closure cell lookups and a walk down every s.x.y.z attribute chain
+each cycle. This pass takes the ASTs of the update blocks cached by
+_cache_func_meta and the sources of the generated net blocks, and for
+every scheduled block
+
+- renames its local variables so that blocks do not clash,
+- replaces closure variables and globals with their values, i.e.
+  simple constants become literals and objects become default
+  arguments of the generated function, which are fast locals, and
+- hoists attribute chains that cannot change during simulation. These
+  are chains through components and interfaces that end at one of them,
+  at the value object of a signal or at a list of those. Signal values
+  are updated in place by @= and <<=, so their identity never changes.
+- turns x @= y and x <<= y between hoisted Bits of the same width, which
+  are most of the generated net blocks, into copies of their integers.
+
+Blocks that we cannot inline are called as before, e.g. blocks with
+return statements, nested functions or comprehensions, blocks that
+share closure variables with functions that rebind them, greenlet and
+SCC wrappers and the blocks of UpblkProfilePass. The pass assumes that
+module globals read by update blocks are not rebound during simulation.
+
+Date   : Oct 17, 2026
+"""
+import ast
+import builtins
+import collections
+import copy
+import dis
+import linecache
+import types
+
+from pymtl3.datatypes import PythonBits
+from pymtl3.dsl import MetadataKey
+from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.extra.pypy import custom_exec
+
+from ..sim.PrepareSimPass import PrepareSimPass
+from .UnrollSimPass import UnrollSimPass
+
+# Python constructs that have their own scope or leave the block early.
+# ast.Match binds names in patterns which we do not rename.
+_unsupported_nodes = tuple( getattr( ast, x ) for x in [
+  'Return', 'Yield', 'YieldFrom', 'Await', 'Global', 'Nonlocal', 'Lambda',
+  'FunctionDef', 'AsyncFunctionDef', 'ClassDef', 'ListComp', 'SetComp',
+  'DictComp', 'GeneratorExp', 'Import', 'ImportFrom', 'Match',
+] if hasattr( ast, x ) )
+
+# Builtins that look at the frame of the caller
+_frame_builtins = { id(getattr( builtins, x )) for x in
+                    [ 'locals', 'vars', 'globals', 'eval', 'exec', 'dir', 'super' ] }
+
+_literal_types = ( type(None), bool, int, float, str, bytes )
+
+def _is_python_bits( x ):
+  return isinstance( x, PythonBits.Bits ) and \
+         type(x).__imatmul__ is PythonBits.Bits.__imatmul__ and \
+         type(x).__ilshift__ is PythonBits.Bits.__ilshift__
+
+class InlineSimPass( PrepareSimPass ):
+
+  # InlineSimPass public pass data
+
+  #: Names of the scheduled functions that are called instead of inlined
+  #:
+  #: Type: ``list``; output
+  fallback_blocks = MetadataKey(list)
+
+  # At most this many blocks are spliced into one generated function
+  max_blocks_per_func = 128
+
+  def __call__( self, top ):
+    self.top        = top
+    self.net_ids    = None
+    self.analyzed   = {}
+    self.rebound    = {}
+    self.fallbacks  = {}
+    self.num_funcs  = 0
+
+    super().__call__( top )
+
+    top.set_metadata( self.fallback_blocks, sorted( self.fallbacks.values() ) )
+
+  #-----------------------------------------------------------------------
+  # gen_schedule_function
+  #-----------------------------------------------------------------------
+
+  # Override
+  def gen_schedule_function( self, schedule ):
+    if self.net_ids is None:
+      self.net_ids = { id(v) for (_, _, _, v) in self.top._sim.signal_object_mapping.values() }
+
+    # One ( statements, hoisted values ) pair per generated function
+    chunks = [ ( [], {} ) ]
+    nblks  = 0
+
+    for func in schedule:
+      if nblks == self.max_blocks_per_func:
+        chunks.append( ( [], {} ) )
+        nblks = 0
+      nblks += 1
+      body, hoisted = chunks[-1]
+
+      analyzed = self.analyze( func )
+      if analyzed is None:
+        self.fallbacks[ id(func) ] = func.__name__
+        call = ast.Call( func=self.mk_value( func, hoisted ), args=[], keywords=[] )
+        body.append( ast.Expr( value=call ) )
+      else:
+        fdef, values = analyzed
+        stmts   = copy.deepcopy( fdef.body )
+        inliner = _BlockInliner( self, func, values, f"_{nblks}_", hoisted, stmts )
+        for stmt in stmts:
+          stmt = inliner.visit( stmt )
+          if stmt is not None:
+            body.append( stmt )
+
+    funcs = [ self.compile_function( body, hoisted ) for body, hoisted in chunks ]
+    if len(funcs) == 1:
+      return funcs[0]
+    return UnrollSimPass.gen_tick_function( funcs )
+
+  # Return the node that refers to value in the generated code. The node
+  # remembers the value in _value.
+
+  def mk_value( self, value, hoisted ):
+    if type(value) in _literal_types:
+      ret = ast.Constant( value=value )
+    else:
+      name = hoisted.get( id(value) )
+      if name is None:
+        name = hoisted[ id(value) ] = ( f"_h{len(hoisted)}", value )
+      else:
+        assert name[1] is value
+      ret = ast.Name( id=name[0], ctx=ast.Load() )
+    ret._value = value
+    return ret
+
+  def compile_function( self, body, hoisted ):
+    func_name = f"inlined_{self.num_funcs}"
+    self.num_funcs += 1
+
+    # Hoisted values become default arguments, which are fast locals
+    names = list( hoisted.values() )
+    fdef  = ast.FunctionDef(
+      name=func_name,
+      args=ast.arguments( posonlyargs=[], args=[ ast.arg( arg=x ) for x, _ in names ],
+                          vararg=None, kwonlyargs=[], kw_defaults=[], kwarg=None,
+                          defaults=[ ast.Name( id=x, ctx=ast.Load() ) for x, _ in names ] ),
+      body=body or [ ast.Pass() ],
+      decorator_list=[],
+      returns=None,
+    )
+    module = ast.fix_missing_locations( ast.Module( body=[ fdef ], type_ignores=[] ) )
+
+    _globals = { x: v for x, v in names }
+    _locals  = {}
+
+    # Register the source so that tracebacks show the inlined code
+    fname = f"<{func_name} of {self.top.__class__.__name__}>"
+    if hasattr( ast, "unparse" ):
+      src = ast.unparse( module )
+      linecache.cache[ fname ] = ( len(src), None, src.splitlines( True ), fname )
+      custom_exec( compile( src, filename=fname, mode="exec" ), _globals, _locals )
+    else:
+      custom_exec( compile( module, filename=fname, mode="exec" ), _globals, _locals )
+
+    return _locals[ func_name ]
+
+  #-----------------------------------------------------------------------
+  # analyze
+  #-----------------------------------------------------------------------
+  # Return ( function def AST, { free/global name: value } ) if we can
+  # inline func, otherwise None
+
+  def analyze( self, func ):
+    key = id(func)
+    if key not in self.analyzed:
+      ret = None
+      if isinstance( func, types.FunctionType ):
+        fdef = self.get_function_ast( func )
+        if fdef is not None:
+          ret = self.get_name_values( func, fdef )
+          if ret is not None:
+            ret = ( fdef, ret )
+      self.analyzed[ key ] = ( func, ret ) # keep func alive for the id
+    return self.analyzed[ key ][1]
+
+  def get_function_ast( self, func ):
+    top  = self.top
+    host = top._dsl.all_upblk_hostobj.get( func )
+
+    if host is not None:
+      info = host.get_update_block_info( func )
+      if info is None:
+        return None
+      module = info[-1]
+
+    # Generated net blocks keep their source in linecache
+    elif func in getattr( top._dag, "genblks", () ):
+      lines = linecache.getlines( func.__code__.co_filename )
+      if not lines:
+        return None
+      try:
+        # GenDAGPass stores the lines without line endings
+        module = ast.parse( "\n".join( x.rstrip( "\n" ) for x in lines ) )
+      except SyntaxError:
+        return None
+    else:
+      return None
+
+    for fdef in module.body:
+      if isinstance( fdef, ast.FunctionDef ) and fdef.name == func.__name__:
+        break
+    else:
+      return None
+
+    a = fdef.args
+    if a.args or a.vararg or a.kwonlyargs or a.kwarg or getattr( a, "posonlyargs", None ):
+      return None
+    return fdef
+
+  def get_name_values( self, func, fdef ):
+    code     = func.__code__
+    local    = set( code.co_varnames )
+    freevars = code.co_freevars
+    closure  = func.__closure__ or ()
+    host     = self.top._dsl.all_upblk_hostobj.get( func )
+
+    values = {}
+    for stmt in fdef.body:
+      for node in ast.walk( stmt ):
+        if isinstance( node, _unsupported_nodes ):
+          return None
+
+        if isinstance( node, ast.ExceptHandler ) and node.name and node.name not in local:
+          return None
+
+        if not isinstance( node, ast.Name ) or node.id in local or node.id in values:
+          continue
+
+        name = node.id
+        if name in freevars:
+          cell = closure[ freevars.index( name ) ]
+          if host is not None and id(cell) in self.get_rebound_cells( host ):
+            return None
+          try:
+            values[ name ] = cell.cell_contents
+          except ValueError: # empty cell
+            return None
+
+        elif name in func.__globals__:
+          values[ name ] = func.__globals__[ name ]
+        elif hasattr( builtins, name ):
+          values[ name ] = getattr( builtins, name )
+        else:
+          return None
+
+        # A store to a non-local name means the AST is not this function
+        if not isinstance( node.ctx, ast.Load ) or id(values[ name ]) in _frame_builtins:
+          return None
+
+    return values
+
+  # Closure cells that the functions of a component rebind with nonlocal
+
+  def get_rebound_cells( self, host ):
+    if host not in self.rebound:
+      funcs = list( host._dsl.upblks ) + list( host._dsl.name_func.values() ) + \
+              [ x for x in host.__dict__.values() if isinstance( x, types.FunctionType ) ]
+
+      self.rebound[ host ] = rebound = set()
+      for f in funcs:
+        code = getattr( f, "__code__", None )
+        if code is None or not code.co_freevars:
+          continue
+        for ins in dis.get_instructions( code ):
+          if ins.opname in ( 'STORE_DEREF', 'DELETE_DEREF' ) and ins.argval in code.co_freevars:
+            rebound.add( id( f.__closure__[ code.co_freevars.index( ins.argval ) ] ) )
+
+    return self.rebound[ host ]
+
+  # An attribute whose value cannot change during simulation
+
+  def is_stable_attr( self, obj, attr, value ):
+    if attr in obj.__dict__:
+      return self.is_stable_value( value )
+    # A method defined in the class
+    return isinstance( value, types.MethodType ) and value.__self__ is obj
+
+  def is_stable_value( self, value ):
+    if isinstance( value, NamedObject ) or id(value) in self.net_ids:
+      return True
+    if type(value) is list:
+      return all( self.is_stable_value( x ) for x in value )
+    return False
+
+#-------------------------------------------------------------------------
+# _BlockInliner
+#-------------------------------------------------------------------------
+# Rewrite the statements of one block for the generated function
+
+class _BlockInliner( ast.NodeTransformer ):
+
+  def __init__( self, sim_pass, func, values, prefix, hoisted, stmts ):
+    self.sim_pass = sim_pass
+    self.local    = set( func.__code__.co_varnames )
+    self.values   = values
+    self.prefix   = prefix
+    self.hoisted  = hoisted
+
+    # A local that is assigned once at the top level of the block before
+    # any other use, e.g. x in the net block "x = s.a; s.b @= x", becomes
+    # an alias of its value if the value is hoisted
+    self.aliases     = {}
+    self.alias_stmts = set()
+
+    stores = collections.Counter()
+    for stmt in stmts:
+      for node in ast.walk( stmt ):
+        if isinstance( node, ast.Name ) and not isinstance( node.ctx, ast.Load ):
+          stores[ node.id ] += 1
+        elif isinstance( node, ast.ExceptHandler ) and node.name:
+          stores[ node.name ] += 1
+
+    seen = set()
+    for stmt in stmts:
+      names = { x.id for x in ast.walk( stmt ) if isinstance( x, ast.Name ) }
+      if isinstance( stmt, ast.Assign ) and len(stmt.targets) == 1 and \
+         isinstance( stmt.targets[0], ast.Name ):
+        x = stmt.targets[0].id
+        if stores[x] == 1 and x not in seen and \
+           x not in { y.id for y in ast.walk( stmt.value ) if isinstance( y, ast.Name ) }:
+          self.alias_stmts.add( id(stmt) )
+      seen |= names
+
+  def visit_Name( self, node ):
+    if node.id in self.local:
+      alias = self.aliases.get( node.id )
+      if alias is not None and isinstance( node.ctx, ast.Load ):
+        return ast.copy_location( self.sim_pass.mk_value( alias, self.hoisted ), node )
+      return ast.copy_location( ast.Name( id=self.prefix + node.id, ctx=node.ctx ), node )
+    return ast.copy_location( self.sim_pass.mk_value( self.values[ node.id ], self.hoisted ), node )
+
+  def visit_Assign( self, node ):
+    if id(node) in self.alias_stmts:
+      node.value = self.visit( node.value )
+      if hasattr( node.value, "_value" ):
+        self.aliases[ node.targets[0].id ] = node.value._value
+        return None
+      node.targets = [ self.visit( node.targets[0] ) ]
+      return node
+    return self.generic_visit( node )
+
+  def visit_ExceptHandler( self, node ):
+    if node.name:
+      node.name = self.prefix + node.name
+    return self.generic_visit( node )
+
+  def visit_AugAssign( self, node ):
+    node.value = self.visit( node.value )
+    # @= and <<= update signal values in place. Other operators may bind
+    # a new object to the attribute, so we keep the last lookup.
+    if isinstance( node.target, ast.Attribute ):
+      node.target = self.fold_attribute( node.target,
+                                         isinstance( node.op, (ast.MatMult, ast.LShift) ) )
+    else:
+      node.target = self.visit( node.target )
+
+    # Copy the integer if both sides are Bits of the same width, which is
+    # what __imatmul__ and __ilshift__ would do
+    if isinstance( node.op, (ast.MatMult, ast.LShift) ) and \
+       hasattr( node.target, "_value" ) and hasattr( node.value, "_value" ):
+      lhs, rhs = node.target._value, node.value._value
+      if _is_python_bits( lhs ) and _is_python_bits( rhs ) and lhs.nbits == rhs.nbits:
+        node.target.ctx = ast.Load()
+        attr = "_uint" if isinstance( node.op, ast.MatMult ) else "_next"
+        return ast.copy_location( ast.Assign(
+          targets=[ ast.Attribute( value=node.target, attr=attr, ctx=ast.Store() ) ],
+          value=ast.Attribute( value=node.value, attr="_uint", ctx=ast.Load() ),
+        ), node )
+    return node
+
+  def visit_Attribute( self, node ):
+    return self.fold_attribute( node, isinstance( node.ctx, ast.Load ) )
+
+  def fold_attribute( self, node, fold_last ):
+    attrs = []
+    base  = node
+    while isinstance( base, ast.Attribute ):
+      attrs.append( base.attr )
+      base = base.value
+    attrs.reverse()
+
+    if not isinstance( base, ast.Name ) or base.id in self.local:
+      return self.generic_visit( node )
+
+    obj   = self.values[ base.id ]
+    n     = 0
+    limit = len(attrs) if fold_last else len(attrs) - 1
+    while n < limit and isinstance( obj, NamedObject ):
+      try:
+        value = getattr( obj, attrs[n] )
+      except AttributeError:
+        break
+      if not self.sim_pass.is_stable_attr( obj, attrs[n], value ):
+        break
+      # We cannot assign to a literal
+      if n == len(attrs) - 1 and not isinstance( node.ctx, ast.Load ) and \
+         type(value) in _literal_types:
+        break
+      obj = value
+      n  += 1
+
+    ret = self.sim_pass.mk_value( obj, self.hoisted )
+    for attr in attrs[n:]:
+      ret = ast.Attribute( value=ret, attr=attr, ctx=ast.Load() )
+    ret.ctx = node.ctx
+    return ast.copy_location( ret, node )
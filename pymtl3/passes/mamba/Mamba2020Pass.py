@@ -22,6 +22,7 @@ from pymtl3.passes.errors import PassOrderError
 
 from ..sim.DynamicSchedulePass import kosaraju_scc
 from ..sim.SimpleSchedulePass import SimpleSchedulePass, dump_dag
+from ..tracing.UpblkProfilePass import UpblkProfilePass
 from .HeuristicTopoPass import CountBranchesLoops
 from .UnrollSimPass import UnrollSimPass
 
@@ -71,6 +72,8 @@ class Mamba2020Pass( UnrollSimPass ):
 
     self.schedule_intra_cycle( top )
 
+    UpblkProfilePass()( top )
+
     top._sim = PassMetadata()
     self.create_print_line_trace( top )
     self.create_sim_cycle_count( top )
@@ -80,6 +83,8 @@ class Mamba2020Pass( UnrollSimPass ):
     self.create_sim_eval_comb( top )
     self.create_sim_tick( top )
     self.create_sim_reset( top )
+    self.create_sim_checkpoint( top )
+    self.create_sim_finalize( top )
 
   #-----------------------------------------------------------------------
   # compile_meta_block
@@ -110,6 +115,7 @@ class Mamba2020Pass( UnrollSimPass ):
     _locals = {}
     custom_exec( py.code.Source( gen_src ).compile(), _globals, _locals )
     ret = _locals[ f'meta_block{meta_id}' ]
+    ret._upblks = blocks
     if _DEBUG: print(gen_src)
 
     # We will use pypyjit.dont_trace_here to compile standalone traces for
@@ -434,7 +440,9 @@ generated_block = wrapped_SCC_{0}
 
       _locals  = {}
       custom_exec(py.code.Source( scc_block_src ).compile(), _globals, _locals)
-      return _locals[ 'generated_block' ]
+      ret = _locals[ 'generated_block' ]
+      ret._upblks = tmp_schedule
+      return ret
 
     # Now we generate meta blocks for each SCC and produce final schedule
 
@@ -0,0 +1,554 @@
+"""
+========================================================================
+PartitionSimPass.py
+========================================================================
+Simulate the partitions of an RTL design in parallel processes.
+
+A component is marked as the root of a partition with
+
+  top.tiles[0].set_metadata( PartitionSimPass.partition, True )
+
+and the update blocks in its subtree, except those in nested partitions,
+run in a worker process that is forked at the end of the pass. The rest
+of the design is partition 0, which the main process simulates and which
+owns the top-level ports. Every process keeps its own copy of the flat
+state list of FlatSimPass and runs only the blocks of its partition.
+
+Partitions may only talk through registers: a signal that a partition
+reads and another partition writes has to be written by update_ff
+blocks, so its value does not change within a cycle. After the clock
+edge every partition copies the registers that the others read into a
+shared memory block, all partitions meet at a barrier, and every
+partition copies in the registers that it reads. The main process copies
+the top-level input ports to the workers at the start of every cycle.
+The other signals of the workers are only gathered into the main process
+for line tracing, waveforms and checkpoints, since gathering them costs
+another two barriers.
+
+The workers stop, and the waveform is closed, with top.sim_finalize() or
+when the main process exits.
+
+Date   : Oct 17, 2026
+"""
+import multiprocessing
+import threading
+import weakref
+
+from pymtl3.datatypes import b1
+from pymtl3.dsl import MetadataKey
+from pymtl3.dsl.Connectable import Signal
+from pymtl3.extra.pypy import custom_exec
+from pymtl3.passes.backends.verilog import VerilogTBGenPass
+from pymtl3.passes.errors import ModelTypeError
+from pymtl3.passes.tracing.PrintTextWavePass import PrintTextWavePass
+from pymtl3.passes.tracing.VcdGenerationPass import VcdGenerationPass
+
+from ..sim.SimCheckpoint import load_checkpoint, save_checkpoint
+from .FlatSimPass import FlatSimPass
+
+try:
+  from multiprocessing import shared_memory
+except ImportError:
+  shared_memory = None
+
+# Commands from the main process to the workers, stored in word 0 of the
+# shared memory. The main process only writes the next command and the
+# inputs once every worker is past the last barrier of the previous one.
+_TICK, _TRACED_TICK, _GATHER, _LOAD, _STOP = range(5)
+
+class _Block:
+  def __init__( s, lines, written, reads, parts, is_seq, is_net=False ):
+    s.lines   = lines
+    s.written = written # slots
+    s.reads   = reads   # slots
+    s.parts   = parts   # partitions that run the block
+    s.is_seq  = is_seq
+    s.is_net  = is_net
+
+class PartitionSimPass( FlatSimPass ):
+
+  # PartitionSimPass public pass data
+
+  #: Simulate the subtree of this component in its own process
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: False
+  partition = MetadataKey(bool)
+
+  #: Names of the root components of the partitions, partition 0 is the
+  #: rest of the design in the main process
+  #:
+  #: Type: ``list``; output
+  partition_names = MetadataKey(list)
+
+  #: Names of the signals that are copied between partitions every cycle
+  #:
+  #: Type: ``list``; output
+  boundary_names = MetadataKey(list)
+
+  def __call__( self, top ):
+    if shared_memory is None:
+      raise ImportError( "PartitionSimPass requires multiprocessing.shared_memory of Python 3.8" )
+    if "fork" not in multiprocessing.get_all_start_methods():
+      raise OSError( "PartitionSimPass forks its workers, which this platform cannot do" )
+
+    super().__call__( top )
+
+    top.set_metadata( PartitionSimPass.partition_names, [ repr(m) for m in self.roots ] )
+    top.set_metadata( PartitionSimPass.boundary_names,
+                      [ self.names[i] for i in sorted( set().union( *self.boundary ) ) ] )
+    self.start_workers( top )
+
+  #-----------------------------------------------------------------------
+  # Partitioning
+  #-----------------------------------------------------------------------
+
+  def compile_schedules( self, top ):
+    self.roots = [ top ] + [ m for m in sorted( top.get_all_components(), key=repr )
+                             if m is not top and m.has_metadata( PartitionSimPass.partition )
+                             and m.get_metadata( PartitionSimPass.partition ) ]
+    self.part_index = { m: i for i, m in enumerate( self.roots ) }
+    nparts = len(self.roots)
+
+    comb = [ self.plan_block( func, False ) for func in top._sched.update_schedule ]
+    ff   = [ self.plan_block( func, True  ) for func in top._sched.schedule_ff ]
+    self.assign_nets( top, comb, ff )
+    self.find_boundaries( top, comb + ff )
+
+    self.comb = [ self.compile_blocks( f"comb_p{p}", [ ( x.lines, x.written ) for x in comb
+                                                       if p in x.parts ], False )
+                  for p in range(nparts) ]
+    self.ff   = [ self.compile_blocks( f"ff_p{p}", [ ( x.lines, x.written ) for x in ff
+                                                     if p in x.parts ], True )
+                  for p in range(nparts) ]
+
+  def part_of( self, m ):
+    while m not in self.part_index:
+      m = m.get_parent_object()
+    return self.part_index[ m ]
+
+  # All slots of the top-level signal of sig
+  def sig_slots( self, sig ):
+    if not isinstance( sig, Signal ):
+      return set()
+    while not sig.is_top_level_signal():
+      sig = sig.get_parent_object()
+    base = self.slots[ sig ]
+    return set( range( base, base + self.entries.get( base, 1 ) ) )
+
+  def plan_block( self, func, is_seq ):
+    top = self.top
+    lines, written = self.compile_func( func, is_seq )
+
+    if func in top._dag.genblk_nets:
+      writer, _ = top._dag.genblk_nets[ func ]
+      return _Block( lines, written, self.sig_slots( writer ), set(), is_seq, True )
+
+    reads, parts = set(), set()
+    for blk in getattr( func, "_upblks", [ func ] ):
+      if blk in top._dag.genblk_nets:
+        # Net blocks in a cycle of blocks
+        writer, readers = top._dag.genblk_nets[ blk ]
+        if readers:
+          parts.add( self.part_of( top._dag.genblk_hostobj[ blk ] ) )
+          reads |= self.sig_slots( writer )
+        continue
+      parts.add( self.part_of( top.get_update_block_host_component( blk ) ) )
+      for x in top._dsl.all_upblk_reads.get( blk, () ):
+        reads |= self.sig_slots( x )
+    if len(parts) > 1:
+      raise ModelTypeError( f"RTL designs whose partitions only connect through registers, "
+                            f"{func.__name__} is a combinational loop across partitions "
+                            f"{sorted(parts)}" )
+    return _Block( lines, written, reads, parts or { 0 }, is_seq )
+
+  # Generated net blocks run in the partition of the signal that drives
+  # the net and in every partition that reads the other signals
+  def assign_nets( self, top, comb, ff ):
+    self.owner = {} # slot -> partition that computes it
+    for x in comb + ff:
+      if not x.is_net:
+        for i in x.written:
+          self.owner.setdefault( i, min( x.parts ) )
+
+    self.reads = [ set() for _ in self.roots ]
+    for x in comb + ff:
+      for p in x.parts:
+        self.reads[p] |= x.reads
+    # The main process reads the top-level output ports
+    for x in top.get_output_value_ports():
+      self.reads[0] |= self.sig_slots( x )
+
+    nets = [ x for x in comb if x.is_net ]
+    for x in nets:
+      x.parts = { min( ( self.owner[i] for i in x.reads if i in self.owner ), default=0 ) }
+      for i in x.written:
+        self.owner.setdefault( i, min( x.parts ) )
+
+    changed = True
+    while changed:
+      changed = False
+      for x in nets:
+        for p, reads in enumerate( self.reads ):
+          if p not in x.parts and x.written & reads:
+            x.parts.add( p )
+            reads |= x.reads
+            changed = True
+
+  def find_boundaries( self, top, blocks ):
+    writers = {} # slot -> { ( partition, is_seq ) } of the update blocks that write it
+    local   = [ set() for _ in self.roots ] # slots that each partition computes
+    for x in blocks:
+      for p in x.parts:
+        local[p] |= x.written
+      if not x.is_net:
+        for i in x.written:
+          writers.setdefault( i, set() ).update( ( p, x.is_seq ) for p in x.parts )
+
+    for i, ws in writers.items():
+      if len({ p for p, _ in ws }) > 1:
+        raise ModelTypeError( f"RTL designs whose signals are written by one partition, "
+                              f"{self.names[i]} is written by partitions "
+                              f"{sorted({ p for p, _ in ws })}" )
+
+    inputs = set()
+    for x in top.get_input_value_ports():
+      inputs |= self.sig_slots( x )
+
+    nparts = len(self.roots)
+    self.boundary = [ set() for _ in range(nparts) ] # registers that each partition sends
+    self.imports  = [ set() for _ in range(nparts) ] # registers that each partition receives
+    self.inputs   = [ set() for _ in range(nparts) ] # top-level inputs that each worker reads
+    for p, reads in enumerate( self.reads ):
+      for i in reads:
+        if i in inputs:
+          if p:
+            self.inputs[p].add( i )
+          continue
+        q = self.owner.get( i, p )
+        if q == p or i in local[p]:
+          continue
+        if i not in writers or not all( seq for _, seq in writers[i] ):
+          raise ModelTypeError( f"RTL designs whose partitions only connect through registers, "
+                                f"{self.names[i]} of partition {q} is read combinationally "
+                                f"by partition {p}" )
+        self.boundary[q].add( i )
+        self.imports[p].add( i )
+
+  #-----------------------------------------------------------------------
+  # Shared memory
+  #-----------------------------------------------------------------------
+  # Word 0 is the command of the main process and every slot has its own
+  # 64-bit words after that.
+
+  def create_exchange( self ):
+    self.offsets = []
+    nwords = 1
+    for w in self.widths:
+      self.offsets.append( nwords )
+      nwords += ( w + 63 ) // 64
+
+    ctx = multiprocessing.get_context( "fork" )
+    self.shm     = shared_memory.SharedMemory( create=True, size=nwords * 8 )
+    self.shared  = self.shm.buf.cast( "Q" )
+    self.barrier = ctx.Barrier( len(self.roots) )
+    self.errors  = ctx.SimpleQueue()
+
+    nparts = len(self.roots)
+    owned  = [ { i for i in range(len(self.widths)) if self.owner.get( i, 0 ) == p }
+               for p in range(nparts) ]
+    everything = range( len(self.widths) )
+    workers    = set( everything ) - owned[0]
+
+    # ( get inputs, put boundary, get boundary, put owned, get all ) of
+    # every partition
+    self.exchange = [ ( self.compile_copy( f"get_inputs_p{p}", self.inputs[p], False ),
+                        self.compile_copy( f"put_boundary_p{p}", self.boundary[p], True ),
+                        self.compile_copy( f"get_boundary_p{p}", self.imports[p], False ),
+                        self.compile_copy( f"put_owned_p{p}", owned[p], True ),
+                        self.compile_copy( f"get_all_p{p}", everything, False ) )
+                      for p in range(nparts) ]
+    self.put_inputs  = self.compile_copy( "put_inputs", set().union( *self.inputs ), True )
+    self.get_workers = self.compile_copy( "get_workers", workers, False )
+    self.put_all     = self.compile_copy( "put_all", everything, True )
+
+  # Compile copy( S, B ) from the state list S to the shared words B or
+  # back
+  def compile_copy( self, func_name, slots, to_shared ):
+    lines = []
+    for i in sorted( slots ):
+      o, n = self.offsets[i], ( self.widths[i] + 63 ) // 64
+      if n == 1:
+        lines.append( f"B[{o}] = S[{i}]" if to_shared else f"S[{i}] = B[{o}]" )
+      elif to_shared:
+        lines.append( f"v = S[{i}]" )
+        lines.extend( f"B[{o+k}] = (v >> {64*k}) & 0xffffffffffffffff" for k in range(n) )
+      else:
+        lines.append( f"S[{i}] = " + " | ".join( f"(B[{o+k}] << {64*k})" for k in range(n) ) )
+
+    src = f"def {func_name}( S, B ):\n" + "".join( f"  {x}\n" for x in lines or [ "pass" ] )
+    _locals = {}
+    custom_exec( compile( src, filename=f"<{func_name}>", mode="exec" ), {}, _locals )
+    return _locals[ func_name ]
+
+  #-----------------------------------------------------------------------
+  # Workers
+  #-----------------------------------------------------------------------
+
+  def start_workers( self, top ):
+    ctx = multiprocessing.get_context( "fork" )
+    procs = [ ctx.Process( target=self.run_worker, args=( p, ), daemon=True )
+              for p in range( 1, len(self.roots) ) ]
+    for x in procs:
+      x.start()
+    top.sim_finalize = weakref.finalize( top, _stop_workers, procs, self.shm,
+                                         self.shared, self.barrier, top.sim_finalize )
+
+  def run_worker( self, p ):
+    S, N = self.arrays
+    B    = self.shared
+    wait = self.barrier.wait
+    comb, ff = self.comb[p], self.ff[p]
+    get_inputs, put_boundary, get_boundary, put_owned, get_all = self.exchange[p]
+
+    try:
+      while True:
+        wait()
+        cmd = B[0]
+        if cmd == _TICK or cmd == _TRACED_TICK:
+          get_inputs( S, B )
+          comb( S )
+          if cmd == _TRACED_TICK:
+            put_owned( S, B )
+            wait()
+            wait()
+          N[:] = S
+          ff( S, N )
+          S, N = N, S
+          put_boundary( S, B )
+          wait()
+          get_boundary( S, B )
+          comb( S )
+        elif cmd == _GATHER:
+          get_inputs( S, B )
+          comb( S )
+          put_owned( S, B )
+          wait()
+        elif cmd == _LOAD:
+          get_all( S, B )
+          N[:] = S
+          wait()
+        else:
+          return
+    except threading.BrokenBarrierError:
+      pass
+    except Exception as e:
+      try:
+        self.errors.put( e )
+      except Exception:
+        self.errors.put( RuntimeError( f"partition {p} failed with {e!r}" ) )
+      self.barrier.abort()
+
+  # Wait at the barrier and re-raise the error of a failed worker
+  def mk_wait( self ):
+    barrier = self.barrier
+    errors  = self.errors
+    failed  = []
+
+    def wait():
+      try:
+        barrier.wait()
+      except threading.BrokenBarrierError:
+        if not failed:
+          failed.append( errors.get() if not errors.empty() else
+                         RuntimeError( "the partition workers have stopped" ) )
+        raise failed[0]
+    return wait
+
+  #-----------------------------------------------------------------------
+  # Simulation functions
+  #-----------------------------------------------------------------------
+
+  def wrap_line_trace( self, top ):
+    if hasattr( top, "line_trace" ):
+      line_trace = top.line_trace
+      def partition_line_trace():
+        self.gather()
+        return line_trace()
+      top.line_trace = partition_line_trace
+
+  def create_sim_eval_comb( self, top ):
+    self.create_views( top )
+    self.create_exchange()
+
+    arrays  = self.arrays
+    B       = self.shared
+    comb    = self.comb[0]
+    wait    = self.mk_wait()
+    sync_in = self.sync_in
+    sync_out   = self.sync_out
+    sync_views = self.sync_views
+    put_inputs = self.put_inputs
+    get_workers = self.get_workers
+    check      = top._sim.check_top_level_inports
+
+    hooks = []
+    if top.has_metadata( VcdGenerationPass.vcd_func ):
+      hooks.append( top.get_metadata( VcdGenerationPass.vcd_func ) )
+    if top.has_metadata( PrintTextWavePass.textwave_func ):
+      hooks.append( top.get_metadata( PrintTextWavePass.textwave_func ) )
+    if top.has_metadata( VerilogTBGenPass.vtbgen_hooks ):
+      hooks.extend( top.get_metadata( VerilogTBGenPass.vtbgen_hooks ) )
+
+    gathered = [ False ] # whether the workers' values are already in S
+
+    def gather():
+      S = arrays[0]
+      if not gathered[0]:
+        put_inputs( S, B )
+        B[0] = _GATHER
+        wait()
+        wait()
+        get_workers( S, B )
+      sync_views( S )
+    self.gather = gather
+
+    # The outputs of the workers are registers, so they only evaluate
+    # their blocks with the new inputs in the next tick or gather
+    def eval_comb():
+      S = arrays[0]
+      sync_in( S )
+      comb( S )
+      sync_out( S )
+    self.eval_comb = eval_comb
+
+    def sim_eval_combinational():
+      check()
+      eval_comb()
+
+    top.sim_eval_combinational = sim_eval_combinational
+
+    ff        = self.ff[0]
+    advance   = self.create_advance_sim_cycle( top )
+    get_boundary, put_boundary = self.exchange[0][2], self.exchange[0][1]
+
+    def tick( print_line_trace ):
+      S = arrays[0]
+      sync_in( S )
+      put_inputs( S, B )
+      traced = print_line_trace is not None or hooks
+      B[0] = _TRACED_TICK if traced else _TICK
+      wait()
+      comb( S )
+
+      if traced:
+        wait()
+        get_workers( S, B )
+        gathered[0] = True
+        if print_line_trace is not None:
+          print_line_trace()
+        if hooks:
+          sync_views( S )
+          for f in hooks:
+            f()
+        gathered[0] = False
+        wait()
+
+      N = arrays[1]
+      N[:] = S
+      ff( S, N )
+      arrays[0] = N
+      arrays[1] = S
+      advance()
+
+      put_boundary( N, B )
+      wait()
+      get_boundary( N, B )
+      comb( N )
+      sync_out( N )
+    self.tick = tick
+
+  def create_sim_tick( self, top ):
+    tick  = self.tick
+    check = top._sim.check_top_level_inports
+
+    print_line_trace = None
+    if self.print_line_trace and hasattr( top, 'line_trace' ):
+      print_line_trace = top.print_line_trace
+
+    def sim_tick():
+      tick( print_line_trace )
+      check()
+
+    top.sim_tick = sim_tick
+
+  def create_sim_reset( self, top ):
+    tick      = self.tick
+    eval_comb = self.eval_comb
+
+    print_line_trace = self.print_line_trace and hasattr( top, 'line_trace' )
+    active_high      = self.reset_active_high
+
+    def sim_reset():
+      if print_line_trace:
+        print()
+      # cycle 0
+      top.reset @= b1( active_high )
+      eval_comb()
+
+      tick( None )
+      # cycle 1
+      if print_line_trace:
+        print( f"{top._sim.simulated_cycles:3}r {top.line_trace()}" )
+
+      tick( None )
+      # cycle 2
+      if print_line_trace:
+        print( f"{top._sim.simulated_cycles:3}r {top.line_trace()}" )
+
+      tick( None )
+      # cycle 3
+      top.reset @= b1( not active_high )
+      eval_comb()
+
+    top.sim_reset = sim_reset
+
+  def create_sim_checkpoint( self, top ):
+    arrays     = self.arrays
+    B          = self.shared
+    wait       = self.mk_wait()
+    gather     = self.gather
+    load_views = self.load_views
+    put_all    = self.put_all
+
+    def sim_checkpoint( path ):
+      gather()
+      save_checkpoint( top, path )
+    def sim_restore( path ):
+      load_checkpoint( top, path )
+      S = arrays[0]
+      load_views( S )
+      arrays[1][:] = S
+      put_all( S, B )
+      B[0] = _LOAD
+      wait()
+      wait()
+    top.sim_checkpoint = sim_checkpoint
+    top.sim_restore    = sim_restore
+
+def _stop_workers( procs, shm, shared, barrier, finalize ):
+  if any( x.is_alive() for x in procs ):
+    shared[0] = _STOP
+    try:
+      barrier.wait( timeout=1 )
+    except threading.BrokenBarrierError:
+      pass
+    for x in procs:
+      x.join( timeout=1 )
+      if x.is_alive():
+        x.terminate()
+  shared.release()
+  shm.close()
+  shm.unlink()
+  finalize()
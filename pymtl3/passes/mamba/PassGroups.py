@@ -1,12 +1,20 @@
 from ..BasePass import BasePass
+from ..sim.DynamicSchedulePass import DynamicSchedulePass
 from ..sim.GenDAGPass import GenDAGPass
 from ..sim.PrepareSimPass import PrepareSimPass
 from ..sim.SimpleSchedulePass import SimpleSchedulePass
 from ..sim.WrapGreenletPass import WrapGreenletPass
 from ..tracing.CLLineTracePass import CLLineTracePass
 from ..tracing.LineTraceParamPass import LineTraceParamPass
+from ..tracing.PrintTextWavePass import PrintTextWavePass
+from ..tracing.UpblkProfilePass import UpblkProfilePass
+from ..tracing.VcdGenerationPass import VcdGenerationPass
+from .BatchSimPass import BatchSimPass
+from .FlatSimPass import FlatSimPass
 from .HeuristicTopoPass import HeuristicTopoPass
+from .InlineSimPass import InlineSimPass
 from .Mamba2020Pass import Mamba2020Pass
+from .PartitionSimPass import PartitionSimPass
 from .UnrollSimPass import UnrollSimPass
 
 
@@ -21,6 +29,7 @@ class UnrollSim( BasePass ):
     GenDAGPass()( top )
     WrapGreenletPass()( top )
     SimpleSchedulePass()( top )
+    UpblkProfilePass()( top )
     UnrollSimPass(print_line_trace=s.print_line_trace,
                   reset_active_high=s.reset_active_high)( top )
 
@@ -52,3 +61,113 @@ class Mamba2020( BasePass ):
       LineTraceParamPass()( top )
     Mamba2020Pass(print_line_trace=s.print_line_trace,
                   reset_active_high=s.reset_active_high)( top )
+
+# A drop-in replacement of DefaultPassGroup for CPython
+class InlineSim( BasePass ):
+  def __init__( s, *, vcdwave=None, textwave=False,
+                      linetrace=False, reset_active_high=True ):
+    s.vcdwave = vcdwave
+    s.textwave = textwave
+    s.linetrace = linetrace
+    s.reset_active_high = reset_active_high
+
+  def __call__( s, top ):
+
+    if s.vcdwave:
+      top.set_metadata( VcdGenerationPass.vcd_file_name, s.vcdwave )
+
+    if s.textwave:
+      top.set_metadata( PrintTextWavePass.enable, True )
+
+    top.apply( LineTraceParamPass() )
+    top.apply( GenDAGPass() )
+    top.apply( WrapGreenletPass() )
+    top.apply( CLLineTracePass() )
+    top.apply( DynamicSchedulePass() )
+    top.apply( VcdGenerationPass() )
+    top.apply( PrintTextWavePass() )
+
+    top.apply( InlineSimPass(print_line_trace=s.linetrace,
+                             reset_active_high=s.reset_active_high) )
+
+# RTL designs only, without greenlets or CL line tracing
+class FlatSim( BasePass ):
+  def __init__( s, *, vcdwave=None, textwave=False,
+                      linetrace=False, reset_active_high=True ):
+    s.vcdwave = vcdwave
+    s.textwave = textwave
+    s.linetrace = linetrace
+    s.reset_active_high = reset_active_high
+
+  def __call__( s, top ):
+
+    if s.vcdwave:
+      top.set_metadata( VcdGenerationPass.vcd_file_name, s.vcdwave )
+
+    if s.textwave:
+      top.set_metadata( PrintTextWavePass.enable, True )
+
+    top.apply( LineTraceParamPass() )
+    top.apply( GenDAGPass() )
+    top.apply( DynamicSchedulePass() )
+    top.apply( VcdGenerationPass() )
+    top.apply( PrintTextWavePass() )
+
+    top.apply( FlatSimPass(print_line_trace=s.linetrace,
+                           reset_active_high=s.reset_active_high) )
+
+# N copies of an RTL design in lockstep, requires numpy
+class BatchSim( BasePass ):
+  def __init__( s, ninstances, *, trace_instance=0, vcdwave=None, textwave=False,
+                linetrace=False, reset_active_high=True ):
+    s.ninstances = ninstances
+    s.trace_instance = trace_instance
+    s.vcdwave = vcdwave
+    s.textwave = textwave
+    s.linetrace = linetrace
+    s.reset_active_high = reset_active_high
+
+  def __call__( s, top ):
+
+    if s.vcdwave:
+      top.set_metadata( VcdGenerationPass.vcd_file_name, s.vcdwave )
+
+    if s.textwave:
+      top.set_metadata( PrintTextWavePass.enable, True )
+
+    top.apply( LineTraceParamPass() )
+    top.apply( GenDAGPass() )
+    top.apply( DynamicSchedulePass() )
+    top.apply( VcdGenerationPass() )
+    top.apply( PrintTextWavePass() )
+
+    top.apply( BatchSimPass(s.ninstances, s.trace_instance,
+                            print_line_trace=s.linetrace,
+                            reset_active_high=s.reset_active_high) )
+
+# RTL designs whose partitions only connect through registers, see
+# PartitionSimPass for how to mark the partitions
+class PartitionSim( BasePass ):
+  def __init__( s, *, vcdwave=None, textwave=False,
+                      linetrace=False, reset_active_high=True ):
+    s.vcdwave = vcdwave
+    s.textwave = textwave
+    s.linetrace = linetrace
+    s.reset_active_high = reset_active_high
+
+  def __call__( s, top ):
+
+    if s.vcdwave:
+      top.set_metadata( VcdGenerationPass.vcd_file_name, s.vcdwave )
+
+    if s.textwave:
+      top.set_metadata( PrintTextWavePass.enable, True )
+
+    top.apply( LineTraceParamPass() )
+    top.apply( GenDAGPass() )
+    top.apply( DynamicSchedulePass() )
+    top.apply( VcdGenerationPass() )
+    top.apply( PrintTextWavePass() )
+
+    top.apply( PartitionSimPass(print_line_trace=s.linetrace,
+                                reset_active_high=s.reset_active_high) )
@@ -1 +1,9 @@
-from .PassGroups import HeuTopoUnrollSim, Mamba2020, UnrollSim
+from .PassGroups import (
+    BatchSim,
+    FlatSim,
+    HeuTopoUnrollSim,
+    InlineSim,
+    Mamba2020,
+    PartitionSim,
+    UnrollSim,
+)
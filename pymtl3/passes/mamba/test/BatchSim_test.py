@@ -0,0 +1,344 @@
+import io
+import random
+
+import pytest
+
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+from pymtl3 import *
+from pymtl3.dsl.errors import UpblkCyclicError
+from pymtl3.passes.errors import ModelTypeError
+from pymtl3.stdlib.primitive import RegisterFile
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+from pymtl3.stdlib.stream.queues import StreamBypassQueue, StreamNormalQueue, StreamPipeQueue
+from pymtl3.stdlib.test_utils import RunTestVectorSimError, run_test_vector_batch_sim
+
+from ..PassGroups import BatchSim, FlatSim
+from .FlatSim_test import RTLHarness
+
+np = pytest.importorskip("numpy")
+
+#-------------------------------------------------------------------------
+# Helpers
+#-------------------------------------------------------------------------
+
+def _ports( top ):
+  inports  = [ x for x in sorted( top.get_input_value_ports(), key=repr )
+               if x is not top.clk and x is not top.reset ]
+  outports = sorted( top.get_output_value_ports(), key=repr )
+  get = lambda x: eval( f"top{repr(x)[1:]}" )
+  return [ get(x) for x in inports ], [ get(x) for x in outports ]
+
+# Simulate n copies with different random inputs in one batch and every
+# copy on its own with FlatSim, and compare the outputs of all cycles and
+# the line trace of the traced copy
+def _check_same_as_flat( top_cls, ncycles, n, *args, trace_instance=0 ):
+  top = top_cls( *args )
+  top.apply( BatchSim( n, trace_instance=trace_instance ) )
+  top.sim_reset()
+  inports, outports = _ports( top )
+
+  rng = random.Random(0xba7c)
+  stimulus = [ [ [ rng.getrandbits( x.nbits ) for _ in range(n) ] for x in inports ]
+               for _ in range(ncycles) ]
+
+  outs, traces = [], []
+  for values in stimulus:
+    for x, v in zip( inports, values ):
+      top.sim_poke( x, v )
+    top.sim_eval_combinational()
+    outs.append( [ top.sim_peek( x ).tolist() for x in outports ] )
+    traces.append( top.line_trace() if hasattr( top, "line_trace" ) else "" )
+    top.sim_tick()
+
+  for k in range(n):
+    ref = top_cls( *args )
+    ref.apply( FlatSim() )
+    ref.sim_reset()
+    ref_in, ref_out = _ports( ref )
+    for cycle, values in enumerate( stimulus ):
+      for x, v in zip( ref_in, values ):
+        x @= x.__class__.from_bits( mk_bits( x.nbits )( v[k] ) ) if is_bitstruct_inst( x ) else v[k]
+      ref.sim_eval_combinational()
+      assert [ int( x.to_bits() ) for x in ref_out ] == [ o[k] for o in outs[cycle] ], \
+             f"copy {k} differs in cycle {cycle}"
+      if k == trace_instance and hasattr( ref, "line_trace" ):
+        assert ref.line_trace() == traces[cycle]
+      ref.sim_tick()
+  return top
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+def test_stream_queues():
+
+  class Top( Component ):
+    def construct( s ):
+      s.istream = IStreamIfc( Bits16 )
+      s.ostream = OStreamIfc( Bits16 )
+      s.queues  = [ StreamNormalQueue( Bits16, 2 ), StreamPipeQueue( Bits16, 3 ),
+                    StreamBypassQueue( Bits16, 2 ), StreamNormalQueue( Bits16, 1 ) ]
+      s.istream //= s.queues[0].istream
+      for i in range(3):
+        s.queues[i].ostream //= s.queues[i+1].istream
+      s.queues[3].ostream //= s.ostream
+
+    def line_trace( s ):
+      return "|".join( q.line_trace() for q in s.queues )
+
+  top = _check_same_as_flat( Top, 150, 6, trace_instance=2 )
+  assert top._sim.flat_arrays[0].dtype == np.uint64
+
+def test_wire_arrays_and_control_flow():
+
+  @bitstruct
+  class Inner:
+    lo : Bits4
+    arr: [ Bits3, Bits3 ]
+
+  @bitstruct
+  class Outer:
+    hi   : Bits5
+    inner: Inner
+    flag : Bits1
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_   = InPort( Outer )
+      s.sel   = InPort( Bits2 )
+      s.a     = InPort( Bits8 )
+      s.b     = InPort( Bits8 )
+      s.out   = OutPort( Outer )
+      s.wide  = OutPort( Bits32 )
+      s.flags = OutPort( Bits8 )
+      s.rdata = OutPort( Bits8 )
+      s.rf    = RegisterFile( Bits8, 4, rd_ports=1, wr_ports=1 )
+      s.vec   = Wire( Bits16 )
+      s.pos   = Wire( Bits4 )
+
+      s.rf.raddr[0] //= s.sel
+      s.rf.waddr[0] //= s.a[0:2]
+      s.rf.wdata[0] //= s.b
+      s.rf.wen[0]   //= s.a[7]
+      s.rf.rdata[0] //= s.rdata
+
+      @update
+      def up_comb():
+        s.pos @= zext( s.sel, 4 ) << 2
+        s.out @= s.in_
+        s.out.inner.arr[ s.sel[0] ] @= s.in_.inner.arr[1] ^ s.in_.inner.arr[0]
+        s.wide @= concat( s.a, sext( s.b[0:4], 8 ), s.vec[ s.pos : s.pos+4 ], s.vec[0:12] )
+
+        tmp = Bits8( 0 )
+        for i in range( 4 ):
+          tmp[i] @= s.a[i] ^ s.b[7-i]
+        tmp[4:8] @= trunc( s.a + s.b, 4 )
+        s.flags @= tmp
+        if reduce_and( s.a[0:2] ) | reduce_xor( s.b ):
+          s.flags[7] @= s.a < s.b
+          if s.sel == 1:
+            s.flags[5] @= 1
+        elif s.sel == 2:
+          s.flags[6] @= s.a >= 200
+        else:
+          s.flags[6] @= reduce_or( s.a & ~s.b )
+        s.out.flag @= 1 if s.a > s.b else 0
+
+      @update_ff
+      def up_seq():
+        if s.reset:
+          s.vec <<= 0
+        elif s.a[6]:
+          s.vec <<= (s.vec << 3) | zext( s.a - s.b * 3, 16 )
+
+    def line_trace( s ):
+      return f"{s.vec} {s.rdata}"
+
+  _check_same_as_flat( Top, 200, 5 )
+
+def test_dynamic_index_over_components():
+
+  class Counter( Component ):
+    def construct( s, step ):
+      s.en    = InPort()
+      s.count = OutPort( Bits8 )
+
+      @update_ff
+      def up_count():
+        if s.reset:
+          s.count <<= 0
+        elif s.en:
+          s.count <<= s.count + step
+
+  class Top( Component ):
+    def construct( s ):
+      s.sel   = InPort( Bits2 )
+      s.en    = InPort()
+      s.out   = OutPort( Bits8 )
+      s.ctrs  = [ Counter( i + 1 ) for i in range(4) ]
+      s.steps = [ Bits8(x) for x in [ 3, 5, 7, 11 ] ]
+
+      @update
+      def up_sel():
+        for i in range(4):
+          s.ctrs[i].en @= s.en & ( s.sel == i )
+        s.out @= s.ctrs[ s.sel ].count + s.steps[ s.sel ]
+
+    def line_trace( s ):
+      return " ".join( str(c.count) for c in s.ctrs )
+
+  _check_same_as_flat( Top, 100, 4 )
+
+def test_scc():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits4 )
+      s.out = OutPort( Bits8 )
+      s.x   = Wire( Bits8 )
+      s.y   = Wire( Bits8 )
+
+      @update
+      def up_x():
+        s.x[0:4] @= s.in_
+        s.x[4:8] @= s.y[0:4]
+
+      @update
+      def up_y():
+        s.y[0:4] @= s.x[0:4] + 1
+        s.y[4:8] @= s.x[4:8]
+
+      @update
+      def up_out():
+        s.out @= s.y
+
+  _check_same_as_flat( Top, 30, 3 )
+
+  class Loop( Component ):
+    def construct( s ):
+      s.x = Wire( Bits8 )
+      s.y = Wire( Bits8 )
+
+      @update
+      def up_x():
+        s.x @= s.y + 1
+
+      @update
+      def up_y():
+        s.y @= s.x
+
+  top = Loop()
+  top.apply( BatchSim( 2 ) )
+  with pytest.raises( UpblkCyclicError ):
+    top.sim_reset()
+
+def test_proc_vvadd():
+  top = RTLHarness( ubmark_vvadd_unopt )
+  top.apply( BatchSim( 3, trace_instance=1 ) )
+  top.sim_reset()
+  # The memory messages are wider than 64 bits
+  assert top._sim.flat_arrays[0].dtype == object
+
+  for _ in range(5000):
+    if top.sim_peek( top.done ).all():
+      break
+    top.sim_tick()
+  assert top.sim_peek( top.done ).tolist() == [ 1, 1, 1 ]
+  assert top.sim_peek( top.error ).tolist() == [ 0, 0, 0 ]
+
+  top.line_trace()
+  assert ubmark_vvadd_unopt.verify( top.mem.read_bytes() )
+
+def test_poke_peek_and_checkpoint( tmpdir ):
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+
+      @update_ff
+      def up_acc():
+        if s.reset:
+          s.out <<= 0
+        else:
+          s.out <<= s.out + s.in_
+
+  top = Top()
+  top.apply( BatchSim( 4 ) )
+  top.sim_reset()
+
+  top.sim_poke( top.in_, [ 1, 2, 3, 4 ] )
+  top.sim_tick()
+  top.sim_poke( top.in_, Bits8(10) )
+  top.sim_tick()
+  assert top.sim_peek( top.out ).tolist() == [ 11, 12, 13, 14 ]
+
+  path = str( tmpdir.join( "batch.ckpt" ) )
+  top.sim_checkpoint( path )
+  top.sim_tick()
+  assert top.sim_peek( top.out ).tolist() == [ 21, 22, 23, 24 ]
+  top.sim_restore( path )
+  assert top.sim_peek( top.out ).tolist() == [ 11, 12, 13, 14 ]
+  assert top.sim_cycle_count() == 5
+
+  # In-memory checkpoints, e.g. run_sweep without fork
+  ckpt = io.BytesIO()
+  top.sim_checkpoint( ckpt )
+  top.sim_tick()
+  ckpt.seek( 0 )
+  top.sim_restore( ckpt )
+  assert top.sim_peek( top.out ).tolist() == [ 11, 12, 13, 14 ]
+  assert top.sim_cycle_count() == 5
+
+  with pytest.raises( ValueError ):
+    top.sim_poke( top.out, 1 )
+  with pytest.raises( ValueError ):
+    top.sim_poke( top.in_, [ 1, 2 ] )
+  with pytest.raises( ValueError ):
+    top.sim_poke( top.in_, 256 )
+
+def test_run_test_vector_batch_sim():
+
+  class Top( Component ):
+    def construct( s ):
+      s.a   = InPort( Bits8 )
+      s.b   = InPort( Bits8 )
+      s.sum = OutPort( Bits8 )
+      s.max = OutPort( Bits8 )
+
+      @update
+      def up():
+        s.sum @= s.a + s.b
+        if s.a > s.b:
+          s.max @= s.a
+        else:
+          s.max @= s.b
+
+  run_test_vector_batch_sim( Top(), [
+    ( 'a           b  sum*            max*'          ),
+    [ [ 1, 2, 3 ], 5, [ 6, 7, 8 ],    5              ],
+    [ 200,         [ 100, 0, 255 ],   [ 44, 200, 199 ], [ 200, '?', 255 ] ],
+    [ np.int64(3), np.array([ 1, 2, 3 ]), np.uint8(4) + np.array([ 0, 1, 2 ]), np.int64(3) ],
+  ], 3 )
+
+  with pytest.raises( RunTestVectorSimError, match="instance       : 2" ):
+    run_test_vector_batch_sim( Top(), [
+      ( 'a           b  sum*'     ),
+      [ [ 1, 2, 3 ], 5, [ 6, 7, 9 ] ],
+    ], 3 )
+
+def test_reject_dynamic_loop_bounds():
+
+  class Top( Component ):
+    def construct( s ):
+      s.n   = InPort( Bits2 )
+      s.out = OutPort( Bits4 )
+
+      @update
+      def up():
+        s.out @= 0
+        for i in range( s.n ):
+          s.out[i] @= 1
+
+  with pytest.raises( ModelTypeError ):
+    Top().apply( BatchSim( 2 ) )
@@ -0,0 +1,428 @@
+import random
+import struct
+
+import pytest
+
+from examples.ex03_proc.NullXcel import NullXcelRTL
+from examples.ex03_proc.ProcRTL import ProcRTL
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+from pymtl3 import *
+from pymtl3.dsl.errors import UpblkCyclicError
+from pymtl3.passes.errors import ModelTypeError
+from pymtl3.stdlib.connects import connect_pairs
+from pymtl3.stdlib.mem import CombinationalROM, MemMsgType, mk_mem_msg
+from pymtl3.stdlib.mem.ifcs import MemResponderIfc
+from pymtl3.stdlib.primitive import RegisterFile
+from pymtl3.stdlib.stream import StreamSinkFL, StreamSourceFL
+from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
+from pymtl3.stdlib.stream.queues import StreamBypassQueue, StreamNormalQueue, StreamPipeQueue
+
+from ..FlatSimPass import FlatSimPass
+from ..PassGroups import FlatSim
+
+#-------------------------------------------------------------------------
+# An RTL-only harness for ProcRTL
+#-------------------------------------------------------------------------
+
+class StreamSourceRTL( Component ):
+  def construct( s, msgs ):
+    n = len(msgs)
+    s.ostream = OStreamIfc( Bits32 )
+    s.msgs = WireArray( Bits32, n+1, msgs + [ 0 ] )
+    s.idx  = Wire( clog2(n+1) )
+
+    @update
+    def up_src():
+      s.ostream.val @= s.idx < n
+      s.ostream.msg @= s.msgs[ s.idx ]
+
+    @update_ff
+    def up_src_ff():
+      if s.reset:
+        s.idx <<= 0
+      elif s.ostream.val & s.ostream.rdy:
+        s.idx <<= s.idx + 1
+
+class StreamSinkRTL( Component ):
+  def construct( s, msgs ):
+    n = len(msgs)
+    s.istream = IStreamIfc( Bits32 )
+    s.done  = OutPort()
+    s.error = OutPort()
+    s.msgs  = WireArray( Bits32, n+1, msgs + [ 0 ] )
+    s.idx   = Wire( clog2(n+1) )
+
+    @update
+    def up_sink():
+      s.istream.rdy @= s.idx < n
+      s.done @= s.idx == n
+
+    @update_ff
+    def up_sink_ff():
+      if s.reset:
+        s.idx   <<= 0
+        s.error <<= 0
+      elif s.istream.val & s.istream.rdy:
+        s.idx <<= s.idx + 1
+        if s.istream.msg != s.msgs[ s.idx ]:
+          s.error <<= 1
+
+class MemoryRTL( Component ):
+  def construct( s, nwords, data ):
+    ReqType, RespType = mk_mem_msg( 8, 32, 32 )
+    nbits = clog2( nwords )
+    write = MemMsgType.WRITE
+
+    s.ifc  = [ MemResponderIfc( ReqType, RespType ) for _ in range(2) ]
+    s.mem  = WireArray( Bits32, nwords, data )
+    s.full = [ Wire() for _ in range(2) ]
+    s.resp = [ Wire( RespType ) for _ in range(2) ]
+
+    @update
+    def up_mem_ifc():
+      for i in range(2):
+        s.ifc[i].reqstream.rdy  @= ~s.full[i] | s.ifc[i].respstream.rdy
+        s.ifc[i].respstream.val @= s.full[i]
+        s.ifc[i].respstream.msg @= s.resp[i]
+
+    @update_ff
+    def up_mem():
+      for i in range(2):
+        if s.reset:
+          s.full[i] <<= 0
+        elif s.ifc[i].reqstream.val & s.ifc[i].reqstream.rdy:
+          s.full[i] <<= 1
+          s.resp[i] <<= RespType( s.ifc[i].reqstream.msg.type_, s.ifc[i].reqstream.msg.opaque,
+                                  Bits2(0), Bits2(0), s.mem[ s.ifc[i].reqstream.msg.addr[2:2+nbits] ] )
+          if s.ifc[i].reqstream.msg.type_ == write:
+            s.mem[ s.ifc[i].reqstream.msg.addr[2:2+nbits] ] <<= s.ifc[i].reqstream.msg.data
+        elif s.ifc[i].respstream.rdy:
+          s.full[i] <<= 0
+
+  def read_bytes( s ):
+    return bytearray( struct.pack( f"<{len(s.mem)}I", *[ int(x) for x in s.mem ] ) )
+
+class RTLHarness( Component ):
+  def construct( s, bmark, nwords=8192 ):
+    data = [ 0 ] * nwords
+    src, sink = [], []
+    for section in bmark.gen_mem_image().get_sections():
+      words = [ x[0] for x in struct.iter_unpack( "<I", section.data ) ]
+      if section.name == ".mngr2proc":
+        src.extend( words )
+      elif section.name == ".proc2mngr":
+        sink.extend( words )
+      else:
+        data[ section.addr//4 : section.addr//4 + len(words) ] = words
+
+    s.done  = OutPort()
+    s.error = OutPort()
+
+    s.src  = StreamSourceRTL( src )
+    s.sink = StreamSinkRTL( sink )
+    s.proc = ProcRTL()
+    s.xcel = NullXcelRTL()
+    s.mem  = MemoryRTL( nwords, data )
+
+    connect_pairs(
+      s.src.ostream,    s.proc.mngr2proc,
+      s.proc.proc2mngr, s.sink.istream,
+      s.proc.imem,      s.mem.ifc[0],
+      s.proc.dmem,      s.mem.ifc[1],
+      s.proc.xcel,      s.xcel.xcel,
+      s.sink.done,      s.done,
+      s.sink.error,     s.error,
+    )
+
+  def line_trace( s ):
+    return s.proc.line_trace()
+
+#-------------------------------------------------------------------------
+# Helpers
+#-------------------------------------------------------------------------
+
+# Drive the top-level input ports with random values and record the line
+# trace and the top-level output ports of every cycle
+def _run( top_cls, pass_group, ncycles, *args ):
+  top = top_cls( *args )
+  top.apply( pass_group )
+  top.sim_reset()
+
+  rng = random.Random(0xf1a7)
+  inports  = sorted( top.get_input_value_ports(), key=repr )
+  outports = sorted( top.get_output_value_ports(), key=repr )
+  trace = []
+  for _ in range( ncycles ):
+    for x in inports:
+      if x is not top.clk and x is not top.reset:
+        obj = eval( f"top{repr(x)[1:]}" )
+        obj @= obj.__class__.from_bits( mk_bits( obj.nbits )( rng.getrandbits( obj.nbits ) ) ) \
+               if is_bitstruct_inst( obj ) else rng.getrandbits( obj.nbits )
+    top.sim_eval_combinational()
+    outs = [ str(eval( f"top{repr(x)[1:]}" )) for x in outports ]
+    trace.append( ( top.line_trace() if hasattr( top, 'line_trace' ) else "", outs ) )
+    top.sim_tick()
+  return top, trace
+
+def _check_same_as_default( top_cls, ncycles, *args ):
+  _, ref = _run( top_cls, DefaultPassGroup(), ncycles, *args )
+  top, trace = _run( top_cls, FlatSim(), ncycles, *args )
+  assert trace == ref
+  return top
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+def test_stream_queues():
+
+  class Top( Component ):
+    def construct( s ):
+      s.istream = IStreamIfc( Bits16 )
+      s.ostream = OStreamIfc( Bits16 )
+      s.queues  = [ StreamNormalQueue( Bits16, 2 ), StreamPipeQueue( Bits16, 3 ),
+                    StreamBypassQueue( Bits16, 2 ), StreamNormalQueue( Bits16, 1 ) ]
+      s.istream //= s.queues[0].istream
+      for i in range(3):
+        s.queues[i].ostream //= s.queues[i+1].istream
+      s.queues[3].ostream //= s.ostream
+
+    def line_trace( s ):
+      return "|".join( q.line_trace() for q in s.queues )
+
+  top = _check_same_as_default( Top, 200 )
+  names = top.get_metadata( FlatSimPass.slot_names )
+  assert len(names) == len(top._sim.flat_arrays[0])
+  assert any( "queues[0].istream.msg" in x for x in names )
+
+def test_wire_arrays():
+
+  class Top( Component ):
+    def construct( s ):
+      s.rf  = RegisterFile( Bits8, 8, rd_ports=2, wr_ports=2, const_zero=True )
+      s.rom = CombinationalROM( Bits16, 4, [ 0xface, 0xbeef, 0xcafe, 0xf00d ], num_ports=2 )
+
+    def line_trace( s ):
+      return f"{s.rf.rdata} {s.rom.rdata}"
+
+  _check_same_as_default( Top, 200 )
+
+def test_structs_and_slices():
+
+  @bitstruct
+  class Inner:
+    lo : Bits4
+    arr: [ Bits3, Bits3 ]
+
+  @bitstruct
+  class Outer:
+    hi   : Bits5
+    inner: Inner
+    flag : Bits1
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_  = InPort( Outer )
+      s.sel  = InPort( Bits2 )
+      s.a    = InPort( Bits8 )
+      s.b    = InPort( Bits8 )
+      s.out  = OutPort( Outer )
+      s.wide = OutPort( Bits32 )
+      s.flags = OutPort( Bits8 )
+      s.reg  = Wire( Outer )
+      s.vec  = Wire( Bits16 )
+      s.reg_next = Wire( Outer )
+      s.vec_next = Wire( Bits16 )
+      s.pos      = Wire( Bits4 )
+
+      @update
+      def up_pos():
+        s.pos @= zext( s.sel, 4 ) << 2
+
+      @update
+      def up_comb():
+        s.out @= s.reg
+        s.out.inner.arr[ s.sel[0] ] @= s.in_.inner.arr[1] ^ s.in_.inner.arr[0]
+        s.out.hi[1:4] @= s.a[5:8]
+        s.wide @= concat( s.a, sext( s.b[0:4], 8 ), zext( s.in_.inner.lo, 8 ), s.vec[ s.pos : s.pos+4 ], s.vec[0:4] )
+
+        tmp = Bits8( 0 )
+        for i in range( 4 ):
+          tmp[i] @= s.a[i] ^ s.b[7-i]
+        tmp[4:8] @= trunc( s.a + s.b, 4 )
+        s.flags @= tmp
+        if reduce_and( s.a[0:2] ) | reduce_xor( s.b ):
+          s.flags[7] @= s.a < s.b
+        elif s.sel == 2:
+          s.flags[6] @= s.a >= 200
+        else:
+          s.flags[6] @= reduce_or( s.a & ~s.b )
+
+      @update
+      def up_next():
+        s.reg_next @= s.in_
+        s.reg_next.inner.lo @= s.reg.inner.lo - 1
+        s.vec_next @= (s.vec << 3) | zext( s.a - s.b * 3, 16 )
+        s.vec_next[ s.pos : s.pos+4 ] @= s.vec[12:16] >> 1
+
+      @update_ff
+      def up_seq():
+        s.reg <<= s.reg_next
+        if s.reset:
+          s.vec <<= 0
+        else:
+          s.vec <<= s.vec_next
+
+    def line_trace( s ):
+      return f"{s.reg} {s.vec}"
+
+  _check_same_as_default( Top, 300 )
+
+def test_dynamic_index_over_components():
+
+  class Counter( Component ):
+    def construct( s, step ):
+      s.en    = InPort()
+      s.count = OutPort( Bits8 )
+
+      @update_ff
+      def up_count():
+        if s.reset:
+          s.count <<= 0
+        elif s.en:
+          s.count <<= s.count + step
+
+  class Top( Component ):
+    def construct( s ):
+      s.sel   = InPort( Bits2 )
+      s.en    = InPort()
+      s.out   = OutPort( Bits8 )
+      s.ctrs  = [ Counter( i + 1 ) for i in range(4) ]
+      s.steps = [ Bits8(x) for x in [ 3, 5, 7, 11 ] ]
+
+      @update
+      def up_sel():
+        for i in range(4):
+          s.ctrs[i].en @= s.en & ( s.sel == i )
+        s.out @= s.ctrs[ s.sel ].count + s.steps[ s.sel ]
+
+    def line_trace( s ):
+      return " ".join( str(c.count) for c in s.ctrs )
+
+  _check_same_as_default( Top, 100 )
+
+def test_scc():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits4 )
+      s.out = OutPort( Bits8 )
+      s.x   = Wire( Bits8 )
+      s.y   = Wire( Bits8 )
+
+      # The blocks form a cycle but the bits do not
+      @update
+      def up_x():
+        s.x[0:4] @= s.in_
+        s.x[4:8] @= s.y[0:4]
+
+      @update
+      def up_y():
+        s.y[0:4] @= s.x[0:4] + 1
+        s.y[4:8] @= s.x[4:8]
+
+      @update
+      def up_out():
+        s.out @= s.y
+
+  _check_same_as_default( Top, 50 )
+
+  class Loop( Component ):
+    def construct( s ):
+      s.x = Wire( Bits8 )
+      s.y = Wire( Bits8 )
+
+      @update
+      def up_x():
+        s.x @= s.y + 1
+
+      @update
+      def up_y():
+        s.y @= s.x
+
+  top = Loop()
+  top.apply( FlatSim() )
+  with pytest.raises( UpblkCyclicError ):
+    top.sim_reset()
+
+def test_proc_vvadd():
+  top = _check_same_as_default( RTLHarness, 400, ubmark_vvadd_unopt )
+
+  for _ in range(5000):
+    if top.done:
+      break
+    top.sim_tick()
+  assert top.done and not top.error
+
+  # The line trace refreshes the views
+  top.line_trace()
+  assert ubmark_vvadd_unopt.verify( top.mem.read_bytes() )
+
+def test_checkpoint( tmpdir ):
+
+  class Top( Component ):
+    def construct( s ):
+      s.istream = IStreamIfc( Bits8 )
+      s.ostream = OStreamIfc( Bits8 )
+      s.rf = RegisterFile( Bits8, 4, rd_ports=1, wr_ports=1 )
+      s.q  = StreamNormalQueue( Bits8, 2 )
+      s.istream //= s.q.istream
+      s.q.ostream //= s.ostream
+
+    def line_trace( s ):
+      return f"{s.rf.rdata} {s.q.line_trace()}"
+
+  top, ref = _run( Top, FlatSim(), 40 )
+  top2, _  = _run( Top, FlatSim(), 20 )
+
+  path = str( tmpdir.join( "flat.ckpt" ) )
+  top2.sim_checkpoint( path )
+  for _ in range(5):
+    top2.sim_tick()
+  top2.sim_restore( path )
+  assert top2.line_trace() == ref[20][0].split(" ", 1)[0] + " " + top2.q.line_trace()
+  assert top2._sim.flat_arrays[0] == top2._sim.flat_arrays[1]
+
+def test_textwave( capsys ):
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+
+      @update_ff
+      def up_reg():
+        s.out <<= s.in_ + 1
+
+  waves = []
+  for pass_group in [ DefaultPassGroup( textwave=True ), FlatSim( textwave=True ) ]:
+    top = Top()
+    top.apply( pass_group )
+    top.sim_reset()
+    for i in range(10):
+      top.in_ @= i
+      top.sim_tick()
+    top.print_textwave()
+    waves.append( capsys.readouterr().out )
+  assert waves[0] == waves[1]
+
+def test_reject_non_rtl():
+
+  class Top( Component ):
+    def construct( s ):
+      s.src  = StreamSourceFL( Bits8, [ Bits8(1) ] )
+      s.sink = StreamSinkFL( Bits8, [ Bits8(1) ] )
+      s.src.ostream //= s.sink.istream
+
+  with pytest.raises( ModelTypeError ):
+    Top().apply( FlatSim() )
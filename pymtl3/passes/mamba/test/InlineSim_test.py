@@ -0,0 +1,141 @@
+from pymtl3 import *
+from pymtl3.stdlib.stream import StreamSinkFL, StreamSourceFL
+from pymtl3.stdlib.stream.queues import StreamBypassQueue, StreamNormalQueue, StreamPipeQueue
+
+from ..InlineSimPass import InlineSimPass
+from ..PassGroups import InlineSim
+
+OFFSET = 3
+
+def _run( top_cls, pass_group, ncycles, *args ):
+  top = top_cls( *args )
+  top.apply( pass_group )
+  top.sim_reset()
+  trace = []
+  for _ in range( ncycles ):
+    top.sim_tick()
+    trace.append( top.line_trace() )
+  return top, trace
+
+def _check_same_as_default( top_cls, ncycles, *args ):
+  _, ref = _run( top_cls, DefaultPassGroup(), ncycles, *args )
+  top, trace = _run( top_cls, InlineSim(), ncycles, *args )
+  assert trace == ref
+  return top
+
+def test_queue_chain():
+
+  class Top( Component ):
+    def construct( s, msgs ):
+      s.src    = StreamSourceFL( Bits16, msgs, 0, 1 )
+      s.queues = [ StreamNormalQueue( Bits16, 2 ), StreamPipeQueue( Bits16, 2 ),
+                   StreamBypassQueue( Bits16, 2 ) ]
+      s.sink   = StreamSinkFL( Bits16, msgs, 0, 2 )
+
+      s.src.ostream //= s.queues[0].istream
+      s.queues[0].ostream //= s.queues[1].istream
+      s.queues[1].ostream //= s.queues[2].istream
+      s.queues[2].ostream //= s.sink.istream
+
+    def line_trace( s ):
+      return "|".join( q.line_trace() for q in s.queues ) + f" {s.sink.idx}"
+
+  msgs = [ Bits16(i) for i in range(20) ]
+  top = _check_same_as_default( Top, 120, msgs )
+  assert top.sink.done()
+
+def test_python_features():
+
+  @bitstruct
+  class Pair:
+    a: Bits8
+    b: Bits8
+
+  class Inner( Component ):
+    def construct( s, n ):
+      s.in_  = InPort( Bits8 )
+      s.out  = OutPort( Pair )
+      s.regs = [ Wire( Bits8 ) for _ in range(n) ]
+      s.count = 0
+      s.log   = []
+
+      @update_ff
+      def up_regs():
+        # Locals, loops, closure constants and plain attributes
+        if s.reset:
+          for i in range(n):
+            s.regs[i] <<= 0
+        else:
+          x = s.in_ + OFFSET
+          for i in range(n):
+            s.regs[i] <<= x + i
+            x = x + 1
+          s.count += 1
+
+      @update
+      def up_out():
+        try:
+          s.out @= Pair( s.regs[0], s.regs[n-1] )
+        except Exception as e:
+          s.log.append( e )
+        y = s.regs[0] ^ s.regs[n-1]
+        s.out.b @= y
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_   = Wire( Bits8 )
+      s.inner = Inner( 3 )
+      s.inner.in_ //= s.in_
+      s.count = 0
+
+      @update_ff
+      def up_in():
+        s.in_ <<= s.in_ + 5
+
+    def line_trace( s ):
+      return f"{s.inner.out} {s.inner.count} {[ int(x) for x in s.inner.regs ]}"
+
+  top = _check_same_as_default( Top, 20 )
+  assert top.inner.count == 20
+  fallbacks = top.get_metadata( InlineSimPass.fallback_blocks )
+  for name in [ 'up_regs', 'up_out', 'up_in' ]:
+    assert name not in fallbacks
+
+def test_fallback_blocks():
+
+  class Top( Component ):
+    def construct( s ):
+      s.out1 = Wire( Bits8 )
+      s.out2 = Wire( Bits8 )
+      s.out3 = Wire( Bits8 )
+      state = 0
+
+      @update_ff
+      def up_early_return():
+        if s.reset:
+          s.out1 <<= 0
+          return
+        s.out1 <<= s.out1 + 1
+
+      @update_ff
+      def up_comprehension():
+        s.out2 <<= sum( [ int(x) for x in [ s.out1, s.out3 ] ] ) & 0xff
+
+      def bump():
+        nonlocal state
+        state += 1
+        return state
+      s.bump = bump
+
+      @update_ff
+      def up_closure():
+        # state is rebound by bump, so it cannot be folded into a constant
+        s.out3 <<= s.bump() + state
+
+    def line_trace( s ):
+      return f"{s.out1} {s.out2} {s.out3}"
+
+  top = _check_same_as_default( Top, 10 )
+  fallbacks = top.get_metadata( InlineSimPass.fallback_blocks )
+  for name in [ 'up_early_return', 'up_comprehension', 'up_closure' ]:
+    assert name in fallbacks
@@ -0,0 +1,232 @@
+import random
+
+import pytest
+
+from examples.ex03_proc.ubmark.proc_ubmark_vvadd_unopt import ubmark_vvadd_unopt
+from pymtl3 import *
+from pymtl3.dsl.errors import UpblkCyclicError
+from pymtl3.passes.errors import ModelTypeError
+
+from ..PartitionSimPass import PartitionSimPass
+from ..PassGroups import FlatSim, PartitionSim
+from .FlatSim_test import RTLHarness
+
+pytest.importorskip("multiprocessing.shared_memory")
+
+#-------------------------------------------------------------------------
+# Designs
+#-------------------------------------------------------------------------
+
+class Tile( Component ):
+  def construct( s, k ):
+    s.en  = InPort()
+    s.in_ = InPort( Bits16 )
+    s.out = OutPort( Bits16 )
+    s.acc = Wire( Bits16 )
+    s.nxt = Wire( Bits16 )
+
+    @update
+    def up_nxt():
+      s.nxt @= s.acc + s.in_ + k
+
+    @update_ff
+    def up_acc():
+      if s.reset:
+        s.acc <<= 0
+        s.out <<= 0
+      elif s.en:
+        s.acc <<= s.nxt
+        s.out <<= s.acc ^ s.in_
+
+  def line_trace( s ):
+    return f"{s.acc}"
+
+# Tiles in a ring, the link into tile 1 swaps the bytes
+class Ring( Component ):
+  def construct( s, n ):
+    s.en    = InPort()
+    s.out   = OutPort( Bits16 )
+    s.sum   = OutPort( Bits16 )
+    s.tiles = [ Tile( i ) for i in range(n) ]
+
+    for i in range(n):
+      s.tiles[i].en //= s.en
+      if i == 1:
+        s.tiles[1].in_[0:8]  //= s.tiles[0].out[8:16]
+        s.tiles[1].in_[8:16] //= s.tiles[0].out[0:8]
+      else:
+        s.tiles[i].in_ //= s.tiles[i-1].out
+    s.out //= s.tiles[0].out
+
+    @update
+    def up_sum():
+      s.sum @= 0
+      for i in range(n):
+        s.sum @= s.sum + s.tiles[i].out
+
+  def line_trace( s ):
+    return " ".join( t.line_trace() for t in s.tiles )
+
+# A processor harness whose done and error outputs are registered
+class ProcTile( Component ):
+  def construct( s ):
+    s.done    = OutPort()
+    s.error   = OutPort()
+    s.harness = RTLHarness( ubmark_vvadd_unopt )
+
+    @update_ff
+    def up_status():
+      s.done  <<= s.harness.done
+      s.error <<= s.harness.error
+
+  def line_trace( s ):
+    return s.harness.line_trace()
+
+class ProcTiles( Component ):
+  def construct( s, n ):
+    s.done  = OutPort()
+    s.error = OutPort()
+    s.tiles = [ ProcTile() for _ in range(n) ]
+
+    @update
+    def up_done():
+      s.done  @= 1
+      s.error @= 0
+      for i in range(n):
+        s.done  @= s.done & s.tiles[i].done
+        s.error @= s.error | s.tiles[i].error
+
+  def line_trace( s ):
+    return " | ".join( t.line_trace() for t in s.tiles )
+
+#-------------------------------------------------------------------------
+# Helpers
+#-------------------------------------------------------------------------
+
+def _mk( top_cls, pass_group, partitions, *args ):
+  top = top_cls( *args )
+  top.elaborate()
+  for m in partitions( top ):
+    m.set_metadata( PartitionSimPass.partition, True )
+  top.apply( pass_group )
+  return top
+
+def _run( top, ncycles ):
+  top.sim_reset()
+  rng = random.Random(0x9a27)
+  trace = []
+  for _ in range( ncycles ):
+    top.en @= rng.getrandbits(1)
+    top.sim_eval_combinational()
+    trace.append( ( top.line_trace(), int(top.out), int(top.sum) ) )
+    top.sim_tick()
+  return trace
+
+#-------------------------------------------------------------------------
+# Tests
+#-------------------------------------------------------------------------
+
+def test_ring():
+  ref = _run( _mk( Ring, FlatSim(), lambda top: [], 4 ), 60 )
+
+  top = _mk( Ring, PartitionSim(), lambda top: top.tiles[1:], 4 )
+  try:
+    assert _run( top, 60 ) == ref
+    assert top.get_metadata( PartitionSimPass.partition_names ) == \
+           [ "s", "s.tiles[1]", "s.tiles[2]", "s.tiles[3]" ]
+    assert any( "s.tiles[0].out" in x for x in top.get_metadata( PartitionSimPass.boundary_names ) )
+  finally:
+    top.sim_finalize()
+
+def test_line_trace_and_textwave( capsys ):
+  ref = _mk( Ring, FlatSim( linetrace=True, textwave=True ), lambda top: [], 3 )
+  _run( ref, 20 )
+  ref.print_textwave()
+  expected = capsys.readouterr().out
+
+  top = _mk( Ring, PartitionSim( linetrace=True, textwave=True ), lambda top: top.tiles, 3 )
+  try:
+    _run( top, 20 )
+    top.print_textwave()
+    assert capsys.readouterr().out == expected
+  finally:
+    top.sim_finalize()
+
+def test_checkpoint( tmpdir ):
+  top = _mk( Ring, PartitionSim(), lambda top: top.tiles[:2], 3 )
+  try:
+    _run( top, 15 )
+    path = str( tmpdir.join( "partition.ckpt" ) )
+    top.sim_checkpoint( path )
+    trace = top.line_trace()
+    for _ in range(5):
+      top.en @= 1
+      top.sim_tick()
+    assert top.line_trace() != trace
+    top.sim_restore( path )
+    assert top.line_trace() == trace
+  finally:
+    top.sim_finalize()
+
+def test_proc_tiles():
+  top = _mk( ProcTiles, PartitionSim(), lambda top: top.tiles, 2 )
+  try:
+    top.sim_reset()
+    for _ in range(5000):
+      if top.done:
+        break
+      top.sim_tick()
+    assert top.done and not top.error
+
+    # The line trace gathers the signals of the workers
+    top.line_trace()
+    for t in top.tiles:
+      assert ubmark_vvadd_unopt.verify( t.harness.mem.read_bytes() )
+  finally:
+    top.sim_finalize()
+
+def test_reject_combinational_boundary():
+
+  class Inc( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+
+      @update
+      def up_inc():
+        s.out @= s.in_ + 1
+
+  class Top( Component ):
+    def construct( s ):
+      s.a = Inc()
+      s.b = Inc()
+      s.a.out //= s.b.in_
+
+  with pytest.raises( ModelTypeError, match="read combinationally by partition 1" ):
+    _mk( Top, PartitionSim(), lambda top: [ top.b ] )
+
+def test_worker_error():
+
+  class Loop( Component ):
+    def construct( s ):
+      s.x = Wire( Bits8 )
+      s.y = Wire( Bits8 )
+
+      @update
+      def up_x():
+        s.x @= s.y + 1
+
+      @update
+      def up_y():
+        s.y @= s.x
+
+  class Top( Component ):
+    def construct( s ):
+      s.loop = Loop()
+
+  top = _mk( Top, PartitionSim(), lambda top: [ top.loop ] )
+  try:
+    with pytest.raises( UpblkCyclicError ):
+      top.sim_reset()
+  finally:
+    top.sim_finalize()
@@ -544,6 +544,7 @@ class RTLIRGetter:
       ( list,          self._handle_Array ),
       ( dsl.InPort,    self._handle_InPort ),
       ( dsl.OutPort,   self._handle_OutPort ),
+      ( dsl.WireArray, self._handle_WireArray ),
       ( dsl.Wire,      self._handle_Wire ),
       ( ( int, Bits ), self._handle_Const ),
       ( dsl.Interface, self._handle_Interface ),
@@ -691,6 +692,10 @@ class RTLIRGetter:
   def _handle_Wire( self, w_id, obj ):
     return Wire( get_rtlir_dtype( obj ) )
 
+  def _handle_WireArray( self, w_id, obj ):
+    # A WireArray is translated in the same way as a list of wires
+    return Array( [ len(obj) ], Wire( get_rtlir_dtype( obj ) ) )
+
   def _handle_Const( self, c_id, obj ):
     return Const( get_rtlir_dtype( obj ), obj )
 
@@ -6,13 +6,14 @@
 """Provide L1 structural RTLIR generation pass."""
 
 from pymtl3 import MetadataKey
+from pymtl3.dsl import WireArray
 from pymtl3.passes.PlaceholderConfigs import PlaceholderConfigs
 # from pymtl3.passes.rtlir.RTLIRPass import RTLIRPass
 from pymtl3.passes.rtlir.errors import RTLIRConversionError
 from pymtl3.passes.rtlir.rtype.RTLIRType import RTLIRGetter
 
 from .StructuralRTLIRGenL0Pass import StructuralRTLIRGenL0Pass
-from .StructuralRTLIRSignalExpr import gen_signal_expr
+from .StructuralRTLIRSignalExpr import ConstInstance, construct_index, gen_signal_expr
 
 
 class StructuralRTLIRGenL1Pass( StructuralRTLIRGenL0Pass ):
@@ -71,4 +72,14 @@ class StructuralRTLIRGenL1Pass( StructuralRTLIRGenL0Pass ):
 
     connections = [ (gen_signal_expr(m, x[0]), gen_signal_expr(m, x[1])) for x in ordered_conns ]
 
+    # The initial values of a WireArray are translated into constant
+    # connections, i.e., what s.x[i] //= init[i] would have generated
+    for obj in m.__dict__.values():
+      if isinstance( obj, WireArray ) and obj._dsl.init is not None:
+        array_expr = gen_signal_expr( m, obj )
+        Type = obj._dsl.Type
+        for i, v in enumerate( obj._dsl.init ):
+          v = v if isinstance( v, Type ) else Type( v )
+          connections.append( (ConstInstance( v, v ), construct_index( array_expr, i )) )
+
     m.set_metadata( c.connections, connections )
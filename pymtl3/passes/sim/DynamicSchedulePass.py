@@ -5,23 +5,29 @@
 # Author : Shunning Jiang
 # Date   : Apr 19, 2019
 
+import linecache
 import os
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 from copy import deepcopy
 
-import py
-
 from pymtl3.datatypes import Bits, is_bitstruct_class
+from pymtl3.dsl import MetadataKey
 from pymtl3.dsl.errors import UpblkCyclicError
 from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass, PassMetadata
 from pymtl3.passes.errors import PassOrderError
 
 from .SimpleSchedulePass import SimpleSchedulePass, dump_dag
-from .SimpleTickPass import SimpleTickPass
 
 
 class DynamicSchedulePass( BasePass ):
+
+  #: Convergence counters of the cyclic SCCs, one SCCStats per
+  #: wrapped_SCC block
+  #:
+  #: Type: ``list``; output
+  scc_stats = MetadataKey(list)
+
   def __call__( self, top ):
     if not hasattr( top._dag, "all_constraints" ):
       raise PassOrderError( "all_constraints" )
@@ -95,6 +101,8 @@ class DynamicSchedulePass( BasePass ):
 
     # Put the graph schedule to _sched
     top._sched.update_schedule = schedule = []
+    top._sched.scc_stats = []
+    top.set_metadata( self.scc_stats, top._sched.scc_stats )
 
     scc_id = 0
     for i in scc_schedule:
@@ -165,94 +173,162 @@ class DynamicSchedulePass( BasePass ):
                           "Probably a loop that involves blocks that should be update_once:\n{}"\
                           .format(", ".join( [ x.__name__ for x in scc] )))
 
-        # generate a loop for scc
-        # Shunning: we just simply loop over the whole SCC block
-        # TODO performance optimizations using Mamba techniques within a SCC block
-
-        def gen_wrapped_SCCblk( s, scc, src ):
-
-          # TODO mamba?
-          scc_tick_func = SimpleTickPass.gen_tick_function( scc )
-          _globals = { 's': s, 'scc_tick_func': scc_tick_func, 'deepcopy': deepcopy,
-                       'UpblkCyclicError': UpblkCyclicError }
-          _locals  = {}
-
-          custom_exec(py.code.Source( src ).compile(), _globals, _locals)
-          return _locals[ 'generated_block' ]
-
-        template = """
-def wrapped_SCC_{0}():
-  N = 0
-  while True:
-    N += 1
-    if N > 100:
-      raise UpblkCyclicError("Combinational loop detected at runtime in {{{3}}} after 100 iters!")
-    {1}
-    scc_tick_func()
-    {2}
-    # print( "SCC block{0} is executed", num_iters, "times" )
-    break
-generated_block = wrapped_SCC_{0}
-          """
-
-        copy_srcs  = []
-        check_srcs = []
-        # print_srcs = []
-
-        # clean up non-top variables if top is there. remove slices
-
-        final_variables = set()
-
-        for x in sorted( variables, key=repr ):
-          w = x.get_top_level_signal()
-          if w is x:
-            final_variables.add( x )
-            continue
-
-          # w is not x
-          if issubclass( w._dsl.Type, Bits ):
-            if w not in final_variables:
-              final_variables.add( w )
-          elif is_bitstruct_class( w._dsl.Type ):
-            if w not in final_variables:
-              final_variables.add( x )
-          else:
-            final_variables.add( x )
-
-        # group them by host component so that we create less bytecode
-
-        final_var_host = defaultdict(list)
-        for x in final_variables:
-          final_var_host[ x.get_host_component() ].append( x )
-
-        # create a block of copy/check code for each host component. Need
-        # to allocate global var_id across different host components.
-
-        var_id = 0
-        for host, var_list in final_var_host.items():
-
-          copy_srcs .append( f"host={host!r}" )
-          check_srcs.append( f"host={host!r}" )
-
-          sub_check_srcs = []
-
-          hostlen = len(repr(host))
-          for var in var_list:
-            var_id += 1
-            subname = repr(var)[hostlen+1:]
-            if issubclass( var._dsl.Type, Bits ):     copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-            elif is_bitstruct_class( var._dsl.Type ): copy_srcs.append( f"t{var_id}=host.{subname}.clone()" )
-            else:                                     copy_srcs.append( f"t{var_id}=deepcopy(host.{subname})" )
-
-            sub_check_srcs.append( f"host.{subname} != t{var_id}" )
-
-          check_srcs.append( f"if { ' or '.join(sub_check_srcs)}: continue" )
-
-        scc_block_src = template.format( scc_id, "; ".join( copy_srcs ), "\n    ".join( check_srcs ),
-                                         ", ".join( [ x.__name__ for x in scc] ) )
-
-        # print(scc_block_src)
-        schedule.append( gen_wrapped_SCCblk( top, tmp_schedule, scc_block_src ) )
+        blk = gen_scc_block( top, scc_id, tmp_schedule, E, constraint_objs )
+        top._sched.scc_stats.append( blk._scc_stats )
+        schedule.append( blk )
+
+#-------------------------------------------------------------------------
+# SCC convergence
+#-------------------------------------------------------------------------
+# A cyclic SCC is evaluated in rounds until its variables stop changing.
+# The first round runs every block in the intra-SCC order. Afterwards a
+# block only runs again if a variable that it reads from another block of
+# the SCC changed: every block saves the variables it passes on before it
+# runs and wakes up the readers of the ones that changed. Readers later
+# in the order run in the same round, earlier ones in the next round.
+# Only signal values are tracked, constraints on methods only order the
+# first round.
+
+class SCCStats:
+  """ Convergence counters of one cyclic SCC. histogram maps the number
+  of rounds a call took to the number of such calls, evaluations counts
+  the update blocks that ran in all calls. """
+
+  __slots__ = ( 'name', 'blocks', 'histogram', 'evaluations' )
+
+  def __init__( self, name, blocks ):
+    self.name        = name
+    self.blocks      = blocks
+    self.histogram   = Counter()
+    self.evaluations = 0
+
+  def calls( self ):
+    return sum( self.histogram.values() )
+
+  def mean_rounds( self ):
+    calls = self.calls()
+    return sum( k * v for k, v in self.histogram.items() ) / calls if calls else 0.0
+
+  def max_rounds( self ):
+    return max( self.histogram, default=0 )
+
+  def __repr__( self ):
+    return f"SCCStats({self.name}, blocks=[{', '.join( self.blocks )}], calls={self.calls()}, " \
+           f"evaluations={self.evaluations}, histogram={dict( sorted( self.histogram.items() ) )})"
+
+def _scc_variable( obj ):
+  if not obj.is_signal():
+    return None
+  # Track slices through the whole Bits signal
+  w = obj.get_top_level_signal()
+  if w is not obj and issubclass( w._dsl.Type, Bits ):
+    return w
+  return obj
+
+def gen_scc_block( top, scc_id, schedule, edges, constraint_objs ):
+  """ Return the wrapped_SCC block that evaluates the blocks of an SCC in
+  the order of schedule until they converge. edges are the constraints
+  of the intra-cycle graph and constraint_objs the variables behind
+  them. The SCCStats of the block is in its _scc_stats attribute. """
+
+  index = { blk: i for i, blk in enumerate( schedule ) }
+
+  # PrepareSimPass points all top-level signals of a net to the same
+  # value, so the net blocks between them do nothing and a change has to
+  # wake up the readers of every signal in the net
+  residence = getattr( top._dag, 'net_residence', None )
+  if residence is None:
+    top._dag.net_residence = residence = {}
+    for writer, signals in top.get_all_value_nets():
+      shared = [ x for x in signals if x.is_signal() and x.is_top_level_signal() ]
+      for x in shared:
+        residence[ x ] = shared[0]
+
+  def group( var ):
+    w = var.get_top_level_signal()
+    return residence.get( w, w )
+
+  # The variables every block passes on, and the blocks that read each
+  # group of variables
+  passes_on = [ {} for _ in schedule ]
+  readers   = defaultdict(set)
+  for (u, v) in edges:
+    if u in index and v in index:
+      for obj in constraint_objs[ (u, v) ]:
+        var = _scc_variable( obj )
+        if var is not None:
+          passes_on[ index[u] ][ var ] = group( var )
+          readers[ group( var ) ].add( index[v] )
+
+  hosts = {}
+  def access( var ):
+    host = var.get_host_component()
+    if host not in hosts:
+      hosts[ host ] = f"h{len(hosts)}"
+    return f"{hosts[host]}.{repr(var)[len(repr(host))+1:]}"
+
+  # The expression that saves the value of var and the one to compare
+  # against the saved value
+  def snapshot( var ):
+    src = access( var )
+    T = var._dsl.Type
+    if isinstance( T, type ) and issubclass( T, Bits ):
+      return f"int({src})", f"int({src})"
+    if is_bitstruct_class( T ):
+      return f"int({src}.to_bits())", f"int({src}.to_bits())"
+    return f"deepcopy({src})", src
+
+  name  = f"wrapped_SCC_{scc_id}"
+  error = "Combinational loop detected at runtime in {" + \
+          ", ".join( x.__name__ for x in schedule ) + "} after 100 iters!"
+  nblks = len(schedule)
+  woken = sorted( { k for x in readers.values() for k in x } )
+
+  body = []
+  for i in range(nblks):
+    body += [ f"      if d{i}:",
+              f"        d{i} = False",
+              f"        evals += 1" ]
+    checks = []
+    for j, (var, g) in enumerate( sorted( passes_on[i].items(), key=lambda x: repr(x[0]) ) ):
+      wake = sorted( readers[g] - { i } )
+      if not wake:
+        continue
+      save, now = snapshot( var )
+      body   += [ f"        t{j} = {save}" ]
+      checks += [ f"        if {now} != t{j}: {' = '.join( f'd{k}' for k in wake )} = True" ]
+    body += [ f"        b{i}()" ] + checks
+
+  lines = [
+    f"def compile_scc( b, h, stats ):",
+    f"  {''.join( f'b{i}, ' for i in range(nblks) )}= b",
+    f"  {''.join( f'{x}, ' for x in hosts.values() )}= h" if hosts else "",
+    f"  histogram = stats.histogram",
+    f"  def {name}():",
+    f"    {' = '.join( f'd{i}' for i in range(nblks) )} = True",
+    f"    rounds = evals = 0",
+    f"    while True:",
+    f"      rounds += 1",
+    f"      if rounds > 100:",
+    f"        raise UpblkCyclicError({error!r})",
+  ] + body + [
+    f"      if not ( {' or '.join( f'd{k}' for k in woken )} ): break" if woken else "      break",
+    f"    histogram[rounds] += 1",
+    f"    stats.evaluations += evals",
+    f"  return {name}",
+  ]
+  src = "\n".join( lines )
+  _globals = { 'deepcopy': deepcopy, 'UpblkCyclicError': UpblkCyclicError }
+  _locals  = {}
+  custom_exec( compile( src, filename=name, mode="exec" ), _globals, _locals )
+  linecache.cache[ name ] = ( len(src), None, lines, name )
+
+  stats = SCCStats( name, [ x.__name__ for x in schedule ] )
+  ret = _locals['compile_scc']( schedule, list( hosts ), stats )
+  # Keep the original blocks for profiling/debugging
+  ret._upblks    = schedule
+  ret._scc_stats = stats
+  return ret
 
 def kosaraju_scc( G, G_T ):
 
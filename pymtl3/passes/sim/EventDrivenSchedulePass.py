@@ -0,0 +1,308 @@
+"""
+========================================================================
+EventDrivenSchedulePass.py
+========================================================================
+An activity-driven variant of DynamicSchedulePass. We reuse the SCC
+schedule of DynamicSchedulePass, but wrap every update block whose
+output is a pure function of its signal reads with a gate that compares
+the current values of its inputs against the values it saw the last
+time it was executed. If nothing changed, the block is skipped.
+
+Date   : Oct 17, 2026
+"""
+import builtins
+import linecache
+
+from pymtl3.datatypes import (
+    Bits,
+    clog2,
+    concat,
+    is_bitstruct_class,
+    reduce_and,
+    reduce_or,
+    reduce_xor,
+    sext,
+    trunc,
+    zext,
+)
+from pymtl3.dsl import Component, MetadataKey, MethodPort, Signal
+from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.extra.pypy import custom_exec
+from pymtl3.passes.BasePass import PassMetadata
+from pymtl3.passes.errors import PassOrderError
+
+from .DynamicSchedulePass import DynamicSchedulePass
+from .SimpleSchedulePass import SimpleSchedulePass
+
+# Python values that cannot be mutated behind the back of an update
+# block. Reading these is as good as reading a constant.
+_immutable_types = ( int, bool, float, str, bytes, tuple, frozenset, type, type(None) )
+
+# Free functions that only depend on their arguments. Calling anything
+# else (e.g. random.randint, print) makes the block ungateable.
+_pure_callables = { trunc, zext, sext, concat, clog2, reduce_and, reduce_or, reduce_xor,
+                    int, bool, len, range, min, max, abs, enumerate, zip, reversed,
+                    isinstance, hasattr, getattr }
+
+class ActivityStats:
+  """ Per-cycle counters of gated update blocks. evaluated/skipped are
+  accumulated during the current cycle and moved to last_evaluated/
+  last_skipped at the clock edge. """
+
+  __slots__ = ( 'evaluated', 'skipped', 'last_evaluated', 'last_skipped',
+                'total_evaluated', 'total_skipped', 'ncycles', 'history' )
+
+  def __init__( self, record_history=False ):
+    self.evaluated       = self.skipped       = 0
+    self.last_evaluated  = self.last_skipped  = 0
+    self.total_evaluated = self.total_skipped = 0
+    self.ncycles = 0
+    self.history = [] if record_history else None
+
+  def end_cycle( self ):
+    self.last_evaluated   = evaluated = self.evaluated
+    self.last_skipped     = skipped   = self.skipped
+    self.total_evaluated += evaluated
+    self.total_skipped   += skipped
+    self.ncycles         += 1
+    if self.history is not None:
+      self.history.append( (evaluated, skipped) )
+    self.evaluated = self.skipped = 0
+
+  def skip_ratio( self ):
+    total = self.total_evaluated + self.total_skipped
+    return self.total_skipped / total if total else 0.0
+
+  def __repr__( self ):
+    return f"ActivityStats(cycles={self.ncycles}, evaluated={self.total_evaluated}, " \
+           f"skipped={self.total_skipped}, skip_ratio={self.skip_ratio():.2%})"
+
+class EventDrivenSchedulePass( DynamicSchedulePass ):
+
+  #: Set on a component to force all of its update blocks to be evaluated
+  #: every cycle, e.g., when they read Python-side state that is mutated
+  #: elsewhere.
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: False
+  always_evaluate = MetadataKey(bool)
+
+  #: Activity counters of the gated blocks
+  #:
+  #: Type: ``ActivityStats``; output
+  activity_stats = MetadataKey(ActivityStats)
+
+  def __init__( self, max_fanin=64, record_history=False ):
+    self.max_fanin      = max_fanin
+    self.record_history = record_history
+
+  def __call__( self, top ):
+    if not hasattr( top._dag, "all_constraints" ):
+      raise PassOrderError( "all_constraints" )
+
+    if hasattr( top, "_sched" ):
+      raise Exception("Some schedule pass has already been applied!")
+
+    top._sched = PassMetadata()
+
+    self.schedule_intra_cycle( top )
+
+    stats = ActivityStats( self.record_history )
+    top.set_metadata( self.activity_stats, stats )
+    top._sched.activity_stats = stats
+
+    self.gate_update_schedule( top, stats )
+
+    # Reuse simple's ff and flip schedule
+    simple = SimpleSchedulePass()
+    simple.schedule_ff( top )
+    simple.schedule_posedge_flip( top )
+
+    # Close the per-cycle counters at the clock edge
+    top._sched.schedule_posedge_flip.append( stats.end_cycle )
+
+  #-----------------------------------------------------------------------
+  # gate_update_schedule
+  #-----------------------------------------------------------------------
+  # Replace every gateable block in update_schedule with a gated version
+
+  def gate_update_schedule( self, top, stats ):
+
+    upblk_reads, _, upblk_calls = top.get_all_upblk_metadata()
+    genblk_reads = top._dag.genblk_reads
+    genblks      = top._dag.genblks
+    onces        = top.get_all_update_once()
+    greenlets    = set( getattr( top._dag, "blk_greenlet_mapping", {} ).values() )
+
+    top._sched.gated_upblks = gated = set()
+
+    # Python attributes that are rebound in some update block/function,
+    # e.g., "s.count = s.count + 1" in an update_ff block. Reading these
+    # is not the same as reading a constant.
+    self.rebound_attrs = set()
+    for c in top.get_all_components():
+      for names in getattr( c.__class__, '_name_wr', {} ).values():
+        for obj_name, _, _ in names:
+          if obj_name[0][0] != 's':
+            continue
+          obj = c
+          for field, idx in obj_name[1:]:
+            parent = obj
+            obj = getattr( obj, field, None )
+            if idx or not isinstance( obj, NamedObject ):
+              if not isinstance( obj, (NamedObject, list) ):
+                self.rebound_attrs.add( (id(parent), field) )
+              break
+
+    new_schedule = []
+    for blk in top._sched.update_schedule:
+      if blk in genblks:
+        reads = genblk_reads.get( blk, [] )
+      elif blk in upblk_reads and blk not in onces and blk not in greenlets and \
+           self._is_pure_upblk( top, blk, upblk_calls[ blk ] ):
+        reads = upblk_reads[ blk ]
+      else: # SCC blocks, greenlet wrappers, update_once, method calls ...
+        new_schedule.append( blk )
+        continue
+
+      inputs = self._collect_inputs( reads )
+      if inputs is None or len(inputs) > self.max_fanin:
+        new_schedule.append( blk )
+        continue
+
+      gblk = self._compile_gated_blk( top, blk, inputs, stats )
+      gated.add( gblk )
+      new_schedule.append( gblk )
+
+    top._sched.update_schedule = new_schedule
+
+  # Turn the read set into a sorted list of top level signals. Return
+  # None if the block reads something we cannot snapshot.
+
+  @staticmethod
+  def _collect_inputs( reads ):
+    inputs = set()
+    for x in reads:
+      if not isinstance( x, Signal ):
+        return None
+      w = x.get_top_level_signal()
+      T = w._dsl.Type
+      if not (isinstance( T, type ) and (issubclass( T, Bits ) or is_bitstruct_class( T ))):
+        return None
+      inputs.add( w )
+    return sorted( inputs, key=repr )
+
+  # A block is pure if it doesn't call methods and every "s.x.y" name it
+  # touches resolves to either a signal or an immutable Python value.
+
+  def _is_pure_upblk( self, top, blk, calls ):
+    host = top.get_update_block_host_component( blk )
+
+    x = host
+    while isinstance( x, Component ):
+      if x.has_metadata( self.always_evaluate ) and x.get_metadata( self.always_evaluate ):
+        return False
+      x = x.get_parent_object()
+
+    cls = host.__class__
+    funcs = [ blk.__name__ ]
+    for call in calls:
+      if isinstance( call, (NamedObject, MethodPort) ):
+        return False
+      # s.func helper functions, we need to check them as well
+      if call in host._dsl.func_reads:
+        funcs.append( call.__name__ )
+
+    for name in funcs:
+      func = blk if name == blk.__name__ else host._dsl.name_func[ name ]
+      for obj_name, _, _ in cls._name_rd[ name ]:
+        if obj_name[0][0] == 's' and not self._resolves_to_pure( host, obj_name ):
+          return False
+      for obj_name, _, _ in cls._name_fc[ name ]:
+        if obj_name[0][0] == 's':
+          if not self._resolves_to_pure( host, obj_name ):
+            return False
+        elif len(obj_name) == 1 and obj_name[0][0] not in host._dsl.name_func:
+          if not _is_pure_callable( func, obj_name[0][0] ):
+            return False
+    return True
+
+  def _resolves_to_pure( self, host, obj_name ):
+    obj = host
+    for field, idx in obj_name[1:]:
+      parent = obj
+      try:
+        obj = getattr( obj, field )
+      except AttributeError:
+        return False
+      # Anything below a signal (bitstruct field, slice, method) is covered
+      # by the signal itself. Arrays of signals/components are fine as long
+      # as we only reach named objects.
+      if isinstance( obj, Signal ):
+        return True
+      if idx or isinstance( obj, list ):
+        Q = [ obj ]
+        found = False
+        while Q:
+          m = Q.pop()
+          if isinstance( m, list ):
+            Q.extend( m )
+          elif not isinstance( m, NamedObject ):
+            return False
+          else:
+            found = True
+        return found
+      if isinstance( obj, NamedObject ):
+        continue
+      return isinstance( obj, _immutable_types ) and (id(parent), field) not in self.rebound_attrs
+    return True
+
+  def _compile_gated_blk( self, top, blk, inputs, stats ):
+    exprs = []
+    for x in inputs:
+      if issubclass( x._dsl.Type, Bits ): exprs.append( f"int({x!r})" )
+      else:                               exprs.append( f"int({x!r}.to_bits())" )
+
+    name = blk.__name__
+    fname = f"gated_{name}"
+    lines = [
+      f"def compile_gated( s, blk, stats ):",
+      f"  last = None",
+      f"  def {name}():",
+      f"    nonlocal last",
+      f"    cur = ( {''.join( x+', ' for x in exprs )})",
+      f"    if cur == last:",
+      f"      stats.skipped += 1",
+      f"      return",
+      f"    last = cur",
+      f"    stats.evaluated += 1",
+      f"    blk()",
+      f"  return {name}",
+    ]
+    src = "\n".join( lines )
+    _locals = {}
+    custom_exec( compile( src, filename=fname, mode="exec" ), {}, _locals )
+    linecache.cache[ fname ] = ( len(src), None, lines, fname )
+    return _locals['compile_gated']( top, blk, stats )
+
+def _is_pure_callable( func, name ):
+  closure = func.__code__.co_freevars
+  if name in closure:
+    try:
+      f = func.__closure__[ closure.index(name) ].cell_contents
+    except ValueError:
+      return False
+  elif name in func.__globals__:
+    f = func.__globals__[ name ]
+  elif hasattr( builtins, name ):
+    f = getattr( builtins, name )
+  else:
+    return False
+  # Bits/bitstruct constructors are fine
+  if isinstance( f, type ) and (issubclass( f, Bits ) or is_bitstruct_class( f )):
+    return True
+  try:
+    return f in _pure_callables
+  except TypeError: # unhashable
+    return False
@@ -0,0 +1,218 @@
+"""
+========================================================================
+FastForwardPass.py
+========================================================================
+Skip stretches of cycles in which the whole design is idle, e.g. while
+a memory response crawls through a delay pipe or a test source counts
+down its delay.
+
+The pass adds top.sim_fast_forward( max_cycles ), which ticks once and
+then checks whether that tick changed anything: the value of every net,
+the plain-data attributes of every component (see SimCheckpoint; we
+look for them once, when the pass runs) and the state of the `random`
+module. If nothing changed, the design is at a
+fixed point and the following ticks will not change anything either,
+except for countdowns that components declare through two hooks:
+
+- sim_idle_cycles() returns how many of the upcoming ticks only advance
+  the countdowns of the component, assuming its inputs do not change.
+  0 means the next tick does real work; None means no limit.
+- sim_skip_cycles( n ) advances the countdowns by n ticks at once.
+
+The attributes of components with hooks are not compared, the hooks
+account for them. sim_fast_forward then jumps over the remaining idle
+ticks by calling sim_skip_cycles and advancing simulated_cycles, so
+sim_cycle_count() stays accurate.
+
+A component without hooks whose state we cannot see, e.g. state in
+closures of update blocks or in attributes that are not plain data,
+makes the whole design opaque and sim_fast_forward never skips. The
+pass lists such components in its stats. Skipped cycles are not line
+traced, so the pass cannot be combined with waveform dumping.
+
+Date   : Oct 17, 2026
+"""
+import io
+import pickle
+import random
+import types
+
+from pymtl3.datatypes import Bits
+from pymtl3.dsl import MetadataKey
+from pymtl3.dsl.NamedObject import NamedObject
+from pymtl3.passes.BasePass import BasePass
+from pymtl3.passes.errors import PassOrderError
+from pymtl3.passes.tracing.PrintTextWavePass import PrintTextWavePass
+from pymtl3.passes.tracing.VcdGenerationPass import VcdGenerationPass
+
+from .SimCheckpoint import _get_net_values, _is_plain, _Pickler, _value_to_state
+
+_constant_types = ( type(None), bool, int, float, complex, str, bytes, Bits, type,
+                    types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                    types.ModuleType )
+
+class FastForwardStats:
+
+  def __init__( self, opaque ):
+    self.opaque  = opaque # components that prevent fast-forwarding
+    self.probes  = 0      # ticks whose effect was checked
+    self.hits    = 0      # probes that found the design idle
+    self.skipped = 0      # cycles skipped in total
+
+  def __repr__( self ):
+    return f"FastForwardStats(probes={self.probes}, hits={self.hits}, " \
+           f"skipped={self.skipped}, opaque={len(self.opaque)})"
+
+class FastForwardPass( BasePass ):
+
+  # FastForwardPass public pass data
+
+  #: enable
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: False
+  enable = MetadataKey(bool)
+
+  #: Only check a tick if the components can be idle for at least
+  #: min_skip cycles
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 8
+  min_skip = MetadataKey(int)
+
+  #: The FastForwardStats object of the simulation
+  #:
+  #: Type: ``FastForwardStats``; output
+  stats = MetadataKey()
+
+  # After a probe finds the design busy, wait this many ticks (doubling
+  # up to max_backoff) before the next probe
+  max_backoff = 64
+
+  def __call__( self, top ):
+    if not ( top.has_metadata( self.enable ) and top.get_metadata( self.enable ) ):
+      return
+
+    if not hasattr( top, "_sim" ) or not hasattr( top, "sim_tick" ):
+      raise PassOrderError( "sim_tick" )
+    if top.has_metadata( VcdGenerationPass.vcd_func ) or \
+       top.has_metadata( PrintTextWavePass.textwave_func ):
+      raise Exception( "FastForwardPass cannot be used when dumping waveforms!" )
+
+    min_skip = 8
+    if top.has_metadata( self.min_skip ):
+      min_skip = top.get_metadata( self.min_skip )
+    assert min_skip >= 2, "min_skip should be at least 2"
+
+    _, values, _ = _get_net_values( top._sim.signal_object_mapping )
+    values     = list( values.values() )
+    signal_ids = { id(v) for v in values }
+
+    hooked  = []
+    watched = []
+    opaque  = []
+    greenlets = getattr( getattr( top, "_dag", None ), "blk_greenlet_mapping", {} )
+    for c in sorted( top.get_all_components(), key=repr ):
+      if hasattr( c, "sim_idle_cycles" ):
+        hooked.append( c )
+      elif self._is_opaque( c, signal_ids, greenlets ):
+        opaque.append( c )
+      else:
+        watched.append( ( c, [ name for name, x in c.__dict__.items()
+                               if name[0] != '_' and _is_plain( x, signal_ids ) ] ) )
+
+    stats = FastForwardStats( opaque )
+    top.set_metadata( self.stats, stats )
+
+    # Most components keep all their state in nets, so we only pickle the
+    # plain-data attributes of the few that do not
+    watched = [ ( c, names ) for c, names in watched if names ]
+
+    def snapshot():
+      buf = io.BytesIO()
+      _Pickler( buf, pickle.HIGHEST_PROTOCOL ).dump( (
+        [ [ getattr( c, name ) for name in names ] for c, names in watched ],
+        random.getstate(),
+      ) )
+      return [ _value_to_state( v ) for v in values ], buf.getvalue()
+
+    def get_idle_budget():
+      budget = None
+      for c in hooked:
+        n = c.sim_idle_cycles()
+        if n is not None and ( budget is None or n < budget ):
+          budget = n
+      return budget
+
+    sim_tick = top.sim_tick
+    sim      = top._sim
+    backoff  = 1
+    wait     = 0
+
+    def sim_fast_forward( max_cycles=1 ):
+      nonlocal backoff, wait
+
+      if opaque or max_cycles < min_skip or wait > 0:
+        wait = max( wait - 1, 0 )
+        sim_tick()
+        return 1
+
+      budget = get_idle_budget()
+      if budget is not None and budget < min_skip:
+        sim_tick()
+        return 1
+
+      before = snapshot()
+      sim_tick()
+      stats.probes += 1
+      if snapshot() != before:
+        wait    = backoff
+        backoff = min( backoff * 2, self.max_backoff )
+        return 1
+
+      # The tick did not change anything but the countdowns, so the next
+      # budget-1 ticks would not either
+      backoff = 1
+      stats.hits += 1
+      n = max_cycles - 1 if budget is None else min( budget, max_cycles ) - 1
+      for c in hooked:
+        c.sim_skip_cycles( n )
+      sim.simulated_cycles += n
+      stats.skipped += n
+      return n + 1
+
+    top.sim_fast_forward = sim_fast_forward
+
+  # A component is opaque if it may keep state where we cannot compare it
+
+  @staticmethod
+  def _is_opaque( c, signal_ids, greenlets ):
+    def is_constant( x ):
+      if isinstance( x, (tuple, frozenset) ):
+        return all( is_constant( y ) for y in x )
+      return isinstance( x, (NamedObject,) + _constant_types )
+
+    def is_ignored( x ):
+      if id(x) in signal_ids or is_constant( x ):
+        return True
+      if isinstance( x, list ):
+        return all( is_ignored( y ) for y in x )
+      return False
+
+    for name, x in c.__dict__.items():
+      if name[0] != '_' and not _is_plain( x, signal_ids ) and not is_ignored( x ):
+        return True
+
+    for func in list( c.get_update_blocks() ) + list( c._dsl.name_func.values() ):
+      if func in greenlets:
+        return True
+      for cell in getattr( func, "__closure__", None ) or ():
+        try:
+          x = cell.cell_contents
+        except ValueError: # empty cell
+          continue
+        if not is_constant( x ):
+          return True
+    return False
@@ -45,6 +45,8 @@ class GenDAGPass( BasePass ):
     top._dag.genblk_hostobj = {}
     top._dag.genblk_reads   = {}
     top._dag.genblk_writes  = {}
+    # The net behind each block: ( writer, readers that the block writes )
+    top._dag.genblk_nets    = {}
     # top._dag.genblk_src     = {}
 
     # Fall back to compiling one block at a time
@@ -123,9 +125,11 @@ class GenDAGPass( BasePass ):
         blk = compile_net_blk( {}, f"""def {genblk_name}(): pass""", writer )
 
         top._dag.genblks.add( blk )
+        top._dag.genblk_hostobj[ blk ] = top
         if writer.is_signal():
           top._dag.genblk_reads[ blk ] = [ writer ]
         top._dag.genblk_writes[ blk ] = all_readers
+        top._dag.genblk_nets[ blk ] = ( writer, [] )
         continue
       # readers = all_readers
       # fanout  = all_fanout
@@ -189,9 +193,11 @@ def {}():
       blk = compile_net_blk( _globals, gen_src, writer )
 
       top._dag.genblks.add( blk )
+      top._dag.genblk_hostobj[ blk ] = wr_lca
       if writer.is_signal():
         top._dag.genblk_reads[ blk ] = [ writer ]
       top._dag.genblk_writes[ blk ] = all_readers
+      top._dag.genblk_nets[ blk ] = ( writer, readers )
 
     # Get the final list of update blocks
     top._dag.final_upblks = top.get_all_update_blocks() | top._dag.genblks
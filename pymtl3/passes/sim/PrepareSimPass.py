@@ -22,6 +22,7 @@ from pymtl3.passes.tracing.LineTraceParamPass import LineTraceParamPass
 from pymtl3.passes.tracing.PrintTextWavePass import PrintTextWavePass
 from pymtl3.passes.tracing.VcdGenerationPass import VcdGenerationPass
 
+from .SimCheckpoint import load_checkpoint, save_checkpoint
 from .SimpleTickPass import SimpleTickPass
 
 
@@ -57,13 +58,15 @@ class PrepareSimPass( BasePass ):
     self.create_sim_eval_comb( top )
     self.create_sim_tick( top )
     self.create_sim_reset( top )
+    self.create_sim_checkpoint( top )
+    self.create_sim_finalize( top )
 
 
   def create_sim_eval_comb( self, top ):
     # Pure RTL design, add eval_combinational
     if len( top.get_all_object_filter( lambda x: isinstance( x, MethodPort ) ) ) == 0 and \
        len( top.get_all_update_once() ) == 0:
-      sim_eval_combinational = SimpleTickPass.gen_tick_function( [top._sim.check_top_level_inports] + top._sched.update_schedule )
+      sim_eval_combinational = self.gen_schedule_function( [top._sim.check_top_level_inports] + top._sched.update_schedule )
     else:
       def sim_eval_combinational():
         raise NotImplementedError(f"top is not a pure RTL design. {'top'+repr(list(method_ports)[0])[1:]} is a method port.")
@@ -83,7 +86,12 @@ class PrepareSimPass( BasePass ):
     final_schedule += self.collect_ff_funcs( top )
     final_schedule += top._sched.update_schedule
     final_schedule.append( top._sim.check_top_level_inports )
-    top.sim_tick = SimpleTickPass.gen_tick_function( final_schedule )
+    top.sim_tick = self.gen_schedule_function( final_schedule )
+
+  # Turn a list of functions into one function that calls them in order.
+  # Subclasses can override this to compile the schedules differently.
+  def gen_schedule_function( self, schedule ):
+    return SimpleTickPass.gen_tick_function( schedule )
 
   def collect_ff_funcs( self, top ):
     # ff_funcs summarizes the execution at the clock edge
@@ -110,8 +118,8 @@ class PrepareSimPass( BasePass ):
 
   # Simulation related APIs
   def create_sim_reset( self, top ):
-    ff = SimpleTickPass.gen_tick_function( self.collect_ff_funcs( top ) )
-    up = SimpleTickPass.gen_tick_function( top._sched.update_schedule )
+    ff = self.gen_schedule_function( self.collect_ff_funcs( top ) )
+    up = self.gen_schedule_function( top._sched.update_schedule )
 
     print_line_trace = self.print_line_trace and hasattr( top, 'line_trace' )
     active_high      = self.reset_active_high
@@ -142,6 +150,23 @@ class PrepareSimPass( BasePass ):
 
     top.sim_reset = sim_reset
 
+  @staticmethod
+  def create_sim_checkpoint( top ):
+    def sim_checkpoint( path ):
+      save_checkpoint( top, path )
+    def sim_restore( path ):
+      load_checkpoint( top, path )
+    top.sim_checkpoint = sim_checkpoint
+    top.sim_restore    = sim_restore
+
+  @staticmethod
+  def create_sim_finalize( top ):
+    # Release the resources of the simulation, e.g., close the waveform
+    if top.has_metadata( VcdGenerationPass.vcd_finalize ):
+      top.sim_finalize = top.get_metadata( VcdGenerationPass.vcd_finalize )
+    else:
+      top.sim_finalize = lambda: None
+
   def create_print_line_trace( self, top ):
     if self.print_line_trace and hasattr( top, 'line_trace' ):
       def print_line_trace():
@@ -0,0 +1,369 @@
+"""
+========================================================================
+SimCheckpoint.py
+========================================================================
+Save and restore the full state of a locked simulation so that many
+experiments can be forked from one warmed-up state.
+
+The state consists of
+- the value of every net, found through top._sim.signal_object_mapping
+  and stored as plain integers,
+- the Python-side state of every component: the return value of
+  get_sim_state() if the component defines get_sim_state()/set_sim_state(),
+  otherwise its public attributes that hold plain data (numbers, strings,
+  Bits, bitstructs and containers of these),
+- the state of every Verilator-imported model that is built with the
+  vl_savable option,
+- the simulated cycle count and the state of the `random` module.
+
+Closure variables of update blocks are not part of the state, so FL/CL
+components should keep their state in attributes or define the two
+hooks above.
+
+Date   : Oct 17, 2026
+"""
+import array
+import copyreg
+import gzip
+import os
+import pickle
+import random
+import tempfile
+from collections import deque
+
+from pymtl3.datatypes import Bits, is_bitstruct_class, is_bitstruct_inst, mk_bits
+from pymtl3.dsl.Connectable import WireArrayValue
+
+CHECKPOINT_VERSION = 1
+
+_scalar_types = ( type(None), bool, int, float, complex, str, bytes )
+_mutable_containers = ( list, dict, set, deque, bytearray, array.array )
+
+#-------------------------------------------------------------------------
+# Public APIs
+#-------------------------------------------------------------------------
+
+def save_checkpoint( top, path ):
+  """Save the simulation state of `top` into `path`, which is either a
+  file name or a binary file object (e.g. io.BytesIO to keep the
+  checkpoint in memory)."""
+  dump_checkpoint_state( _capture_sim_state( top ), path )
+
+def load_checkpoint( top, path ):
+  """Restore the simulation state of `top` from `path`. `top` has to be
+  an instance of the same design as the checkpointed one, but does not
+  have to be the same object."""
+  _restore_sim_state( top, load_checkpoint_state( top, path ) )
+
+def dump_checkpoint_state( state, path ):
+  """Write `state` into `path`, a file name or a binary file object, in
+  the checkpoint format. For simulators that capture their own state."""
+  with gzip.open( path, 'wb', compresslevel=6 ) as f:
+    _Pickler( f, pickle.HIGHEST_PROTOCOL ).dump( state )
+
+def load_checkpoint_state( top, path ):
+  """Read the state written by dump_checkpoint_state from `path`."""
+  with gzip.open( path, 'rb' ) as f:
+    return _Unpickler( f, top ).load()
+
+#-------------------------------------------------------------------------
+# Internal helpers
+#-------------------------------------------------------------------------
+# Note that the captured state shares mutable objects with the model, so
+# it has to be pickled before the simulation continues.
+
+def _capture_sim_state( top ):
+  sim = _check_locked( top )
+  names, values, needs_dbuf = _get_net_values( sim.signal_object_mapping )
+  signal_ids = { id(v) for v in values.values() }
+
+  return {
+    'version'    : CHECKPOINT_VERSION,
+    'cycles'     : sim.simulated_cycles,
+    'random'     : random.getstate(),
+    'nets'       : { name: _value_to_state( values[name] ) for name in names },
+    'components' : { repr(c): _get_component_state( c, signal_ids )
+                     for c in top.get_all_components() },
+    'verilated'  : { repr(c): _save_verilated( c ) for c in _get_verilated( top ) },
+  }
+
+def _restore_sim_state( top, state ):
+  sim = _check_locked( top )
+  if state.get('version') != CHECKPOINT_VERSION:
+    raise ValueError( f"Unsupported checkpoint version {state.get('version')}" )
+
+  names, values, needs_dbuf = _get_net_values( sim.signal_object_mapping )
+  nets = state['nets']
+  if set(nets) != set(names):
+    missing = sorted( set(names) ^ set(nets) )[:3]
+    raise ValueError( f"The checkpoint does not match the design, e.g. {missing}" )
+
+  for name in names:
+    _state_to_value( values[name], nets[name], needs_dbuf[name] )
+
+  signal_ids = { id(v) for v in values.values() }
+  components = state['components']
+  for c in top.get_all_components():
+    try:
+      cstate = components[ repr(c) ]
+    except KeyError:
+      raise ValueError( f"The checkpoint does not have the state of {c!r}" )
+    _set_component_state( c, cstate, signal_ids )
+
+  for c in _get_verilated( top ):
+    _restore_verilated( c, state['verilated'][ repr(c) ] )
+
+  sim.simulated_cycles = state['cycles']
+  random.setstate( state['random'] )
+
+def _check_locked( top ):
+  sim = getattr( top, '_sim', None )
+  if sim is None or not getattr( sim, 'locked_simulation', False ):
+    raise AttributeError( "Checkpointing requires a locked simulation. "
+                          "Please apply a simulation pass first." )
+  return sim
+
+# Nets share one value object. Name each value object by the smallest
+# repr of its signals so that the name does not depend on the
+# elaboration order.
+
+def _get_net_values( signal_object_mapping ):
+  values = {}
+  needs_dbuf = {}
+  names = {}
+  for signal, (_, _, _, value) in signal_object_mapping.items():
+    if isinstance( value, int ): # constant
+      continue
+    name = repr(signal)
+    vid = id(value)
+    if vid not in names:
+      names[vid] = name
+      values[vid] = value
+      needs_dbuf[vid] = signal._dsl.needs_double_buffer
+    else:
+      names[vid] = min( names[vid], name )
+      needs_dbuf[vid] |= signal._dsl.needs_double_buffer
+
+  return sorted( names.values() ), \
+         { names[vid]: v for vid, v in values.items() }, \
+         { names[vid]: x for vid, x in needs_dbuf.items() }
+
+def _value_to_state( v ):
+  if isinstance( v, Bits ):
+    return int(v)
+  if is_bitstruct_inst( v ):
+    return int(v.to_bits())
+  if isinstance( v, WireArrayValue ):
+    return [ _value_to_state( x ) for x in v ]
+  raise TypeError( f"Cannot checkpoint a signal value of type {type(v).__name__}" )
+
+def _state_to_value( v, x, needs_dbuf ):
+  if isinstance( v, WireArrayValue ):
+    for entry, y in zip( v, x ):
+      _state_to_value( entry, y, needs_dbuf )
+    return
+
+  if isinstance( v, Bits ):
+    new = Bits( v.nbits, x )
+  elif is_bitstruct_inst( v ):
+    new = type(v).from_bits( Bits( v.nbits, x ) )
+  else:
+    raise TypeError( f"Cannot restore a signal value of type {type(v).__name__}" )
+
+  v @= new
+  if needs_dbuf:
+    v <<= new
+    v._flip()
+
+#-------------------------------------------------------------------------
+# Python-side component state
+#-------------------------------------------------------------------------
+
+def _is_plain( x, signal_ids ):
+  if isinstance( x, _scalar_types ):
+    return True
+  if id(x) in signal_ids:
+    return False
+  if isinstance( x, Bits ) or is_bitstruct_inst( x ):
+    return True
+  if isinstance( x, (list, tuple, set, frozenset, deque) ):
+    return all( _is_plain( y, signal_ids ) for y in x )
+  if isinstance( x, dict ):
+    return all( _is_plain( k, signal_ids ) and _is_plain( y, signal_ids )
+                for k, y in x.items() )
+  return isinstance( x, (bytearray, array.array) )
+
+def _get_component_state( c, signal_ids ):
+  if hasattr( c, 'get_sim_state' ):
+    return ( True, c.get_sim_state() )
+  return ( False, { name: x for name, x in c.__dict__.items()
+                    if name[0] != '_' and _is_plain( x, signal_ids ) } )
+
+def _set_component_state( c, cstate, signal_ids ):
+  has_hooks, x = cstate
+  if has_hooks:
+    c.set_sim_state( x )
+    return
+
+  for name, y in x.items():
+    cur = c.__dict__.get( name )
+    # Restore mutable containers in place since other objects (e.g.
+    # closures of update blocks) may hold a reference to them.
+    if type(cur) is type(y) and isinstance( cur, _mutable_containers ) and \
+       _is_plain( cur, signal_ids ):
+      if isinstance( cur, dict ):
+        cur.clear()
+        cur.update( y )
+      elif isinstance( cur, set ):
+        cur.clear()
+        cur.update( y )
+      elif isinstance( cur, deque ):
+        cur.clear()
+        cur.extend( y )
+      else:
+        cur[:] = y
+    else:
+      setattr( c, name, y )
+
+# Pickle Bits as ( nbits, uint ) instead of their classes and slots.
+# Bitstruct classes are often created inside functions (e.g.
+# mk_mem_msg), so they cannot be pickled by reference. We pickle them by
+# their name and fields, and look them up in the signal types, component
+# attributes and update block closures of the restored design.
+
+def _mk_bits_value( nbits, v ):
+  return mk_bits( nbits )( v )
+
+def _mk_bitstruct_value( cls, nbits, v ):
+  return cls.from_bits( Bits( nbits, v ) )
+
+def _get_bitstruct_key( cls ):
+  return ( cls.__module__, cls.__qualname__,
+           tuple( (name, repr(T)) for name, T in cls.__bitstruct_fields__.items() ) )
+
+def _collect_bitstruct_classes( top ):
+  classes = {}
+
+  def add_type( T ):
+    if isinstance( T, list ):
+      for x in T:
+        add_type( x )
+    elif is_bitstruct_class( T ):
+      key = _get_bitstruct_key( T )
+      if key not in classes:
+        classes[ key ] = T
+        for x in T.__bitstruct_fields__.values():
+          add_type( x )
+
+  def add_value( x ):
+    if is_bitstruct_inst( x ):
+      add_type( type(x) )
+    elif isinstance( x, dict ):
+      for y in x.values():
+        add_value( y )
+    elif isinstance( x, (list, tuple, set, frozenset, deque) ):
+      for y in x:
+        add_value( y )
+
+  for signal in top._sim.signal_object_mapping:
+    add_type( signal._dsl.Type )
+  for c in top.get_all_components():
+    for name, x in c.__dict__.items():
+      if name[0] != '_':
+        add_value( x )
+  # Classes that are only referred to by update blocks
+  for blk in top.get_all_update_blocks():
+    for cell in blk.__closure__ or ():
+      try:
+        add_type( cell.cell_contents )
+      except ValueError: # empty cell
+        pass
+  return classes
+
+def _reduce_bits( obj ):
+  return _mk_bits_value, ( obj.nbits, int(obj) )
+
+def _reduce_bitstruct( obj ):
+  return _mk_bitstruct_value, ( type(obj), obj.nbits, int(obj.to_bits()) )
+
+# Pickler.dispatch_table is looked up with the exact class of an object,
+# and BitsN/bitstruct classes are created on demand, so we add their
+# reducers on the first lookup. Unlike Pickler.reducer_override, which
+# only exists since Python 3.8, this works on every Python we support.
+
+class _ReducerTable( dict ):
+
+  def __missing__( self, cls ):
+    if issubclass( cls, Bits ):
+      self[ cls ] = _reduce_bits
+    elif is_bitstruct_class( cls ):
+      self[ cls ] = _reduce_bitstruct
+    else:
+      raise KeyError( cls )
+    return self[ cls ]
+
+  # The pure-Python pickler calls get(), which bypasses __missing__
+  def get( self, cls, default=None ):
+    try:
+      return self[ cls ]
+    except KeyError:
+      return default
+
+class _Pickler( pickle.Pickler ):
+  dispatch_table = _ReducerTable( copyreg.dispatch_table )
+
+  def persistent_id( self, obj ):
+    if is_bitstruct_class( obj ):
+      return _get_bitstruct_key( obj )
+    return None
+
+class _Unpickler( pickle.Unpickler ):
+  def __init__( self, f, top ):
+    super().__init__( f )
+    self.top     = top
+    self.classes = None
+
+  def persistent_load( self, key ):
+    if self.classes is None:
+      self.classes = _collect_bitstruct_classes( self.top )
+    try:
+      return self.classes[ key ]
+    except KeyError:
+      pass
+    # Not used in the design; try to import it
+    module, qualname, _ = key
+    try:
+      cls = self.find_class( module, qualname )
+    except AttributeError:
+      raise pickle.UnpicklingError( f"Cannot find bitstruct {qualname} in the design" )
+    if _get_bitstruct_key( cls ) != key:
+      raise pickle.UnpicklingError( f"Bitstruct {qualname} has different fields" )
+    return cls
+
+#-------------------------------------------------------------------------
+# Verilator-imported models
+#-------------------------------------------------------------------------
+# The verilated model writes its state into a file, which we embed into
+# the checkpoint.
+
+def _get_verilated( top ):
+  return [ c for c in top.get_all_components() if hasattr( c, 'save_verilated_state' ) ]
+
+def _save_verilated( c ):
+  fd, filename = tempfile.mkstemp( suffix='.vlsave' )
+  os.close( fd )
+  try:
+    c.save_verilated_state( filename )
+    with open( filename, 'rb' ) as f:
+      return f.read()
+  finally:
+    os.remove( filename )
+
+def _restore_verilated( c, data ):
+  fd, filename = tempfile.mkstemp( suffix='.vlsave' )
+  try:
+    with os.fdopen( fd, 'wb' ) as f:
+      f.write( data )
+    c.restore_verilated_state( filename )
+  finally:
+    os.remove( filename )
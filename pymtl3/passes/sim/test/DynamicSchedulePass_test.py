@@ -5,7 +5,7 @@
 # Author : Shunning Jiang
 # Date   : Apr 19, 2019
 
-from pymtl3.datatypes import Bits8, Bits32, bitstruct
+from pymtl3.datatypes import Bits8, Bits16, Bits32, bitstruct
 from pymtl3.dsl import *
 from pymtl3.dsl.errors import UpblkCyclicError
 
@@ -453,3 +453,106 @@ def test_update_once():
     print(e)
     return
   raise Exception("Should've thrown UpblkCyclicError")
+
+def test_scc_worklist():
+
+  @bitstruct
+  class Pair:
+    lo: Bits8
+    hi: Bits8
+
+  class Top(Component):
+
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.en  = InPort()
+      s.out = OutPort( Bits8 )
+      s.a   = Wire( Bits16 )
+      s.b   = Wire( Pair )
+      s.c   = Wire( Bits8 )
+
+      # A loop that only closes when en is high, but the scheduler sees it
+      # as an SCC of three blocks
+      @update
+      def up_a():
+        s.a[0:8] @= s.in_
+        s.a[8:16] @= s.c if s.en else 0
+
+      @update
+      def up_b():
+        s.b.lo @= s.a[0:8]
+        s.b.hi @= s.a[8:16]
+
+      @update
+      def up_c():
+        s.c @= s.b.lo
+        s.out @= s.b.hi
+
+  A = Top()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( DynamicSchedulePass() )
+  A.apply( PrepareSimPass( print_line_trace=False ) )
+  A.sim_reset()
+
+  stats, = A.get_metadata( DynamicSchedulePass.scc_stats )
+  assert sorted( stats.blocks ) == [ 'up_a', 'up_b', 'up_c' ]
+
+  stats.histogram.clear()
+  stats.evaluations = 0
+  for i, en in enumerate( [ 0, 0, 1, 1, 0, 1 ] ):
+    A.in_ @= 10 + i
+    A.en  @= en
+    A.sim_eval_combinational()
+    assert A.out == ( 10 + i if en else 0 )
+
+  assert stats.calls() == 6
+  assert 2 <= stats.max_rounds() <= 3
+  assert stats.evaluations <= 3 * sum( k * v for k, v in stats.histogram.items() )
+
+  # Nothing changes in the first round, so no block runs twice
+  evaluations = stats.evaluations
+  A.sim_eval_combinational()
+  assert stats.histogram[1] == 1
+  assert stats.evaluations == evaluations + 3
+
+def test_scc_through_shared_nets():
+
+  class Stage(Component):
+
+    def construct( s, k ):
+      s.in_ = InPort( Bits8 )
+      s.x   = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+
+      @update
+      def up():
+        if k == 0:
+          s.out @= s.x
+        else:
+          s.out @= s.in_ + s.x
+
+  # The ports of a net share their value, so the net blocks in the SCC
+  # do nothing and the stages have to wake up each other
+  class Top(Component):
+
+    def construct( s, n ):
+      s.x      = InPort( Bits8 )
+      s.out    = OutPort( Bits8 )
+      s.stages = [ Stage( i ) for i in range(n) ]
+      for i in range(n):
+        s.stages[i].x //= s.x
+        s.stages[i].out //= s.stages[ (i+1) % n ].in_
+      s.out //= s.stages[-1].out
+
+  A = Top( 6 )
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( DynamicSchedulePass() )
+  A.apply( PrepareSimPass( print_line_trace=False ) )
+  A.sim_reset()
+
+  for x in [ 3, 7, 7, 40, 1 ]:
+    A.x @= x
+    A.sim_eval_combinational()
+    assert A.out == ( 6 * x ) % 256
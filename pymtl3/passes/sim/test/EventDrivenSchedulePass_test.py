@@ -0,0 +1,174 @@
+#=========================================================================
+# EventDrivenSchedulePass_test.py
+#=========================================================================
+#
+# Date   : Oct 17, 2026
+
+from pymtl3.datatypes import Bits8, Bits32, bitstruct
+from pymtl3.dsl import *
+
+from ..DynamicSchedulePass import DynamicSchedulePass
+from ..EventDrivenSchedulePass import EventDrivenSchedulePass
+from ..GenDAGPass import GenDAGPass
+from ..PrepareSimPass import PrepareSimPass
+
+
+def _run( cls, schedule_pass, stimulus ):
+  A = cls()
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( schedule_pass )
+  A.apply( PrepareSimPass(print_line_trace=False) )
+  A.sim_reset()
+
+  trace = []
+  for x in stimulus:
+    A.in_ @= x
+    A.sim_eval_combinational()
+    trace.append( A.line_trace() )
+    A.sim_tick()
+  return A, trace
+
+class Chain( Component ):
+  def construct( s ):
+    s.in_ = InPort(32)
+    s.out = OutPort(32)
+    s.a   = Wire(32)
+    s.b   = Wire(32)
+    s.cnt = Wire(32)
+
+    @update
+    def up_a():
+      s.a @= s.in_ + 1
+
+    @update
+    def up_b():
+      s.b @= s.a + s.a
+
+    @update
+    def up_out():
+      s.out @= s.b + s.cnt
+
+    @update_ff
+    def up_cnt():
+      if s.reset: s.cnt <<= 0
+      elif s.in_ == 0: s.cnt <<= s.cnt + 1
+
+  def line_trace( s ):
+    return f"{s.a} {s.b} {s.cnt} {s.out}"
+
+def test_same_behavior_as_dynamic():
+  stimulus = [ 1, 1, 1, 2, 2, 0, 0, 0, 3, 3, 3, 3 ]
+  _, ref = _run( Chain, DynamicSchedulePass(), stimulus )
+  _, dut = _run( Chain, EventDrivenSchedulePass(), stimulus )
+  assert ref == dut
+
+def test_idle_blocks_are_skipped():
+  A, _ = _run( Chain, EventDrivenSchedulePass(record_history=True), [ 5 ] * 10 )
+  stats = A.get_metadata( EventDrivenSchedulePass.activity_stats )
+
+  assert len(A._sched.gated_upblks) == 3
+  # in_ is stable, so nothing is re-evaluated in steady state
+  assert stats.history[-1][0] == 0
+  assert stats.history[-1][1] > 0
+  assert stats.total_skipped > stats.total_evaluated
+  assert 0 < stats.skip_ratio() < 1
+
+def test_bitstruct_inputs():
+
+  @bitstruct
+  class SomeMsg:
+    a: Bits8
+    b: Bits32
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort( SomeMsg )
+      s.out = OutPort(32)
+
+      @update
+      def up():
+        s.out @= s.in_.b + 1
+
+    def line_trace( s ):
+      return f"{s.out}"
+
+  stimulus = [ SomeMsg(1,2), SomeMsg(1,2), SomeMsg(2,2), SomeMsg(2,7) ]
+  _, ref = _run( Top, DynamicSchedulePass(), stimulus )
+  _, dut = _run( Top, EventDrivenSchedulePass(), stimulus )
+  assert ref == dut == [ "00000003", "00000003", "00000003", "00000008" ]
+
+def test_python_state_is_not_gated():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort(32)
+      s.out = OutPort(32)
+      s.history = []
+
+      @update
+      def up():
+        s.out @= s.in_ + len(s.history)
+
+      @update_ff
+      def up_ff():
+        s.history.append( s.in_ )
+
+    def line_trace( s ):
+      return f"{s.out}"
+
+  stimulus = [ 1 ] * 5
+  A, ref = _run( Top, DynamicSchedulePass(), stimulus )
+  B, dut = _run( Top, EventDrivenSchedulePass(), stimulus )
+  assert ref == dut
+  assert not B._sched.gated_upblks
+
+def test_always_evaluate_metadata():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort(32)
+      s.out = OutPort(32)
+
+      @update
+      def up():
+        s.out @= s.in_
+
+    def line_trace( s ):
+      return f"{s.out}"
+
+  A = Top()
+  A.set_metadata( EventDrivenSchedulePass.always_evaluate, True )
+  A.elaborate()
+  A.apply( GenDAGPass() )
+  A.apply( EventDrivenSchedulePass() )
+  assert not A._sched.gated_upblks
+
+def test_combinational_loop_still_converges():
+
+  class Top( Component ):
+    def construct( s ):
+      s.in_ = InPort(32)
+      s.a   = Wire(32)
+      s.b   = Wire(32)
+      s.out = OutPort(32)
+
+      @update
+      def up1():
+        s.a @= s.in_ + (s.b & 0)
+
+      @update
+      def up2():
+        s.b @= s.a
+
+      @update
+      def up3():
+        s.out @= s.b + 1
+
+    def line_trace( s ):
+      return f"{s.a} {s.b} {s.out}"
+
+  stimulus = [ 1, 2, 2, 3 ]
+  _, ref = _run( Top, DynamicSchedulePass(), stimulus )
+  _, dut = _run( Top, EventDrivenSchedulePass(), stimulus )
+  assert ref == dut
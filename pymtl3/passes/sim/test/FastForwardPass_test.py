@@ -0,0 +1,118 @@
+#=========================================================================
+# FastForwardPass_test.py
+#=========================================================================
+#
+# Date   : Oct 17, 2026
+
+import random
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.passes.sim.FastForwardPass import FastForwardPass
+from pymtl3.stdlib.mem.MemoryFL import InelasticDelayPipe
+from pymtl3.stdlib.stream import StreamSinkFL, StreamSourceFL
+
+
+class Top( Component ):
+
+  def construct( s, msgs, src_delay, sink_delay, pipe_delay, mode='fixed' ):
+    s.src  = StreamSourceFL( Bits16, msgs, src_delay, src_delay, mode )
+    s.pipe = InelasticDelayPipe( Bits16, pipe_delay )
+    s.sink = StreamSinkFL( Bits16, msgs, sink_delay, sink_delay, mode )
+
+    s.src.ostream  //= s.pipe.istream
+    s.pipe.ostream //= s.sink.istream
+
+  def done( s ):
+    return s.src.done() and s.sink.done()
+
+  def line_trace( s ):
+    return f"{s.src.line_trace()}{s.pipe.line_trace()}{s.sink.line_trace()}"
+
+class ClosureCounter( Component ):
+  # The counter lives in a closure, which the pass cannot see
+
+  def construct( s ):
+    s.out = OutPort( Bits8 )
+    state = [ 0 ]
+
+    @update_ff
+    def up_cnt():
+      state[0] += 1
+      s.out <<= state[0] >> 6
+
+class OpaqueTop( Top ):
+
+  def construct( s, *args ):
+    super().construct( *args )
+    s.cnt = ClosureCounter()
+
+def _run_ref( top ):
+  random.seed( 0xfaced )
+  top.apply( DefaultPassGroup() )
+  top.sim_reset()
+  traces = { top.sim_cycle_count(): top.line_trace() }
+  while not top.done():
+    top.sim_tick()
+    traces[ top.sim_cycle_count() ] = top.line_trace()
+  return traces
+
+def _run_ff( top, max_cycles=10000 ):
+  random.seed( 0xfaced )
+  top.apply( DefaultPassGroup( fast_forward=True ) )
+  top.sim_reset()
+  traces = { top.sim_cycle_count(): top.line_trace() }
+  while not top.done():
+    top.sim_fast_forward( max_cycles - top.sim_cycle_count() )
+    traces[ top.sim_cycle_count() ] = top.line_trace()
+  return traces, top.get_metadata( FastForwardPass.stats )
+
+@pytest.mark.parametrize( "delays", [
+  ( 0, 0, 40 ), ( 30, 0, 1 ), ( 0, 25, 12 ), ( 17, 9, 33 ),
+])
+def test_same_cycles_and_traces( delays ):
+  msgs = [ Bits16(i * 3) for i in range(12) ]
+  ref = _run_ref( Top( msgs, *delays ) )
+  traces, stats = _run_ff( Top( msgs, *delays ) )
+
+  assert max( traces ) == max( ref )
+  assert stats.skipped > 0 and not stats.opaque
+  # Every cycle we stopped at looks exactly like the reference
+  for cycle, trace in traces.items():
+    assert trace == ref[ cycle ]
+
+def test_random_delays():
+  msgs = [ Bits16(i) for i in range(20) ]
+  ref = _run_ref( Top( msgs, 20, 20, 10, 'random' ) )
+  traces, stats = _run_ff( Top( msgs, 20, 20, 10, 'random' ) )
+
+  assert max( traces ) == max( ref )
+  assert stats.skipped > 0
+  for cycle, trace in traces.items():
+    assert trace == ref[ cycle ]
+
+def test_max_cycles():
+  top = Top( [ Bits16(1) ], 0, 0, 100 )
+  top.apply( DefaultPassGroup( fast_forward=True ) )
+  top.sim_reset()
+  # Send the message into the pipe, then there is nothing to do
+  for _ in range(5):
+    top.sim_tick()
+  start = top.sim_cycle_count()
+  assert sum( top.sim_fast_forward( 15 ) for _ in range(4) ) == 60
+  assert top.sim_cycle_count() == start + 60
+
+def test_opaque_component_disables_skipping():
+  args = ( [ Bits16(i) for i in range(4) ], 10, 10, 20 )
+  ref = _run_ref( OpaqueTop( *args ) )
+  traces, stats = _run_ff( OpaqueTop( *args ) )
+
+  assert [ repr(c) for c in stats.opaque ] == [ "s.cnt" ]
+  assert stats.skipped == 0
+  assert traces == ref
+
+def test_no_waveforms():
+  top = Top( [ Bits16(1) ], 0, 0, 1 )
+  with pytest.raises( Exception, match="waveforms" ):
+    top.apply( DefaultPassGroup( textwave=True, fast_forward=True ) )
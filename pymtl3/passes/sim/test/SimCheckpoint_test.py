@@ -0,0 +1,212 @@
+#=========================================================================
+# SimCheckpoint_test.py
+#=========================================================================
+#
+# Date   : Oct 17, 2026
+
+import io
+import os
+import pickle
+import subprocess
+import sys
+from collections import deque
+from random import randint
+
+import pytest
+
+import pymtl3
+from pymtl3 import *
+from pymtl3.dsl.Connectable import WireArray
+
+from ..SimCheckpoint import _Pickler
+
+
+@bitstruct
+class Pair:
+  a: Bits8
+  b: Bits8
+
+def mk_tagged_msg( nbits ):
+
+  @bitstruct
+  class TaggedMsg:
+    tag  : Bits4
+    data : mk_bits( nbits )
+
+  return TaggedMsg
+
+class PyGen( Component ):
+  # All state of this component lives in Python attributes
+
+  def construct( s ):
+    s.out     = OutPort( Bits8 )
+    s.n       = 0
+    s.history = []
+    s.recent  = deque( maxlen=4 )
+
+    Msg = mk_tagged_msg( 8 )
+
+    @update_ff
+    def up_gen():
+      if s.reset:
+        s.n = 0
+      else:
+        s.n = ( s.n + randint( 0, 3 ) ) & 0xff
+        s.history.append( Bits8( s.n ) )
+        s.recent.append( Msg( len(s.history) & 0xf, s.n ) )
+      s.out <<= s.n
+
+class HookedCounter( Component ):
+  # The state is kept in a closure, so we need the hooks
+
+  def construct( s ):
+    s.out = OutPort( Bits8 )
+    state = [ 0 ]
+
+    @update_ff
+    def up_cnt():
+      state[0] = ( state[0] + 1 ) & 0xff
+      s.out <<= state[0]
+
+    def get_sim_state():
+      return state[0]
+    def set_sim_state( x ):
+      state[0] = x
+    s.get_sim_state = get_sim_state
+    s.set_sim_state = set_sim_state
+
+class Top( Component ):
+
+  def construct( s ):
+    s.gen  = PyGen()
+    s.cnt  = HookedCounter()
+    s.out  = OutPort( Pair )
+
+    s.regs = WireArray( Bits8, 4 )
+    s.ptr  = Wire( Bits2 )
+    s.acc  = Wire( Pair )
+
+    @update_ff
+    def up_regs():
+      if s.reset:
+        s.ptr <<= 0
+        s.acc <<= Pair()
+      else:
+        s.regs[ s.ptr ] <<= s.gen.out
+        s.ptr <<= s.ptr + 1
+        s.acc <<= Pair( s.acc.a + s.gen.out, s.acc.b ^ s.regs[ s.ptr ] ^ s.cnt.out )
+
+    @update
+    def up_out():
+      s.out @= s.acc
+
+  def line_trace( s ):
+    return f"{s.gen.n} {s.cnt.out} {[ int(x) for x in s.regs ]} {s.out}"
+
+def _mk_top():
+  top = Top()
+  top.apply( DefaultPassGroup() )
+  top.sim_reset()
+  return top
+
+def _run( top, ncycles ):
+  trace = []
+  for _ in range( ncycles ):
+    top.sim_tick()
+    trace.append( top.line_trace() )
+  return trace
+
+def test_restore_same_model( tmp_path ):
+  top = _mk_top()
+  _run( top, 20 )
+
+  path = str( tmp_path / "ckpt.gz" )
+  top.sim_checkpoint( path )
+  cycles = top.sim_cycle_count()
+  ref = _run( top, 20 )
+  ref_history = list( top.gen.history )
+  ref_recent  = list( top.gen.recent )
+
+  top.sim_restore( path )
+  assert top.sim_cycle_count() == cycles
+  assert _run( top, 20 ) == ref
+  assert top.gen.history == ref_history
+  assert list( top.gen.recent ) == ref_recent
+
+def test_restore_fresh_models():
+  top = _mk_top()
+  _run( top, 30 )
+
+  buf = io.BytesIO()
+  top.sim_checkpoint( buf )
+  ref = _run( top, 10 )
+
+  # Fork several experiments from the same warmed-up state
+  for _ in range( 3 ):
+    buf.seek( 0 )
+    fork = _mk_top()
+    fork.sim_restore( buf )
+    assert fork.sim_cycle_count() == top.sim_cycle_count() - 10
+    assert _run( fork, 10 ) == ref
+
+def test_restore_mismatching_design():
+  top = _mk_top()
+  buf = io.BytesIO()
+  top.sim_checkpoint( buf )
+
+  other = PyGen()
+  other.apply( DefaultPassGroup() )
+  buf.seek( 0 )
+  with pytest.raises( ValueError ):
+    other.sim_restore( buf )
+
+# A fresh interpreter rebuilds the design, so classes like TaggedMsg are
+# new objects there, and it never creates Bits700 before unpickling it.
+_restore_in_fresh_interpreter = """
+import pickle, sys
+from pymtl3.passes.sim.test.SimCheckpoint_test import _mk_top, _run
+top = _mk_top()
+top.sim_restore( sys.argv[1] )
+print( repr( _run( top, 10 ) ) )
+with open( sys.argv[2], 'rb' ) as f:
+  print( repr( pickle.load( f ) ) )
+"""
+
+def test_restore_in_fresh_interpreter( tmp_path ):
+  top = _mk_top()
+  _run( top, 30 )
+  path = str( tmp_path / "ckpt.gz" )
+  top.sim_checkpoint( path )
+  ref = _run( top, 10 )
+
+  value = mk_bits( 700 )( 5 )
+  value_path = str( tmp_path / "values.pkl" )
+  with open( value_path, 'wb' ) as f:
+    _Pickler( f, pickle.HIGHEST_PROTOCOL ).dump( value )
+
+  root = os.path.dirname( os.path.dirname( pymtl3.__file__ ) )
+  env  = dict( os.environ, PYTHONPATH=os.pathsep.join( [ root, os.environ.get( 'PYTHONPATH', '' ) ] ) )
+  out  = subprocess.run( [ sys.executable, "-c", _restore_in_fresh_interpreter, path, value_path ],
+                         env=env, check=True, stdout=subprocess.PIPE, universal_newlines=True ).stdout
+  trace, out_value = out.splitlines()
+  assert trace == repr( ref )
+  assert out_value == repr( value )
+
+def test_pickle_without_class_references():
+  # Bits and bitstruct values must not be pickled by class reference,
+  # which is what happened when only reducer_override was defined.
+  values = [ mk_bits( 700 )( 5 ), Bits8( 3 ), Pair( 1, 2 ) ]
+  buf = io.BytesIO()
+  _Pickler( buf, pickle.HIGHEST_PROTOCOL ).dump( values )
+
+  found = []
+  class Unpickler( pickle.Unpickler ):
+    def find_class( self, module, name ):
+      found.append( name )
+      return super().find_class( module, name )
+    def persistent_load( self, key ):
+      return Pair
+
+  buf.seek( 0 )
+  assert Unpickler( buf ).load() == values
+  assert set( found ) == { '_mk_bits_value', '_mk_bitstruct_value' }
@@ -18,7 +18,7 @@ Date   : Nov 9, 2019
 
 import py
 
-from pymtl3.dsl import Const, MetadataKey
+from pymtl3.dsl import Const, MetadataKey, WireArray
 from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.errors import PassOrderError
 
@@ -224,7 +224,11 @@ class PrintTextWavePass( BasePass ):
     signal_names = []
     for x in top._dsl.all_signals:
       if x.is_top_level_signal() and x.get_field_name() != "clk" and x.get_field_name() != "reset":
-        signal_names.append( (x._dsl.level, repr(x)) )
+        # Every entry of a WireArray is shown as a separate signal
+        if isinstance( x, WireArray ):
+          signal_names.extend( (x._dsl.level, f"{x!r}[{i}]") for i in range(len(x)) )
+        else:
+          signal_names.append( (x._dsl.level, repr(x)) )
 
     for _, x in [(0, 's.reset')] + sorted(signal_names):
       text_sigs[x] = []
@@ -0,0 +1,205 @@
+"""
+========================================================================
+UpblkProfilePass.py
+========================================================================
+Measure where the simulation time goes. The pass wraps every block in
+the intra-cycle, update_ff and posedge flip schedules with a timer.
+This includes the generated net blocks, the wrapped_SCC_* blocks of
+DynamicSchedulePass and the meta blocks of the Mamba passes. The
+results are aggregated by block, by host component and by component
+class.
+
+Timing every call of every block adds about 15% to the time per cycle
+of the TinyRV0 vvadd benchmark (benchmarks/bench_upblk_profile.py).
+Setting sample_period to N only times one out of N calls of each block
+and extrapolates the total from the samples, which is cheap enough to
+be left on in long simulations.
+
+To use, set the enable metadata on top (or pass profile_upblks to
+DefaultPassGroup), run the simulation and call
+top.print_upblk_profile().
+
+Date   : Oct 17, 2026
+"""
+import time
+from collections import defaultdict
+
+from pymtl3.dsl import MetadataKey
+from pymtl3.passes.BasePass import BasePass
+from pymtl3.passes.errors import PassOrderError
+
+
+class UpblkProfilePass( BasePass ):
+
+  # UpblkProfilePass public pass data
+
+  #: enable
+  #:
+  #: Type: ``bool``; input
+  #:
+  #: Default value: False
+  enable = MetadataKey(bool)
+
+  #: Time one out of every sample_period calls of each block
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 1
+  sample_period = MetadataKey(int)
+
+  #: The UpblkProfile object that collects the measurements
+  #:
+  #: Type: ``UpblkProfile``; output
+  upblk_profile = MetadataKey()
+
+  def __call__( self, top ):
+    if not ( top.has_metadata( self.enable ) and top.get_metadata( self.enable ) ):
+      return
+
+    if not hasattr( top, "_sched" ):
+      raise PassOrderError( "_sched" )
+    if top.has_metadata( self.upblk_profile ):
+      raise Exception("UpblkProfilePass has already been applied!")
+
+    period = 1
+    if top.has_metadata( self.sample_period ):
+      period = top.get_metadata( self.sample_period )
+    assert period >= 1, "sample_period should be a positive integer"
+
+    profile = UpblkProfile( period )
+    hosts   = _BlockHosts( top )
+
+    for name in [ 'update_schedule', 'schedule_ff', 'schedule_posedge_flip' ]:
+      schedule = getattr( top._sched, name, None )
+      if schedule is None:
+        continue
+      for i, blk in enumerate( schedule ):
+        schedule[i] = profile.wrap( blk, hosts.get( blk ) )
+
+    top.set_metadata( self.upblk_profile, profile )
+    top.get_upblk_profile   = profile.report
+    top.print_upblk_profile = profile.print_report
+
+#-------------------------------------------------------------------------
+# UpblkProfile
+#-------------------------------------------------------------------------
+
+class UpblkProfile:
+
+  def __init__( self, sample_period=1 ):
+    self.sample_period = sample_period
+    # ( name, host, [ calls, samples, seconds ] )
+    self.entries = []
+
+  def wrap( self, blk, host ):
+    stat   = [ 0, 0, 0.0 ]
+    period = self.sample_period
+    perf_counter = time.perf_counter
+
+    if period == 1:
+      def profiled_blk():
+        t0 = perf_counter()
+        blk()
+        stat[2] += perf_counter() - t0
+        stat[0] += 1
+        stat[1] += 1
+
+    else:
+      def profiled_blk():
+        stat[0] += 1
+        if stat[0] % period:
+          return blk()
+        t0 = perf_counter()
+        blk()
+        stat[2] += perf_counter() - t0
+        stat[1] += 1
+
+    name = getattr( blk, '__name__', repr(blk) )
+    profiled_blk.__name__ = name
+    self.entries.append( (name, host, stat) )
+    return profiled_blk
+
+  def clear( self ):
+    for _, _, stat in self.entries:
+      stat[0] = stat[1] = 0
+      stat[2] = 0.0
+
+  def report( self, by='block' ):
+    """ Return a list of dicts sorted by the estimated time. by can be
+    'block', 'host' or 'class'. """
+    if   by == 'block': key = lambda name, host: f"{name} @ {host!r}"
+    elif by == 'host':  key = lambda name, host: repr(host)
+    elif by == 'class': key = lambda name, host: type(host).__name__
+    else:
+      raise ValueError(f"cannot aggregate the profile by '{by}'")
+
+    groups = defaultdict( lambda: [ 0, 0, 0.0 ] )
+    for name, host, (calls, samples, seconds) in self.entries:
+      g = groups[ key( name, host ) ]
+      g[0] += calls
+      g[1] += samples
+      # Extrapolate the sampled time to all calls
+      g[2] += seconds * calls / samples if samples else 0.0
+
+    total = sum( g[2] for g in groups.values() ) or 1.0
+    ret = [ { 'name': k, 'calls': calls, 'samples': samples, 'time': t,
+              'time_per_call': t / calls if calls else 0.0,
+              'percent': 100.0 * t / total }
+            for k, (calls, samples, t) in groups.items() ]
+    ret.sort( key=lambda x: x['time'], reverse=True )
+    return ret
+
+  def format_report( self, by='block', top_n=None ):
+    rows = self.report( by )
+    if top_n is not None:
+      rows = rows[:top_n]
+    lines = [ f"{by:<60} {'calls':>10} {'time(s)':>10} {'us/call':>9} {'%':>6}" ]
+    for x in rows:
+      lines.append( f"{x['name']:<60} {x['calls']:>10} {x['time']:>10.4f} "
+                    f"{x['time_per_call']*1e6:>9.2f} {x['percent']:>6.1f}" )
+    return "\n".join( lines )
+
+  def print_report( self, top_n=20 ):
+    for by in [ 'block', 'host', 'class' ]:
+      print()
+      print( self.format_report( by, top_n ) )
+    print()
+
+#-------------------------------------------------------------------------
+# _BlockHosts
+#-------------------------------------------------------------------------
+# Find the host component of a scheduled block. Generated blocks that
+# wrap several update blocks (SCCs and meta blocks) keep them in _upblks
+# and are attributed to the lowest common ancestor of their hosts.
+
+class _BlockHosts:
+
+  def __init__( self, top ):
+    self.top = top
+    self.hostobj = dict( top._dsl.all_upblk_hostobj )
+    self.hostobj.update( getattr( top._dag, 'genblk_hostobj', {} ) )
+    for blk, gblk in getattr( top._dag, 'blk_greenlet_mapping', {} ).items():
+      self.hostobj[ gblk ] = self.hostobj.get( blk, top )
+
+  def get( self, blk ):
+    if blk in self.hostobj:
+      return self.hostobj[ blk ]
+
+    upblks = getattr( blk, '_upblks', None )
+    if not upblks:
+      return self.top
+
+    host = None
+    for x in upblks:
+      host = self.get( x ) if host is None else _lca( host, self.get( x ) )
+    return host
+
+def _lca( x, y ):
+  while x.get_component_level() > y.get_component_level():
+    x = x.get_parent_object()
+  while y.get_component_level() > x.get_component_level():
+    y = y.get_parent_object()
+  while x is not y:
+    x = x.get_parent_object()
+    y = y.get_parent_object()
+  return x
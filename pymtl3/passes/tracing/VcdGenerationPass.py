@@ -7,14 +7,36 @@ Author : Shunning Jiang, Yanghui Ou, Peitian Pan
 Date   : Sep 8, 2019
 """
 
+import io
+import linecache
 import time
+import weakref
 from collections import defaultdict
 
 from pymtl3.datatypes import Bits, concat
-from pymtl3.dsl import Const, MetadataKey
+from pymtl3.dsl import Const, MetadataKey, WireArray
+from pymtl3.extra.pypy import custom_exec
 from pymtl3.passes.BasePass import BasePass
 from pymtl3.passes.errors import PassOrderError
 
+from .binary_wave import BinaryWaveWriter, pack_net_index, pack_record_header
+
+
+# One entry of a WireArray, which looks like a signal to the dumper so
+# that s.x[i] gets its own net in the waveform.
+
+class _WireArrayEntry:
+
+  def __init__( s, array, idx ):
+    s._dsl  = array._dsl
+    s.array = array
+    s.idx   = idx
+
+  def __repr__( s ):
+    return f"{s.array!r}[{s.idx}]"
+
+  def get_host_component( s ):
+    return s.array.get_host_component()
 
 class VcdGenerationPass( BasePass ):
 
@@ -27,6 +49,54 @@ class VcdGenerationPass( BasePass ):
   #: Default value: ""
   vcd_file_name = MetadataKey(str)
 
+  #: Only dump the signals of these components and their descendants
+  #:
+  #: Type: ``Component`` or ``list`` of ``Component``; input
+  #:
+  #: Default value: None (the whole design)
+  vcd_scopes = MetadataKey()
+
+  #: The first cycle to dump. All nets are dumped at this cycle.
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: 0
+  vcd_start_cycle = MetadataKey(int)
+
+  #: Stop dumping at this cycle (exclusive)
+  #:
+  #: Type: ``int``; input
+  #:
+  #: Default value: None (never stop)
+  vcd_stop_cycle = MetadataKey(int)
+
+  #: Waveform format. "text" writes a standard VCD file, "binary" writes
+  #: a block-compressed change log (.vcdb) that can be converted to VCD
+  #: offline with ``python -m pymtl3.passes.tracing.binary_wave``.
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: "text"
+  vcd_format = MetadataKey(str)
+
+  #: Compression of the binary format, "zlib" or "lzma"
+  #:
+  #: Type: ``str``; input
+  #:
+  #: Default value: "zlib"
+  vcd_compression = MetadataKey(str)
+
+  #: The opened waveform file (text) or BinaryWaveWriter (binary)
+  #:
+  #: Type: ``file`` or ``BinaryWaveWriter``; output
+  vcd_writer = MetadataKey()
+
+  #: Closes vcd_writer when the top component is garbage collected.
+  #: Call it (or top.sim_finalize) to finish the waveform earlier.
+  #:
+  #: Type: ``weakref.finalize``; output
+  vcd_finalize = MetadataKey()
+
   vcd_func = MetadataKey()
 
   def __call__( self, top ):
@@ -39,12 +109,28 @@ class VcdGenerationPass( BasePass ):
 
   def make_vcd_func( self, top, vcd_file_name ):
     assert vcd_file_name is not None
+
+    vcd_format = top.get_metadata( self.vcd_format ) if top.has_metadata( self.vcd_format ) else "text"
+    if vcd_format not in ( "text", "binary" ):
+      raise ValueError( f"Unknown vcd format {vcd_format!r}, should be \"text\" or \"binary\"" )
+    suffix = ".vcd" if vcd_format == "text" else ".vcdb"
+
     if vcd_file_name != "":
-      vcd_file_name = str(vcd_file_name) + ".vcd"
+      vcd_file_name = str(vcd_file_name) + suffix
     else:
-      vcd_file_name = str(top.__class__.__name__) + ".vcd"
+      vcd_file_name = str(top.__class__.__name__) + suffix
 
-    vcd_file = open( vcd_file_name, "w" )
+    if vcd_format == "text":
+      vcd_file = wave_writer = open( vcd_file_name, "w" )
+    else:
+      compression = top.get_metadata( self.vcd_compression ) \
+                    if top.has_metadata( self.vcd_compression ) else "zlib"
+      wave_writer = BinaryWaveWriter( vcd_file_name, compression )
+      # The preamble is kept as text in the header block
+      vcd_file = io.StringIO()
+
+    top.set_metadata( self.vcd_writer, wave_writer )
+    top.set_metadata( self.vcd_finalize, weakref.finalize( top, wave_writer.close ) )
 
     # Get vcd timescale
 
@@ -80,6 +166,32 @@ class VcdGenerationPass( BasePass ):
 
     vcd_symbols = _gen_vcd_symbol()
 
+    # Collect dump options
+
+    scopes = top.get_metadata( self.vcd_scopes ) if top.has_metadata( self.vcd_scopes ) else None
+    if scopes is not None and not isinstance( scopes, (list, tuple) ):
+      scopes = [ scopes ]
+
+    start_cycle = top.get_metadata( self.vcd_start_cycle ) if top.has_metadata( self.vcd_start_cycle ) else 0
+    stop_cycle  = top.get_metadata( self.vcd_stop_cycle )  if top.has_metadata( self.vcd_stop_cycle )  else None
+
+    # in_scope[m] is True if m's signals are dumped, False if m is only an
+    # ancestor of a dumped component and we just need its $scope
+    in_scope = {}
+    roots = set( scopes ) if scopes is not None else { top }
+    for m in top.get_all_components():
+      x = m
+      while x is not None and x not in roots:
+        x = x.get_parent_object()
+      if x is not None:
+        in_scope[ m ] = True
+        # Open the scopes of all ancestors
+        x = m.get_parent_object()
+        while x is not None and x not in in_scope:
+          in_scope[ x ] = False
+          x = x.get_parent_object()
+    in_scope.setdefault( top, False )
+
     # Preprocess some metadata
 
     component_signals = defaultdict(set)
@@ -87,11 +199,14 @@ class VcdGenerationPass( BasePass ):
     all_components = set()
 
     # We only collect top level signals, and squash bitstruct into a long
-    # bits object
+    # bits object. Every entry of a WireArray is dumped as a signal.
     for x in top._dsl.all_signals:
       if x.is_top_level_signal():
         host = x.get_host_component()
-        component_signals[ host ].add( x )
+        if isinstance( x, WireArray ):
+          component_signals[ host ].update( _WireArrayEntry( x, i ) for i in range(len(x)) )
+        else:
+          component_signals[ host ].add( x )
 
     # We pre-process all nets in order to remove all sliced wires because
     # they belong to a top level wire and we count that wire
@@ -131,7 +246,7 @@ class VcdGenerationPass( BasePass ):
       return name.replace('[','(').replace(']',')').replace(':', '__')
 
     def recurse_models( m, spaces ):
-      nonlocal vcd_clock_net_idx, vcd_sim_ncycles
+      nonlocal vcd_clock_net_idx
 
       # Special case the top level "s" to "top"
 
@@ -145,8 +260,14 @@ class VcdGenerationPass( BasePass ):
 
       m_name = repr(m)
 
-      # Define all signals for this model.
-      for signal in component_signals[m]:
+      # Define all signals for this model. The clock of top is always
+      # dumped because it drives the time axis.
+      if in_scope[m]:
+        signals = component_signals[m]
+      else:
+        signals = [ x for x in component_signals[m] if repr(x) == "s.clk" ]
+
+      for signal in sorted( signals, key=repr ):
 
         # Multiple signals may be collapsed into a single net in the
         # simulator if they are connected. Generate new vcd symbols per
@@ -154,7 +275,6 @@ class VcdGenerationPass( BasePass ):
 
         if signal in signal_net_mapping:
           net_id = signal_net_mapping[signal]
-          symbol = net_symbol_mapping[net_id]
         else:
           # We treat this as a new net
 
@@ -168,10 +288,13 @@ class VcdGenerationPass( BasePass ):
           # a signal updated in an upblk. Creating a new net for it does
           # not hurt functionality.
 
+          net_id = len(trimmed_value_nets)
           trimmed_value_nets.append( [ signal ] )
-          signal_net_mapping[signal] = len(signal_net_mapping)
-          symbol = next(vcd_symbols)
-          net_symbol_mapping.append( symbol )
+          signal_net_mapping[signal] = net_id
+          net_symbol_mapping.append( next(vcd_symbols) )
+
+        dumped_nets.add( net_id )
+        symbol = net_symbol_mapping[net_id]
 
         # This signal can be a part of an interface so we have to
         # "subtract" host component's name from signal's full name
@@ -183,11 +306,13 @@ class VcdGenerationPass( BasePass ):
 
       # Recursively visit all submodels.
       for child in m.get_child_components():
-        recurse_models( child, spaces+'  ' )
+        if child in in_scope:
+          recurse_models( child, spaces+'  ' )
 
       print( f"{spaces}$upscope $end", file=vcd_file )
 
     # Begin recursive descent from the top-level model.
+    dumped_nets = set()
     recurse_models( top, '' )
 
     # Once all models and their signals have been defined, end the
@@ -195,74 +320,142 @@ class VcdGenerationPass( BasePass ):
     # nets in the design.
     print( "$enddefinitions $end\n", file=vcd_file )
 
-    # last_values is an array of values from the previous cycle
-
-    last_values = [0 for _ in range(len(trimmed_value_nets))]
+    # Only keep the nets that are actually declared in the dumped scopes
+    net_ids = [ i for i in sorted(dumped_nets) if i != vcd_clock_net_idx ]
 
-    for i, net in enumerate(trimmed_value_nets):
+    for i in sorted(dumped_nets):
       # Convert everything to Bits to get around lack of bit struct support.
       # The first cycle VCD contains the default value
-      bin_str = net[0]._dsl.Type().to_bits().bin()
-
+      bin_str = trimmed_value_nets[i][0]._dsl.Type().to_bits().bin()
       print( f"b{bin_str} {net_symbol_mapping[i]}", file=vcd_file )
 
-      # Set this to be the last cycle value str
-      last_values[i] = bin_str
-
-    # Now we create per-cycle signal value collect functions
-
-    vcd_sim_ncycles = 0
-
     # Separate clock net from normal nets ahead of time
     clock_symbol = net_symbol_mapping[ vcd_clock_net_idx ]
 
-    net_details = [ ( trimmed_value_nets[i][0], net_symbol_mapping[i] )
-                    for i in range(len(trimmed_value_nets))
-                      if i != vcd_clock_net_idx ]
-
     # Flip clock for the first cycle
     print( '\n#0\nb0b1 {}\n'.format( clock_symbol ), file=vcd_file, flush=True )
 
-    # Returns a dump_vcd function that is ready to be appended to _sched.
-    # TODO: type check?
-
-    # Adding this 's' argument is for eval to correctly evaluate 's.x'...
-    # Python 3 destroys a lot of our hacks .. sigh
-
-    def dump_vcd_inner( s ):
-      nonlocal vcd_sim_ncycles
-
-      for i, (signal, symbol) in enumerate( net_details ):
-
-        # If we encounter a BitStruct then dump it as a concatenation of
-        # all fields.
-        # TODO: treat each field in a BitStruct as a separate signal?
+    signals = [ trimmed_value_nets[i][0] for i in net_ids ]
+    symbols = [ net_symbol_mapping[i] for i in net_ids ]
 
-        try:
-          net_bits_bin = eval(repr(signal)).to_bits()
-        except Exception as e:
-          raise TypeError(f'{e}\n - {signal} becomes another type. Please check your code.')
-
-        net_bits_bin_str = net_bits_bin.bin()
-        # `last_value` is the string form of a Bits object in binary
-        # e.g. '0b000' == Bits3(0).bin()
-        # We store strings instead of values ...
-        if last_values[i] != net_bits_bin_str:
-          last_values[i] = net_bits_bin_str
-          print( f'b{net_bits_bin_str} {symbol}', file=vcd_file )
-
-      # Flop clock at the end of cycle
-      next_neg_edge = 100 * vcd_sim_ncycles + 50
-      print( f'\n#{next_neg_edge}\nb0b0 {clock_symbol}', file=vcd_file )
-
-      # Flip clock of the next cycle
-      next_pos_edge = next_neg_edge + 50
-      print( f'#{next_pos_edge}\nb0b1 {clock_symbol}\n', file=vcd_file, flush=True )
-      vcd_sim_ncycles += 1
-
-    def gen_dump_vcd( s ):
-      def dump_vcd():
-        dump_vcd_inner( s )
-      return dump_vcd
-
-    return gen_dump_vcd( top )
+    # Returns a dump_vcd function that is ready to be appended to _sched.
+    if vcd_format == "text":
+      return self.gen_dump_vcd( top, vcd_file, signals, symbols, clock_symbol,
+                                start_cycle, stop_cycle )
+
+    wave_writer.write_header( vcd_file.getvalue(),
+                              [ [ sym, x._dsl.Type.nbits ] for x, sym in zip( signals, symbols ) ],
+                              clock_symbol )
+    return self.gen_dump_binary( top, wave_writer, signals, start_cycle, stop_cycle )
+
+  # Generate the per-cycle dump function. Instead of evaluating the
+  # repr of each signal and comparing binary strings every cycle, we
+  # generate straight-line code that reads each net through a hoisted
+  # attribute access, compares integers against the last dumped value,
+  # and appends changes to a list that is written out in one chunk.
+
+  @staticmethod
+  def _gen_dump_body( signals, start_cycle, stop_cycle, gen_change ):
+
+    # Group nets by host component to hoist the common attribute chain
+
+    host_nets = defaultdict(list)
+    for i, signal in enumerate( signals ):
+      host_nets[ signal.get_host_component() ].append( i )
+
+    src = [
+      "    ncycles = state[0]",
+      "    state[0] = ncycles + 1",
+    ]
+
+    if start_cycle > 0 or stop_cycle is not None:
+      cond = [ f"ncycles < {start_cycle}" ] if start_cycle > 0 else []
+      if stop_cycle is not None:
+        cond.append( f"ncycles >= {stop_cycle}" )
+      src += [
+      f"    if {' or '.join(cond)}:",
+       "      return",
+      ]
+
+    src.append( "    out = []" )
+    src.append( "    _append = out.append" )
+
+    for host, idxs in host_nets.items():
+      repr_host = repr(host)
+      pos = len(repr_host) + 1
+      src.append( f"    h = {repr_host}" )
+      for i in idxs:
+        signal = signals[i]
+        # A net that is assigned a value of another type no longer has
+        # to_bits(), e.g., an int.
+        err_msg = f'\n - {signal} becomes another type. Please check your code.'
+        src += [
+          f"    try:",
+          f"      v = int(h.{repr(signal)[pos:]}.to_bits())",
+          f"    except Exception as e:",
+          f"      raise TypeError( str(e) + {err_msg!r} )",
+          f"    if v != last[{i}]:",
+          f"      last[{i}] = v",
+          f"      _append( {gen_change( i, signal._dsl.Type.nbits )} )",
+        ]
+    return src
+
+  @staticmethod
+  def _compile_dump_func( top, src, *args ):
+    _locals = {}
+    fname = f"dump_vcd_{top.__class__.__name__}"
+    custom_exec( compile( "\n".join(src), filename=fname, mode="exec" ), {}, _locals )
+    linecache.cache[ fname ] = ( 1, None, src, fname )
+    return _locals['compile_dump_vcd']( top, *args )
+
+  @staticmethod
+  def gen_dump_vcd( top, vcd_file, signals, symbols, clock_symbol, start_cycle, stop_cycle ):
+
+    src = [
+      "def compile_dump_vcd( s, last, vcd_file, state ):",
+      "  _write = vcd_file.write",
+      "  _flush = vcd_file.flush",
+      "  def dump_vcd():",
+    ]
+    src += VcdGenerationPass._gen_dump_body( signals, start_cycle, stop_cycle,
+      lambda i, nbits: f"'b0b' + format( v, '0{nbits}b' ) + {' '+symbols[i]+chr(10)!r}" )
+
+    # Flop clock at the end of cycle, flip clock of the next cycle
+    clk_neg = f"\nb0b0 {clock_symbol}\n"
+    clk_pos = f"\nb0b1 {clock_symbol}\n\n"
+    src += [
+      f"    next_neg_edge = 100 * ncycles + 50",
+      f"    _append( '\\n#' + str(next_neg_edge) + {clk_neg!r} )",
+      f"    _append( '#' + str(next_neg_edge + 50) + {clk_pos!r} )",
+      f"    _write( ''.join( out ) )",
+      f"    _flush()",
+      f"  return dump_vcd",
+    ]
+
+    # If we start dumping in the middle, the first dumped cycle must
+    # contain every net, so we start with impossible last values.
+    init = -1 if start_cycle > 0 else 0
+    return VcdGenerationPass._compile_dump_func( top, src, [ init ] * len(signals),
+                                                 vcd_file, [ 0 ] )
+
+  # The binary dumper records the cycle number and the (net index, value)
+  # pairs of the changed nets. Clock edges are implied by the cycle.
+
+  @staticmethod
+  def gen_dump_binary( top, writer, signals, start_cycle, stop_cycle ):
+
+    src = [
+      "def compile_dump_vcd( s, last, writer, state, _pack ):",
+      "  _write = writer.write",
+      "  def dump_vcd():",
+    ]
+    src += VcdGenerationPass._gen_dump_body( signals, start_cycle, stop_cycle,
+      lambda i, nbits: f"{pack_net_index(i)!r} + v.to_bytes( {(nbits+7)//8}, 'little' )" )
+    src += [
+      f"    _write( _pack( ncycles, len(out) ) + b''.join( out ) )",
+      f"  return dump_vcd",
+    ]
+
+    init = -1 if start_cycle > 0 else 0
+    return VcdGenerationPass._compile_dump_func( top, src, [ init ] * len(signals),
+                                                 writer, [ 0 ], pack_record_header )
@@ -0,0 +1,192 @@
+"""
+========================================================================
+binary_wave.py
+========================================================================
+A compact binary waveform format for VcdGenerationPass and an offline
+converter back to standard VCD.
+
+A file starts with an 8-byte magic string and a one-byte codec id,
+followed by a sequence of blocks. Each block has a '<cII' header (kind,
+raw length, compressed length) and a compressed payload:
+
+- 'H' (header): JSON object with the VCD preamble text (definitions and
+  initial values), the [symbol, nbits] list of dumped nets, and the
+  clock symbol.
+- 'D' (data): back-to-back cycle records. Each record is a '<II'
+  (cycle, number of changes) followed by the changes, each encoded as
+  a '<I' net index and the little-endian value of the net.
+
+Usage: python -m pymtl3.passes.tracing.binary_wave in.vcdb [out.vcd]
+
+Date   : Oct 17, 2026
+"""
+
+import argparse
+import json
+import lzma
+import struct
+import sys
+import zlib
+
+MAGIC = b"PYMTLWV1"
+
+_codecs = {
+  "zlib": ( b"z", zlib.compress, zlib.decompress ),
+  "lzma": ( b"x", lzma.compress, lzma.decompress ),
+}
+_decompressors = { cid: dec for cid, _, dec in _codecs.values() }
+
+_block_header = struct.Struct("<cII")
+_record_header = struct.Struct("<II")
+_net_index = struct.Struct("<I")
+
+def pack_net_index( i ):
+  return _net_index.pack( i )
+
+def pack_record_header( ncycles, nchanges ):
+  return _record_header.pack( ncycles, nchanges )
+
+#-------------------------------------------------------------------------
+# BinaryWaveWriter
+#-------------------------------------------------------------------------
+
+class BinaryWaveWriter:
+  """ Buffers cycle records and writes them out as compressed blocks of
+  at least block_size raw bytes. A record is never split across blocks. """
+
+  def __init__( s, file_name, compression="zlib", block_size=1<<20 ):
+    if compression not in _codecs:
+      raise ValueError( f"Unknown waveform compression {compression!r}, "
+                        f"should be one of {sorted(_codecs)}" )
+    codec_id, s._compress, _ = _codecs[ compression ]
+
+    s.file_name  = file_name
+    s.block_size = block_size
+    s.closed     = False
+    s._buf       = bytearray()
+    s._file      = open( file_name, "wb" )
+    s._file.write( MAGIC + codec_id )
+
+  def _write_block( s, kind, raw ):
+    data = s._compress( bytes(raw) )
+    s._file.write( _block_header.pack( kind, len(raw), len(data) ) )
+    s._file.write( data )
+
+  def write_header( s, preamble, nets, clock_symbol ):
+    raw = json.dumps({
+      "preamble": preamble,
+      "nets"    : nets,
+      "clock"   : clock_symbol,
+    }).encode()
+    s._write_block( b"H", raw )
+    s._file.flush()
+
+  def write( s, data ):
+    buf = s._buf
+    buf += data
+    if len(buf) >= s.block_size:
+      s.flush()
+
+  def flush( s ):
+    if s._buf:
+      s._write_block( b"D", s._buf )
+      s._buf = bytearray()
+    s._file.flush()
+
+  def close( s ):
+    if not s.closed:
+      s.flush()
+      s._file.close()
+      s.closed = True
+
+#-------------------------------------------------------------------------
+# Reader
+#-------------------------------------------------------------------------
+
+def iter_blocks( f ):
+  magic = f.read( len(MAGIC) )
+  if magic != MAGIC:
+    raise ValueError( f"{getattr(f, 'name', f)} is not a PyMTL binary waveform file" )
+  codec_id = f.read(1)
+  if codec_id not in _decompressors:
+    raise ValueError( f"Unknown waveform codec {codec_id!r}" )
+  decompress = _decompressors[ codec_id ]
+
+  while True:
+    hdr = f.read( _block_header.size )
+    if not hdr:
+      return
+    if len(hdr) < _block_header.size:
+      raise ValueError( "Truncated waveform block header" )
+    kind, raw_len, comp_len = _block_header.unpack( hdr )
+    raw = decompress( f.read( comp_len ) )
+    if len(raw) != raw_len:
+      raise ValueError( "Corrupted waveform block" )
+    yield kind, raw
+
+#-------------------------------------------------------------------------
+# convert_to_vcd
+#-------------------------------------------------------------------------
+# The output is the same text VcdGenerationPass writes in "text" format.
+
+def convert_to_vcd( src_file_name, dst_file_name ):
+  nets  = None
+  clock = None
+
+  with open( src_file_name, "rb" ) as f, open( dst_file_name, "w" ) as out:
+    write = out.write
+
+    for kind, raw in iter_blocks( f ):
+      if kind == b"H":
+        header = json.loads( raw )
+        write( header["preamble"] )
+        clock = header["clock"]
+        nets  = [ ( (nbits + 7) // 8, f"0{nbits}b", f" {symbol}\n" )
+                  for symbol, nbits in header["nets"] ]
+        clk_neg = f"\nb0b0 {clock}\n"
+        clk_pos = f"\nb0b1 {clock}\n\n"
+
+      elif kind == b"D":
+        if nets is None:
+          raise ValueError( "Waveform data block before header" )
+        view = memoryview( raw )
+        pos, end = 0, len(raw)
+        lines = []
+        _append = lines.append
+        while pos < end:
+          ncycles, nchanges = _record_header.unpack_from( view, pos )
+          pos += _record_header.size
+          for _ in range( nchanges ):
+            i, = _net_index.unpack_from( view, pos )
+            pos += _net_index.size
+            nbytes, fmt, sym = nets[i]
+            v = int.from_bytes( view[ pos:pos+nbytes ], "little" )
+            pos += nbytes
+            _append( "b0b" + format( v, fmt ) + sym )
+          next_neg_edge = 100 * ncycles + 50
+          _append( "\n#" + str(next_neg_edge) + clk_neg )
+          _append( "#" + str(next_neg_edge + 50) + clk_pos )
+        write( "".join( lines ) )
+
+      else:
+        raise ValueError( f"Unknown waveform block kind {kind!r}" )
+
+#-------------------------------------------------------------------------
+# Command line
+#-------------------------------------------------------------------------
+
+def main( argv=None ):
+  p = argparse.ArgumentParser( description="Convert a PyMTL binary waveform to VCD" )
+  p.add_argument( "src", help="binary waveform file (.vcdb)" )
+  p.add_argument( "dst", nargs="?", help="output vcd file, default: src with .vcd suffix" )
+  opts = p.parse_args( argv )
+
+  dst = opts.dst
+  if dst is None:
+    dst = opts.src[:-5] if opts.src.endswith(".vcdb") else opts.src
+    dst += ".vcd"
+  convert_to_vcd( opts.src, dst )
+  return dst
+
+if __name__ == "__main__":
+  main( sys.argv[1:] )
@@ -12,6 +12,7 @@ from contextlib import redirect_stdout
 
 from pymtl3.datatypes import (
     Bits1,
+    Bits8,
     Bits16,
     Bits32,
     Bits128,
@@ -24,6 +25,7 @@ from pymtl3.datatypes import (
 from pymtl3.dsl import *
 from pymtl3.passes.errors import ModelTypeError
 from pymtl3.passes.PassGroups import DefaultPassGroup
+from pymtl3.stdlib.primitive import RegisterFile
 
 from ..PrintTextWavePass import PrintTextWavePass
 
@@ -306,3 +308,27 @@ def test_bitstruct():
     sliced = i[dot+1:]
     if sliced != "reset" and sliced != "clk":
       assert i[dot+1:] in out
+
+def test_wire_array_entries():
+  dut = RegisterFile( Bits8, 4 )
+  dut.set_metadata( PrintTextWavePass.enable, True )
+  dut.elaborate()
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+  dut.wen[0] @= 1
+  dut.waddr[0] @= 2
+  dut.wdata[0] @= 0xab
+  dut.sim_tick()
+  dut.wen[0] @= 0
+  dut.sim_tick()
+
+  sig = dut.get_metadata( PrintTextWavePass.textwave_dict )
+  for i in range(4):
+    assert f"s.regs[{i}]" in sig
+  assert sig["s.regs[2]"][-1] == "0b10101011"
+  assert sig["s.regs[1]"][-1] == "0b00000000"
+
+  f = io.StringIO()
+  with redirect_stdout(f):
+    dut.print_textwave()
+  assert "regs[2]" in f.getvalue()
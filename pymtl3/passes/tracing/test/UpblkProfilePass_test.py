@@ -0,0 +1,152 @@
+#=========================================================================
+# UpblkProfilePass_test.py
+#=========================================================================
+#
+# Date   : Oct 17, 2026
+
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from pymtl3.datatypes import Bits8
+from pymtl3.dsl import *
+from pymtl3.passes.mamba import Mamba2020
+from pymtl3.passes.PassGroups import DefaultPassGroup
+
+from ..UpblkProfilePass import UpblkProfilePass
+
+
+class Adder( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+
+    @update
+    def up_add():
+      s.out @= s.in_ + 1
+
+class Reg( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+
+    @update_ff
+    def up_reg():
+      s.out <<= s.in_
+
+class Top( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+
+    s.add0 = Adder()
+    s.add1 = Adder()
+    s.reg  = Reg()
+
+    s.add0.in_ //= s.in_
+    s.add1.in_ //= s.add0.out
+    s.reg.in_  //= s.add1.out
+    s.out      //= s.reg.out
+
+    @update
+    def up_top():
+      pass
+
+def _run( m, ncycles ):
+  m.sim_reset()
+  for i in range( ncycles ):
+    m.in_ @= i
+    m.sim_tick()
+
+def test_profile_every_call():
+  m = Top()
+  m.apply( DefaultPassGroup( profile_upblks=True ) )
+  _run( m, 10 )
+  assert m.out == 11
+
+  by_block = { x['name']: x for x in m.get_upblk_profile( 'block' ) }
+  # sim_reset runs the update_ff blocks three times
+  assert by_block['up_reg @ s.reg']['calls'] == 13
+  assert by_block['up_reg @ s.reg']['samples'] == 13
+  assert by_block['up_add @ s.add0']['calls'] == by_block['up_add @ s.add1']['calls']
+
+  by_host = { x['name']: x for x in m.get_upblk_profile( 'host' ) }
+  assert 's.add0' in by_host and 's.reg' in by_host
+
+  by_class = { x['name']: x for x in m.get_upblk_profile( 'class' ) }
+  assert by_class['Adder']['calls'] == 2 * by_block['up_add @ s.add0']['calls']
+
+  rows = m.get_upblk_profile( 'block' )
+  assert rows == sorted( rows, key=lambda x: x['time'], reverse=True )
+  assert abs( sum( x['percent'] for x in rows ) - 100.0 ) < 1e-6
+
+  f = io.StringIO()
+  with redirect_stdout( f ):
+    m.print_upblk_profile()
+  assert "up_reg @ s.reg" in f.getvalue()
+
+def test_profile_sampling():
+  m = Top()
+  m.apply( DefaultPassGroup( profile_upblks=4 ) )
+  _run( m, 37 )
+  assert m.out == 38
+
+  by_block = { x['name']: x for x in m.get_upblk_profile( 'block' ) }
+  assert by_block['up_reg @ s.reg']['calls'] == 40
+  assert by_block['up_reg @ s.reg']['samples'] == 10
+
+  m.get_metadata( UpblkProfilePass.upblk_profile ).clear()
+  assert all( x['calls'] == 0 for x in m.get_upblk_profile() )
+
+def test_profile_disabled():
+  m = Top()
+  m.apply( DefaultPassGroup() )
+  assert not hasattr( m, 'get_upblk_profile' )
+  assert not m.has_metadata( UpblkProfilePass.upblk_profile )
+
+def test_profile_scc_block():
+
+  class Loop( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+      s.a = Wire( Bits8 )
+      s.b = Wire( Bits8 )
+
+      @update
+      def up_a():
+        s.a @= s.in_ if s.b > 5 else s.in_ + 1
+
+      @update
+      def up_b():
+        s.b @= s.a
+        s.out @= s.b
+
+  class LoopTop( Component ):
+    def construct( s ):
+      s.in_  = InPort( Bits8 )
+      s.out  = OutPort( Bits8 )
+      s.loop = Loop()
+      s.loop.in_ //= s.in_
+      s.out //= s.loop.out
+
+  m = LoopTop()
+  m.apply( DefaultPassGroup( profile_upblks=True ) )
+  _run( m, 3 )
+
+  names = [ x['name'] for x in m.get_upblk_profile( 'block' ) ]
+  # The SCC block is attributed to the host of the blocks it wraps
+  assert 'wrapped_SCC_1 @ s.loop' in names
+
+@pytest.mark.parametrize( "period", [ 1, 3 ] )
+def test_profile_mamba( period ):
+  m = Top()
+  m.set_metadata( UpblkProfilePass.enable, True )
+  m.set_metadata( UpblkProfilePass.sample_period, period )
+  m.apply( Mamba2020( print_line_trace=False ) )
+  _run( m, 10 )
+  assert m.out == 11
+
+  rows = m.get_upblk_profile( 'class' )
+  assert sum( x['calls'] for x in rows ) > 0
@@ -11,10 +11,16 @@
 # Author: Peitian Pan
 # Date:   Nov 1, 2019
 
+import gc
+
+import pytest
+
 from pymtl3.datatypes import *
 from pymtl3.dsl import *
 from pymtl3.passes.PassGroups import DefaultPassGroup
+from pymtl3.stdlib.primitive import RegisterFile
 
+from ..binary_wave import convert_to_vcd
 from ..VcdGenerationPass import VcdGenerationPass
 
 
@@ -89,3 +95,192 @@ def test_bitstruct_signals():
     [  bs(0, -1), b32(0), b32(-1), ],
     [  bs(0, 42), b32(42), b32(84), ],
   ], tv_in, tv_out )
+
+class Inner( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.tmp = Wire( Bits8 )
+
+    @update
+    def upblk():
+      s.tmp @= s.in_ + 1
+      s.out @= s.tmp
+
+class Outer( Component ):
+  def construct( s ):
+    s.in_ = InPort( Bits8 )
+    s.out = OutPort( Bits8 )
+    s.a = Inner()
+    s.b = Inner()
+    s.a.in_ //= s.in_
+    s.b.in_ //= s.a.out
+    s.out //= s.b.out
+
+def _sim_outer( vcd_file_name, metadata, ncycles ):
+  dut = Outer()
+  dut.elaborate()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, vcd_file_name )
+  for key, value in metadata( dut ):
+    dut.set_metadata( key, value )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+  for i in range(ncycles):
+    dut.in_ @= i
+    dut.sim_tick()
+  return dut
+
+def _run_outer( vcd_file_name, metadata, ncycles ):
+  _sim_outer( vcd_file_name, metadata, ncycles )
+  with open(vcd_file_name+".vcd") as fd:
+    return fd.read()
+
+def test_value_changes_only( tmpdir ):
+  vcd = _run_outer( str(tmpdir/"Outer_changes"), lambda dut: [], 8 )
+  body = vcd.split( "$enddefinitions $end" )[1]
+  # No net is dumped twice in a row with the same value
+  last = {}
+  for x in body.split("\n"):
+    if x.startswith("b0b"):
+      value, symbol = x.split()
+      if symbol != "!":
+        assert last.get( symbol ) != value
+      last[ symbol ] = value
+  assert "b0b00001001" in body # b.out == 7+2 at the last cycle
+
+def test_sub_hierarchy( tmpdir ):
+  vcd = _run_outer( str(tmpdir/"Outer_scope"), lambda dut: [ (VcdGenerationPass.vcd_scopes, dut.b) ], 4 )
+  header = vcd.split( "$enddefinitions $end" )[0]
+  assert "$scope module b $end" in header
+  assert "$scope module a $end" not in header
+  assert " tmp $end" in header
+  # top level only keeps the clock
+  assert " clk $end" in header
+  assert " reset $end" not in header.split("$scope module b")[0]
+
+def test_time_window( tmpdir ):
+  vcd = _run_outer( str(tmpdir/"Outer_window"), lambda dut: [ (VcdGenerationPass.vcd_start_cycle, 5),
+                                                 (VcdGenerationPass.vcd_stop_cycle, 7) ], 10 )
+  body = vcd.split( "$enddefinitions $end" )[1]
+  stamps = [ int(x[1:]) for x in body.split("\n") if x.startswith("#") ]
+  assert stamps == [ 0, 550, 600, 650, 700 ]
+
+# Net symbols depend on the elaboration order, so we compare the value
+# changes of each named signal at each time stamp.
+def _parse_vcd( vcd ):
+  header, body = vcd.split( "$enddefinitions $end" )
+  scope, names = [], {}
+  for x in header.split("\n"):
+    x = x.split()
+    if   x[:2] == [ "$scope", "module" ]: scope.append( x[2] )
+    elif x[:1] == [ "$upscope" ]:         scope.pop()
+    elif x[:1] == [ "$var" ]:
+      names.setdefault( x[3], [] ).append( ".".join( scope + [ x[4] ] ) )
+  events, cur = [], []
+  for x in body.split("\n"):
+    if x.startswith("#"):
+      events.append( sorted(cur) )
+      cur = [ (x, "") ]
+    elif x.startswith("b"):
+      value, symbol = x.split()
+      cur += [ (name, value) for name in names[ symbol ] ]
+  events.append( sorted(cur) )
+  return sorted( sum( names.values(), [] ) ), events
+
+def _check_binary_roundtrip( vcd_file_name, metadata ):
+  ref = _run_outer( vcd_file_name+"_ref", metadata, 12 )
+
+  binary = lambda dut: metadata( dut ) + [ (VcdGenerationPass.vcd_format, "binary") ]
+  dut = _sim_outer( vcd_file_name, binary, 12 )
+  dut.sim_finalize()
+  assert dut.get_metadata( VcdGenerationPass.vcd_writer ).closed
+
+  convert_to_vcd( vcd_file_name+".vcdb", vcd_file_name+".vcd" )
+  with open(vcd_file_name+".vcd") as fd:
+    assert _parse_vcd( fd.read() ) == _parse_vcd( ref )
+
+def test_binary_format( tmpdir ):
+  _check_binary_roundtrip( str(tmpdir/"Outer_binary"), lambda dut: [] )
+
+def test_binary_format_lzma_small_blocks( tmpdir ):
+  vcd_file_name = str(tmpdir/"Outer_lzma")
+  def metadata( dut ):
+    return [ (VcdGenerationPass.vcd_compression, "lzma") ]
+  ref = _run_outer( vcd_file_name+"_ref", metadata, 12 )
+
+  dut = Outer()
+  dut.elaborate()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, vcd_file_name )
+  dut.set_metadata( VcdGenerationPass.vcd_format, "binary" )
+  dut.set_metadata( VcdGenerationPass.vcd_compression, "lzma" )
+  dut.apply( DefaultPassGroup() )
+  # Force one block per cycle
+  writer = dut.get_metadata( VcdGenerationPass.vcd_writer )
+  writer.block_size = 1
+  dut.sim_reset()
+  for i in range(12):
+    dut.in_ @= i
+    dut.sim_tick()
+  writer.close()
+
+  convert_to_vcd( vcd_file_name+".vcdb", vcd_file_name+".vcd" )
+  with open(vcd_file_name+".vcd") as fd:
+    assert _parse_vcd( fd.read() ) == _parse_vcd( ref )
+
+def test_binary_format_window_and_scope( tmpdir ):
+  _check_binary_roundtrip( str(tmpdir/"Outer_binary_window"),
+    lambda dut: [ (VcdGenerationPass.vcd_scopes, dut.b),
+                  (VcdGenerationPass.vcd_start_cycle, 3),
+                  (VcdGenerationPass.vcd_stop_cycle, 9) ] )
+
+def test_binary_writer_closed_with_top( tmpdir ):
+  vcd_file_name = str(tmpdir/"Outer_gc")
+  dut = _sim_outer( vcd_file_name, lambda dut: [ (VcdGenerationPass.vcd_format, "binary") ], 4 )
+  writer = dut.get_metadata( VcdGenerationPass.vcd_writer )
+  assert not writer.closed
+  del dut
+  gc.collect()
+  assert writer.closed
+
+def test_wire_array_entries( tmpdir ):
+  vcd_file_name = str(tmpdir/"RegisterFile")
+  dut = RegisterFile( Bits8, 4 )
+  dut.elaborate()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, vcd_file_name )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+  dut.wen[0] @= 1
+  dut.waddr[0] @= 2
+  dut.wdata[0] @= 0xab
+  dut.sim_tick()
+  dut.wen[0] @= 0
+  dut.sim_tick()
+  dut.sim_finalize()
+
+  with open(vcd_file_name+".vcd") as fd:
+    names, events = _parse_vcd( fd.read() )
+  for i in range(4):
+    assert f"top.regs({i})" in names
+  assert ( "top.regs(2)", "b0b10101011" ) in sum( events, [] )
+  assert ( "top.regs(1)", "b0b10101011" ) not in sum( events, [] )
+
+def test_signal_changes_type( tmpdir ):
+  class A( Component ):
+    def construct( s ):
+      s.in_ = InPort( Bits8 )
+      s.out = OutPort( Bits8 )
+      s.w   = Wire( Bits8 )
+
+      @update
+      def upblk():
+        s.out @= s.in_ + s.w
+
+  dut = A()
+  dut.elaborate()
+  dut.set_metadata( VcdGenerationPass.vcd_file_name, str(tmpdir/"A_type") )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+  # Replace the Bits object of w with an int
+  dut.w = 5
+  with pytest.raises( TypeError, match="becomes another type" ):
+    dut.sim_tick()
@@ -62,11 +62,122 @@ class BehavioralMemory( Component ):
     return s.mem[ addr : addr + size ]
 
   def write_mem( s, addr, data ):
-    assert isinstance(data, (bytes, bytearray, list)), \
-        f"Write operand {data} needs to be bytes, bytearray, or list of bytes!"
+    assert isinstance(data, (bytes, bytearray, memoryview, list)), \
+        f"Write operand {data} needs to be bytes, bytearray, memoryview, or list of bytes!"
     assert len(s.mem) > (int(addr) + len(data)), \
         f"Out-of-bound memory write of {len(data)} bytes @ 0x{int(addr):#08x} detected at behavioral memory {s}!"
     s.mem[ addr : addr + len(data) ] = data
 
   def line_trace( s ):
     return s.trace
+
+#-------------------------------------------------------------------------
+# SparseBehavioralMemory
+#-------------------------------------------------------------------------
+# Same interface as BehavioralMemory, but the address space is split into
+# fixed-size pages that are only allocated on the first write. Reading an
+# untouched page returns zeros without allocating it, so we can model a
+# large (e.g., 4GB) physical address space.
+
+class SparseBehavioralMemory( Component ):
+
+  def construct( s, mem_nbytes=1<<32, page_nbytes=1<<12 ):
+    assert page_nbytes > 0 and (page_nbytes & (page_nbytes-1)) == 0, \
+        f"Page size {page_nbytes} needs to be a power of two!"
+    s.mem_nbytes  = mem_nbytes
+    s.page_nbytes = page_nbytes
+    s.page_shift  = page_nbytes.bit_length() - 1
+    s.page_mask   = page_nbytes - 1
+    s.pages       = {}
+
+    s.trace = "     "
+    @update_once
+    def up_clear_trace():
+      s.trace = "     "
+
+  # Return the page that holds addr, allocating it if necessary
+
+  def _get_page( s, page_idx ):
+    page = s.pages.get( page_idx )
+    if page is None:
+      page = s.pages[ page_idx ] = bytearray( s.page_nbytes )
+    return page
+
+  def read( s, addr, nbytes ):
+    addr = int(addr)
+    assert addr + nbytes <= s.mem_nbytes, \
+        f"Out-of-bound memory read of {int(nbytes)} bytes @ 0x{addr:#08x} detected at behavioral memory {s}!"
+    s.trace = "[rd ]"
+    offset = addr & s.page_mask
+    if offset + nbytes <= s.page_nbytes:
+      page = s.pages.get( addr >> s.page_shift )
+      if page is None:
+        return Bits( nbytes << 3, 0 )
+      return read_bytearray_bits( page, offset, nbytes )
+    return Bits( nbytes << 3, int.from_bytes( s.read_mem( addr, nbytes ), 'little' ) )
+
+  def write( s, addr, nbytes, data ):
+    assert isinstance(data, Bits), \
+        f"Write operand {data} needs to be Bits to indicate write length!"
+    addr = int(addr)
+    assert addr + nbytes <= s.mem_nbytes, \
+        f"Out-of-bound memory write of {data.nbits//8} bytes @ 0x{addr:#08x} detected at behavioral memory {s}!"
+    s.trace = "[wr ]"
+    offset = addr & s.page_mask
+    if offset + nbytes <= s.page_nbytes:
+      write_bytearray_bits( s._get_page( addr >> s.page_shift ), offset, nbytes, data )
+    else:
+      s.write_mem( addr, int(data).to_bytes( data.nbits // 8, 'little' )[:nbytes] )
+
+  def amo( s, amo, addr, nbytes, data ):
+    ret = s.read( addr, nbytes )
+    s.write( addr, nbytes, AMO_FUNS[ int(amo) ]( ret, data ) )
+    s.trace = "[amo]"
+    return ret
+
+  def read_mem( s, addr, size ):
+    addr, size = int(addr), int(size)
+    assert addr + size <= s.mem_nbytes, \
+        f"Out-of-bound memory read of {size} bytes @ 0x{addr:#08x} detected at behavioral memory {s}!"
+    ret = bytearray( size )
+    pos = 0
+    while pos < size:
+      offset = (addr + pos) & s.page_mask
+      n      = min( s.page_nbytes - offset, size - pos )
+      page   = s.pages.get( (addr + pos) >> s.page_shift )
+      if page is not None:
+        ret[ pos : pos + n ] = page[ offset : offset + n ]
+      pos += n
+    return ret
+
+  def write_mem( s, addr, data ):
+    assert isinstance(data, (bytes, bytearray, memoryview, list)), \
+        f"Write operand {data} needs to be bytes, bytearray, memoryview, or list of bytes!"
+    addr = int(addr)
+    assert addr + len(data) <= s.mem_nbytes, \
+        f"Out-of-bound memory write of {len(data)} bytes @ 0x{addr:#08x} detected at behavioral memory {s}!"
+    # Slicing a memoryview does not copy, so each byte is copied exactly
+    # once, from the source straight into its page
+    if not isinstance( data, list ):
+      data = memoryview( data ).cast( 'B' )
+    size = len(data)
+    pos  = 0
+    while pos < size:
+      offset = (addr + pos) & s.page_mask
+      n      = min( s.page_nbytes - offset, size - pos )
+      s._get_page( (addr + pos) >> s.page_shift )[ offset : offset + n ] = data[ pos : pos + n ]
+      pos += n
+
+  def load_image( s, mem_image ):
+    """Write all sections of a SparseMemoryImage into the memory."""
+    for section in mem_image.get_sections():
+      s.write_mem( section.addr, section.data )
+
+  def num_resident_pages( s ):
+    return len( s.pages )
+
+  def resident_nbytes( s ):
+    return len( s.pages ) * s.page_nbytes
+
+  def line_trace( s ):
+    return s.trace
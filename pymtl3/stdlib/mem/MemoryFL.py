@@ -16,7 +16,7 @@ from collections import deque
 from pymtl3 import *
 from pymtl3.extra import clone_deepcopy
 
-from pymtl3.stdlib.mem.BehavioralMemory import BehavioralMemory
+from pymtl3.stdlib.mem.BehavioralMemory import BehavioralMemory, SparseBehavioralMemory
 from pymtl3.stdlib.mem.MemMsg import MemMsgType, mk_mem_msg
 from pymtl3.stdlib.stream.ifcs import IStreamIfc, OStreamIfc
 
@@ -57,6 +57,7 @@ class RandomStall( Component ):
     s.istream.msg //= s.ostream.msg
 
     stall_rgen = Random( stall_seed )
+    s._stall_rgen = stall_rgen
 
     s.rand_value = 0
     s.stall_prob = stall_prob
@@ -72,6 +73,18 @@ class RandomStall( Component ):
     def up_stall_val():
       s.ostream.val @= s.istream.val & (s.rand_value > stall_prob)
 
+  # Fast-forward hooks, see FastForwardPass
+
+  def sim_idle_cycles( s ):
+    # The random value only matters if something can go through
+    if s.stall_prob == 0 or not (s.istream.val | s.ostream.rdy):
+      return None
+    return 0
+
+  def sim_skip_cycles( s, n ):
+    for _ in range(n):
+      s.rand_value = s._stall_rgen.random()
+
   def line_trace( s ):
     return "[ ]" if s.rand_value > s.stall_prob else "[#]"
 
@@ -114,6 +127,23 @@ class InelasticDelayPipe( Component ):
 
       s.istream.rdy <<= s.delay_pipe[0] is None
 
+  # Fast-forward hooks, see FastForwardPass
+
+  def sim_idle_cycles( s ):
+    if (s.istream.rdy & s.istream.val) or (s.ostream.val & s.ostream.rdy):
+      return 0
+    if s.ostream.val: # stalled until the consumer is ready
+      return None
+    # The pipe only rotates until the oldest message reaches the end
+    for j in range( len(s.delay_pipe) - 1, -1, -1 ):
+      if s.delay_pipe[j] is not None:
+        return len(s.delay_pipe) - 2 - j
+    return None
+
+  def sim_skip_cycles( s, n ):
+    if not s.ostream.val:
+      s.delay_pipe.rotate( n )
+
   def line_trace( s ):
     return f"[{''.join([ ' ' if x is None else '*' for x in s.delay_pipe])}]"
 
@@ -129,7 +159,7 @@ class MemoryFL( Component ):
 
   # Actual stuff
   def construct( s, nports=1, mem_ifc_dtypes=[mk_mem_msg(8,32,32)],
-                    stall_prob=0, extra_latency=0, mem_nbytes=2**20 ):
+                    stall_prob=0, extra_latency=0, mem_nbytes=2**20, sparse=False ):
 
     # Local constants
 
@@ -137,7 +167,12 @@ class MemoryFL( Component ):
     req_classes  = [ x for (x,y) in mem_ifc_dtypes ]
     resp_classes = [ y for (x,y) in mem_ifc_dtypes ]
 
-    s.mem = BehavioralMemory( mem_nbytes )
+    # A sparse memory only allocates the pages that are written, which
+    # is required to model a large address space
+    if sparse:
+      s.mem = SparseBehavioralMemory( mem_nbytes )
+    else:
+      s.mem = BehavioralMemory( mem_nbytes )
 
     # Interface
 
@@ -206,6 +241,20 @@ class MemoryFL( Component ):
 
           s.resp_qs[i].istream.msg @= resp
 
+  #-----------------------------------------------------------------------
+  # Fast-forward hooks, see FastForwardPass
+  #-----------------------------------------------------------------------
+  # The memory itself has no timing state, it only answers the requests
+  # that get through the stalls in the same cycle.
+
+  def sim_idle_cycles( s ):
+    if any( x.ostream.val for x in s.req_stalls ):
+      return 0
+    return None
+
+  def sim_skip_cycles( s, n ):
+    pass
+
   #-----------------------------------------------------------------------
   # line_trace
   #-----------------------------------------------------------------------
@@ -19,9 +19,7 @@ class CombinationalROM( Component ):
     s.raddr = [ InPort( clog2(num_entries) ) for _ in range(num_ports) ]
     s.rdata = [ OutPort( Type )              for _ in range(num_ports) ]
 
-    s.mem = [ Wire(Type) for _ in range(num_entries) ]
-    for i in range(num_entries):
-      s.mem[i] //= data[i]
+    s.mem = WireArray( Type, num_entries, data )
 
     @update
     def up_read_rom():
@@ -36,9 +34,7 @@ class SequentialROM( Component ):
     s.raddr = [ InPort( clog2(num_entries) ) for _ in range(num_ports) ]
     s.rdata = [ OutPort( Type )              for _ in range(num_ports) ]
 
-    s.mem = [ Wire(Type) for _ in range(num_entries) ]
-    for i in range(num_entries):
-      s.mem[i] //= data[i]
+    s.mem = WireArray( Type, num_entries, data )
 
     @update_ff
     def up_read_rom():
@@ -0,0 +1,75 @@
+#=========================================================================
+# BehavioralMemory_test.py
+#=========================================================================
+
+import random
+
+from pymtl3 import *
+from pymtl3.stdlib.proc.SparseMemoryImage import SparseMemoryImage
+
+from ..BehavioralMemory import BehavioralMemory, SparseBehavioralMemory
+from ..MemMsg import MemMsgType
+
+#-------------------------------------------------------------------------
+# Compare the sparse memory against the dense memory
+#-------------------------------------------------------------------------
+
+def test_sparse_vs_dense():
+  dense  = BehavioralMemory( 1 << 16 )
+  sparse = SparseBehavioralMemory( 1 << 16, page_nbytes=64 )
+  dense.elaborate()
+  sparse.elaborate()
+
+  rgen = random.Random( 0x5b9c7d01 )
+  for _ in range( 2000 ):
+    addr   = rgen.randrange( 0, (1 << 16) - 16 )
+    nbytes = rgen.choice( [1, 2, 4, 8] )
+    op     = rgen.randrange( 3 )
+    if op == 0:
+      data = Bits( nbytes*8, rgen.getrandbits( nbytes*8 ) )
+      dense.write( addr, nbytes, data )
+      sparse.write( addr, nbytes, data )
+    elif op == 1:
+      assert dense.read( addr, nbytes ) == sparse.read( addr, nbytes )
+    else:
+      data = Bits( nbytes*8, rgen.getrandbits( nbytes*8 ) )
+      assert dense.amo( MemMsgType.AMO_ADD, addr, nbytes, data ) == \
+             sparse.amo( MemMsgType.AMO_ADD, addr, nbytes, data )
+
+  assert dense.read_mem( 0, (1 << 16) - 1 ) == sparse.read_mem( 0, (1 << 16) - 1 )
+
+#-------------------------------------------------------------------------
+# Pages are allocated on first write only
+#-------------------------------------------------------------------------
+
+def test_sparse_first_touch():
+  mem = SparseBehavioralMemory()
+  mem.elaborate()
+
+  assert mem.read( 0xfffffff0, 4 ) == 0
+  assert mem.read_mem( 0x80000000, 8192 ) == bytearray( 8192 )
+  assert mem.num_resident_pages() == 0
+
+  # An unaligned write that spans two pages
+  mem.write( 0x1ffe, 4, b32(0xdeadbeef) )
+  assert mem.num_resident_pages() == 2
+  assert mem.read( 0x1ffe, 4 ) == 0xdeadbeef
+  assert mem.read( 0x2000, 2 ) == 0xdead
+  assert mem.resident_nbytes() == 2 * 4096
+
+#-------------------------------------------------------------------------
+# Load a sparse memory image
+#-------------------------------------------------------------------------
+
+def test_sparse_load_image():
+  image = SparseMemoryImage()
+  image.add_section( ".text", 0x00000200, bytearray( range(256) ) * 20 )
+  image.add_section( ".data", 0xc0000000, b"\x01\x02\x03\x04" )
+
+  mem = SparseBehavioralMemory()
+  mem.elaborate()
+  mem.load_image( image )
+
+  assert mem.read_mem( 0x200, 5120 ) == bytearray( range(256) ) * 20
+  assert mem.read( 0xc0000000, 4 ) == 0x04030201
+  assert mem.num_resident_pages() == 3
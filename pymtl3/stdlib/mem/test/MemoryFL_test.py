@@ -4,6 +4,7 @@
 
 import random
 import struct
+from functools import partial
 
 import pytest
 
@@ -279,6 +280,24 @@ def test_20port( test_params, cmdline_opts ):
                         test_params.src_init, test_params.src_intv,
                         test_params.sink_init, test_params.sink_intv ) )
 
+#-------------------------------------------------------------------------
+# Test cases for sparse memory
+#-------------------------------------------------------------------------
+# Place the messages across a page boundary near the top of a 4GB
+# address space.
+
+@pytest.mark.parametrize( **test_case_table )
+def test_1port_sparse( test_params, cmdline_opts ):
+  msgs = test_params.msg_func(0xffff0fe0)
+  th = TestHarness( partial( MemoryFL, mem_nbytes=2**32, sparse=True ), 1, [(req_cls, resp_cls)],
+                    [ msgs[::2] ],
+                    [ msgs[1::2] ],
+                    test_params.stall, test_params.lat,
+                    test_params.src_init, test_params.src_intv,
+                    test_params.sink_init, test_params.sink_intv )
+  run_sim( th )
+  assert th.mem.mem.num_resident_pages() <= 2
+
 #-------------------------------------------------------------------------
 # Test Read/Write Mem
 #-------------------------------------------------------------------------
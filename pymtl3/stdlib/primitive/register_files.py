@@ -15,7 +15,7 @@ class RegisterFile( Component ):
     s.wdata = [ InPort( Type ) for i in range( wr_ports ) ]
     s.wen   = [ InPort( Bits1 ) for i in range( wr_ports ) ]
 
-    s.regs = [ Wire( Type ) for i in range(nregs) ]
+    s.regs = WireArray( Type, nregs )
 
     @update
     def up_rf_read():
@@ -49,7 +49,7 @@ class RegisterFileRst( Component ):
     s.wdata = [ InPort( Type ) for i in range( wr_ports ) ]
     s.wen   = [ InPort( Bits1 ) for i in range( wr_ports ) ]
 
-    s.regs = [ Wire( Type ) for i in range(nregs) ]
+    s.regs = WireArray( Type, nregs )
 
     @update
     def up_rf_read():
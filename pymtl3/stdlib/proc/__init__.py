@@ -1,2 +1,2 @@
-from .elf import elf_reader, elf_writer
+from .elf import elf_mmap_reader, elf_reader, elf_writer
 from .SparseMemoryImage import SparseMemoryImage
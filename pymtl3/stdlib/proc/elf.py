@@ -34,6 +34,7 @@
 # Author : Christopher Batten, Shunning Jiang
 # Date   : Feb 26, 2020
 
+import mmap
 import struct
 
 from .SparseMemoryImage import SparseMemoryImage
@@ -554,6 +555,95 @@ def elf_reader( file_obj ):
 
   return mem_image
 
+#-------------------------------------------------------------------------
+# elf_mmap_reader
+#-------------------------------------------------------------------------
+# Same as elf_reader, but the ELF file is memory-mapped and the data of
+# each section is a zero-copy memoryview of the mapping, so a section is
+# only read from the file (by the OS, page by page) when a memory model
+# copies it into memory. The .bss/.sbss sections are zero-filled bytes
+# which are lazily allocated by the OS. The section header table and the
+# symbol table are each parsed with a single struct.iter_unpack. Unlike
+# elf_reader, this also loads the NOTYPE/OBJECT/FUNC symbols.
+#
+# The mapping stays valid after file_obj is closed and is released once
+# all sections are garbage collected.
+
+def elf_mmap_reader( file_obj ):
+
+  mm   = mmap.mmap( file_obj.fileno(), 0, access=mmap.ACCESS_READ )
+  view = memoryview( mm )
+
+  # Construct an ELF header object and verify if it is really an ELF file
+
+  ehdr = ElfHeader( view[:ElfHeader.NBYTES] )
+  if ehdr.ident[0:4] != '\x7fELF':
+    raise ValueError( "Not a valid ELF file" )
+
+  # Parse the whole section header table at once
+
+  shdr_table = view[ ehdr.shoff : ehdr.shoff + ehdr.shnum * ehdr.shentsize ]
+  if ehdr.shentsize == ElfSectionHeader.NBYTES:
+    shdrs = list( struct.iter_unpack( ElfSectionHeader.FORMAT, shdr_table ) )
+  else:
+    shdrs = [ struct.unpack_from( ElfSectionHeader.FORMAT,
+                                  bytes(shdr_table[ i : i + ehdr.shentsize ]).ljust( ElfSectionHeader.NBYTES, b'\0' ) )
+              for i in range( 0, len(shdr_table), ehdr.shentsize ) ]
+
+  def get_data( shdr ):
+    return view[ shdr[4] : shdr[4] + shdr[5] ]
+
+  def get_name( strtab, offset ):
+    end = strtab.find( b'\0', offset )
+    return strtab[ offset : end if end >= 0 else len(strtab) ].decode()
+
+  shstrtab = get_data( shdrs[ ehdr.shstrndx ] ).tobytes()
+
+  # Load sections
+
+  mem_image = SparseMemoryImage()
+  symtab    = None
+
+  for shdr in shdrs:
+    name, type_, flags, addr = shdr[0], shdr[1], shdr[2], shdr[3]
+
+    if type_ == ElfSectionHeader.TYPE_SYMTAB:
+      symtab = shdr
+
+    # Only sections marked as alloc should be written to memory
+
+    if not ( flags & ElfSectionHeader.FLAGS_ALLOC ) or \
+       type_ in ( ElfSectionHeader.TYPE_SYMTAB, ElfSectionHeader.TYPE_STRTAB ):
+      continue
+
+    section_name = get_name( shstrtab, name )
+
+    if section_name not in ['.sbss', '.bss']:
+      data = get_data( shdr )
+    else:
+      data = memoryview( bytes( shdr[5] ) )
+
+    mem_image.add_section( SparseMemoryImage.Section( section_name, addr, data ) )
+
+  # Load symbols. The string table of the symbols is the section linked
+  # by the symbol table. We skip the first (undefined) symbol.
+
+  if symtab is not None:
+    strtab      = get_data( shdrs[ symtab[6] ] ).tobytes()
+    symtab_data = get_data( symtab )
+    nbytes      = len(symtab_data) - len(symtab_data) % ElfSymTabEntry.NBYTES
+    valid_sym_types = ( ElfSymTabEntry.TYPE_NOTYPE,
+                        ElfSymTabEntry.TYPE_OBJECT,
+                        ElfSymTabEntry.TYPE_FUNC )
+
+    syms = struct.iter_unpack( ElfSymTabEntry.FORMAT, symtab_data[:nbytes] )
+    next( syms, None )
+    for st_name, st_value, _, st_info, _, _ in syms:
+      if st_name and ( st_info & 0xf ) in valid_sym_types:
+        mem_image.add_symbol( get_name( strtab, st_name ), st_value )
+
+  return mem_image
+
 #-------------------------------------------------------------------------
 # elf_writer
 #-------------------------------------------------------------------------
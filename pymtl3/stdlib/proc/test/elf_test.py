@@ -49,3 +49,88 @@ def test_basic( tmpdir ):
   # Check that the original and new sparse memory images are equal
 
   assert mem_image == mem_image_test
+
+#-------------------------------------------------------------------------
+# test_mmap_reader
+#-------------------------------------------------------------------------
+
+def test_mmap_reader( tmpdir ):
+
+  mem_image = SparseMemoryImage()
+  mem_image.add_section( ".text", 0x00000200, bytearray( range(256) ) * 4 )
+  mem_image.add_section( ".data", 0x00002000, bytearray( b"\x01\x02\x03\x04" ) )
+
+  with tmpdir.join("elf-test").open('wb') as file_obj:
+    elf.elf_writer( mem_image, file_obj )
+
+  with tmpdir.join("elf-test").open('rb') as file_obj:
+    mem_image_test = elf.elf_mmap_reader( file_obj )
+
+  # Sections are views of the file and stay valid after closing it
+
+  assert mem_image == mem_image_test
+  assert all( isinstance( x.data, memoryview ) for x in mem_image_test.get_sections() )
+  assert mem_image_test.get_section( ".data" ).data.tobytes() == b"\x01\x02\x03\x04"
+
+#-------------------------------------------------------------------------
+# test_mmap_reader_bss_symbols
+#-------------------------------------------------------------------------
+# Write an ELF file with .text, .bss, .symtab, and .strtab sections.
+
+def _mk_shdr( name, type_, flags, addr, offset, size, link=0 ):
+  shdr = elf.ElfSectionHeader()
+  shdr.name, shdr.type, shdr.flags, shdr.addr = name, type_, flags, addr
+  shdr.offset, shdr.size, shdr.link = offset, size, link
+  shdr.info = shdr.addralign = shdr.entsize = 0
+  return shdr.to_bytes()
+
+def test_mmap_reader_bss_symbols( tmpdir ):
+
+  shstrtab = b"\0.text\0.bss\0.symtab\0.strtab\0.shstrtab\0"
+  strtab   = b"\0_start\0buf\0"
+  text     = struct.pack( "<4I", 1, 2, 3, 4 )
+  symtab   = b"".join( struct.pack( elf.ElfSymTabEntry.FORMAT, *x ) for x in [
+    ( 0, 0,      0,  0, 0, 0 ), # undefined symbol
+    ( 1, 0x200,  16, elf.ElfSymTabEntry.TYPE_FUNC,    0, 1 ),
+    ( 8, 0x1000, 64, elf.ElfSymTabEntry.TYPE_OBJECT,  0, 2 ),
+    ( 1, 0,      0,  elf.ElfSymTabEntry.TYPE_SECTION, 0, 1 ), # skipped
+  ])
+
+  nsections = 6
+  offset = elf.ElfHeader.NBYTES + nsections * elf.ElfSectionHeader.NBYTES
+  datas  = [ text, symtab, strtab, shstrtab ]
+  offsets = []
+  for data in datas:
+    offsets.append( offset )
+    offset += len(data)
+
+  ehdr = elf.ElfHeader()
+  ehdr.ident = "\x7fELF\x01\x01\x01".ljust( elf.ElfHeader.IDENT_NBYTES, '0' )
+  ehdr.type, ehdr.machine, ehdr.version, ehdr.entry = elf.ElfHeader.TYPE_EXEC, 8, 1, 0x200
+  ehdr.phoff, ehdr.flags, ehdr.ehsize, ehdr.phentsize, ehdr.phnum = 0, 0, 0, 0, 0
+  ehdr.shoff, ehdr.shentsize = elf.ElfHeader.NBYTES, elf.ElfSectionHeader.NBYTES
+  ehdr.shnum, ehdr.shstrndx = nsections, 5
+
+  ALLOC = elf.ElfSectionHeader.FLAGS_ALLOC
+  with tmpdir.join("elf-test").open('wb') as file_obj:
+    file_obj.write( ehdr.to_bytes() )
+    file_obj.write( _mk_shdr( 0, 0, 0, 0, 0, 0 ) )
+    file_obj.write( _mk_shdr( 1, elf.ElfSectionHeader.TYPE_PROGBITS, ALLOC, 0x200, offsets[0], len(text) ) )
+    file_obj.write( _mk_shdr( 7, elf.ElfSectionHeader.TYPE_NOBITS, ALLOC, 0x1000, 0, 64 ) )
+    file_obj.write( _mk_shdr( 12, elf.ElfSectionHeader.TYPE_SYMTAB, 0, 0, offsets[1], len(symtab), link=4 ) )
+    file_obj.write( _mk_shdr( 20, elf.ElfSectionHeader.TYPE_STRTAB, 0, 0, offsets[2], len(strtab) ) )
+    file_obj.write( _mk_shdr( 28, elf.ElfSectionHeader.TYPE_STRTAB, 0, 0, offsets[3], len(shstrtab) ) )
+    for data in datas:
+      file_obj.write( data )
+
+  with tmpdir.join("elf-test").open('rb') as file_obj:
+    mem_image = elf.elf_mmap_reader( file_obj )
+
+  assert [ x.name for x in mem_image.get_sections() ] == [ ".text", ".bss" ]
+  assert mem_image.get_section( ".text" ).data == text
+  assert mem_image.get_section( ".bss" ).data == bytes(64)
+  assert mem_image.symbols == { "_start": 0x200, "buf": 0x1000 }
+
+  # The original reader returns the same sections
+  with tmpdir.join("elf-test").open('rb') as file_obj:
+    assert elf.elf_reader( file_obj ).get_sections() == mem_image.get_sections()
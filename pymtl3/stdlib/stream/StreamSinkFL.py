@@ -145,6 +145,22 @@ class StreamSinkFL( Component ):
   def done( s ):
     return s.done_flag
 
+  # Fast-forward hooks, see FastForwardPass
+
+  def sim_idle_cycles( s ):
+    if s.reset or s.error_msg or s.received or (s.istream.val & s.istream.rdy):
+      return 0
+    if s.all_msg_recved != s.done_flag or (s.idx >= len(s.msgs)) != s.all_msg_recved:
+      return 0
+    if s.count > 0:
+      return s.count
+    return None
+
+  def sim_skip_cycles( s, n ):
+    s.cycle_count += n
+    if s.count > 0:
+      s.count -= n
+
   # Line trace
 
   def line_trace( s ):
@@ -68,6 +68,21 @@ class StreamSourceFL( Component ):
   def done( s ):
     return s.idx >= len(s.msgs)
 
+  # Fast-forward hooks, see FastForwardPass
+
+  def sim_idle_cycles( s ):
+    if s.reset or (s.ostream.val & s.ostream.rdy) or s.prev_is_none:
+      return 0
+    if s.count > 0:
+      return s.count
+    if s.idx < len(s.msgs) and s.msgs[s.idx] is None:
+      return 0
+    return None
+
+  def sim_skip_cycles( s, n ):
+    if s.count > 0:
+      s.count -= n
+
   # Line trace
 
   def line_trace( s ):
@@ -1,8 +1,11 @@
 from .test_helpers import (
     RunTestVectorSimError,
+    SimModelCache,
     TestVectorSimulator,
     config_model_with_cmdline_opts,
     mk_test_case_table,
     run_sim,
+    run_test_vector_batch_sim,
     run_test_vector_sim,
 )
+from .sweep import SweepReport, SweepResult, run_sweep
@@ -0,0 +1,205 @@
+"""
+========================================================================
+sweep.py
+========================================================================
+Run many independent simulations of one model that only differ in their
+stimulus, e.g. the programs loaded into the memory of a processor test
+harness. The model is elaborated and scheduled once in the parent
+process. Every sweep point then runs in a child process forked from the
+parent, so it starts from the same unsimulated model at the cost of a
+copy-on-write fork instead of an elaboration.
+
+  def load( model, mem_image ):
+    model.load( mem_image )
+
+  report = run_sweep( TestHarness( ProcRTL, NullXcelRTL, 0, 0, 0, 1 ),
+                      mem_images, load, njobs=8 )
+  print( report.summary() )
+
+Date   : Oct 17, 2026
+"""
+import collections
+import io
+import multiprocessing
+import time
+
+from pymtl3 import *
+
+from .test_helpers import config_model_with_cmdline_opts, finalize_verilator
+
+#------------------------------------------------------------------------------
+# SweepResult
+#------------------------------------------------------------------------------
+# The outcome of one sweep point. It is sent back from the child process,
+# so everything in it has to be picklable.
+
+class SweepResult:
+
+  def __init__( self, index ):
+    self.index       = index
+    self.ncycles     = 0
+    self.done        = False
+    self.error       = None # "ExceptionType: message" if the point failed
+    self.value       = None # return value of result_func
+    self.traces      = []   # the last trace_lines line traces
+    self.final_trace = ''
+    self.elapsed     = 0.0
+
+  @property
+  def passed( self ):
+    return self.done and self.error is None
+
+  def __repr__( self ):
+    status = "done" if self.done else "not done"
+    if self.error is not None:
+      status = f"error ({self.error})"
+    return f"SweepResult({self.index}, {self.ncycles} cycles, {status})"
+
+#------------------------------------------------------------------------------
+# SweepReport
+#------------------------------------------------------------------------------
+
+class SweepReport:
+
+  def __init__( self, points, results, njobs, elapsed ):
+    self.points  = points
+    self.results = results # sorted by index
+    self.njobs   = njobs
+    self.elapsed = elapsed
+
+  def __iter__( self ):
+    return iter( self.results )
+
+  def __len__( self ):
+    return len( self.results )
+
+  def __getitem__( self, i ):
+    return self.results[i]
+
+  @property
+  def all_passed( self ):
+    return all( r.passed for r in self.results )
+
+  @property
+  def sims_per_minute( self ):
+    return 60.0 * len( self.results ) / self.elapsed if self.elapsed > 0 else float('inf')
+
+  def summary( self ):
+    lines = [ f"{len(self.results)} simulations with {self.njobs} jobs in {self.elapsed:.2f}s "
+              f"({self.sims_per_minute:.1f} simulations/minute)" ]
+    for r in self.results:
+      status = "error" if r.error is not None else "done" if r.done else "timeout"
+      lines.append( f"  {r.index:4}: {status:7} {r.ncycles:8} cycles  {r.final_trace}" )
+      if r.error is not None:
+        lines.append( f"        {r.error}" )
+    return "\n".join( lines )
+
+#------------------------------------------------------------------------------
+# run_sweep
+#------------------------------------------------------------------------------
+
+_forked_sweep = None
+
+def _run_sweep_point_in_forked_worker( index ):
+  return _run_sweep_point( *_forked_sweep, index )
+
+def _run_sweep_point( model, points, setup_func, result_func, max_cycles,
+                      trace_lines, index ):
+  result = SweepResult( index )
+  point  = points[ index ]
+  traces = collections.deque( maxlen=trace_lines )
+  start  = time.perf_counter()
+
+  try:
+    if setup_func is not None:
+      setup_func( model, point )
+    model.sim_reset()
+
+    if trace_lines:
+      while not model.done() and model.sim_cycle_count() < max_cycles:
+        model.sim_tick()
+        traces.append( model.line_trace() )
+    elif hasattr( model, 'sim_fast_forward' ):
+      while not model.done() and model.sim_cycle_count() < max_cycles:
+        model.sim_fast_forward( max_cycles - model.sim_cycle_count() )
+    else:
+      while not model.done() and model.sim_cycle_count() < max_cycles:
+        model.sim_tick()
+
+    result.done = bool( model.done() )
+    if result_func is not None:
+      result.value = result_func( model, point )
+  except Exception as e:
+    result.error = f"{type(e).__name__}: {e}"
+
+  result.ncycles = model.sim_cycle_count()
+  result.traces  = list( traces )
+  try:
+    result.final_trace = model.line_trace()
+  except Exception:
+    pass
+  result.elapsed = time.perf_counter() - start
+  return result
+
+def _get_sweep_jobs( njobs, npoints ):
+  if "fork" not in multiprocessing.get_all_start_methods():
+    return 0
+  return max( 1, min( njobs or multiprocessing.cpu_count(), npoints ) )
+
+def run_sweep( model, points, setup_func=None, *, result_func=None, njobs=0,
+               max_cycles=10000, trace_lines=0, cmdline_opts=None, duts=None ):
+  """Simulate `model` once for every point in `points` and return a
+  SweepReport.
+
+  For every point, setup_func( model, point ) is called before
+  sim_reset, e.g. to load a memory image, and the model is ticked until
+  model.done() or max_cycles. result_func( model, point ) can return
+  extra picklable results, e.g. the verification of the memory content.
+  trace_lines keeps the last line traces of every point, at the cost of
+  calling line_trace every cycle.
+
+  `model` can be a new component, which is then configured with
+  cmdline_opts and simulated here, or a component that has already been
+  simulated with sim_reset not called yet. njobs=0 uses all CPUs.
+  """
+
+  points = list( points )
+
+  is_configured_here = not hasattr( model, '_sim' )
+  if is_configured_here:
+    model = config_model_with_cmdline_opts( model, cmdline_opts or {}, duts )
+    model.apply( DefaultPassGroup() )
+
+  njobs = _get_sweep_jobs( njobs, len(points) )
+  args  = ( model, points, setup_func, result_func, max_cycles, trace_lines )
+  start = time.perf_counter()
+
+  if njobs:
+    global _forked_sweep
+    _forked_sweep = args
+    try:
+      # Every point gets a fresh child forked from the unsimulated model
+      with multiprocessing.get_context( "fork" ).Pool( njobs, maxtasksperchild=1 ) as pool:
+        results = list( pool.imap_unordered( _run_sweep_point_in_forked_worker,
+                                             range(len(points)), chunksize=1 ) )
+    finally:
+      _forked_sweep = None
+
+  else:
+    # Without fork we simulate the points in turn and go back to the
+    # initial state through a simulation checkpoint. Python-side state
+    # that is not plain data is not checkpointed, see SimCheckpoint.
+    ckpt = io.BytesIO()
+    model.sim_checkpoint( ckpt )
+    results = []
+    for i in range( len(points) ):
+      ckpt.seek( 0 )
+      model.sim_restore( ckpt )
+      results.append( _run_sweep_point( *args, i ) )
+
+  elapsed = time.perf_counter() - start
+  if is_configured_here:
+    finalize_verilator( model )
+
+  results.sort( key=lambda r: r.index )
+  return SweepReport( points, results, max( njobs, 1 ), elapsed )
@@ -0,0 +1,104 @@
+#=========================================================================
+# SimModelCache_test
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.stream.queues import StreamNormalQueue1Entry
+from pymtl3.stdlib.stream.test.queues_test import TestHarness
+from pymtl3.stdlib.test_utils import (
+    RunTestVectorSimError,
+    SimModelCache,
+    run_sim,
+    run_test_vector_sim,
+)
+
+from .run_test_vector_sim_test import TestComponent1i1o
+
+
+class Accumulator( Component ):
+  def construct( s, nbits ):
+    s.in_ = InPort( nbits )
+    s.out = OutPort( nbits )
+
+    @update_ff
+    def up_acc():
+      if s.reset:
+        s.out <<= 0
+      else:
+        s.out <<= s.out + s.in_
+
+  def line_trace( s ):
+    return f"{s.in_}({s.out})"
+
+@pytest.fixture
+def cache():
+  cache = SimModelCache()
+  yield cache
+  cache.clear()
+
+def test_same_model( cache ):
+  a = cache.get( TestComponent1i1o )
+  b = cache.get( TestComponent1i1o )
+  c = cache.get( Accumulator, 8 )
+  d = cache.get( Accumulator, nbits=8 )
+  e = cache.get( Accumulator, 8, print_line_trace=False )
+  assert a is b
+  assert c is not a and d is not c and e is not c
+  assert cache.get( Accumulator, 8 ) is c
+  assert ( cache.hits, cache.misses ) == ( 2, 4 )
+
+def test_waveforms_not_cached( cache ):
+  opts = { 'dump_textwave': True }
+  a = cache.get( TestComponent1i1o, cmdline_opts=opts )
+  b = cache.get( TestComponent1i1o, cmdline_opts=opts )
+  assert a is not b
+  assert cache.misses == 0
+  # The uncached model goes through the usual setup
+  run_test_vector_sim( a, [
+    ('in_ out*' ),
+    [ 0,  1     ],
+  ], opts )
+
+def test_reuse_test_vector_sim( cache ):
+  test_vectors = [
+    ('in_ out*' ),
+    [ 1,  0     ],
+    [ 2,  1     ],
+    [ 3,  3     ],
+    [ 0,  6     ],
+  ]
+  for _ in range(3):
+    model = cache.get( Accumulator, 8 )
+    run_test_vector_sim( model, test_vectors )
+
+  # A failing test does not break the next one
+  with pytest.raises( RunTestVectorSimError ):
+    run_test_vector_sim( cache.get( Accumulator, 8 ), [
+      ('in_ out*' ),
+      [ 1,  0     ],
+      [ 2,  0     ],
+    ] )
+  run_test_vector_sim( cache.get( Accumulator, 8 ), test_vectors )
+  assert ( cache.hits, cache.misses ) == ( 4, 1 )
+
+def test_reuse_run_sim( cache ):
+  msgs = [ Bits16( 4 ), Bits16( 1 ), Bits16( 2 ), Bits16( 3 ) ]
+  for _ in range(2):
+    th = cache.get( TestHarness, Bits16, StreamNormalQueue1Entry, msgs, msgs )
+    run_sim( th )
+    assert th.sim_cycle_count() < 20
+  assert ( cache.hits, cache.misses ) == ( 1, 1 )
+
+def test_same_repr_different_args( cache ):
+  A = mk_bitstruct( "SameReprMsg", { 'a': Bits8 } )
+  B = mk_bitstruct( "SameReprMsg", { 'a': Bits16, 'b': Bits4 } )
+  assert repr(A) == repr(B)
+  a = cache.get( StreamNormalQueue1Entry, A )
+  b = cache.get( StreamNormalQueue1Entry, B )
+  assert a is not b
+  assert type( b.istream.msg ) is B
+  assert cache.get( StreamNormalQueue1Entry, A ) is a
+  assert cache.get( Accumulator, Bits8 ) is not cache.get( Accumulator, Bits16 )
+  assert ( cache.hits, cache.misses ) == ( 1, 4 )
@@ -213,3 +213,75 @@ def test_a2i2o_incorrect_outport( cmdline_opts ):
       [ 0,     1,     1,      3        ],
     ], cmdline_opts )
 
+
+#-------------------------------------------------------------------------
+# Test component that provides run_batch like Verilator-imported models
+#-------------------------------------------------------------------------
+# out is the sum of the previous inputs. run_batch models the same
+# behavior over the packed layout and records how many rows it ran.
+
+class TestComponentBatch( Component ):
+
+  batch_in_layout  = [ ('in_', 0, 1, 4), ('reset', 1, 1, 1) ]
+  batch_out_layout = [ ('out', 0, 1, 8) ]
+  batch_in_nbytes  = 2
+  batch_out_nbytes = 1
+
+  def construct( s ):
+    s.in_ = InPort(4)
+    s.out = OutPort(8)
+    s.batched = 0
+
+    @update_ff
+    def up():
+      if s.reset: s.out <<= 0
+      else:       s.out <<= s.out + zext( s.in_, 8 )
+
+  def run_batch( s, inputs, ncycles, expected=None, mask=None ):
+    acc, out = int(s.out), bytearray()
+    for c in range( ncycles ):
+      out.append( acc )
+      if expected is not None and (acc ^ expected[c]) & mask[c]:
+        break
+      acc = (acc + inputs[2*c]) & 0xff
+      s.batched += 1
+    s.out @= acc
+    return bytes(out), s.batched
+
+  def line_trace( s ):
+    return f"{s.in_}(){s.out}"
+
+def test_batch_basic( cmdline_opts ):
+  m = TestComponentBatch()
+  run_test_vector_sim( m, [
+    ('in_ out*' ),
+    [ 1,  0     ],
+    [ 2,  1     ],
+    [ 3,  '?'   ],
+    [ 0,  6     ],
+  ], cmdline_opts, batch=True )
+  assert m.batched == 4
+  # The extra ticks keep the inputs of the last row
+  assert m.out == 6
+
+def test_batch_incorrect_output( cmdline_opts ):
+  m = TestComponentBatch()
+  with pytest.raises(RunTestVectorSimError) as e:
+    run_test_vector_sim( m, [
+      ('in_ out*' ),
+      [ 1,  0     ],
+      [ 2,  1     ],
+      [ 3,  4     ],
+      [ 0,  6     ],
+    ], cmdline_opts, batch=True )
+  assert m.batched == 2
+  assert "row number     : 3" in str(e.value)
+
+def test_batch_disabled( cmdline_opts ):
+  m = TestComponentBatch()
+  run_test_vector_sim( m, [
+    ('in_ out*' ),
+    [ 1,  0     ],
+    [ 2,  1     ],
+  ], cmdline_opts, batch=False )
+  assert m.batched == 0
@@ -0,0 +1,78 @@
+#=========================================================================
+# sweep_test
+#=========================================================================
+
+import pytest
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import run_sweep
+from pymtl3.stdlib.test_utils import sweep
+
+
+class Counter( Component ):
+  def construct( s ):
+    s.count  = Wire( Bits16 )
+    s.target = 0
+    s.loaded = []
+
+    @update_ff
+    def up_count():
+      if s.reset:
+        s.count <<= 0
+      else:
+        s.count <<= s.count + 1
+
+  def done( s ):
+    return s.count >= s.target
+
+  def line_trace( s ):
+    return f"{s.count}"
+
+def load( model, point ):
+  if point < 0:
+    raise ValueError( f"bad target {point}" )
+  model.target = point
+  model.loaded.append( point )
+
+def get_result( model, point ):
+  return int( model.count ), list( model.loaded )
+
+@pytest.mark.parametrize( "njobs", [ 1, 2 ] )
+def test_sweep( njobs ):
+  targets = [ 3, 7, 5, 1 ]
+  report = run_sweep( Counter(), targets, load, result_func=get_result,
+                      njobs=njobs, trace_lines=2 )
+
+  assert len(report) == len(targets)
+  assert report.all_passed
+  assert report.sims_per_minute > 0
+  for r, target in zip( report, targets ):
+    count, loaded = r.value
+    assert count == target
+    # Every point starts from the unsimulated model
+    assert loaded == [ target ]
+    assert r.final_trace == f"{Bits16(target)}"
+    assert r.traces[-1] == r.final_trace
+    assert len(r.traces) == min( 2, target )
+
+  assert report[1].ncycles - report[0].ncycles == 4
+
+def test_sweep_errors_and_timeouts():
+  report = run_sweep( Counter(), [ 2, -1, 100 ], load, njobs=2, max_cycles=50 )
+
+  assert not report.all_passed
+  assert report[0].passed
+  assert report[1].error == "ValueError: bad target -1"
+  assert not report[2].done and report[2].error is None
+  assert report[2].ncycles == 50
+  assert "timeout" in report.summary()
+
+def test_sweep_without_fork( monkeypatch ):
+  monkeypatch.setattr( sweep.multiprocessing, "get_all_start_methods", lambda: [ "spawn" ] )
+
+  m = Counter()
+  m.apply( DefaultPassGroup() )
+  report = run_sweep( m, [ 4, 2, 6 ], load, result_func=get_result )
+
+  assert report.njobs == 1
+  assert [ r.value for r in report ] == [ (4, [4]), (2, [2]), (6, [6]) ]
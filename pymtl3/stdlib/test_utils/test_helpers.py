@@ -10,9 +10,10 @@ Author : Shunning Jiang
 
 import collections
 import re
+import sys
 
 from pymtl3 import *
-from pymtl3.datatypes import is_bitstruct_class
+from pymtl3.datatypes import is_bitstruct_class, is_bitstruct_inst
 from pymtl3.passes.backends.verilog import *
 from pymtl3.passes.backends.yosys.YosysTranslationImportPass import YosysTranslationImportPass
 from pymtl3.passes.backends.yosys.import_.YosysVerilatorImportPass import YosysVerilatorImportPass
@@ -66,6 +67,10 @@ def _recursive_set_vl_trace( m, dump_vcd ):
 # Define a singleton metadata key to check if a component has been configured.
 IsComponentConfigured = MetadataKey(bool)
 
+# Define a singleton metadata key to mark a simulated model owned by a
+# SimModelCache, which run_sim and run_test_vector_sim reuse as is.
+IsSimModelCached = MetadataKey(bool)
+
 def config_model_with_cmdline_opts( top, cmdline_opts, duts ):
   # First, check to make sure if this model has not been configured yet.
   if not isinstance(top, Component):
@@ -173,6 +178,78 @@ def config_model_with_cmdline_opts( top, cmdline_opts, duts ):
 
   return top
 
+#------------------------------------------------------------------------------
+# SimModelCache
+#------------------------------------------------------------------------------
+# Many parametrized test cases elaborate, configure and simulate the very
+# same model, and with --test-verilog each of them translates and imports
+# it again. SimModelCache keeps the simulated models and hands the same
+# model to every test that asks for the same class, arguments and options.
+# run_sim and run_test_vector_sim then skip the setup and only call
+# sim_reset, so the reuse is only correct if the model restores all of
+# its state on reset. See the sim_model_cache fixtures of the pytest
+# plugin.
+
+def _sim_model_cache_key( x ):
+  # Key on the objects themselves and never on their reprs, since e.g. two
+  # bitstructs with the same name but different fields print the same.
+  # Unhashable objects are keyed by identity; the cache keeps them alive.
+  if isinstance( x, (list, tuple) ):
+    return ( type(x), tuple( _sim_model_cache_key( y ) for y in x ) )
+  if isinstance( x, dict ):
+    return ( dict, tuple( ( _sim_model_cache_key( k ), _sim_model_cache_key( v ) )
+                          for k, v in x.items() ) )
+  try:
+    hash( x )
+  except TypeError:
+    return ( type(x), id(x) )
+  return ( type(x), x )
+
+def _is_sim_model_cached( model ):
+  return model.has_metadata( IsSimModelCached ) and model.get_metadata( IsSimModelCached )
+
+class SimModelCache:
+
+  def __init__( self ):
+    # key -> ( model, args, kwargs, duts ). We keep the arguments alive so
+    # that the ids in the keys of unhashable arguments stay unique.
+    self.models = {}
+    self.hits   = 0
+    self.misses = 0
+
+  def get( self, model_cls, *args, cmdline_opts=None, print_line_trace=True,
+           duts=None, **kwargs ):
+    """Return a simulated `model_cls(*args, **kwargs)` configured with
+    `cmdline_opts`, the same model for the same key. Models that dump
+    waveforms or test benches are not cached and are returned unconfigured."""
+    cmdline_opts = cmdline_opts or {}
+    if cmdline_opts.get('dump_textwave') or cmdline_opts.get('dump_vcd') or \
+       cmdline_opts.get('dump_vtb'):
+      return model_cls( *args, **kwargs )
+
+    opts = { k: v for k, v in cmdline_opts.items() if k != 'max_cycles' }
+    key  = _sim_model_cache_key( ( model_cls, args, sorted(kwargs.items()),
+                                   sorted(opts.items()), print_line_trace, duts ) )
+
+    entry = self.models.get( key )
+    if entry is None:
+      self.misses += 1
+      model = config_model_with_cmdline_opts( model_cls( *args, **kwargs ), cmdline_opts, duts )
+      model.apply( DefaultPassGroup(linetrace=print_line_trace) )
+      model.set_metadata( IsSimModelCached, True )
+      self.models[ key ] = ( model, args, kwargs, duts )
+    else:
+      self.hits += 1
+      model = entry[0]
+      model._sim.simulated_cycles = 0
+
+    return model
+
+  def clear( self ):
+    for model, _, _, _ in self.models.values():
+      finalize_verilator( model )
+    self.models.clear()
+
 #------------------------------------------------------------------------------
 # TestVectorSimulator
 #------------------------------------------------------------------------------
@@ -238,19 +315,28 @@ def run_sim( model, cmdline_opts=None, print_line_trace=True, duts=None ):
 
   max_cycles = cmdline_opts['max_cycles'] or 10000
 
-  # Setup the model
+  # Setup the model unless it comes from a SimModelCache
 
-  model = config_model_with_cmdline_opts( model, cmdline_opts, duts )
+  is_cached = _is_sim_model_cached( model )
+  if not is_cached:
+    model = config_model_with_cmdline_opts( model, cmdline_opts, duts )
 
   try:
     # Create a simulator
-    model.apply( DefaultPassGroup(linetrace=print_line_trace) )
+    if not is_cached:
+      model.apply( DefaultPassGroup(linetrace=print_line_trace) )
     # Reset model
     model.sim_reset()
 
-    # Run simulation
-    while not model.done() and model.sim_cycle_count() < max_cycles:
-      model.sim_tick()
+    # Run simulation, skipping idle cycles if the model was simulated
+    # with fast_forward
+
+    if hasattr( model, 'sim_fast_forward' ):
+      while not model.done() and model.sim_cycle_count() < max_cycles:
+        model.sim_fast_forward( max_cycles - model.sim_cycle_count() )
+    else:
+      while not model.done() and model.sim_cycle_count() < max_cycles:
+        model.sim_tick()
 
     # Force a test failure if we timed out
     assert model.sim_cycle_count() < max_cycles
@@ -265,12 +351,132 @@ def run_sim( model, cmdline_opts=None, print_line_trace=True, duts=None ):
     if cmdline_opts['dump_textwave']:
         model.print_textwave()
 
-    finalize_verilator( model )
+    if not is_cached:
+      finalize_verilator( model )
 
 class RunTestVectorSimError( Exception ):
   pass
 
-def run_test_vector_sim( model, test_vectors, cmdline_opts=None, print_line_trace=True ):
+#------------------------------------------------------------------------------
+# _pack_test_vectors
+#------------------------------------------------------------------------------
+# Pack the inputs, expected outputs, and output masks of all rows into the
+# byte layout of run_batch of a Verilator-imported model. Return None if
+# some value cannot be encoded, in which case the caller falls back to
+# simulating the rows in Python.
+
+def _pack_test_vectors( model, port_names, groups, types, in_ids, out_ids, rows ):
+
+  def full_name( g ):
+    return f"{g[1]}[{g[2]}]" if g[0] else g[1]
+
+  def to_int( value, t, nbits ):
+    if t: value = t( value )
+    if is_bitstruct_inst( value ):
+      value = value.to_bits()
+    value = int( value )
+    if not 0 <= value < (1 << nbits):
+      raise ValueError
+    return value
+
+  in_layout  = { x[0]: x[1:] for x in model.batch_in_layout }
+  out_layout = { x[0]: x[1:] for x in model.batch_out_layout }
+
+  try:
+    # Inputs missing from the header (e.g. reset) keep their current value
+    in_template = bytearray( model.batch_in_nbytes )
+    for name, (offset, nbytes, nbits) in in_layout.items():
+      value = to_int( eval(f"model.{name}"), None, nbits )
+      in_template[offset:offset+nbytes] = value.to_bytes( nbytes, 'little' )
+
+    in_fields  = [ (i, types[i], *in_layout[ full_name(groups[i]) ]) for i in in_ids ]
+    out_fields = [ (i, types[i], *out_layout[ full_name(groups[i]) ]) for i in out_ids ]
+
+    inputs   = bytearray()
+    expected = bytearray()
+    mask     = bytearray()
+    for row in rows:
+      _in   = bytearray( in_template )
+      _exp  = bytearray( model.batch_out_nbytes )
+      _mask = bytearray( model.batch_out_nbytes )
+      for i, t, offset, nbytes, nbits in in_fields:
+        _in[offset:offset+nbytes] = to_int( row[i], t, nbits ).to_bytes( nbytes, 'little' )
+      for i, t, offset, nbytes, nbits in out_fields:
+        if row[i] == '?': continue
+        _exp[offset:offset+nbytes]  = to_int( row[i], t, nbits ).to_bytes( nbytes, 'little' )
+        _mask[offset:offset+nbytes] = ((1 << nbits) - 1).to_bytes( nbytes, 'little' )
+      inputs   += _in
+      expected += _exp
+      mask     += _mask
+
+  except Exception:
+    return None
+
+  return inputs, expected, mask
+
+#------------------------------------------------------------------------------
+# _parse_port_names
+#------------------------------------------------------------------------------
+# Return the indices of the input and output columns, the ( is_list, name,
+# index ) group and the Bits type (None for bitstructs) of every column of
+# a test vector header.
+
+def _parse_port_names( model, port_names ):
+  in_ids  = []
+  out_ids = []
+  groups  = [ None ] * len(port_names)
+  types   = [ None ] * len(port_names)
+
+  # Preprocess default type
+  # Special case for lists of ports
+  # NOTE THAT WE ONLY SUPPORT 1D ARRAY and no interface
+  for i, port_full_name in enumerate( port_names ):
+    if port_full_name[-1] == "*":
+      out_ids.append( i )
+      port_name = port_full_name[:-1]
+    else:
+      in_ids.append( i )
+      port_name = port_full_name
+
+    if '[' in port_name:
+      # Get tokens of the full name
+      m = re.match( r'(\w+)\[(\d+)\]', port_name )
+      if not m:
+        raise Exception(f"Could not parse port name: {port_name}. "
+                        f"Currently we don't support interface or high-D array.")
+
+      groups[i] = g = ( True, m.group(1), int(m.group(2)) )
+
+      if not hasattr( model, g[1] ):
+        raise RunTestVectorSimError(f"Invalid port name: {g[1]}")
+
+      # Get type of all the ports
+      t = type( getattr( model, g[1] )[ int(g[2]) ] )
+      types[i] = None if is_bitstruct_class( t ) else t
+
+    else:
+      groups[i] = ( False, port_name )
+
+      if not hasattr( model, port_name ):
+        raise RunTestVectorSimError(f"Invalid port name: {port_name}")
+
+      t = type( getattr( model, port_name ) )
+      types[i] = None if is_bitstruct_class( t ) else t
+
+  return in_ids, out_ids, groups, types
+
+def run_test_vector_sim( model, test_vectors, cmdline_opts=None, print_line_trace=True,
+                         batch=None ):
+  """Simulate `model` with `test_vectors` and check its outputs.
+
+  If `model` is a Verilator-imported model, the test vectors are packed
+  and simulated in C by run_batch of the model without going back to
+  Python every cycle. The first mismatching row, if any, is then
+  simulated again in Python to print the line trace and the error
+  message. The line trace of the other rows is not printed in this case.
+  `batch` forces (True) or disables (False) this, and by default it is
+  only used when no waveform is dumped.
+  """
   cmdline_opts = cmdline_opts or {'dump_textwave'      : False,
                                   'dump_vcd'           : False,
                                   'test_verilog'       : False,
@@ -288,63 +494,52 @@ def run_test_vector_sim( model, test_vectors, cmdline_opts=None, print_line_trac
 
   test_vectors = test_vectors[1:]
 
-  # Setup the model
+  # Setup the model unless it comes from a SimModelCache
 
-  model = config_model_with_cmdline_opts( model, cmdline_opts, [] )
+  is_cached = _is_sim_model_cached( model )
+  if not is_cached:
+    model = config_model_with_cmdline_opts( model, cmdline_opts, [] )
 
   try:
     # Create a simulator
-    model.apply( DefaultPassGroup(linetrace=print_line_trace) )
+    if not is_cached:
+      model.apply( DefaultPassGroup(linetrace=print_line_trace) )
     # Reset model
     model.sim_reset()
 
     # Run the simulation
 
     row_num = 0
-    in_ids  = []
-    out_ids = []
-    groups  = [ None ] * len(port_names)
-    types   = [ None ] * len(port_names)
-
-    # Preprocess default type
-    # Special case for lists of ports
-    # NOTE THAT WE ONLY SUPPORT 1D ARRAY and no interface
-    for i, port_full_name in enumerate( port_names ):
-      if port_full_name[-1] == "*":
-        out_ids.append( i )
-        port_name = port_full_name[:-1]
-      else:
-        in_ids.append( i )
-        port_name = port_full_name
-
-      if '[' in port_name:
-        # Get tokens of the full name
-        m = re.match( r'(\w+)\[(\d+)\]', port_name )
-        if not m:
-          raise Exception(f"Could not parse port name: {port_name}. "
-                          f"Currently we don't support interface or high-D array.")
-
-        groups[i] = g = ( True, m.group(1), int(m.group(2)) )
-
-        if not hasattr( model, g[1] ):
-          raise RunTestVectorSimError(f"Invalid port name: {g[1]}")
-
-        # Get type of all the ports
-        t = type( getattr( model, g[1] )[ int(g[2]) ] )
-        types[i] = None if is_bitstruct_class( t ) else t
-
-      else:
-        groups[i] = ( False, port_name )
-
-        if not hasattr( model, port_name ):
-          raise RunTestVectorSimError(f"Invalid port name: {port_name}")
-
-        t = type( getattr( model, port_name ) )
-        types[i] = None if is_bitstruct_class( t ) else t
+    in_ids, out_ids, groups, types = _parse_port_names( model, port_names )
+
+    # Run the rows in C if possible
+
+    if batch is None:
+      batch = not ( cmdline_opts.get('dump_textwave') or cmdline_opts.get('dump_vcd') or
+                    cmdline_opts.get('dump_vtb') ) and sys.byteorder == 'little'
+
+    if batch and test_vectors and hasattr( model, 'run_batch' ):
+      packed = _pack_test_vectors( model, port_names, groups, types,
+                                   in_ids, out_ids, test_vectors )
+      if packed is not None:
+        inputs, expected, mask = packed
+        _, row_num = model.run_batch( inputs, len(test_vectors), expected, mask )
+
+        # The ports of the model are not updated by run_batch. Keep the
+        # inputs of the last row for the extra ticks below. A mismatching
+        # row is simulated again by the Python loop.
+        if row_num == len(test_vectors):
+          for i in in_ids:
+            t = types[i]
+            in_value = t( test_vectors[-1][i] ) if t else test_vectors[-1][i]
+            g = groups[i]
+            x = getattr( model, g[1] )
+            if g[0]:  x[g[2]] @= in_value
+            else:     x       @= in_value
 
     # Run simulation
 
-    for row in test_vectors:
+    for row in test_vectors[row_num:]:
       row_num += 1
 
       # Apply test inputs
@@ -411,4 +606,91 @@ run_test_vector_sim received an incorrect value!
     if cmdline_opts['dump_textwave']:
         model.print_textwave()
 
-    finalize_verilator( model )
+    if not is_cached:
+      finalize_verilator( model )
+
+#------------------------------------------------------------------------------
+# run_test_vector_batch_sim
+#------------------------------------------------------------------------------
+
+def run_test_vector_batch_sim( model, test_vectors, ninstances, print_line_trace=True ):
+  """Simulate `ninstances` copies of `model` in lockstep with the BatchSim
+  pass group and check the outputs of every copy against `test_vectors`.
+
+  The header row is the same as for run_test_vector_sim. Every other cell
+  is either one value for all copies or a sequence of `ninstances` values,
+  one per copy. An output value of '?' is not checked, either for all
+  copies or for one copy inside a sequence. The line trace shows copy 0.
+  BatchSim requires numpy.
+  """
+  import numpy as np
+
+  from pymtl3.passes.mamba import BatchSim
+
+  if isinstance(test_vectors[0],str):
+    port_names = test_vectors[0].split()
+  else:
+    port_names = test_vectors[0]
+  test_vectors = test_vectors[1:]
+
+  model.elaborate()
+  model.apply( BatchSim( ninstances, linetrace=print_line_trace ) )
+  model.sim_reset()
+
+  in_ids, out_ids, groups, types = _parse_port_names( model, port_names )
+
+  def get_port( g ):
+    x = getattr( model, g[1] )
+    return x[g[2]] if g[0] else x
+
+  def to_int( value, t ):
+    if t: value = t( value )
+    if is_bitstruct_inst( value ):
+      value = value.to_bits()
+    return int( value )
+
+  def per_instance( value ):
+    # np.ndim is 0 for plain and numpy scalars, e.g., np.int64
+    if hasattr( value, 'to_bits' ) or np.ndim( value ) == 0:
+      return [ value ] * ninstances
+    value = list( value )
+    if len(value) != ninstances:
+      raise RunTestVectorSimError(f"Expected one value or {ninstances} values, got {len(value)}")
+    return value
+
+  for row_num, row in enumerate( test_vectors, 1 ):
+
+    # Apply test inputs
+    for i in in_ids:
+      values = per_instance( row[i] )
+      if '?' in values:
+        raise RunTestVectorSimError(f"Invalid input value in row {row_num} ({row}): "
+                                    f"'?' can only appear in output values")
+      model.sim_poke( get_port( groups[i] ), [ to_int( x, types[i] ) for x in values ] )
+
+    # Evaluate combinational concurrent blocks
+    model.sim_eval_combinational()
+
+    # Check test outputs
+    for i in out_ids:
+      g = groups[i]
+      out_values = model.sim_peek( get_port( g ) )
+      for k, ref_value in enumerate( per_instance( row[i] ) ):
+        if ref_value == '?':  continue
+
+        if int( out_values[k] ) != to_int( ref_value, types[i] ):
+          if print_line_trace and hasattr( model, 'line_trace' ):
+            model.print_line_trace()
+
+          port_name = f"{g[1]}[{g[2]}]" if g[0] else g[1]
+          raise RunTestVectorSimError(f"""
+run_test_vector_batch_sim received an incorrect value!
+- row number     : {row_num}
+- instance       : {k}
+- port name      : {port_name}
+- expected value : {ref_value}
+- actual value   : {int( out_values[k] )}
+""")
+
+    # Tick the simulation
+    model.sim_tick()
@@ -39,6 +39,13 @@ def pytest_addoption(parser):
                     default=None, help="dump verilog test bench for each test" )
   group.addoption( "--max-cycles", dest="max_cycles", action="store",
                     default=None, help="max cycles of simulation" )
+  group.addoption( "--profile-elaboration", dest="profile_elaboration", action="store_true",
+                    default=False, help="print the elaboration and pass profile of each test" )
+  group.addoption( "--profile-elaboration-json", dest="profile_elaboration_json", action="store",
+                    default=None, metavar="FILE",
+                    help="profile elaboration like --profile-elaboration and dump it to FILE as JSON" )
+  group.addoption( "--dont-write-bytecode", dest="dont_write_bytecode", action="store_true",
+                    default=False, help="don't write *.pyc and __pycache__ files" )
 
 @pytest.fixture
 def cmdline_opts( request ):
@@ -53,6 +60,21 @@ def cmdline_opts( request ):
 
   return opts
 
+@pytest.fixture(scope="session")
+def sim_model_cache():
+  """Simulated models shared by all tests of the session.
+
+  Build the model with e.g. `sim_model_cache.get( MyModel, 32,
+  cmdline_opts=cmdline_opts )` instead of `MyModel( 32 )` and pass it to
+  run_sim or run_test_vector_sim, which then only reset it. See
+  pymtl3.stdlib.test_utils.SimModelCache."""
+  yield from _gen_sim_model_cache()
+
+@pytest.fixture(scope="module")
+def module_sim_model_cache():
+  """Simulated models shared by the tests of a module."""
+  yield from _gen_sim_model_cache()
+
 @pytest.fixture
 def no_translation( request ):
   """Mark a test case as not to be translated."""
@@ -61,24 +83,77 @@ def no_translation( request ):
     pytest.skip("skipping untranslatable test cases with --test-verilog or --test-yosys-verilog")
 
 def pytest_configure(config):
-  pass
+  """Don't write *.pyc and __pycache__ files if asked to."""
+  if config.getoption("dont_write_bytecode"):
+    import sys
+    sys.dont_write_bytecode = True
+
+  if config.getoption("profile_elaboration") or config.getoption("profile_elaboration_json"):
+    config.pluginmanager.register( _ElaborationProfiler( config.getoption("profile_elaboration_json") ),
+                                   "pymtl3-elaboration-profiler" )
 
 def pytest_unconfigure(config):
   pass
 
-def pytest_cmdline_preparse(config, args):
-  """Don't write *.pyc and __pycache__ files."""
-  import sys
-  sys.dont_write_bytecode = True
-
 def pytest_runtest_setup(item):
   if _any_opts_present(item.config) and 'cmdline_opts' not in item.fixturenames:
     pytest.skip("'cmdline_opts' is required by pytest commandline but not used")
 
+class _ElaborationProfiler:
+  """Profile the setup and the call of each test, since models are often
+  elaborated in fixtures, and report the profiles at the end of the run."""
+
+  def __init__( self, json_path ):
+    self.json_path = json_path
+    # Elaboration profiles of the tests, keyed by node id
+    self.reports = {}
+
+  def _profile( self, item ):
+    from pymtl3.dsl import Profiler
+    was_enabled = Profiler.is_enabled()
+    Profiler.reset()
+    Profiler.enable()
+    yield
+    if not was_enabled:
+      Profiler.disable()
+
+    report = Profiler.get_report()
+    Profiler.reset()
+    if report['phases']:
+      self.reports.setdefault( item.nodeid, { 'phases': [] } )['phases'].extend( report['phases'] )
+
+  @pytest.hookimpl(hookwrapper=True)
+  def pytest_runtest_setup( self, item ):
+    yield from self._profile( item )
+
+  @pytest.hookimpl(hookwrapper=True)
+  def pytest_runtest_call( self, item ):
+    yield from self._profile( item )
+
+  def pytest_terminal_summary( self, terminalreporter, exitstatus, config ):
+    from pymtl3.dsl import Profiler
+    terminalreporter.write_sep( "=", "pymtl3 elaboration profile" )
+    for nodeid, report in self.reports.items():
+      terminalreporter.write_line( nodeid )
+      terminalreporter.write_line( Profiler.format_report( report ) )
+      terminalreporter.write_line( "" )
+
+    if self.json_path:
+      import json
+      with open( self.json_path, 'w' ) as f:
+        json.dump( self.reports, f, indent=2 )
+      terminalreporter.write_line( f"elaboration profile written to {self.json_path}" )
+
 #-------------------------------------------------------------------------
 # helper functions
 #-------------------------------------------------------------------------
 
+def _gen_sim_model_cache():
+  from pymtl3.stdlib.test_utils import SimModelCache
+  cache = SimModelCache()
+  yield cache
+  cache.clear()
+
 def _any_opts_present( config ):
   opt_default_pairs = [
       ( 'test_verilog',       ''   ),